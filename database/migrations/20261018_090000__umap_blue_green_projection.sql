@@ -0,0 +1,43 @@
+-- Blue/green UMAP projection slots
+--
+-- Adds a second 2D coordinate column so a new UMAP model can be projected
+-- into the inactive slot while the API keeps serving the active one.
+-- `umap_projection_state` records which slot is live; `is_active` is flipped
+-- in one transaction, so the API switches layouts atomically.
+--
+-- Apply outside an explicit transaction (CREATE INDEX CONCURRENTLY):
+-- psql -h $DOC_TROVE_HOST -p $DOC_TROVE_PORT -U $DOC_TROVE_USER -d $DOC_TROVE_DB \
+--      -f database/migrations/20261018_090000__umap_blue_green_projection.sql
+--
+-- Rollback:
+--   DROP TABLE IF EXISTS umap_projection_state;
+--   DROP INDEX CONCURRENTLY IF EXISTS idx_doctrove_papers_embedding_2d_shadow_gist;
+--   ALTER TABLE doctrove_papers DROP COLUMN IF EXISTS doctrove_embedding_2d_shadow;
+
+ALTER TABLE doctrove_papers
+    ADD COLUMN IF NOT EXISTS doctrove_embedding_2d_shadow POINT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_doctrove_papers_embedding_2d_shadow_gist
+    ON doctrove_papers USING gist (doctrove_embedding_2d_shadow);
+
+CREATE TABLE IF NOT EXISTS umap_projection_state (
+    slot TEXT PRIMARY KEY
+        CHECK (slot IN ('doctrove_embedding_2d', 'doctrove_embedding_2d_shadow')),
+    model_version TEXT,
+    model_path TEXT,
+    is_active BOOLEAN NOT NULL DEFAULT FALSE,
+    built_at TIMESTAMP,
+    activated_at TIMESTAMP
+);
+
+-- At most one slot may be live at a time
+CREATE UNIQUE INDEX IF NOT EXISTS idx_umap_projection_state_single_active
+    ON umap_projection_state (is_active) WHERE is_active;
+
+INSERT INTO umap_projection_state (slot, model_version, is_active, activated_at)
+VALUES ('doctrove_embedding_2d', 'umap_v1', TRUE, NOW())
+ON CONFLICT (slot) DO NOTHING;
+
+INSERT INTO umap_projection_state (slot, is_active)
+VALUES ('doctrove_embedding_2d_shadow', FALSE)
+ON CONFLICT (slot) DO NOTHING;
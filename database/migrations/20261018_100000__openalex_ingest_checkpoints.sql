@@ -0,0 +1,16 @@
+-- Per-file checkpoints for streaming_openalex_ingester.py
+--
+-- Each batch commits together with its row here, so an interrupted run
+-- resumes after `last_line` of the file. The ingester also creates this
+-- table on start (CREATE TABLE IF NOT EXISTS); this file records the DDL.
+--
+-- Rollback:
+--   DROP TABLE IF EXISTS openalex_ingest_checkpoints;
+
+CREATE TABLE IF NOT EXISTS openalex_ingest_checkpoints (
+    file_path TEXT PRIMARY KEY,
+    last_line BIGINT NOT NULL DEFAULT 0,
+    papers_inserted BIGINT NOT NULL DEFAULT 0,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,30 @@
+-- Notify the API catalog cache when doctrove_papers changes
+--
+-- doctrove-api/catalog.py LISTENs on `doctrove_catalog_changed` and refreshes
+-- its in-memory sources/stats snapshot (debounced). Statement-level, so a bulk
+-- COPY or batch INSERT sends one notification, and Postgres folds duplicate
+-- notifications within a transaction into one.
+--
+-- Rollback:
+--   DROP TRIGGER IF EXISTS doctrove_papers_catalog_notify ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS doctrove_papers_catalog_notify_truncate ON doctrove_papers;
+--   DROP FUNCTION IF EXISTS notify_catalog_changed();
+
+CREATE OR REPLACE FUNCTION notify_catalog_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('doctrove_catalog_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doctrove_papers_catalog_notify ON doctrove_papers;
+CREATE TRIGGER doctrove_papers_catalog_notify
+    AFTER INSERT OR DELETE OR UPDATE OF doctrove_source, doctrove_embedding_2d
+    ON doctrove_papers
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed();
+
+DROP TRIGGER IF EXISTS doctrove_papers_catalog_notify_truncate ON doctrove_papers;
+CREATE TRIGGER doctrove_papers_catalog_notify_truncate
+    AFTER TRUNCATE
+    ON doctrove_papers
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed();
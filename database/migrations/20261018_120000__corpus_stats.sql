@@ -0,0 +1,247 @@
+-- Precomputed corpus statistics maintained by statement-level triggers
+--
+-- `corpus_stats` holds one row per source: paper counts, counts with a 1D
+-- (`doctrove_embedding`) and 2D (`doctrove_embedding_2d`) embedding, and the
+-- 2D extent. `corpus_year_stats` holds paper counts per source and
+-- publication year. Global figures are the SUM/MIN/MAX over the few source
+-- rows, so /api/max-extent and /api/stats no longer scan doctrove_papers.
+--
+-- The triggers use transition tables, so a batch INSERT/UPDATE/COPY is
+-- aggregated once per statement. Counts are exact. Extents only ever widen
+-- incrementally; when a row on the boundary is deleted or moved the source
+-- row is flagged `extent_stale` and readers fall back to MIN/MAX over
+-- doctrove_papers until `refresh_stale_corpus_extents()` runs (queue_2d_worker
+-- calls it when its queue is idle).
+--
+-- Only `doctrove_embedding_2d` is tracked; the blue/green shadow slot is
+-- measured on the fly.
+--
+-- Both refresh functions take an EXCLUSIVE lock on the stats tables, which
+-- makes concurrent writers wait at their trigger until the rescan finishes.
+--
+-- Rollback:
+--   DROP TRIGGER IF EXISTS corpus_stats_insert ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS corpus_stats_update ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS corpus_stats_delete ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS corpus_stats_truncate ON doctrove_papers;
+--   DROP FUNCTION IF EXISTS corpus_stats_track();
+--   DROP FUNCTION IF EXISTS corpus_stats_reset();
+--   DROP FUNCTION IF EXISTS refresh_corpus_stats();
+--   DROP FUNCTION IF EXISTS refresh_stale_corpus_extents();
+--   DROP TABLE IF EXISTS corpus_year_stats;
+--   DROP TABLE IF EXISTS corpus_stats;
+
+CREATE TABLE IF NOT EXISTS corpus_stats (
+    doctrove_source TEXT PRIMARY KEY,
+    paper_count BIGINT NOT NULL DEFAULT 0,
+    with_embedding BIGINT NOT NULL DEFAULT 0,
+    with_embedding_2d BIGINT NOT NULL DEFAULT 0,
+    x_min DOUBLE PRECISION,
+    x_max DOUBLE PRECISION,
+    y_min DOUBLE PRECISION,
+    y_max DOUBLE PRECISION,
+    extent_stale BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS corpus_year_stats (
+    doctrove_source TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    paper_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (doctrove_source, year)
+);
+
+CREATE OR REPLACE FUNCTION corpus_stats_track() RETURNS trigger AS $$
+DECLARE
+    -- Rows whose tracked columns did not change are skipped on UPDATE
+    changed CONSTANT TEXT := $c$
+        n.doctrove_source IS DISTINCT FROM o.doctrove_source
+        OR n.doctrove_primary_date IS DISTINCT FROM o.doctrove_primary_date
+        OR (n.doctrove_embedding IS NULL) <> (o.doctrove_embedding IS NULL)
+        OR (n.doctrove_embedding_2d)[0] IS DISTINCT FROM (o.doctrove_embedding_2d)[0]
+        OR (n.doctrove_embedding_2d)[1] IS DISTINCT FROM (o.doctrove_embedding_2d)[1]
+    $c$;
+    added TEXT;
+    removed TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        added := 'SELECT * FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        removed := 'SELECT * FROM old_rows';
+    ELSE
+        added := 'SELECT n.* FROM new_rows n JOIN old_rows o USING (doctrove_paper_id) WHERE ' || changed;
+        removed := 'SELECT o.* FROM old_rows o JOIN new_rows n USING (doctrove_paper_id) WHERE ' || changed;
+    END IF;
+
+    IF removed IS NOT NULL THEN
+        EXECUTE format($q$
+            UPDATE corpus_stats cs SET
+                paper_count = cs.paper_count - r.paper_count,
+                with_embedding = cs.with_embedding - r.with_embedding,
+                with_embedding_2d = cs.with_embedding_2d - r.with_embedding_2d,
+                extent_stale = cs.extent_stale OR COALESCE(
+                    r.x_min <= cs.x_min OR r.x_max >= cs.x_max
+                    OR r.y_min <= cs.y_min OR r.y_max >= cs.y_max, FALSE),
+                updated_at = NOW()
+            FROM (
+                SELECT doctrove_source,
+                       COUNT(*) AS paper_count,
+                       COUNT(doctrove_embedding) AS with_embedding,
+                       COUNT(doctrove_embedding_2d) AS with_embedding_2d,
+                       MIN((doctrove_embedding_2d)[0]) AS x_min,
+                       MAX((doctrove_embedding_2d)[0]) AS x_max,
+                       MIN((doctrove_embedding_2d)[1]) AS y_min,
+                       MAX((doctrove_embedding_2d)[1]) AS y_max
+                FROM (%s) removed
+                GROUP BY doctrove_source
+            ) r
+            WHERE cs.doctrove_source = r.doctrove_source
+        $q$, removed);
+
+        EXECUTE format($q$
+            UPDATE corpus_year_stats ys SET paper_count = ys.paper_count - r.paper_count
+            FROM (
+                SELECT doctrove_source, EXTRACT(YEAR FROM doctrove_primary_date)::INTEGER AS year,
+                       COUNT(*) AS paper_count
+                FROM (%s) removed
+                WHERE doctrove_primary_date IS NOT NULL
+                GROUP BY 1, 2
+            ) r
+            WHERE ys.doctrove_source = r.doctrove_source AND ys.year = r.year
+        $q$, removed);
+    END IF;
+
+    IF added IS NOT NULL THEN
+        EXECUTE format($q$
+            INSERT INTO corpus_stats AS cs (doctrove_source, paper_count, with_embedding, with_embedding_2d,
+                                            x_min, x_max, y_min, y_max)
+            SELECT doctrove_source,
+                   COUNT(*),
+                   COUNT(doctrove_embedding),
+                   COUNT(doctrove_embedding_2d),
+                   MIN((doctrove_embedding_2d)[0]),
+                   MAX((doctrove_embedding_2d)[0]),
+                   MIN((doctrove_embedding_2d)[1]),
+                   MAX((doctrove_embedding_2d)[1])
+            FROM (%s) added
+            GROUP BY doctrove_source
+            ON CONFLICT (doctrove_source) DO UPDATE SET
+                paper_count = cs.paper_count + EXCLUDED.paper_count,
+                with_embedding = cs.with_embedding + EXCLUDED.with_embedding,
+                with_embedding_2d = cs.with_embedding_2d + EXCLUDED.with_embedding_2d,
+                x_min = LEAST(cs.x_min, EXCLUDED.x_min),
+                x_max = GREATEST(cs.x_max, EXCLUDED.x_max),
+                y_min = LEAST(cs.y_min, EXCLUDED.y_min),
+                y_max = GREATEST(cs.y_max, EXCLUDED.y_max),
+                updated_at = NOW()
+        $q$, added);
+
+        EXECUTE format($q$
+            INSERT INTO corpus_year_stats AS ys (doctrove_source, year, paper_count)
+            SELECT doctrove_source, EXTRACT(YEAR FROM doctrove_primary_date)::INTEGER, COUNT(*)
+            FROM (%s) added
+            WHERE doctrove_primary_date IS NOT NULL
+            GROUP BY 1, 2
+            ON CONFLICT (doctrove_source, year) DO UPDATE SET
+                paper_count = ys.paper_count + EXCLUDED.paper_count
+        $q$, added);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION corpus_stats_reset() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE corpus_stats, corpus_year_stats;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Full recompute (initial backfill, or after manual edits with triggers disabled)
+CREATE OR REPLACE FUNCTION refresh_corpus_stats() RETURNS void AS $$
+BEGIN
+    LOCK TABLE corpus_stats, corpus_year_stats IN EXCLUSIVE MODE;
+    DELETE FROM corpus_stats;
+    DELETE FROM corpus_year_stats;
+
+    INSERT INTO corpus_stats (doctrove_source, paper_count, with_embedding, with_embedding_2d,
+                              x_min, x_max, y_min, y_max)
+    SELECT doctrove_source,
+           COUNT(*),
+           COUNT(doctrove_embedding),
+           COUNT(doctrove_embedding_2d),
+           MIN((doctrove_embedding_2d)[0]),
+           MAX((doctrove_embedding_2d)[0]),
+           MIN((doctrove_embedding_2d)[1]),
+           MAX((doctrove_embedding_2d)[1])
+    FROM doctrove_papers
+    GROUP BY doctrove_source;
+
+    INSERT INTO corpus_year_stats (doctrove_source, year, paper_count)
+    SELECT doctrove_source, EXTRACT(YEAR FROM doctrove_primary_date)::INTEGER, COUNT(*)
+    FROM doctrove_papers
+    WHERE doctrove_primary_date IS NOT NULL
+    GROUP BY 1, 2;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute extents only for sources flagged stale; returns the number of sources refreshed
+CREATE OR REPLACE FUNCTION refresh_stale_corpus_extents() RETURNS INTEGER AS $$
+DECLARE
+    refreshed INTEGER;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM corpus_stats WHERE extent_stale) THEN
+        RETURN 0;
+    END IF;
+
+    LOCK TABLE corpus_stats IN EXCLUSIVE MODE;
+
+    UPDATE corpus_stats cs SET
+        x_min = e.x_min, x_max = e.x_max, y_min = e.y_min, y_max = e.y_max,
+        extent_stale = FALSE,
+        updated_at = NOW()
+    FROM (
+        SELECT s.doctrove_source,
+               MIN((dp.doctrove_embedding_2d)[0]) AS x_min,
+               MAX((dp.doctrove_embedding_2d)[0]) AS x_max,
+               MIN((dp.doctrove_embedding_2d)[1]) AS y_min,
+               MAX((dp.doctrove_embedding_2d)[1]) AS y_max
+        FROM corpus_stats s
+        LEFT JOIN doctrove_papers dp
+            ON dp.doctrove_source = s.doctrove_source AND dp.doctrove_embedding_2d IS NOT NULL
+        WHERE s.extent_stale
+        GROUP BY s.doctrove_source
+    ) e
+    WHERE cs.doctrove_source = e.doctrove_source;
+
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+    RETURN refreshed;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS corpus_stats_insert ON doctrove_papers;
+CREATE TRIGGER corpus_stats_insert
+    AFTER INSERT ON doctrove_papers
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_track();
+
+DROP TRIGGER IF EXISTS corpus_stats_update ON doctrove_papers;
+CREATE TRIGGER corpus_stats_update
+    AFTER UPDATE ON doctrove_papers
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_track();
+
+DROP TRIGGER IF EXISTS corpus_stats_delete ON doctrove_papers;
+CREATE TRIGGER corpus_stats_delete
+    AFTER DELETE ON doctrove_papers
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_track();
+
+DROP TRIGGER IF EXISTS corpus_stats_truncate ON doctrove_papers;
+CREATE TRIGGER corpus_stats_truncate
+    AFTER TRUNCATE ON doctrove_papers
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_reset();
+
+-- Backfill
+SELECT refresh_corpus_stats();
@@ -0,0 +1,62 @@
+-- Precomputed hierarchical cluster tree of the 2D map
+--
+-- `doctrove-api/cluster_tree.py build` recursively K-means clusters every
+-- paper with 2D coordinates (each node is split into up to `branching`
+-- children) and stores, per node, its Voronoi polygon (clipped to its parent,
+-- so each level tiles the map), its centroid and point count, and an LLM label
+-- generated once at build time. GET /api/clusters/tree returns the nodes of
+-- the depth matching the requested zoom that intersect the viewport, so
+-- multi-scale labels cost no K-means or LLM work per request.
+--
+-- Each run inserts a new build and then activates it in one transaction, so
+-- readers switch trees atomically. At most one build is active.
+--
+-- Rollback:
+--   DROP TABLE IF EXISTS cluster_tree_nodes;
+--   DROP TABLE IF EXISTS cluster_tree_builds;
+
+CREATE TABLE IF NOT EXISTS cluster_tree_builds (
+    build_id SERIAL PRIMARY KEY,
+    embedding_2d_column TEXT NOT NULL,
+    sources TEXT[],                    -- NULL: every source
+    branching INTEGER NOT NULL,
+    max_depth INTEGER NOT NULL,
+    point_count BIGINT NOT NULL,
+    node_count INTEGER NOT NULL,
+    x_min DOUBLE PRECISION,
+    x_max DOUBLE PRECISION,
+    y_min DOUBLE PRECISION,
+    y_max DOUBLE PRECISION,
+    is_active BOOLEAN NOT NULL DEFAULT FALSE,
+    built_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    activated_at TIMESTAMP
+);
+
+-- At most one build may be live at a time
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cluster_tree_builds_single_active
+    ON cluster_tree_builds (is_active) WHERE is_active;
+
+CREATE TABLE IF NOT EXISTS cluster_tree_nodes (
+    build_id INTEGER NOT NULL REFERENCES cluster_tree_builds (build_id) ON DELETE CASCADE,
+    node_id INTEGER NOT NULL,
+    parent_id INTEGER,                 -- NULL for the root
+    depth SMALLINT NOT NULL,           -- 0 for the root
+    is_leaf BOOLEAN NOT NULL,
+    point_count INTEGER NOT NULL,
+    center_x DOUBLE PRECISION NOT NULL,
+    center_y DOUBLE PRECISION NOT NULL,
+    -- Bounding box of the polygon, for viewport queries
+    x_min DOUBLE PRECISION NOT NULL,
+    x_max DOUBLE PRECISION NOT NULL,
+    y_min DOUBLE PRECISION NOT NULL,
+    y_max DOUBLE PRECISION NOT NULL,
+    -- Closed polygon ring
+    polygon_x DOUBLE PRECISION[] NOT NULL,
+    polygon_y DOUBLE PRECISION[] NOT NULL,
+    label TEXT,
+    sample_paper_ids UUID[],           -- Representatives the label was generated from
+    PRIMARY KEY (build_id, node_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cluster_tree_nodes_depth
+    ON cluster_tree_nodes (build_id, depth);
@@ -0,0 +1,39 @@
+-- Sampled query plans of /api/papers
+--
+-- doctrove-api/plan_capture.py runs EXPLAIN (FORMAT JSON) -- planning only,
+-- the query is not executed again -- for a sampled fraction of /api/papers
+-- requests and for every request slower than a threshold, on the connection
+-- that ran the query (same prepared statement and ANN settings). A background
+-- thread stores each plan here with a fingerprint of its shape (node types,
+-- relations, indexes; no costs or row counts), the measured timing and the
+-- findings of the plan checks (e.g. a seq scan on doctrove_papers, or a
+-- semantic query not using the ANN index). GET /api/debug/query-plans reports
+-- findings and query templates whose plan changed and got slower.
+--
+-- Rows older than DOCTROVE_PLAN_RETENTION_DAYS are deleted by the writer.
+--
+-- Rollback:
+--   DROP TABLE IF EXISTS query_plan_samples;
+
+CREATE TABLE IF NOT EXISTS query_plan_samples (
+    sample_id BIGSERIAL PRIMARY KEY,
+    captured_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    endpoint TEXT NOT NULL,
+    query_kind TEXT NOT NULL,          -- 'papers' (main query) or 'count'
+    query_hash TEXT NOT NULL,          -- Hash of the SQL template (literals are bound parameters)
+    plan_fingerprint TEXT NOT NULL,    -- Hash of the plan shape
+    reason TEXT NOT NULL,              -- 'sampled' or 'slow'
+    execution_ms REAL NOT NULL,        -- Measured time of the query in the request
+    total_cost DOUBLE PRECISION,       -- Planner estimates of the top node
+    plan_rows DOUBLE PRECISION,
+    semantic_strategy TEXT,            -- semantic_planner strategy, NULL for non-semantic queries
+    findings TEXT[] NOT NULL DEFAULT '{}',
+    query_text TEXT NOT NULL,
+    plan JSONB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_query_plan_samples_captured_at
+    ON query_plan_samples (captured_at);
+
+CREATE INDEX IF NOT EXISTS idx_query_plan_samples_query
+    ON query_plan_samples (query_hash, captured_at);
@@ -0,0 +1,59 @@
+-- Vector index maintenance history
+--
+-- doctrove-api/index_maintenance.py replaces the index shell scripts
+-- (create_optimized_hnsw.sh, scripts/adaptive_reindex_hnsw.sh,
+-- create_ivfflat_index*.sh, scripts/rebuild_vector_index.sh). It records:
+--
+-- vector_index_builds        every create / REINDEX CONCURRENTLY / retune of
+--                            an ANN index on doctrove_papers.doctrove_embedding,
+--                            with the embedded row count at build time (rows
+--                            inserted since = current count - rows_at_build)
+-- vector_index_evaluations   recall@k and latency of the index against an exact
+--                            scan for a sample of queries, per ivfflat.probes or
+--                            hnsw.ef_search value, and the smallest value that
+--                            reached the target recall. The semantic planner
+--                            (semantic_planner.py) uses that value as the floor
+--                            for the setting while the index keeps the same
+--                            build parameters.
+--
+-- Rollback:
+--   DROP TABLE IF EXISTS vector_index_evaluations;
+--   DROP TABLE IF EXISTS vector_index_builds;
+
+CREATE TABLE IF NOT EXISTS vector_index_builds (
+    build_id SERIAL PRIMARY KEY,
+    index_name TEXT NOT NULL,
+    index_method TEXT NOT NULL,        -- 'ivfflat' or 'hnsw'
+    build_params JSONB NOT NULL,       -- {"lists": n} or {"m": n, "ef_construction": n}
+    action TEXT NOT NULL,              -- 'create', 'reindex', 'retune' or 'baseline' (existing index adopted)
+    reason TEXT,
+    rows_at_build BIGINT NOT NULL,     -- Papers with doctrove_embedding when the build started
+    status TEXT NOT NULL,              -- 'running', 'succeeded' or 'failed'
+    error TEXT,
+    started_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_vector_index_builds_index
+    ON vector_index_builds (index_name, started_at);
+
+CREATE TABLE IF NOT EXISTS vector_index_evaluations (
+    evaluation_id SERIAL PRIMARY KEY,
+    evaluated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    index_name TEXT NOT NULL,
+    index_method TEXT NOT NULL,
+    build_params JSONB NOT NULL,       -- Parameters of the index when it was measured
+    embedded_rows BIGINT NOT NULL,
+    rows_since_build BIGINT,           -- NULL when no build is recorded
+    sample_size INTEGER NOT NULL,      -- Query vectors measured
+    k INTEGER NOT NULL,                -- Recall@k
+    setting_name TEXT NOT NULL,        -- 'ivfflat.probes' or 'hnsw.ef_search'
+    target_recall REAL NOT NULL,
+    recommended_setting INTEGER,       -- Smallest measured value reaching target_recall; NULL if none did
+    exact_p50_ms REAL,                 -- Exact scan latency, for comparison
+    results JSONB NOT NULL,            -- [{"setting": n, "recall": r, "p50_ms": t, "p95_ms": t}, ...]
+    advice JSONB                       -- Decision taken from this evaluation (see index_maintenance.advise)
+);
+
+CREATE INDEX IF NOT EXISTS idx_vector_index_evaluations_index
+    ON vector_index_evaluations (index_name, evaluated_at);
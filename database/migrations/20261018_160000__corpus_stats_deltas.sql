@@ -0,0 +1,454 @@
+-- corpus_stats without shared-row contention, tracked per projection slot
+--
+-- 20261018_120000__corpus_stats.sql had every INSERT/UPDATE/DELETE on
+-- doctrove_papers upsert the same per-source corpus_stats row. Every writer
+-- to a source then waited on that row lock until commit (with the ingesters'
+-- batched transactions, one ingester blocked the others), and a statement
+-- touching several sources could deadlock against one taking the row locks in
+-- another order. Its 2D counts and extent also only covered
+-- doctrove_embedding_2d, so they described the wrong layout after a
+-- blue/green switch to doctrove_embedding_2d_shadow.
+--
+-- Now:
+--
+-- corpus_stats_deltas / corpus_year_stats_deltas
+--     append-only; the statement-level triggers INSERT one row per source
+--     (per source and year) per statement. Writers never update a shared row,
+--     so they neither wait for each other nor deadlock.
+-- corpus_stats_base / corpus_year_stats_base
+--     the former tables, renamed; compact_corpus_stats() folds committed
+--     deltas into them. The triggers compact opportunistically every
+--     CORPUS_STATS_COMPACT_EVERY (1000) deltas, skipping when another
+--     compaction holds the advisory lock; refresh_stale_corpus_extents()
+--     (queue_2d_worker, when idle) compacts first.
+-- corpus_stats / corpus_year_stats
+--     views summing base + deltas, so readers are unchanged. 2D counts,
+--     extents and extent_stale are kept for both slots (`*_shadow` columns
+--     in the tables); the corpus_stats view exposes those of the slot active
+--     in umap_projection_state, named in `embedding_2d_column`, so stats
+--     follow an activation without a recompute (activation also notifies the
+--     API catalog).
+--
+-- Removing a 2D point flags the slot's extent stale unless the point lies
+-- strictly inside the compacted (base) extent, which is a subset of the full
+-- extent. refresh_corpus_stats() still takes an EXCLUSIVE lock on all four
+-- tables, so writers wait at their trigger for the duration of the rescan.
+--
+-- Requires 20261018_090000__umap_blue_green_projection.sql and
+-- 20261018_120000__corpus_stats.sql.
+--
+-- Rollback (then re-apply 20261018_120000__corpus_stats.sql):
+--   DROP TRIGGER IF EXISTS corpus_stats_insert ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS corpus_stats_update ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS corpus_stats_delete ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS corpus_stats_truncate ON doctrove_papers;
+--   DROP TRIGGER IF EXISTS umap_projection_state_catalog_notify ON umap_projection_state;
+--   DROP VIEW IF EXISTS corpus_stats;
+--   DROP VIEW IF EXISTS corpus_year_stats;
+--   DROP FUNCTION IF EXISTS compact_corpus_stats();
+--   DROP TABLE IF EXISTS corpus_stats_deltas, corpus_year_stats_deltas;
+--   DROP TABLE IF EXISTS corpus_stats_base, corpus_year_stats_base;
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF to_regclass('corpus_stats') IS NOT NULL
+       AND (SELECT relkind FROM pg_class WHERE oid = to_regclass('corpus_stats')) = 'r' THEN
+        ALTER TABLE corpus_stats RENAME TO corpus_stats_base;
+        ALTER TABLE corpus_year_stats RENAME TO corpus_year_stats_base;
+    END IF;
+END
+$$;
+
+ALTER TABLE corpus_stats_base
+    ADD COLUMN IF NOT EXISTS with_embedding_2d_shadow BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS x_min_shadow DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS x_max_shadow DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS y_min_shadow DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS y_max_shadow DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS extent_stale_shadow BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE TABLE IF NOT EXISTS corpus_stats_deltas (
+    delta_id BIGSERIAL PRIMARY KEY,
+    doctrove_source TEXT NOT NULL,
+    paper_count BIGINT NOT NULL,
+    with_embedding BIGINT NOT NULL,
+    with_embedding_2d BIGINT NOT NULL,
+    x_min DOUBLE PRECISION,            -- Extents of added rows only (NULL for removals)
+    x_max DOUBLE PRECISION,
+    y_min DOUBLE PRECISION,
+    y_max DOUBLE PRECISION,
+    extent_stale BOOLEAN NOT NULL,     -- A removed point may have been on the boundary
+    with_embedding_2d_shadow BIGINT NOT NULL,
+    x_min_shadow DOUBLE PRECISION,
+    x_max_shadow DOUBLE PRECISION,
+    y_min_shadow DOUBLE PRECISION,
+    y_max_shadow DOUBLE PRECISION,
+    extent_stale_shadow BOOLEAN NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS corpus_year_stats_deltas (
+    delta_id BIGSERIAL PRIMARY KEY,
+    doctrove_source TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    paper_count BIGINT NOT NULL
+);
+
+CREATE OR REPLACE VIEW corpus_stats AS
+WITH active AS (
+    SELECT COALESCE((SELECT slot FROM umap_projection_state WHERE is_active),
+                    'doctrove_embedding_2d') AS slot
+), totals AS (
+    SELECT doctrove_source,
+           SUM(paper_count) AS paper_count,
+           SUM(with_embedding) AS with_embedding,
+           SUM(with_embedding_2d) AS with_embedding_2d,
+           MIN(x_min) AS x_min, MAX(x_max) AS x_max, MIN(y_min) AS y_min, MAX(y_max) AS y_max,
+           BOOL_OR(extent_stale) AS extent_stale,
+           SUM(with_embedding_2d_shadow) AS with_embedding_2d_shadow,
+           MIN(x_min_shadow) AS x_min_shadow, MAX(x_max_shadow) AS x_max_shadow,
+           MIN(y_min_shadow) AS y_min_shadow, MAX(y_max_shadow) AS y_max_shadow,
+           BOOL_OR(extent_stale_shadow) AS extent_stale_shadow,
+           MAX(updated_at) AS updated_at
+    FROM (
+        SELECT doctrove_source, paper_count, with_embedding, with_embedding_2d,
+               x_min, x_max, y_min, y_max, extent_stale,
+               with_embedding_2d_shadow, x_min_shadow, x_max_shadow, y_min_shadow, y_max_shadow,
+               extent_stale_shadow, updated_at
+        FROM corpus_stats_base
+        UNION ALL
+        SELECT doctrove_source, paper_count, with_embedding, with_embedding_2d,
+               x_min, x_max, y_min, y_max, extent_stale,
+               with_embedding_2d_shadow, x_min_shadow, x_max_shadow, y_min_shadow, y_max_shadow,
+               extent_stale_shadow, created_at
+        FROM corpus_stats_deltas
+    ) s
+    GROUP BY doctrove_source
+)
+SELECT t.doctrove_source,
+       t.paper_count::BIGINT AS paper_count,
+       t.with_embedding::BIGINT AS with_embedding,
+       (CASE WHEN a.slot = 'doctrove_embedding_2d_shadow'
+             THEN t.with_embedding_2d_shadow ELSE t.with_embedding_2d END)::BIGINT AS with_embedding_2d,
+       CASE WHEN a.slot = 'doctrove_embedding_2d_shadow' THEN t.x_min_shadow ELSE t.x_min END AS x_min,
+       CASE WHEN a.slot = 'doctrove_embedding_2d_shadow' THEN t.x_max_shadow ELSE t.x_max END AS x_max,
+       CASE WHEN a.slot = 'doctrove_embedding_2d_shadow' THEN t.y_min_shadow ELSE t.y_min END AS y_min,
+       CASE WHEN a.slot = 'doctrove_embedding_2d_shadow' THEN t.y_max_shadow ELSE t.y_max END AS y_max,
+       CASE WHEN a.slot = 'doctrove_embedding_2d_shadow'
+            THEN t.extent_stale_shadow ELSE t.extent_stale END AS extent_stale,
+       a.slot AS embedding_2d_column,
+       t.updated_at
+FROM totals t CROSS JOIN active a;
+
+CREATE OR REPLACE VIEW corpus_year_stats AS
+SELECT doctrove_source, year, SUM(paper_count)::BIGINT AS paper_count
+FROM (
+    SELECT doctrove_source, year, paper_count FROM corpus_year_stats_base
+    UNION ALL
+    SELECT doctrove_source, year, paper_count FROM corpus_year_stats_deltas
+) s
+GROUP BY doctrove_source, year;
+
+-- Fold committed deltas into the base tables; returns the number of corpus_stats deltas folded
+CREATE OR REPLACE FUNCTION compact_corpus_stats() RETURNS INTEGER AS $$
+DECLARE
+    compacted INTEGER;
+BEGIN
+    -- One compaction at a time; writers only INSERT deltas and never wait for it
+    PERFORM pg_advisory_xact_lock(hashtext('compact_corpus_stats'));
+
+    WITH moved AS (
+        DELETE FROM corpus_stats_deltas RETURNING *
+    ), summed AS (
+        SELECT doctrove_source,
+               SUM(paper_count) AS paper_count, SUM(with_embedding) AS with_embedding,
+               SUM(with_embedding_2d) AS with_embedding_2d,
+               MIN(x_min) AS x_min, MAX(x_max) AS x_max, MIN(y_min) AS y_min, MAX(y_max) AS y_max,
+               BOOL_OR(extent_stale) AS extent_stale,
+               SUM(with_embedding_2d_shadow) AS with_embedding_2d_shadow,
+               MIN(x_min_shadow) AS x_min_shadow, MAX(x_max_shadow) AS x_max_shadow,
+               MIN(y_min_shadow) AS y_min_shadow, MAX(y_max_shadow) AS y_max_shadow,
+               BOOL_OR(extent_stale_shadow) AS extent_stale_shadow
+        FROM moved
+        GROUP BY doctrove_source
+    ), folded AS (
+        INSERT INTO corpus_stats_base AS cs (
+            doctrove_source, paper_count, with_embedding, with_embedding_2d,
+            x_min, x_max, y_min, y_max, extent_stale,
+            with_embedding_2d_shadow, x_min_shadow, x_max_shadow, y_min_shadow, y_max_shadow,
+            extent_stale_shadow)
+        SELECT * FROM summed
+        ORDER BY doctrove_source
+        ON CONFLICT (doctrove_source) DO UPDATE SET
+            paper_count = cs.paper_count + EXCLUDED.paper_count,
+            with_embedding = cs.with_embedding + EXCLUDED.with_embedding,
+            with_embedding_2d = cs.with_embedding_2d + EXCLUDED.with_embedding_2d,
+            x_min = LEAST(cs.x_min, EXCLUDED.x_min),
+            x_max = GREATEST(cs.x_max, EXCLUDED.x_max),
+            y_min = LEAST(cs.y_min, EXCLUDED.y_min),
+            y_max = GREATEST(cs.y_max, EXCLUDED.y_max),
+            extent_stale = cs.extent_stale OR EXCLUDED.extent_stale,
+            with_embedding_2d_shadow = cs.with_embedding_2d_shadow + EXCLUDED.with_embedding_2d_shadow,
+            x_min_shadow = LEAST(cs.x_min_shadow, EXCLUDED.x_min_shadow),
+            x_max_shadow = GREATEST(cs.x_max_shadow, EXCLUDED.x_max_shadow),
+            y_min_shadow = LEAST(cs.y_min_shadow, EXCLUDED.y_min_shadow),
+            y_max_shadow = GREATEST(cs.y_max_shadow, EXCLUDED.y_max_shadow),
+            extent_stale_shadow = cs.extent_stale_shadow OR EXCLUDED.extent_stale_shadow,
+            updated_at = NOW()
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO compacted FROM moved;
+
+    WITH moved AS (
+        DELETE FROM corpus_year_stats_deltas RETURNING *
+    )
+    INSERT INTO corpus_year_stats_base AS ys (doctrove_source, year, paper_count)
+    SELECT doctrove_source, year, SUM(paper_count)
+    FROM moved
+    GROUP BY doctrove_source, year
+    ORDER BY doctrove_source, year
+    ON CONFLICT (doctrove_source, year) DO UPDATE SET
+        paper_count = ys.paper_count + EXCLUDED.paper_count;
+
+    RETURN compacted;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION corpus_stats_track() RETURNS trigger AS $$
+DECLARE
+    -- Rows whose tracked columns did not change are skipped on UPDATE
+    changed CONSTANT TEXT := $c$
+        n.doctrove_source IS DISTINCT FROM o.doctrove_source
+        OR n.doctrove_primary_date IS DISTINCT FROM o.doctrove_primary_date
+        OR (n.doctrove_embedding IS NULL) <> (o.doctrove_embedding IS NULL)
+        OR (n.doctrove_embedding_2d)[0] IS DISTINCT FROM (o.doctrove_embedding_2d)[0]
+        OR (n.doctrove_embedding_2d)[1] IS DISTINCT FROM (o.doctrove_embedding_2d)[1]
+        OR (n.doctrove_embedding_2d_shadow)[0] IS DISTINCT FROM (o.doctrove_embedding_2d_shadow)[0]
+        OR (n.doctrove_embedding_2d_shadow)[1] IS DISTINCT FROM (o.doctrove_embedding_2d_shadow)[1]
+    $c$;
+    -- Per-source aggregates of a row set, for both slots
+    aggregate CONSTANT TEXT := $a$
+        SELECT doctrove_source,
+               COUNT(*) AS paper_count,
+               COUNT(doctrove_embedding) AS with_embedding,
+               COUNT(doctrove_embedding_2d) AS with_2d,
+               MIN((doctrove_embedding_2d)[0]) AS x_min, MAX((doctrove_embedding_2d)[0]) AS x_max,
+               MIN((doctrove_embedding_2d)[1]) AS y_min, MAX((doctrove_embedding_2d)[1]) AS y_max,
+               COUNT(doctrove_embedding_2d_shadow) AS with_2d_shadow,
+               MIN((doctrove_embedding_2d_shadow)[0]) AS x_min_shadow,
+               MAX((doctrove_embedding_2d_shadow)[0]) AS x_max_shadow,
+               MIN((doctrove_embedding_2d_shadow)[1]) AS y_min_shadow,
+               MAX((doctrove_embedding_2d_shadow)[1]) AS y_max_shadow
+        FROM (%s) rows
+        GROUP BY doctrove_source
+    $a$;
+    compact_every CONSTANT INTEGER := 1000;  -- CORPUS_STATS_COMPACT_EVERY
+    added TEXT;
+    removed TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        added := 'SELECT * FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        removed := 'SELECT * FROM old_rows';
+    ELSE
+        added := 'SELECT n.* FROM new_rows n JOIN old_rows o USING (doctrove_paper_id) WHERE ' || changed;
+        removed := 'SELECT o.* FROM old_rows o JOIN new_rows n USING (doctrove_paper_id) WHERE ' || changed;
+    END IF;
+
+    IF removed IS NOT NULL THEN
+        -- Stale unless the removed points lie strictly inside the compacted extent
+        EXECUTE format($q$
+            INSERT INTO corpus_stats_deltas (
+                doctrove_source, paper_count, with_embedding, with_embedding_2d, extent_stale,
+                with_embedding_2d_shadow, extent_stale_shadow)
+            SELECT r.doctrove_source, -r.paper_count, -r.with_embedding, -r.with_2d,
+                   r.x_min IS NOT NULL AND (b.x_min IS NULL
+                       OR r.x_min <= b.x_min OR r.x_max >= b.x_max OR r.y_min <= b.y_min OR r.y_max >= b.y_max),
+                   -r.with_2d_shadow,
+                   r.x_min_shadow IS NOT NULL AND (b.x_min_shadow IS NULL
+                       OR r.x_min_shadow <= b.x_min_shadow OR r.x_max_shadow >= b.x_max_shadow
+                       OR r.y_min_shadow <= b.y_min_shadow OR r.y_max_shadow >= b.y_max_shadow)
+            FROM (%s) r
+            LEFT JOIN corpus_stats_base b ON b.doctrove_source = r.doctrove_source
+        $q$, format(aggregate, removed));
+
+        EXECUTE format($q$
+            INSERT INTO corpus_year_stats_deltas (doctrove_source, year, paper_count)
+            SELECT doctrove_source, EXTRACT(YEAR FROM doctrove_primary_date)::INTEGER, -COUNT(*)
+            FROM (%s) removed
+            WHERE doctrove_primary_date IS NOT NULL
+            GROUP BY 1, 2
+        $q$, removed);
+    END IF;
+
+    IF added IS NOT NULL THEN
+        EXECUTE format($q$
+            INSERT INTO corpus_stats_deltas (
+                doctrove_source, paper_count, with_embedding, with_embedding_2d,
+                x_min, x_max, y_min, y_max, extent_stale,
+                with_embedding_2d_shadow, x_min_shadow, x_max_shadow, y_min_shadow, y_max_shadow,
+                extent_stale_shadow)
+            SELECT doctrove_source, paper_count, with_embedding, with_2d,
+                   x_min, x_max, y_min, y_max, FALSE,
+                   with_2d_shadow, x_min_shadow, x_max_shadow, y_min_shadow, y_max_shadow, FALSE
+            FROM (%s) a
+        $q$, format(aggregate, added));
+
+        EXECUTE format($q$
+            INSERT INTO corpus_year_stats_deltas (doctrove_source, year, paper_count)
+            SELECT doctrove_source, EXTRACT(YEAR FROM doctrove_primary_date)::INTEGER, COUNT(*)
+            FROM (%s) added
+            WHERE doctrove_primary_date IS NOT NULL
+            GROUP BY 1, 2
+        $q$, added);
+    END IF;
+
+    -- Keep the views cheap: fold deltas once enough pile up, unless another compaction is running
+    IF EXISTS (SELECT 1 FROM corpus_stats_deltas OFFSET compact_every)
+       AND pg_try_advisory_xact_lock(hashtext('compact_corpus_stats')) THEN
+        PERFORM compact_corpus_stats();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION corpus_stats_reset() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE corpus_stats_base, corpus_stats_deltas, corpus_year_stats_base, corpus_year_stats_deltas;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Full recompute (initial backfill, or after manual edits with triggers disabled)
+CREATE OR REPLACE FUNCTION refresh_corpus_stats() RETURNS void AS $$
+BEGIN
+    LOCK TABLE corpus_stats_base, corpus_stats_deltas, corpus_year_stats_base, corpus_year_stats_deltas
+        IN EXCLUSIVE MODE;
+    DELETE FROM corpus_stats_deltas;
+    DELETE FROM corpus_year_stats_deltas;
+    DELETE FROM corpus_stats_base;
+    DELETE FROM corpus_year_stats_base;
+
+    INSERT INTO corpus_stats_base (
+        doctrove_source, paper_count, with_embedding, with_embedding_2d, x_min, x_max, y_min, y_max,
+        with_embedding_2d_shadow, x_min_shadow, x_max_shadow, y_min_shadow, y_max_shadow)
+    SELECT doctrove_source,
+           COUNT(*),
+           COUNT(doctrove_embedding),
+           COUNT(doctrove_embedding_2d),
+           MIN((doctrove_embedding_2d)[0]), MAX((doctrove_embedding_2d)[0]),
+           MIN((doctrove_embedding_2d)[1]), MAX((doctrove_embedding_2d)[1]),
+           COUNT(doctrove_embedding_2d_shadow),
+           MIN((doctrove_embedding_2d_shadow)[0]), MAX((doctrove_embedding_2d_shadow)[0]),
+           MIN((doctrove_embedding_2d_shadow)[1]), MAX((doctrove_embedding_2d_shadow)[1])
+    FROM doctrove_papers
+    GROUP BY doctrove_source;
+
+    INSERT INTO corpus_year_stats_base (doctrove_source, year, paper_count)
+    SELECT doctrove_source, EXTRACT(YEAR FROM doctrove_primary_date)::INTEGER, COUNT(*)
+    FROM doctrove_papers
+    WHERE doctrove_primary_date IS NOT NULL
+    GROUP BY 1, 2;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Compact, then recompute the extents flagged stale (either slot); returns the number of sources refreshed
+CREATE OR REPLACE FUNCTION refresh_stale_corpus_extents() RETURNS INTEGER AS $$
+DECLARE
+    refreshed INTEGER;
+    refreshed_shadow INTEGER;
+BEGIN
+    PERFORM compact_corpus_stats();
+    IF NOT EXISTS (SELECT 1 FROM corpus_stats_base WHERE extent_stale OR extent_stale_shadow) THEN
+        RETURN 0;
+    END IF;
+
+    -- Blocks other compactions only; writers keep appending deltas
+    LOCK TABLE corpus_stats_base IN EXCLUSIVE MODE;
+
+    UPDATE corpus_stats_base cs SET
+        x_min = e.x_min, x_max = e.x_max, y_min = e.y_min, y_max = e.y_max,
+        extent_stale = FALSE,
+        updated_at = NOW()
+    FROM (
+        SELECT s.doctrove_source,
+               MIN((dp.doctrove_embedding_2d)[0]) AS x_min,
+               MAX((dp.doctrove_embedding_2d)[0]) AS x_max,
+               MIN((dp.doctrove_embedding_2d)[1]) AS y_min,
+               MAX((dp.doctrove_embedding_2d)[1]) AS y_max
+        FROM corpus_stats_base s
+        LEFT JOIN doctrove_papers dp
+            ON dp.doctrove_source = s.doctrove_source AND dp.doctrove_embedding_2d IS NOT NULL
+        WHERE s.extent_stale
+        GROUP BY s.doctrove_source
+    ) e
+    WHERE cs.doctrove_source = e.doctrove_source;
+    GET DIAGNOSTICS refreshed = ROW_COUNT;
+
+    UPDATE corpus_stats_base cs SET
+        x_min_shadow = e.x_min, x_max_shadow = e.x_max, y_min_shadow = e.y_min, y_max_shadow = e.y_max,
+        extent_stale_shadow = FALSE,
+        updated_at = NOW()
+    FROM (
+        SELECT s.doctrove_source,
+               MIN((dp.doctrove_embedding_2d_shadow)[0]) AS x_min,
+               MAX((dp.doctrove_embedding_2d_shadow)[0]) AS x_max,
+               MIN((dp.doctrove_embedding_2d_shadow)[1]) AS y_min,
+               MAX((dp.doctrove_embedding_2d_shadow)[1]) AS y_max
+        FROM corpus_stats_base s
+        LEFT JOIN doctrove_papers dp
+            ON dp.doctrove_source = s.doctrove_source AND dp.doctrove_embedding_2d_shadow IS NOT NULL
+        WHERE s.extent_stale_shadow
+        GROUP BY s.doctrove_source
+    ) e
+    WHERE cs.doctrove_source = e.doctrove_source;
+    GET DIAGNOSTICS refreshed_shadow = ROW_COUNT;
+
+    RETURN GREATEST(refreshed, refreshed_shadow);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Triggers are unchanged apart from the function body; recreate for completeness
+DROP TRIGGER IF EXISTS corpus_stats_insert ON doctrove_papers;
+CREATE TRIGGER corpus_stats_insert
+    AFTER INSERT ON doctrove_papers
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_track();
+
+DROP TRIGGER IF EXISTS corpus_stats_update ON doctrove_papers;
+CREATE TRIGGER corpus_stats_update
+    AFTER UPDATE ON doctrove_papers
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_track();
+
+DROP TRIGGER IF EXISTS corpus_stats_delete ON doctrove_papers;
+CREATE TRIGGER corpus_stats_delete
+    AFTER DELETE ON doctrove_papers
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_track();
+
+DROP TRIGGER IF EXISTS corpus_stats_truncate ON doctrove_papers;
+CREATE TRIGGER corpus_stats_truncate
+    AFTER TRUNCATE ON doctrove_papers
+    FOR EACH STATEMENT EXECUTE FUNCTION corpus_stats_reset();
+
+-- The API catalog caches per-source 2D counts; refresh it when a slot is activated
+-- (notify_catalog_changed() is from 20261018_110000__catalog_change_notify.sql)
+DO $$
+BEGIN
+    IF to_regproc('notify_catalog_changed') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS umap_projection_state_catalog_notify ON umap_projection_state;
+        CREATE TRIGGER umap_projection_state_catalog_notify
+            AFTER INSERT OR DELETE OR UPDATE OF is_active ON umap_projection_state
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed();
+    END IF;
+END
+$$;
+
+-- Backfill the shadow-slot columns
+SELECT refresh_corpus_stats();
+
+COMMIT;
@@ -188,13 +188,14 @@ def process_file_in_batches(file_path: Path, config_provider, limit: Optional[in
     print()
     
     try:
-        # Import connection factory
-        from shared_ingestion_framework import create_connection_factory
-        connection_factory = create_connection_factory(config_provider)
+        # One pooled connection for the whole file, committing in batches
+        from shared_ingestion_framework import create_pooled_connection_factory, commit_pending
+        connection_factory = create_pooled_connection_factory(config_provider)
         
         # Ensure metadata table exists
         from shared_ingestion_framework import ensure_metadata_table_exists
         ensure_metadata_table_exists(connection_factory, 'openalex', get_openalex_metadata_fields())
+        commit_pending(connection_factory)
         
         # Stream records instead of loading into memory
         record_stream = process_openalex_jsonl_file_streaming(file_path)
@@ -243,6 +244,11 @@ def process_file_in_batches(file_path: Path, config_provider, limit: Optional[in
             total_processed += batch_results['processed']
             total_errors += batch_results['errors']
         
+        # Papers only count as processed once their batch is committed
+        lost = commit_pending(connection_factory)
+        total_processed -= lost
+        total_errors += lost
+        connection_factory.close()
         processing_time = time.time() - start_time
         
         print(f"\n✅ Processing completed successfully!")
@@ -274,7 +280,8 @@ def process_batch(records: List[Dict[str, Any]], connection_factory) -> Dict[str
         transform_records_to_papers,
         filter_valid_papers,
         insert_paper_with_metadata,
-        extract_metadata_from_record
+        extract_metadata_from_record,
+        BatchLostError
     )
     
     try:
@@ -314,6 +321,11 @@ def process_batch(records: List[Dict[str, Any]], connection_factory) -> Dict[str
                 else:
                     print(f"         ❌ Insert failed for paper {i+1}: {paper.source_id[:20]}")
                         
+            except BatchLostError as e:
+                # Earlier papers of this batch were rolled back with this one
+                processed -= e.lost
+                errors += e.lost + 1
+                print(f"         ⚠️  {e} at paper {i}")
             except Exception as e:
                 errors += 1  # Silently count errors
                 if errors <= 3:  # Only show first few errors
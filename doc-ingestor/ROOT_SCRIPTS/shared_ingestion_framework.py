@@ -13,6 +13,8 @@ from typing import Dict, Any, Iterator, Optional, Callable, List, Tuple, NamedTu
 from functools import wraps, reduce
 from dataclasses import dataclass
 import os
+import threading
+import time
 from itertools import islice
 
 # Set up logging
@@ -137,6 +139,250 @@ def create_connection_factory(config_provider: Callable[[], Dict[str, str]]):
         )
     return get_connection
 
+# ============================================================================
+# CONNECTION POOLING AND TRANSACTION BATCHING
+# ============================================================================
+
+@dataclass(frozen=True)
+class CommitPolicy:
+    """Immutable transaction batching policy: commit every N units of work or T seconds."""
+    max_rows: int = 1000
+    max_seconds: float = 5.0
+
+DEFAULT_COMMIT_POLICY = CommitPolicy()
+
+class BatchLostError(Exception):
+    """
+    The pending (released but not yet committed) batch was rolled back.
+
+    Raised when the savepoint of a failing record cannot be rolled back, or when
+    the batch COMMIT fails. `lost` records were accepted by their `with` blocks
+    but never committed: callers must retry them or count them as failed.
+    """
+
+    def __init__(self, lost: int):
+        super().__init__(f"Lost {lost} uncommitted records")
+        self.lost = lost
+
+class BatchedConnection:
+    """
+    Wraps one psycopg2 connection so per-record code can keep using
+    `with connection_factory() as conn:` and `conn.commit()` unchanged.
+
+    Each `with` block runs inside a SAVEPOINT: an error rolls back only that
+    record, success releases it and counts one unit of work. `commit()` inside
+    a block is deferred; the real COMMIT happens at block exit once the
+    CommitPolicy is due, or on flush(). Units of work count as committed
+    (`committed`) only once that COMMIT succeeds; if the batch is lost instead,
+    BatchLostError reports how many. The connection is never closed by the
+    `with` block; PooledConnectionFactory.close() flushes and closes it.
+    """
+
+    def __init__(self, raw_connection, policy: CommitPolicy):
+        self.raw = raw_connection
+        self.policy = policy
+        self._depth = 0
+        self._pending = 0
+        self._first_pending_at = None
+        self.committed = 0
+
+    def __enter__(self):
+        self._depth += 1
+        with self.raw.cursor() as cur:
+            cur.execute(f"SAVEPOINT ingest_sp_{self._depth}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        savepoint = f"ingest_sp_{self._depth}"
+        self._depth -= 1
+        if exc_type is not None and issubclass(exc_type, BatchLostError):
+            # An inner block already rolled the connection back
+            return False
+        if exc_type is not None:
+            try:
+                with self.raw.cursor() as cur:
+                    cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            except psycopg2.Error:
+                # Connection-level failure: the whole pending batch is gone
+                self._discard_pending(exc)
+            return False
+
+        with self.raw.cursor() as cur:
+            cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+        if self._depth == 0:
+            self._pending += 1
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            if self._commit_due():
+                try:
+                    self.flush()
+                except BatchLostError as e:
+                    # This record is lost too, but its caller has not counted it yet
+                    raise BatchLostError(e.lost - 1) from e.__cause__
+        return False
+
+    def _commit_due(self) -> bool:
+        if self._pending >= self.policy.max_rows:
+            return True
+        return (self._first_pending_at is not None and
+                time.monotonic() - self._first_pending_at >= self.policy.max_seconds)
+
+    def _reset_pending(self) -> None:
+        self._pending = 0
+        self._first_pending_at = None
+
+    def _discard_pending(self, cause: Optional[BaseException]) -> None:
+        """Roll back the connection and raise BatchLostError for the pending batch."""
+        lost = self._pending
+        self._reset_pending()
+        try:
+            self.raw.rollback()
+        except psycopg2.Error:
+            pass
+        raise BatchLostError(lost) from cause
+
+    def cursor(self, *args, **kwargs):
+        return self.raw.cursor(*args, **kwargs)
+
+    def commit(self) -> None:
+        """Deferred inside a `with` block; commits the pending batch otherwise."""
+        if self._depth == 0:
+            self.flush()
+
+    def rollback(self) -> None:
+        """Roll back the current record inside a `with` block, the pending batch otherwise."""
+        if self._depth > 0:
+            with self.raw.cursor() as cur:
+                cur.execute(f"ROLLBACK TO SAVEPOINT ingest_sp_{self._depth}")
+                cur.execute(f"SAVEPOINT ingest_sp_{self._depth}")
+        else:
+            self.raw.rollback()
+            self._reset_pending()
+
+    def flush(self) -> None:
+        """Commit all pending work now."""
+        if self._depth == 0:
+            try:
+                self.raw.commit()
+            except psycopg2.Error as e:
+                self._discard_pending(e)
+            self.committed += self._pending
+            self._reset_pending()
+
+    def close(self) -> None:
+        """No-op: the owning PooledConnectionFactory closes connections."""
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+class PooledConnectionFactory:
+    """
+    Connection factory shared by all source ingesters (arxiv, aipickle, MARC,
+    OpenAlex). Calling it returns the calling thread's BatchedConnection, so
+    one ingestion run opens one backend per thread instead of one per record.
+
+    Use as a context manager (or call close()) so the final partial batch is
+    committed:
+
+        with create_pooled_connection_factory(get_default_config) as factory:
+            insert_paper_with_metadata(factory, paper, metadata, 'arxiv')
+    """
+
+    def __init__(self, connect: Callable[[], Any], policy: CommitPolicy = DEFAULT_COMMIT_POLICY):
+        self.connect = connect
+        self.policy = policy
+        self._local = threading.local()
+        self._connections: List[BatchedConnection] = []
+        self._closed_committed = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> BatchedConnection:
+        conn = getattr(self._local, 'connection', None)
+        if conn is None or conn.raw.closed:
+            conn = BatchedConnection(self.connect(), self.policy)
+            self._local.connection = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def committed(self) -> int:
+        """Units of work committed so far, over all connections."""
+        with self._lock:
+            return self._closed_committed + sum(conn.committed for conn in self._connections)
+
+    def flush(self) -> None:
+        """Commit pending work on every connection (BatchLostError totals any lost batches)."""
+        with self._lock:
+            connections = list(self._connections)
+        lost = 0
+        for conn in connections:
+            if not conn.raw.closed:
+                try:
+                    conn.flush()
+                except BatchLostError as e:
+                    lost += e.lost
+        if lost:
+            raise BatchLostError(lost)
+
+    def close(self) -> None:
+        """Commit pending work and close every connection."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        lost = 0
+        try:
+            for conn in connections:
+                if conn.raw.closed:
+                    continue
+                try:
+                    conn.flush()
+                except BatchLostError as e:
+                    lost += e.lost
+                finally:
+                    conn.raw.close()
+        finally:
+            with self._lock:
+                self._closed_committed += sum(conn.committed for conn in connections)
+            self._local = threading.local()
+        if lost:
+            raise BatchLostError(lost)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def create_pooled_connection_factory(config_provider: Callable[[], Dict[str, str]],
+                                     policy: CommitPolicy = DEFAULT_COMMIT_POLICY) -> PooledConnectionFactory:
+    """Impure function: Create a pooled, transaction-batching connection factory."""
+    return as_pooled_connection_factory(create_connection_factory(config_provider), policy)
+
+def as_pooled_connection_factory(connection_factory: Callable,
+                                 policy: CommitPolicy = DEFAULT_COMMIT_POLICY) -> PooledConnectionFactory:
+    """Wrap a plain connection factory; an existing PooledConnectionFactory is returned unchanged."""
+    if isinstance(connection_factory, PooledConnectionFactory):
+        return connection_factory
+    return PooledConnectionFactory(connection_factory, policy)
+
+def commit_pending(connection_factory: Callable) -> int:
+    """
+    Commit the pending batch of a PooledConnectionFactory before reporting results.
+
+    Returns the number of accepted records that were lost instead of committed
+    (0 on success, or for a plain connection factory, which commits per record).
+    """
+    if not isinstance(connection_factory, PooledConnectionFactory):
+        return 0
+    try:
+        connection_factory.flush()
+    except BatchLostError as e:
+        logger.error(f"Commit failed: {e}")
+        return e.lost
+    return 0
+
 def get_default_config() -> Dict[str, str]:
     """Impure function: Get default configuration."""
     try:
@@ -275,6 +521,9 @@ def insert_paper_with_metadata(connection_factory: Callable, paper: PaperRecord,
                 conn.commit()
                 return True
                 
+    except BatchLostError:
+        # Earlier accepted records were rolled back with this one: the caller must account for them
+        raise
     except psycopg2.IntegrityError as e:
         if "duplicate key value violates unique constraint" in str(e).lower():
             logger.debug(f"Duplicate paper skipped: {paper.source_id}")
@@ -348,18 +597,32 @@ def handle_error(ctx: Dict[str, Any]) -> Dict[str, Any]:
 
 def process_file_with_interceptors(ctx: Dict[str, Any]) -> ProcessingResult:
     """Pure function: Process file using functional patterns."""
+    logger.info(f"Processing file with interceptors: {ctx['file_path']}")
+    
+    # Reuse one connection for the whole file; close it only if we opened it here
+    owns_pool = not isinstance(ctx['connection_factory'], PooledConnectionFactory)
+    connection_factory = as_pooled_connection_factory(ctx['connection_factory'])
+    try:
+        return _insert_file_records(ctx, connection_factory)
+    finally:
+        if owns_pool:
+            connection_factory.close()
+        else:
+            connection_factory.flush()
+
+def _insert_file_records(ctx: Dict[str, Any], connection_factory: Callable) -> ProcessingResult:
+    """Impure function: Insert a file's records through one (pooled) connection factory."""
     file_path = ctx['file_path']
-    connection_factory = ctx['connection_factory']
     source_name = ctx['source_name']
     transformer = ctx['transformer']
     metadata_extractor = ctx['metadata_extractor']
     limit = ctx.get('limit')
     
-    logger.info(f"Processing file with interceptors: {file_path}")
-    
     # Ensure metadata table exists (impure)
     if 'metadata_fields' in ctx:
         ensure_metadata_table_exists(connection_factory, source_name, ctx['metadata_fields'])
+        # Commit the DDL on its own so a lost batch only ever holds paper records
+        commit_pending(connection_factory)
     
     # Pure data processing pipeline
     records = process_json_records(file_path)
@@ -392,10 +655,19 @@ def process_file_with_interceptors(ctx: Dict[str, Any]) -> ProcessingResult:
                 
                 if inserted_count % 100 == 0:
                     logger.info(f"Inserted {inserted_count} papers (processed {total_processed})")
+        except BatchLostError as e:
+            inserted_count -= e.lost
+            errors.append(f"Error processing paper {paper.source_id}: {e}")
         except Exception as e:
             errors.append(f"Error processing paper {paper.source_id}: {e}")
             continue
     
+    # Papers only count as inserted once their batch is committed
+    lost = commit_pending(connection_factory)
+    if lost:
+        inserted_count -= lost
+        errors.append(f"Lost {lost} uncommitted records in the final commit")
+    
     logger.info(f"Successfully inserted {inserted_count} papers from {file_path}")
     return ProcessingResult(inserted_count=inserted_count, total_processed=total_processed, errors=errors)
 
@@ -210,12 +210,13 @@ def process_aipickle_file_unified(file_path: Path, config_provider=None, limit:
     if config_provider is None:
         config_provider = get_default_config
     
-    # Import connection factory
-    from shared_ingestion_framework import create_connection_factory
-    connection_factory = create_connection_factory(config_provider)
+    # One pooled connection for the whole file, committing in batches
+    from shared_ingestion_framework import create_pooled_connection_factory, commit_pending, BatchLostError
+    connection_factory = create_pooled_connection_factory(config_provider)
     
     # Ensure metadata table exists
     ensure_metadata_table_exists(connection_factory, 'aipickle', get_aipickle_metadata_fields())
+    commit_pending(connection_factory)
     
     # Pure data processing pipeline (aipickle-specific)
     records = process_aipickle_pickle_file(file_path)
@@ -247,10 +248,19 @@ def process_aipickle_file_unified(file_path: Path, config_provider=None, limit:
                 
                 if inserted_count % 100 == 0:
                     print(f"Inserted {inserted_count} papers (processed {total_processed})")
+        except BatchLostError as e:
+            inserted_count -= e.lost
+            errors.append(f"Error processing paper {paper.source_id}: {e}")
         except Exception as e:
             errors.append(f"Error processing paper {paper.source_id}: {e}")
             continue
     
+    # Papers only count as inserted once their batch is committed
+    lost = commit_pending(connection_factory)
+    if lost:
+        inserted_count -= lost
+        errors.append(f"Lost {lost} uncommitted records in the final commit")
+    connection_factory.close()
     print(f"Successfully inserted {inserted_count} papers from {file_path}")
     return ProcessingResult(inserted_count=inserted_count, total_processed=total_processed, errors=errors)
 
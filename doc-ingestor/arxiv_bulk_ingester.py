@@ -9,6 +9,11 @@ https://www.kaggle.com/datasets/Cornell-University/arxiv
 
 This script processes the arxiv-metadata-oai-snapshot.json file which contains
 metadata for all arXiv papers in JSON Lines format (one JSON object per line).
+
+With --bulk, each batch is COPYed into a session-local staging table and merged
+into doctrove_papers and arxiv_metadata with two set-based statements instead
+of one INSERT per paper. Progress is reported as a byte offset so an
+interrupted run can continue with --resume-offset.
 """
 
 import argparse
@@ -16,23 +21,31 @@ import json
 import logging
 import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from io import StringIO
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import psycopg2
 from psycopg2.extras import execute_batch
 
-# Add parent directory to path for shared framework imports
+# Import shared framework
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_SCRIPTS = os.path.dirname(SCRIPT_DIR)
+ROOT_SCRIPTS = os.path.join(SCRIPT_DIR, 'ROOT_SCRIPTS')
 sys.path.append(ROOT_SCRIPTS)
 
-from doc_ingestor.shared_ingestion_framework import (
+from shared_ingestion_framework import (
     PaperRecord,
     MetadataRecord,
-    get_db_connection,
+    create_connection_factory,
+    get_default_config,
 )
 
+# One plain connection per process; batches are committed explicitly
+get_db_connection = create_connection_factory(get_default_config)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,11 +53,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# orjson parses the snapshot lines several times faster than json; optional
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Suppress verbose logging from shared framework during bulk operations
 logging.getLogger('doc_ingestor.shared_ingestion_framework').setLevel(logging.WARNING)
 
 BATCH_SIZE = 5000  # Process papers in batches for performance
 
+# Parallel parse stage (--workers): file is split into newline-aligned byte ranges
+PARSE_CHUNK_BYTES = 32 * 1024 * 1024
+PARSE_QUEUE_DEPTH_PER_WORKER = 2  # Bounded number of parsed chunks held in memory
+
+# Staging table for --bulk mode. TEMP tables are never WAL-logged and are private
+# to the session, so concurrent ingesters cannot see each other's rows.
+STAGING_TABLE = 'arxiv_bulk_staging'
+STAGING_COLUMNS = (
+    'doctrove_source', 'doctrove_source_id', 'title', 'authors', 'abstract',
+    'doctrove_primary_date', 'publication_url', 'pdf_url', 'tags', 'links', 'fields'
+)
+
 def insert_paper_batch(papers_batch: List[tuple], metadata_batch: List[tuple], conn) -> tuple:
     """
     Insert a batch of papers and their metadata into the database.
@@ -125,6 +157,120 @@ def insert_paper_batch(papers_batch: List[tuple], metadata_batch: List[tuple], c
     return successful, errors
 
 
+def _copy_text(value: Any) -> str:
+    """Format one value for COPY ... FROM STDIN text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        value = '{' + ','.join(
+            '"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for v in value
+        ) + '}'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def build_copy_buffer(papers_batch: List[tuple], metadata_batch: List[tuple]) -> StringIO:
+    """
+    Build a COPY text-format buffer for the staging table.
+    Each row is the paper insert tuple followed by its metadata fields JSON.
+    """
+    buffer = StringIO()
+    for paper_data, meta_data in zip(papers_batch, metadata_batch):
+        row = list(paper_data) + [meta_data[1]]
+        buffer.write('\t'.join(_copy_text(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def copy_paper_batch(papers_batch: List[tuple], metadata_batch: List[tuple], conn) -> tuple:
+    """
+    Bulk-load a batch of papers and their metadata with COPY.
+    
+    Rows are COPYed into a temporary staging table, then a single statement
+    inserts new papers with ON CONFLICT DO NOTHING RETURNING and joins the
+    returned ids back to the staged metadata. If the COPY or merge fails the
+    batch falls back to insert_paper_batch so one malformed record does not
+    drop the whole batch.
+    
+    Returns: (successful_inserts, errors)
+    """
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+                doctrove_source TEXT,
+                doctrove_source_id TEXT,
+                title TEXT,
+                authors TEXT[],
+                abstract TEXT,
+                doctrove_primary_date DATE,
+                publication_url TEXT,
+                pdf_url TEXT,
+                tags TEXT[],
+                links JSONB,
+                fields JSONB
+            ) ON COMMIT DELETE ROWS;
+        """)
+        
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN",
+            build_copy_buffer(papers_batch, metadata_batch)
+        )
+        
+        # DISTINCT ON guards against the same arXiv id appearing twice in one batch
+        cursor.execute(f"""
+            WITH batch AS (
+                SELECT DISTINCT ON (doctrove_source_id) *
+                FROM {STAGING_TABLE}
+                ORDER BY doctrove_source_id
+            ),
+            inserted AS (
+                INSERT INTO doctrove_papers (
+                    doctrove_source,
+                    doctrove_source_id,
+                    title,
+                    authors,
+                    abstract,
+                    doctrove_primary_date,
+                    publication_url,
+                    pdf_url,
+                    tags,
+                    links
+                )
+                SELECT doctrove_source, doctrove_source_id, title, authors, abstract,
+                       doctrove_primary_date, publication_url, pdf_url, tags, links
+                FROM batch
+                ON CONFLICT (doctrove_source, doctrove_source_id) DO NOTHING
+                RETURNING doctrove_paper_id, doctrove_source_id
+            ),
+            metadata AS (
+                INSERT INTO arxiv_metadata (doctrove_paper_id, fields)
+                SELECT inserted.doctrove_paper_id, batch.fields
+                FROM inserted
+                JOIN batch ON batch.doctrove_source_id = inserted.doctrove_source_id
+                ON CONFLICT (doctrove_paper_id) DO NOTHING
+                RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM metadata);
+        """)
+        successful, _ = cursor.fetchone()
+        conn.commit()
+        return successful, 0
+        
+    except Exception as e:
+        logger.warning(f"COPY batch failed ({e}); retrying batch row by row")
+        conn.rollback()
+    finally:
+        cursor.close()
+    
+    return insert_paper_batch(papers_batch, metadata_batch, conn)
+
+
 def parse_arxiv_date(date_str: str) -> Optional[str]:
     """
     Parse arXiv date string to YYYY-MM-DD format.
@@ -212,6 +358,62 @@ def parse_authors(authors_data: Any) -> List[str]:
     return []
 
 
+def passes_filters(
+    record: Dict[str, Any],
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    categories: Optional[List[str]] = None
+) -> bool:
+    """
+    Apply the year/date/category filters to a parsed arXiv record.
+    The category check runs first since it is cheaper than date parsing.
+    Records without a parseable date pass (conversion rejects them later).
+    """
+    # Category filter
+    if categories:
+        record_categories = record.get('categories', '')
+        if isinstance(record_categories, str):
+            record_cats = set(record_categories.split())
+        else:
+            record_cats = set(record_categories)
+        
+        if not any(cat in record_cats for cat in categories):
+            return False
+    
+    if not (start_year or end_year or start_date or end_date):
+        return True
+    
+    # Date filters
+    versions = record.get('versions', [])
+    if versions and len(versions) > 0:
+        created_date = parse_arxiv_date(versions[0].get('created', ''))
+    else:
+        created_date = parse_arxiv_date(
+            record.get('update_date') or 
+            record.get('published') or 
+            record.get('created', '')
+        )
+    
+    if created_date:
+        # Year filter
+        if start_year or end_year:
+            year = int(created_date[:4])
+            if start_year and year < start_year:
+                return False
+            if end_year and year > end_year:
+                return False
+        
+        # Date range filter
+        if start_date and created_date < start_date:
+            return False
+        if end_date and created_date > end_date:
+            return False
+    
+    return True
+
+
 def convert_to_paper_record(record: Dict[str, Any]) -> Optional[tuple]:
     """
     Convert an arXiv JSON record to database insert tuple.
@@ -307,6 +509,211 @@ def convert_to_paper_record(record: Dict[str, Any]) -> Optional[tuple]:
         return None
 
 
+def align_offset(f, offset: int) -> int:
+    """
+    Seek `f` (binary) to the first line starting at or after `offset`.
+    Returns the aligned offset.
+    """
+    if offset <= 0:
+        f.seek(0)
+        return 0
+    f.seek(offset - 1)
+    if f.read(1) != b'\n':
+        # Offset points into a line: skip to the start of the next one
+        offset += len(f.readline())
+    return offset
+
+
+def iter_file_ranges(file_path: str, start: int, chunk_bytes: int = PARSE_CHUNK_BYTES):
+    """Yield (start, end) byte ranges of roughly chunk_bytes, each ending on a newline."""
+    with open(file_path, 'rb') as f:
+        start = align_offset(f, start)
+        file_size = os.fstat(f.fileno()).st_size
+        while start < file_size:
+            f.seek(min(start + chunk_bytes, file_size))
+            f.readline()
+            end = min(f.tell(), file_size)
+            yield start, end
+            start = end
+
+
+def parse_file_range(
+    file_path: str,
+    start: int,
+    end: int,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    categories: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Parse, filter and convert the lines in [start, end). Runs in a worker process.
+    
+    With a category filter, lines that do not contain any requested category
+    string are rejected before JSON parsing.
+    
+    Returns:
+        Dictionary with 'rows' [(paper_data, metadata_data, line_end_offset)],
+        'lines', 'filtered_out', 'errors' and 'end'.
+    """
+    category_needles = [cat.encode('utf-8') for cat in categories] if categories else None
+    result = {'rows': [], 'lines': 0, 'filtered_out': 0, 'errors': 0, 'end': end}
+    
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            raw_line = f.readline()
+            if not raw_line:
+                break
+            offset += len(raw_line)
+            result['lines'] += 1
+            
+            if category_needles and not any(needle in raw_line for needle in category_needles):
+                result['filtered_out'] += 1
+                continue
+            
+            try:
+                record = _json_loads(raw_line)
+            except ValueError:
+                result['errors'] += 1
+                continue
+            
+            if not passes_filters(record, start_year, end_year, start_date, end_date, categories):
+                result['filtered_out'] += 1
+                continue
+            
+            converted = convert_to_paper_record(record)
+            if converted:
+                paper_data, metadata_data = converted
+                result['rows'].append((paper_data, metadata_data, offset))
+            else:
+                result['errors'] += 1
+    
+    return result
+
+
+def process_arxiv_bulk_file_parallel(
+    file_path: str,
+    workers: int,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    bulk: bool = False,
+    resume_offset: int = 0
+) -> Dict[str, int]:
+    """
+    Process the arXiv bulk metadata file with a parallel parse stage.
+    
+    Newline-aligned byte ranges are parsed and filtered in a process pool;
+    a single connection in this process writes the results. At most
+    workers * PARSE_QUEUE_DEPTH_PER_WORKER chunks are in flight, and chunks
+    are written in file order so 'committed_offset' stays a valid resume point.
+    
+    Arguments and return value match process_arxiv_bulk_file.
+    """
+    stats = {
+        'total_lines': 0,
+        'filtered_out': 0,
+        'processed': 0,
+        'successful': 0,
+        'errors': 0,
+        'committed_offset': resume_offset,
+        'lines_per_second': 0.0
+    }
+    
+    insert_batch = copy_paper_batch if bulk else insert_paper_batch
+    conn = get_db_connection()
+    
+    papers_batch = []
+    metadata_batch = []
+    batch_end_offset = resume_offset
+    start_time = time.time()
+    filters = (start_year, end_year, start_date, end_date, categories)
+    
+    def flush_batch():
+        successful, errors = insert_batch(papers_batch, metadata_batch, conn)
+        stats['successful'] += successful
+        stats['errors'] += errors
+        stats['committed_offset'] = batch_end_offset
+        papers_batch.clear()
+        metadata_batch.clear()
+    
+    try:
+        logger.info(f"Opening bulk file: {file_path} ({workers} parse workers)")
+        logger.info(f"Filters: year={start_year}-{end_year}, date={start_date}-{end_date}, categories={categories}")
+        logger.info(f"Mode: {'COPY bulk load' if bulk else 'row inserts'}")
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            ranges = iter_file_ranges(file_path, resume_offset)
+            pending = deque()
+            max_pending = workers * PARSE_QUEUE_DEPTH_PER_WORKER
+            reached_limit = False
+            
+            def submit_next() -> bool:
+                next_range = next(ranges, None)
+                if next_range is None:
+                    return False
+                pending.append(executor.submit(parse_file_range, file_path, *next_range, *filters))
+                return True
+            
+            while len(pending) < max_pending and submit_next():
+                pass
+            
+            while pending and not reached_limit:
+                chunk = pending.popleft().result()
+                submit_next()
+                
+                stats['total_lines'] += chunk['lines']
+                stats['filtered_out'] += chunk['filtered_out']
+                stats['errors'] += chunk['errors']
+                
+                for paper_data, metadata_data, line_end in chunk['rows']:
+                    papers_batch.append(paper_data)
+                    metadata_batch.append(metadata_data)
+                    batch_end_offset = line_end
+                    stats['processed'] += 1
+                    
+                    if limit and stats['processed'] >= limit:
+                        logger.info(f"Reached limit of {limit} papers")
+                        reached_limit = True
+                        break
+                    
+                    if len(papers_batch) >= BATCH_SIZE:
+                        flush_batch()
+                
+                if not reached_limit:
+                    # Whole chunk consumed: the rest of its lines were filtered or rejected
+                    batch_end_offset = chunk['end']
+                    if not papers_batch:
+                        stats['committed_offset'] = batch_end_offset
+                
+                rate = stats['total_lines'] / max(time.time() - start_time, 1e-6)
+                logger.info(f"   📊 Read {stats['total_lines']:,} lines ({rate:,.0f} lines/sec), "
+                            f"processed {stats['processed']:,} papers, offset {chunk['end']:,}")
+            
+            for future in pending:
+                future.cancel()
+        
+        if papers_batch:
+            flush_batch()
+            logger.info(f"   ✅ Final batch: Processed {stats['processed']:,} papers total")
+    
+    except Exception as e:
+        logger.error(f"Error processing file: {e}")
+        logger.error(f"Resume with --resume-offset {stats['committed_offset']}")
+        raise
+    finally:
+        conn.close()
+        stats['lines_per_second'] = stats['total_lines'] / max(time.time() - start_time, 1e-6)
+    
+    return stats
+
+
 def process_arxiv_bulk_file(
     file_path: str,
     start_year: Optional[int] = None,
@@ -314,7 +721,10 @@ def process_arxiv_bulk_file(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     categories: Optional[List[str]] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    bulk: bool = False,
+    resume_offset: int = 0,
+    workers: int = 0
 ) -> Dict[str, int]:
     """
     Process the arXiv bulk metadata file.
@@ -327,86 +737,81 @@ def process_arxiv_bulk_file(
         end_date: Only process papers up to this date (YYYY-MM-DD)
         categories: Only process papers in these categories (e.g., ['cs.AI', 'cs.LG'])
         limit: Maximum number of papers to process (for testing)
+        bulk: Load batches with COPY + set-based merge instead of per-row inserts
+        resume_offset: Byte offset to resume from (as reported by a previous run)
+        workers: Parse in this many worker processes (0 = parse inline)
     
     Returns:
-        Dictionary with processing statistics
+        Dictionary with processing statistics. 'committed_offset' is the byte
+        offset up to which every line has been committed; pass it back as
+        resume_offset to continue an interrupted run.
     """
     stats = {
         'total_lines': 0,
         'filtered_out': 0,
         'processed': 0,
         'successful': 0,
-        'errors': 0
+        'errors': 0,
+        'committed_offset': resume_offset,
+        'lines_per_second': 0.0
     }
     
+    if workers:
+        return process_arxiv_bulk_file_parallel(
+            file_path, workers, start_year, end_year, start_date, end_date,
+            categories, limit, bulk, resume_offset
+        )
+    
+    insert_batch = copy_paper_batch if bulk else insert_paper_batch
     conn = get_db_connection()
     
     papers_batch = []
     metadata_batch = []
+    offset = resume_offset
+    start_time = time.time()
+    
+    def flush_batch():
+        successful, errors = insert_batch(papers_batch, metadata_batch, conn)
+        stats['successful'] += successful
+        stats['errors'] += errors
+        stats['committed_offset'] = offset
+        return successful, errors
     
     try:
         logger.info(f"Opening bulk file: {file_path}")
         logger.info(f"Filters: year={start_year}-{end_year}, date={start_date}-{end_date}, categories={categories}")
+        logger.info(f"Mode: {'COPY bulk load' if bulk else 'row inserts'}")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
+        # Binary mode so byte offsets are exact for --resume-offset
+        with open(file_path, 'rb') as f:
+            if resume_offset:
+                offset = align_offset(f, resume_offset)
+                logger.info(f"Resuming at byte offset {offset:,}")
+            
+            for line_num, raw_line in enumerate(f, 1):
                 stats['total_lines'] = line_num
                 
                 # Progress logging (reduced verbosity)
                 if line_num % 100000 == 0:
-                    logger.info(f"   📊 Read {line_num:,} lines, processed {stats['processed']:,} papers so far...")
+                    rate = line_num / max(time.time() - start_time, 1e-6)
+                    logger.info(f"   📊 Read {line_num:,} lines ({rate:,.0f} lines/sec), processed {stats['processed']:,} papers so far...")
                 
                 # Check limit before processing
                 if limit and stats['processed'] >= limit:
                     logger.info(f"Reached limit of {limit} papers")
                     break
                 
+                offset += len(raw_line)
+                
                 try:
-                    record = json.loads(line.strip())
-                except json.JSONDecodeError as e:
+                    record = _json_loads(raw_line)
+                except ValueError as e:
                     logger.warning(f"Invalid JSON at line {line_num}: {e}")
                     stats['errors'] += 1
                     continue
                 
                 # Apply filters
-                skip = False
-                
-                # Date filters
-                versions = record.get('versions', [])
-                if versions and len(versions) > 0:
-                    created_date = parse_arxiv_date(versions[0].get('created', ''))
-                else:
-                    created_date = parse_arxiv_date(
-                        record.get('update_date') or 
-                        record.get('published') or 
-                        record.get('created', '')
-                    )
-                
-                if created_date:
-                    # Year filter
-                    if start_year or end_year:
-                        year = int(created_date[:4])
-                        if start_year and year < start_year:
-                            skip = True
-                        if end_year and year > end_year:
-                            skip = True
-                    
-                    # Date range filter
-                    if start_date and created_date < start_date:
-                        skip = True
-                    if end_date and created_date > end_date:
-                        skip = True
-                
-                # Category filter
-                if categories:
-                    record_categories = record.get('categories', '')
-                    if isinstance(record_categories, str):
-                        record_cats = set(record_categories.split())
-                    else:
-                        record_cats = set(record_categories)
-                    
-                    if not any(cat in record_cats for cat in categories):
-                        skip = True
+                skip = not passes_filters(record, start_year, end_year, start_date, end_date, categories)
                 
                 if skip:
                     stats['filtered_out'] += 1
@@ -429,13 +834,11 @@ def process_arxiv_bulk_file(
                 
                 # Process batch when it reaches BATCH_SIZE
                 if len(papers_batch) >= BATCH_SIZE:
-                    successful, errors = insert_paper_batch(papers_batch, metadata_batch, conn)
-                    stats['successful'] += successful
-                    stats['errors'] += errors
+                    successful, errors = flush_batch()
                     
                     # Reduced verbosity - only log every 1000 papers
                     if stats['processed'] % 1000 == 0:
-                        logger.info(f"   ✅ Processed {stats['processed']:,} papers (batch: +{successful}, errors: {errors})")
+                        logger.info(f"   ✅ Processed {stats['processed']:,} papers (batch: +{successful}, errors: {errors}, offset: {offset:,})")
                     
                     papers_batch = []
                     metadata_batch = []
@@ -446,16 +849,18 @@ def process_arxiv_bulk_file(
         
         # Process final batch
         if papers_batch:
-            successful, errors = insert_paper_batch(papers_batch, metadata_batch, conn)
-            stats['successful'] += successful
-            stats['errors'] += errors
+            flush_batch()
             logger.info(f"   ✅ Final batch: Processed {stats['processed']:,} papers total")
+        else:
+            stats['committed_offset'] = offset
     
     except Exception as e:
         logger.error(f"Error processing file: {e}")
+        logger.error(f"Resume with --resume-offset {stats['committed_offset']}")
         raise
     finally:
         conn.close()
+        stats['lines_per_second'] = stats['total_lines'] / max(time.time() - start_time, 1e-6)
     
     return stats
 
@@ -475,6 +880,13 @@ Examples:
 
   # Test with first 100 papers
   python arxiv_bulk_ingester.py --file arxiv-metadata-oai-snapshot.json --limit 100
+
+  # Full snapshot with COPY bulk loading, then resume after an interruption
+  python arxiv_bulk_ingester.py --file arxiv-metadata-oai-snapshot.json --bulk
+  python arxiv_bulk_ingester.py --file arxiv-metadata-oai-snapshot.json --bulk --resume-offset 1234567890
+
+  # Parse on 8 cores while one connection COPYs
+  python arxiv_bulk_ingester.py --file arxiv-metadata-oai-snapshot.json --bulk --workers 8
         """
     )
     
@@ -518,6 +930,26 @@ Examples:
         help='Maximum number of papers to process (for testing)'
     )
     
+    parser.add_argument(
+        '--bulk',
+        action='store_true',
+        help='Load batches with COPY into a staging table and merge set-based'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='Parse and filter in this many processes; one connection writes (default: inline)'
+    )
+    
+    parser.add_argument(
+        '--resume-offset',
+        type=int,
+        default=0,
+        help='Byte offset to resume from (logged as the committed offset by a previous run)'
+    )
+    
     args = parser.parse_args()
     
     # Validate file exists
@@ -537,7 +969,10 @@ Examples:
         start_date=args.start_date,
         end_date=args.end_date,
         categories=args.categories,
-        limit=args.limit
+        limit=args.limit,
+        bulk=args.bulk,
+        resume_offset=args.resume_offset,
+        workers=args.workers
     )
     
     # Print summary
@@ -549,6 +984,8 @@ Examples:
     logger.info(f"Filtered out:       {stats['filtered_out']:,}")
     logger.info(f"Successfully ingested: {stats['successful']:,}")
     logger.info(f"Errors:             {stats['errors']:,}")
+    logger.info(f"Throughput:         {stats['lines_per_second']:,.0f} lines/sec")
+    logger.info(f"Committed offset:   {stats['committed_offset']:,} (use --resume-offset to continue)")
     logger.info("")
     logger.info("📊 Papers will be automatically enriched with:")
     logger.info("   - Vector embeddings (1536-d semantic search)")
@@ -35,8 +35,10 @@ from shared_ingestion_framework import (
     get_default_config, 
     PaperRecord, 
     MetadataRecord,
-    create_connection_factory,
-    ensure_metadata_table_exists
+    create_pooled_connection_factory,
+    ensure_metadata_table_exists,
+    commit_pending,
+    BatchLostError
 )
 
 # arXiv API configuration
@@ -385,6 +387,7 @@ def ingest_arxiv_papers(papers: List[Dict[str, Any]], connection_factory) -> Dic
     
     # Ensure metadata table exists
     ensure_metadata_table_exists(connection_factory, 'arxiv', get_arxiv_metadata_fields())
+    commit_pending(connection_factory)
     
     # Process in batches
     for i in range(0, total, BATCH_SIZE):
@@ -412,6 +415,11 @@ def ingest_arxiv_papers(papers: List[Dict[str, Any]], connection_factory) -> Dic
                 result = insert_paper_with_metadata(connection_factory, paper, metadata, 'arxiv')
                 if result:
                     processed += 1
+            except BatchLostError as e:
+                # Earlier papers of the batch were rolled back with this one
+                processed -= e.lost
+                errors += e.lost + 1
+                logger.error(f"Error inserting paper: {e}")
             except Exception as e:
                 errors += 1
                 if errors <= 10:  # Only show first 10 errors
@@ -420,6 +428,11 @@ def ingest_arxiv_papers(papers: List[Dict[str, Any]], connection_factory) -> Dic
         logger.info(f"   ✅ Batch {batch_num} completed: {len(paper_records)} processed")
         logger.info(f"   📈 Total progress: {processed:,}/{total:,} papers")
     
+    # Papers only count as ingested once their batch is committed
+    lost = commit_pending(connection_factory)
+    processed -= lost
+    errors += lost
+    
     return {
         'total': total,
         'processed': processed,
@@ -485,9 +498,8 @@ def main():
     
     # Ingest into database
     logger.info("🗄️  Ingesting into database...")
-    connection_factory = create_connection_factory(get_default_config)
-    
-    result = ingest_arxiv_papers(papers, connection_factory)
+    with create_pooled_connection_factory(get_default_config) as connection_factory:
+        result = ingest_arxiv_papers(papers, connection_factory)
     
     # Summary
     print()
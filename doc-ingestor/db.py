@@ -3,10 +3,18 @@ Database operations for doc-ingestor.
 These functions handle database I/O and are impure.
 """
 
+import os
+import sys
+import logging
 import psycopg2
 from typing import Dict, Any, List, Callable
 from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ROOT_SCRIPTS'))
+from shared_ingestion_framework import as_pooled_connection_factory, CommitPolicy, DEFAULT_COMMIT_POLICY
+
+logger = logging.getLogger(__name__)
+
 def create_connection_factory():
     """
     Pure function: creates a connection factory function.
@@ -24,6 +32,14 @@ def create_connection_factory():
         )
     return get_connection
 
+def create_pooled_connection_factory(policy: CommitPolicy = DEFAULT_COMMIT_POLICY):
+    """
+    Creates a connection factory that reuses one connection per thread and
+    commits every policy.max_rows papers or policy.max_seconds seconds.
+    Call .close() on it when done to commit the final batch.
+    """
+    return as_pooled_connection_factory(create_connection_factory(), policy)
+
 def insert_paper(connection_factory, paper: Dict[str, Any]) -> bool:
     """
     Insert a paper into the doctrove_papers table.
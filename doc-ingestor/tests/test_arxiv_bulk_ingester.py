@@ -0,0 +1,249 @@
+"""
+Unit tests for arxiv_bulk_ingester's COPY staging path and byte-range parsing
+(no database required).
+"""
+
+import json
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arxiv_bulk_ingester
+from arxiv_bulk_ingester import (STAGING_COLUMNS, _copy_text, align_offset, build_copy_buffer, copy_paper_batch,
+                                 iter_file_ranges, parse_file_range, process_arxiv_bulk_file)
+
+
+def paper(source_id, title='Title', abstract='Abstract', authors=('A. Author',), links=None):
+    paper_data = ('arxiv', source_id, title, list(authors), abstract, '2024-01-15',
+                  f"https://arxiv.org/abs/{source_id}", f"https://arxiv.org/pdf/{source_id}.pdf",
+                  ['cs.LG'], links)
+    metadata_data = (None, json.dumps({'comments': '12 pages'}), source_id)
+    return paper_data, metadata_data
+
+
+def parse_copy_field(field):
+    """Decode one COPY text-format field (the inverse of _copy_text for scalars)."""
+    if field == '\\N':
+        return None
+    escapes = {'t': '\t', 'n': '\n', 'r': '\r', '\\': '\\'}
+    out, i = [], 0
+    while i < len(field):
+        if field[i] == '\\':
+            out.append(escapes[field[i + 1]])
+            i += 2
+        else:
+            out.append(field[i])
+            i += 1
+    return ''.join(out)
+
+
+class TestCopyText(unittest.TestCase):
+
+    def test_null(self):
+        self.assertEqual(_copy_text(None), '\\N')
+        # The two characters backslash-N in the data are text, not NULL
+        self.assertEqual(_copy_text('\\N'), '\\\\N')
+        self.assertEqual(_copy_text(''), '')
+
+    def test_escapes_delimiters_and_backslashes(self):
+        value = 'tab\there\nnewline\r\nwindows \\alpha C:\\path'
+        encoded = _copy_text(value)
+        self.assertNotIn('\t', encoded)
+        self.assertNotIn('\n', encoded)
+        self.assertNotIn('\r', encoded)
+        self.assertEqual(encoded, 'tab\\there\\nnewline\\r\\nwindows \\\\alpha C:\\\\path')
+        self.assertEqual(parse_copy_field(encoded), value)
+
+    def test_arrays(self):
+        self.assertEqual(_copy_text(['a', 'b c']), '{"a","b c"}')
+        self.assertEqual(_copy_text([]), '{}')
+        # Quotes and backslashes are escaped for the array literal, then again for COPY
+        self.assertEqual(_copy_text(['O"Neil', 'a\\b']), '{"O\\\\"Neil","a\\\\\\\\b"}')
+        self.assertEqual(parse_copy_field(_copy_text(['O"Neil', 'a\\b'])), '{"O\\"Neil","a\\\\b"}')
+        self.assertEqual(_copy_text(['line\nbreak']), '{"line\\nbreak"}')
+
+    def test_non_strings(self):
+        self.assertEqual(_copy_text(3), '3')
+        self.assertEqual(_copy_text(json.dumps({'doi': '10.1/x'})), '{"doi": "10.1/x"}')
+
+
+class TestBuildCopyBuffer(unittest.TestCase):
+
+    def test_one_line_per_row(self):
+        rows = [paper('2401.00001', abstract='first\nparagraph\tindented'),
+                paper('2401.00002', title='Backslash \\ and \\N', links=json.dumps({'doi': '10.1/x'}))]
+        papers_batch = [p for p, _ in rows]
+        metadata_batch = [m for _, m in rows]
+
+        lines = build_copy_buffer(papers_batch, metadata_batch).getvalue().split('\n')
+
+        # Embedded newlines never split a row
+        self.assertEqual(lines[-1], '')
+        self.assertEqual(len(lines[:-1]), 2)
+        for line, (paper_data, metadata_data) in zip(lines, rows):
+            fields = line.split('\t')
+            self.assertEqual(len(fields), len(STAGING_COLUMNS))
+            # Paper columns, then the metadata fields JSON
+            self.assertEqual(parse_copy_field(fields[1]), paper_data[1])
+            self.assertEqual(parse_copy_field(fields[2]), paper_data[2])
+            self.assertEqual(parse_copy_field(fields[4]), paper_data[4])
+            self.assertEqual(parse_copy_field(fields[-1]), metadata_data[1])
+        self.assertEqual(lines[0].split('\t')[9], '\\N')
+
+    def test_empty_batch(self):
+        self.assertEqual(build_copy_buffer([], []).getvalue(), '')
+
+
+class TestCopyPaperBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.rows = [paper(f"2401.{i:05d}", abstract=f"line one\nline two {i}") for i in range(3)]
+        self.papers_batch = [p for p, _ in self.rows]
+        self.metadata_batch = [m for _, m in self.rows]
+
+    def test_staged_rows_reach_the_merge(self):
+        self.cursor.fetchone.return_value = (2, 2)  # One paper already present
+
+        result = copy_paper_batch(self.papers_batch, self.metadata_batch, self.conn)
+
+        self.assertEqual(result, (2, 0))
+        copy_sql, buffer = self.cursor.copy_expert.call_args[0]
+        self.assertIn(f"COPY {arxiv_bulk_ingester.STAGING_TABLE} ({', '.join(STAGING_COLUMNS)})", copy_sql)
+        self.assertEqual(buffer.getvalue().count('\n'), len(self.rows))
+        merge_sql = self.cursor.execute.call_args_list[-1][0][0]
+        self.assertIn(f"FROM {arxiv_bulk_ingester.STAGING_TABLE}", merge_sql)
+        self.assertIn('ON CONFLICT (doctrove_source, doctrove_source_id) DO NOTHING', merge_sql)
+        self.conn.commit.assert_called_once()
+        self.conn.rollback.assert_not_called()
+
+    def test_failed_copy_falls_back_to_row_inserts(self):
+        self.cursor.copy_expert.side_effect = Exception('invalid input syntax')
+
+        with patch.object(arxiv_bulk_ingester, 'insert_paper_batch', return_value=(3, 0)) as fallback:
+            result = copy_paper_batch(self.papers_batch, self.metadata_batch, self.conn)
+
+        self.assertEqual(result, (3, 0))
+        self.conn.rollback.assert_called_once()
+        fallback.assert_called_once_with(self.papers_batch, self.metadata_batch, self.conn)
+
+
+def snapshot_line(i):
+    """One arXiv snapshot record; titles vary in length and include multi-byte characters."""
+    record = {
+        'id': f"2401.{i:05d}",
+        'title': f"Paper {i} on Schrödinger bridges" + ' extra words' * (i % 4),
+        'abstract': 'An abstract.',
+        'authors_parsed': [['Author', 'A.', '']],
+        'categories': 'cs.LG stat.ML' if i % 3 else 'math.PR',
+        'versions': [{'version': 'v1', 'created': 'Mon, 15 Jan 2024 10:00:00 GMT'}],
+    }
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+class TestFileRanges(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = [snapshot_line(i) for i in range(40)]
+        self.data = b''.join(self.lines)
+        self.line_starts = [sum(len(line) for line in self.lines[:i]) for i in range(len(self.lines))]
+        handle = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        handle.write(self.data)
+        handle.close()
+        self.path = handle.name
+        self.addCleanup(os.unlink, self.path)
+
+    def test_align_offset(self):
+        with open(self.path, 'rb') as f:
+            self.assertEqual(align_offset(f, 0), 0)
+            self.assertEqual(f.tell(), 0)
+            # Already at a line start
+            self.assertEqual(align_offset(f, self.line_starts[5]), self.line_starts[5])
+            # Inside a line: moves to the start of the next one
+            self.assertEqual(align_offset(f, self.line_starts[5] + 1), self.line_starts[6])
+            self.assertEqual(align_offset(f, self.line_starts[6] - 1), self.line_starts[6])
+            self.assertEqual(f.tell(), self.line_starts[6])
+            self.assertEqual(align_offset(f, len(self.data) - 1), len(self.data))
+
+    def test_ranges_split_at_line_boundaries(self):
+        for chunk_bytes in (1, 100, 1000, len(self.data) * 2):
+            ranges = list(iter_file_ranges(self.path, 0, chunk_bytes))
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], len(self.data))
+            for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, next_start)
+            for start, end in ranges:
+                self.assertLess(start, end)
+                self.assertIn(start, self.line_starts)
+                self.assertEqual(self.data[end - 1:end], b'\n')
+
+    def test_each_line_parsed_exactly_once(self):
+        for chunk_bytes in (1, 300, 4096):
+            results = [parse_file_range(self.path, start, end)
+                       for start, end in iter_file_ranges(self.path, 0, chunk_bytes)]
+            source_ids = [paper_data[1] for result in results for paper_data, _, _ in result['rows']]
+            self.assertEqual(source_ids, [f"2401.{i:05d}" for i in range(len(self.lines))])
+            self.assertEqual(sum(result['lines'] for result in results), len(self.lines))
+            # Each row carries the offset just past its line
+            offsets = [line_end for result in results for _, _, line_end in result['rows']]
+            self.assertEqual(offsets, self.line_starts[1:] + [len(self.data)])
+
+    def test_category_prefilter(self):
+        result = parse_file_range(self.path, 0, len(self.data), categories=['math.PR'])
+        self.assertEqual(len(result['rows']), len(range(0, len(self.lines), 3)))
+        self.assertEqual(result['filtered_out'], len(self.lines) - len(result['rows']))
+        self.assertEqual(result['lines'], len(self.lines))
+
+    def test_resumed_range_starts_at_stored_offset(self):
+        stored = self.line_starts[17]
+        ranges = list(iter_file_ranges(self.path, stored, 200))
+        self.assertEqual(ranges[0][0], stored)
+        rows = [row for start, end in ranges for row in parse_file_range(self.path, start, end)['rows']]
+        self.assertEqual(rows[0][0][1], '2401.00017')
+        self.assertEqual(len(rows), len(self.lines) - 17)
+        # An offset inside a line (not one the ingester reports) skips the partial line
+        self.assertEqual(next(iter_file_ranges(self.path, stored + 3, 200))[0], self.line_starts[18])
+        self.assertEqual(list(iter_file_ranges(self.path, len(self.data), 200)), [])
+
+    def test_ranges_parse_in_spawned_workers(self):
+        # Spawned workers (macOS, Windows) re-import the ingester rather than inheriting it
+        ranges = list(iter_file_ranges(self.path, 0, 1000))
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(parse_file_range, [self.path] * len(ranges), *zip(*ranges)))
+        source_ids = [paper_data[1] for result in results for paper_data, _, _ in result['rows']]
+        self.assertEqual(source_ids, [f"2401.{i:05d}" for i in range(len(self.lines))])
+
+    def run_ingester(self, **kwargs):
+        inserted = []
+
+        def record_batch(papers_batch, metadata_batch, conn):
+            inserted.extend(paper_data[1] for paper_data in papers_batch)
+            return len(papers_batch), 0
+
+        with patch.object(arxiv_bulk_ingester, 'get_db_connection', return_value=MagicMock()), \
+                patch.object(arxiv_bulk_ingester, 'insert_paper_batch', side_effect=record_batch), \
+                patch.object(arxiv_bulk_ingester, 'BATCH_SIZE', 7):
+            stats = process_arxiv_bulk_file(self.path, **kwargs)
+        return stats, inserted
+
+    def test_resume_from_committed_offset(self):
+        expected = [f"2401.{i:05d}" for i in range(len(self.lines))]
+        for workers in (0, 2):
+            first, first_ids = self.run_ingester(limit=12, workers=workers)
+            self.assertEqual(first_ids, expected[:12])
+            self.assertEqual(first['committed_offset'], self.line_starts[12])
+
+            rest, rest_ids = self.run_ingester(resume_offset=first['committed_offset'], workers=workers)
+            self.assertEqual(first_ids + rest_ids, expected)
+            self.assertEqual(rest['committed_offset'], len(self.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for the shared framework's pooled, transaction-batching connection factory.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import psycopg2
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ROOT_SCRIPTS'))
+
+from shared_ingestion_framework import (BatchLostError, CommitPolicy, PooledConnectionFactory,
+                                       as_pooled_connection_factory, commit_pending)
+
+
+def make_raw_connection():
+    raw = MagicMock()
+    raw.closed = 0
+    return raw
+
+
+def executed_sql(raw):
+    cursor = raw.cursor.return_value.__enter__.return_value
+    return [c.args[0] for c in cursor.execute.call_args_list]
+
+
+class TestPooledConnectionFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = make_raw_connection()
+        self.connect = MagicMock(return_value=self.raw)
+
+    def test_reuses_one_connection(self):
+        """Repeated factory calls on one thread share a single backend connection"""
+        factory = PooledConnectionFactory(self.connect)
+        for _ in range(5):
+            with factory() as conn:
+                conn.commit()
+        self.assertEqual(self.connect.call_count, 1)
+
+    def test_commit_deferred_until_policy_due(self):
+        """conn.commit() inside a block is deferred; COMMIT happens every max_rows records"""
+        factory = PooledConnectionFactory(self.connect, CommitPolicy(max_rows=3, max_seconds=3600))
+        for _ in range(7):
+            with factory() as conn:
+                conn.commit()
+        self.assertEqual(self.raw.commit.call_count, 2)
+
+        factory.close()
+        self.assertEqual(self.raw.commit.call_count, 3)
+        self.raw.close.assert_called_once()
+
+    def test_failed_record_rolls_back_to_savepoint(self):
+        """An exception rolls back only the failing record, not the pending batch"""
+        factory = PooledConnectionFactory(self.connect, CommitPolicy(max_rows=100))
+        with factory() as conn:
+            pass
+        with self.assertRaises(ValueError):
+            with factory() as conn:
+                raise ValueError('duplicate')
+
+        statements = executed_sql(self.raw)
+        self.assertIn('ROLLBACK TO SAVEPOINT ingest_sp_1', statements)
+        self.raw.rollback.assert_not_called()
+        self.assertEqual(factory()._pending, 1)
+
+    def test_failed_savepoint_rollback_reports_lost_batch(self):
+        """If the savepoint cannot be rolled back, the pending records are reported lost, never counted"""
+        factory = PooledConnectionFactory(self.connect, CommitPolicy(max_rows=100))
+        for _ in range(3):
+            with factory() as conn:
+                pass
+
+        cursor = self.raw.cursor.return_value.__enter__.return_value
+        def execute(sql, *args):
+            if sql.startswith('ROLLBACK TO SAVEPOINT'):
+                raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        cursor.execute.side_effect = execute
+
+        with self.assertRaises(BatchLostError) as raised:
+            with factory() as conn:
+                raise ValueError('duplicate')
+        self.assertEqual(raised.exception.lost, 3)
+        self.assertIsInstance(raised.exception.__cause__, ValueError)
+        self.raw.rollback.assert_called_once()
+
+        cursor.execute.side_effect = None
+        with factory() as conn:
+            pass
+        factory.close()
+        self.assertEqual(factory.committed, 1)
+
+    def test_failed_commit_reports_lost_batch(self):
+        """Records count as committed only after COMMIT succeeds"""
+        factory = PooledConnectionFactory(self.connect, CommitPolicy(max_rows=2, max_seconds=3600))
+        with factory() as conn:
+            pass
+        self.raw.commit.side_effect = psycopg2.OperationalError('could not commit')
+        # The record whose exit triggers the failing COMMIT is not counted among the lost accepted ones
+        with self.assertRaises(BatchLostError) as raised:
+            with factory() as conn:
+                pass
+        self.assertEqual(raised.exception.lost, 1)
+        self.assertEqual(factory.committed, 0)
+
+        with factory() as conn:
+            pass
+        self.assertEqual(commit_pending(factory), 1)
+        self.raw.commit.side_effect = None
+        with factory() as conn:
+            pass
+        self.assertEqual(commit_pending(factory), 0)
+        self.assertEqual(factory.committed, 1)
+
+    def test_as_pooled_connection_factory_is_idempotent(self):
+        """Wrapping an existing pooled factory returns it unchanged"""
+        factory = PooledConnectionFactory(self.connect)
+        self.assertIs(as_pooled_connection_factory(factory), factory)
+        self.assertIsInstance(as_pooled_connection_factory(self.connect), PooledConnectionFactory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -112,6 +112,7 @@ def create_app():
             dcc.Location(id='url', refresh=False),
             dcc.Store(id='cluster-busy', data=False),
             dcc.Store(id='cluster-overlay', data=None),
+            dcc.Store(id='cluster-lineage', storage_type='session'),  # Per-session K-means warm-start id
             dcc.Store(id='clear-selection-store', data=0),
                     dcc.Store(id='data-store'),  # Single source of truth for data
         dcc.Store(id='data-metadata', data={'total_count': 0}),  # Store for data metadata like total count
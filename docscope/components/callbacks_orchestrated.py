@@ -10,6 +10,7 @@ from dash.exceptions import PreventUpdate
 import pandas as pd
 import time
 import os
+import uuid
 
 # Import our orchestrator system
 from .component_orchestrator_fp import (
@@ -1405,12 +1406,14 @@ def register_orchestrated_callbacks(app):
     @app.callback(
         [Output('cluster-overlay', 'data'),
          Output('cluster-busy', 'data', allow_duplicate=True),
-         Output('show-clusters', 'value')],
+         Output('show-clusters', 'value'),
+         Output('cluster-lineage', 'data')],
         [Input('compute-clusters-button', 'n_clicks')],
         [State('data-store', 'data'),
          State('num-clusters', 'value'),
          State('selected-sources', 'data'),
-         State('graph-3', 'relayoutData')],
+         State('graph-3', 'relayoutData'),
+         State('cluster-lineage', 'data')],
         prevent_initial_call=True
     )
     def handle_clustering_operation(
@@ -1418,13 +1421,17 @@ def register_orchestrated_callbacks(app):
         data_store: Optional[List[Dict]],
         num_clusters: Optional[int],
         selected_sources: Optional[List[str]],
-        relayout_data: Optional[Dict]
-    ) -> Tuple[Dict[str, Any], bool, List[str]]:
+        relayout_data: Optional[Dict],
+        lineage: Optional[str]
+    ) -> Tuple[Dict[str, Any], bool, List[str], str]:
         """
         Handle clustering operations - delegates to orchestrator.
         
         This callback ONLY handles clustering coordination.
         It delegates actual clustering to the orchestrator.
+        
+        K-means warm starts are scoped to the browser session: the first run
+        stores a random lineage id in the session-scoped cluster-lineage store.
         """
         try:
             logger.info(f"CLUSTERING CALLBACK TRIGGERED - n_clicks: {n_clicks}, data_store length: {len(data_store) if data_store else 0}")
@@ -1432,7 +1439,9 @@ def register_orchestrated_callbacks(app):
             # Input validation
             if n_clicks is None or n_clicks == 0:
                 logger.info("CLUSTERING CALLBACK: n_clicks is None or 0, returning no_update")
-                return dash.no_update, dash.no_update, dash.no_update
+                return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+            
+            lineage = lineage or uuid.uuid4().hex
             
             # Validate number of clusters
             if num_clusters is not None:
@@ -1450,7 +1459,7 @@ def register_orchestrated_callbacks(app):
             # Check data availability
             if not data_store or len(data_store) == 0:
                 logger.warning("No data available for clustering - please load some data first")
-                return {'polygons': [], 'annotations': []}, False, ['show']
+                return {'polygons': [], 'annotations': []}, False, ['show'], lineage
             
             logger.info(f"Starting clustering operation with {num_clusters_int} clusters")
             
@@ -1460,23 +1469,24 @@ def register_orchestrated_callbacks(app):
                 data=data_store,
                 num_clusters=num_clusters_int,
                 selected_sources=selected_sources,
-                relayout_data=relayout_data
+                relayout_data=relayout_data,
+                lineage=lineage
             )
             
             logger.info(f"CLUSTERING CALLBACK: Orchestrator result: {result}")
             
             if result['success']:
                 logger.info("Clustering operation successful")
-                return result['cluster_data'], False, ['show']  # Auto-check show clusters
+                return result['cluster_data'], False, ['show'], lineage  # Auto-check show clusters
             else:
                 logger.warning(f"Clustering operation failed: {result.get('error', 'Unknown error')}")
-                return {'polygons': [], 'annotations': []}, False, ['show']
+                return {'polygons': [], 'annotations': []}, False, ['show'], lineage
                 
         except Exception as e:
             logger.error(f"Clustering operation callback error: {e}")
             import traceback
             logger.error(f"CLUSTERING CALLBACK: Full traceback: {traceback.format_exc()}")
-            return {'polygons': [], 'annotations': []}, False, ['show']
+            return {'polygons': [], 'annotations': []}, False, ['show'], dash.no_update
     
     @app.callback(
         Output('graph-3', 'figure', allow_duplicate=True),
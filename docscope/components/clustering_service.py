@@ -6,17 +6,27 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional
 import logging
-from sklearn.cluster import KMeans
 from scipy.spatial import ConvexHull
 import requests
 import re
 import certifi
 
+# K-means engine shared with the API (doctrove-shared package)
+from doctrove_shared.cluster_engine import get_kmeans_engine
+
 logger = logging.getLogger(__name__)
 
-def overlay_clusters(data_store, num_clusters, clustering_data=None, selected_countries=None, universe_constraints=None):
+# Cold-start initializations for the overlay: DocScope has always used a single
+# init (KMeans(n_clusters, random_state=42)), ~6x faster than the API's n_init=10
+KMEANS_N_INIT = 1
+
+def overlay_clusters(data_store, num_clusters, clustering_data=None, selected_countries=None, universe_constraints=None,
+                     lineage=None):
     """
     Overlay clustering data on the visualization using Voronoi polygons and LLM summaries.
+
+    lineage optionally names the session's view history being re-clustered; K-means
+    warm-starts from the centroids last computed for it (see cluster_engine).
     """
     from shapely.geometry import Point, MultiPoint, box
     from shapely.ops import voronoi_diagram
@@ -80,9 +90,9 @@ def overlay_clusters(data_store, num_clusters, clustering_data=None, selected_co
                 return {'polygons': [], 'annotations': []}
         
         coords = valid_coords.values
-        kmeans = KMeans(n_clusters=num_clusters, random_state=42)
-        df['cluster'] = kmeans.fit_predict(coords)
-        cluster_centers = kmeans.cluster_centers_
+        kmeans = get_kmeans_engine().fit(coords, num_clusters, lineage, n_init=KMEANS_N_INIT)
+        df['cluster'] = kmeans.labels
+        cluster_centers = kmeans.centers
         # LLM summaries
         nearest_titles = get_nearest_titles(df, cluster_centers, n=10)
         llm_prompt = build_llm_prompt(nearest_titles)
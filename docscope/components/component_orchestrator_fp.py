@@ -898,7 +898,8 @@ def orchestrate_complete_workflow(year_range: Optional[List[int]], sources: Opti
 
 def orchestrate_clustering(data: List[Dict], num_clusters: int, 
                           selected_sources: Optional[List[str]], 
-                          relayout_data: Optional[Dict]) -> Dict[str, Any]:
+                          relayout_data: Optional[Dict],
+                          lineage: Optional[str] = None) -> Dict[str, Any]:
     """
     Orchestrate clustering operations using pure functions.
     
@@ -910,6 +911,8 @@ def orchestrate_clustering(data: List[Dict], num_clusters: int,
         num_clusters: Number of clusters to create
         selected_sources: Optional list of sources to filter by
         relayout_data: Optional relayout data for view bounds filtering
+        lineage: Optional per-session id; re-clustering after a pan or zoom
+                 warm-starts from that session's previous centroids
         
     Returns:
         Dict with success status, cluster data, and error info
@@ -964,7 +967,8 @@ def orchestrate_clustering(data: List[Dict], num_clusters: int,
             visible_data = filtered_df.to_dict('records')
             
             clustering_result = overlay_clusters(
-                visible_data, num_clusters, None, None  # No source filtering needed
+                visible_data, num_clusters, None, None,  # No source filtering needed
+                lineage=lineage
             )
             
             if clustering_result and 'polygons' in clustering_result:
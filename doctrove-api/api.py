@@ -10,10 +10,10 @@ import time
 import logging
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, has_request_context
 from flask_cors import CORS
+import threading
 import psycopg2
-from psycopg2.pool import SimpleConnectionPool
 from psycopg2.extras import DictCursor
 from config import (
     DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD,
@@ -40,9 +40,20 @@ from performance_interceptor import (
     log_duration
 )
 from interceptor import InterceptorStack
+from catalog import get_catalog
+import plan_capture
+import request_trace
+from connection_pool import (
+    ConnectionPool, apply_session_settings, settings_committed,
+    settings_rolled_back, register_pool
+)
 from api_interceptors import (
     create_papers_endpoint_stack,
     create_paper_detail_endpoint_stack,
+    create_paper_details_batch_endpoint_stack,
+    create_paper_sidebar_detail_endpoint_stack,
+    create_clusters_endpoint_stack,
+    create_cluster_tree_endpoint_stack,
     create_stats_endpoint_stack,
     create_health_endpoint_stack
 )
@@ -58,73 +69,102 @@ try:
 except Exception:
     pass
 
+@app.before_request
+def begin_request_trace():
+    request_trace.begin_request(request.path)
+
 _POOL_MIN = 1
 _POOL_MAX = 10
-_POOL: Optional[SimpleConnectionPool] = None
+_POOL: Optional[ConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+# WSGI environ key under which asgi.py passes the connection leased for a request
+CONNECTION_LEASE_ENVIRON_KEY = 'doctrove.connection_lease'
 
 class PooledConnection:
     """Context manager that returns a pooled connection and ensures return to pool."""
-    def __init__(self, pool: SimpleConnectionPool, desired_probes: int):
+    def __init__(self, pool: ConnectionPool, desired_probes: int):
         self._pool = pool
         self._conn = None
         self._desired_probes = desired_probes
 
     def __enter__(self):
         self._conn = self._pool.getconn()
+        self._apply_settings()
+        if self._conn.closed:
+            # Died since it was last used (e.g. server restart): replace it once
+            self._release()
+            self._conn = self._pool.getconn()
+            self._apply_settings()
+        return self._conn
+
+    def _apply_settings(self):
         try:
-            with self._conn.cursor() as cur:
-                cur.execute("SET ivfflat.probes = %s", (self._desired_probes,))
+            apply_session_settings(self._conn, {'ivfflat.probes': self._desired_probes}, self._pool.metrics)
         except Exception:
-            pass
-        return self._conn
+            # Not fatal, but leave no aborted transaction behind
+            self._rollback()
 
     def __exit__(self, exc_type, exc, tb):
         try:
-            if self._conn is not None:
+            if self._conn is not None and not self._conn.closed:
                 if exc_type is None:
                     try:
                         self._conn.commit()
+                        settings_committed(self._conn)
                     except Exception:
-                        try:
-                            self._conn.rollback()
-                        except Exception:
-                            pass
+                        self._rollback()
                 else:
-                    try:
-                        self._conn.rollback()
-                    except Exception:
-                        pass
+                    self._rollback()
         finally:
-            if self._conn is not None:
-                try:
-                    self._pool.putconn(self._conn)
-                except Exception:
-                    pass
-            self._conn = None
+            self._release()
         # Do not suppress exceptions
         return False
 
+    def _rollback(self):
+        try:
+            self._conn.rollback()
+        except Exception:
+            pass
+        settings_rolled_back(self._conn)
+
+    def _release(self):
+        # psycopg2 marks connections it found broken as closed; the pool discards them
+        if self._conn is not None:
+            try:
+                self._pool.putconn(self._conn)
+            except Exception:
+                pass
+        self._conn = None
+
 def _init_pool_if_needed():
     global _POOL
     if _POOL is None:
-        _POOL = SimpleConnectionPool(
-            _POOL_MIN,
-            _POOL_MAX,
-            host=DB_HOST,
-            port=DB_PORT,
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ConnectionPool(
+                    _POOL_MIN,
+                    _POOL_MAX,
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    dbname=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD
+                )
+                register_pool('api', _POOL.stats)
 
 def create_connection_factory():
     """Create a database connection factory using a global psycopg2 pool.
 
-    Applies ivfflat.probes per checkout; can be overridden per request with
-    `?probes=N`.
+    Applies ivfflat.probes per checkout (no round-trip when the connection
+    already has the value); can be overridden per request with
+    `?probes=N`. Semantic /api/papers queries then SET LOCAL the probes (or
+    hnsw.ef_search) chosen by the semantic planner. The pool itself is created
+    on first checkout, so requests rejected by validation never touch the database.
+    
+    When served through asgi.py, the request carries a connection lease from the
+    async pool instead and every checkout in that request uses it.
     """
-    _init_pool_if_needed()
-
     def connection_factory():
         # Default probes
         desired_probes = 5
@@ -134,6 +174,10 @@ def create_connection_factory():
                 desired_probes = override
         except Exception:
             pass
+        lease = request.environ.get(CONNECTION_LEASE_ENVIRON_KEY) if has_request_context() else None
+        if lease is not None:
+            return lease.checkout(desired_probes)
+        _init_pool_if_needed()
         # Return a context manager compatible with existing `with ... as conn:` usage
         return PooledConnection(_POOL, desired_probes)  # type: ignore[arg-type]
 
@@ -248,86 +292,38 @@ def _create_clean_display_name(column_name: str, source: str) -> str:
 
 @app.route('/api/sources', methods=['GET'])
 def get_available_sources():
-    """Get all available sources that have enrichment data."""
+    """Get all available sources that have papers (served from the catalog cache)."""
     try:
-        print("=== DEBUG: Starting get_available_sources function ===")
-        
-        with create_connection_factory()() as conn:
-            with conn.cursor() as cur:
-                # Query for sources that actually have papers in the database
-                query = """
-                    SELECT DISTINCT doctrove_source as source_name
-                    FROM doctrove_papers 
-                    WHERE doctrove_source IS NOT NULL
-                    AND doctrove_source != ''
-                    ORDER BY doctrove_source
-                """
-                print(f"=== DEBUG: Executing query: {query} ===")
-                
-                cur.execute(query)
-                
-                raw_results = cur.fetchall()
-                print(f"=== DEBUG: Raw database results: {raw_results} ===")
-                
-                sources = [row[0] for row in raw_results if row[0]]
-                print(f"=== DEBUG: Extracted sources list: {sources} ===")
-                
-                # Filter to only include valid sources
-                valid_sources_list = ['arxiv', 'randpub', 'extpub']
-                print(f"=== DEBUG: Valid sources filter list: {valid_sources_list} ===")
-                
-                valid_sources = [s for s in sources if s in valid_sources_list]
-                print(f"=== DEBUG: Filtered valid sources: {valid_sources} ===")
-                
-                response = {
-                    'sources': valid_sources,
-                    'count': len(valid_sources)
-                }
-                print(f"=== DEBUG: Final response: {response} ===")
-                
-                return jsonify(response)
+        sources = get_catalog().sources()
+        return jsonify({
+            'sources': sources,
+            'count': len(sources)
+        })
                 
     except Exception as e:
-        print(f"=== DEBUG: Exception occurred: {e} ===")
         logger.error(f"Error getting available sources: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/sources/<source>/enrichment-fields', methods=['GET'])
 def get_enrichment_fields(source: str):
-    """Get available enrichment fields for a given source."""
+    """Get available enrichment fields for a given source (served from the catalog cache)."""
     try:
-        with create_connection_factory()() as conn:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                # Get available enrichment tables for this source
-                # Look for both enrichment and metadata tables
-                cur.execute("""
-                    SELECT table_name, column_name, data_type, is_nullable
-                    FROM information_schema.columns 
-                    WHERE (table_name LIKE %s OR table_name LIKE %s)
-                    AND column_name NOT IN ('doctrove_paper_id', 'processed_at', 'version')
-                    ORDER BY table_name, ordinal_position
-                """, (f'%{source}%enrichment%', f'%{source}%metadata%'))
-                
-                columns = cur.fetchall()
-                
-                # Group by table
-                enrichment_tables = {}
-                for col in columns:
-                    table_name = col['table_name']
-                    if table_name not in enrichment_tables:
-                        enrichment_tables[table_name] = []
-                    
-                    enrichment_tables[table_name].append({
-                        'field_name': col['column_name'],
-                        'data_type': col['data_type'],
-                        'nullable': col['is_nullable'] == 'YES',
-                        'display_name': _create_clean_display_name(col['column_name'], source)
-                    })
-                
-                return jsonify({
-                    'source': source,
-                    'enrichment_tables': enrichment_tables
-                })
+        enrichment_tables = {}
+        for table_name, columns in get_catalog().enrichment_fields(source).items():
+            enrichment_tables[table_name] = [
+                {
+                    'field_name': col['column_name'],
+                    'data_type': col['data_type'],
+                    'nullable': col['nullable'],
+                    'display_name': _create_clean_display_name(col['column_name'], source)
+                }
+                for col in columns
+            ]
+        
+        return jsonify({
+            'source': source,
+            'enrichment_tables': enrichment_tables
+        })
                 
     except Exception as e:
         logger.error(f"Error getting enrichment fields for {source}: {e}")
@@ -370,50 +366,51 @@ def get_symbolizations():
 
 @app.route('/api/sources/<source>/enrichment-fields/<table>/<field>/unique-count', methods=['GET'])
 def get_enrichment_field_unique_count(source: str, table: str, field: str):
-    """Get unique value count for a specific enrichment field."""
+    """Get unique value count for a specific enrichment field (memoised until the next catalog refresh)."""
     try:
-        with create_connection_factory()() as conn:
-            with conn.cursor() as cur:
-                # Check if the table and field exist
-                cur.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = %s AND column_name = %s
-                """, (table, field))
-                
-                if not cur.fetchone():
-                    return jsonify({'error': f'Field {field} not found in table {table}'}), 404
-                
-                # Get unique value count
-                cur.execute(f"""
-                    SELECT COUNT(DISTINCT {field}) as unique_count
-                    FROM {table}
-                    WHERE {field} IS NOT NULL
-                """)
-                
-                result = cur.fetchone()
-                unique_count = result[0] if result else 0
-                
-                # Get sample values for preview
-                cur.execute(f"""
-                    SELECT {field}, COUNT(*) as count
-                    FROM {table}
-                    WHERE {field} IS NOT NULL
-                    GROUP BY {field}
-                    ORDER BY count DESC
-                    LIMIT 10
-                """)
-                
-                sample_values = [{'value': row[0], 'count': row[1]} for row in cur.fetchall()]
-                
-                return jsonify({
-                    'source': source,
-                    'table': table,
-                    'field': field,
-                    'unique_count': unique_count,
-                    'sample_values': sample_values,
-                    'suitable_for_visualization': unique_count <= 25
-                })
+        catalog = get_catalog()
+        
+        # Check against the cached schema; this also guards the identifiers interpolated below
+        if not catalog.has_column(table, field):
+            return jsonify({'error': f'Field {field} not found in table {table}'}), 404
+        
+        def compute_unique_count():
+            with create_connection_factory()() as conn:
+                with conn.cursor() as cur:
+                    # Get unique value count
+                    cur.execute(f"""
+                        SELECT COUNT(DISTINCT {field}) as unique_count
+                        FROM {table}
+                        WHERE {field} IS NOT NULL
+                    """)
+                    
+                    result = cur.fetchone()
+                    unique_count = result[0] if result else 0
+                    
+                    # Get sample values for preview
+                    cur.execute(f"""
+                        SELECT {field}, COUNT(*) as count
+                        FROM {table}
+                        WHERE {field} IS NOT NULL
+                        GROUP BY {field}
+                        ORDER BY count DESC
+                        LIMIT 10
+                    """)
+                    
+                    sample_values = [{'value': row[0], 'count': row[1]} for row in cur.fetchall()]
+            
+            return {
+                'unique_count': unique_count,
+                'sample_values': sample_values,
+                'suitable_for_visualization': unique_count <= 25
+            }
+        
+        return jsonify({
+            'source': source,
+            'table': table,
+            'field': field,
+            **catalog.unique_count(table, field, compute_unique_count)
+        })
                 
     except Exception as e:
         logger.error(f"Error getting unique count for {table}.{field}: {e}")
@@ -423,18 +420,8 @@ def get_enrichment_field_unique_count(source: str, table: str, field: str):
 @log_performance("api_papers_endpoint")
 def get_papers():
     """Get papers with optional filtering and enrichment."""
-    
-    # IMMEDIATE DEBUG: Log that we're in the endpoint
-    logger.info(f"🔍 ENDPOINT DEBUG: /api/papers called with args: {dict(request.args)}")
-    
-    # Write to file to verify execution
-    with open('/tmp/api_debug.txt', 'w') as f:
-        f.write(f"API endpoint called with args: {dict(request.args)}\n")
-    
-            # Debug: Request details (commented out for production)
-        # print(f"=== API DEBUG: Endpoint called with args: {dict(request.args)} ===")
-        # print(f"=== API DEBUG: Raw request URL: {request.url} ===")
-        # print(f"=== API DEBUG: Request method: {request.method} ===")
+    if request_trace.enabled('request'):
+        request_trace.trace('request', 'papers_request', args=request.args.to_dict())
     
     # Create interceptor stack for this endpoint
     stack = InterceptorStack(create_papers_endpoint_stack())
@@ -454,22 +441,13 @@ def get_papers():
     # Symbolization parameter
     symbolization_id = request.args.get('symbolization_id', type=int)
     
-    # Debug: Log all request parameters
-    logger.info(f"🔍 API DEBUG: Request args: {dict(request.args)}")
-    logger.info(f"🔍 API DEBUG: symbolization_id: {symbolization_id}")
-    
     # Process symbolization if provided
     # NOTE: Fields list will be modified below to include enrichment field
     enrichment_field_column_name = None  # Will be set if symbolization is found
     
     if symbolization_id:
-        print(f"🔍 PRINT DEBUG: About to process symbolization_id: {symbolization_id}")
         logger.info(f"Processing symbolization_id: {symbolization_id}")
         
-        # Write to file to verify we reach this point
-        with open('/tmp/symbolization_debug.txt', 'w') as f:
-            f.write(f"Processing symbolization_id: {symbolization_id}\n")
-        
         try:
             # Use the existing field definition system to parse symbolization
             from business_logic import FIELD_DEFINITIONS, parse_qualified_field_name
@@ -532,17 +510,11 @@ def get_papers():
                         sym_enrichment_field = sym_data['enrichment_field']
                         sym_color_map = sym_data['color_map']
                         
-                        # Write to file to verify we get symbolization data
-                        with open('/tmp/symbolization_data.txt', 'w') as f:
-                            f.write(f"Symbolization data: {sym_enrichment_field}\n")
-                        
                         # Parse the enrichment field using the generic function
                         if sym_enrichment_field:
                             enrichment_params = get_enrichment_params_from_field(sym_enrichment_field)
-                            
-                            # Write to file to verify enrichment params
-                            with open('/tmp/enrichment_params.txt', 'w') as f:
-                                f.write(f"Enrichment params: {enrichment_params}\n")
+                            request_trace.trace('enrichment', 'symbolization', symbolization_id=symbolization_id,
+                                                enrichment_field=sym_enrichment_field, params=enrichment_params)
                             
                             if enrichment_params:
                                 enrichment_source = enrichment_params['source']
@@ -550,10 +522,6 @@ def get_papers():
                                 enrichment_field = enrichment_params['field']
                                 enrichment_field_column_name = enrichment_field  # Store column name for fields list
                                 
-                                # Write to file to verify final enrichment values
-                                with open('/tmp/final_enrichment.txt', 'w') as f:
-                                    f.write(f"Final enrichment: source={enrichment_source}, table={enrichment_table}, field={enrichment_field}\n")
-                                
                                 logger.info(f"Symbolization {symbolization_id} applied: source={enrichment_source}, table={enrichment_table}, field={enrichment_field}")
                             else:
                                 logger.error(f"Failed to parse enrichment field '{sym_enrichment_field}' for symbolization {symbolization_id}")
@@ -561,8 +529,6 @@ def get_papers():
             logger.error(f"Error processing symbolization {symbolization_id}: {e}")
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
-    else:
-        logger.info("No symbolization_id provided")
     
     # CRITICAL: enrichment_field_column_name will be passed via context
     # and the interceptor will add it to the fields list
@@ -577,6 +543,8 @@ def get_papers():
     context = stack.execute({
         'endpoint': '/api/papers',
         'method': 'GET',
+        # Pooled connections keep their prepared query templates across requests
+        'connection_factory': create_connection_factory(),
         'limit': limit,
         'bbox': bbox,
         'sql_filter': sql_filter,
@@ -588,13 +556,6 @@ def get_papers():
         'enrichment_field_column_name': enrichment_field_column_name  # Pass column name for fields list
     })
     
-    # Write to file to verify context was created with enrichment params
-    with open('/tmp/context_debug.txt', 'w') as f:
-        f.write(f"Context enrichment: source={enrichment_source}, table={enrichment_table}, field={enrichment_field}\n")
-    
-        # Debug: Context creation (commented out for production)
-        # print(f"=== API DEBUG: Context created with enrichment: {context.get('enrichment_source')}, {context.get('enrichment_table')}, {context.get('enrichment_field')} ===")
-    
     # Return response from context
     response = context.get('response')
     if isinstance(response, tuple):
@@ -611,6 +572,7 @@ def get_paper(paper_id: str):
     context = stack.execute({
         'endpoint': '/api/papers/<paper_id>',
         'method': 'GET',
+        'connection_factory': create_connection_factory(),
         'paper_id': paper_id
     })
     
@@ -620,17 +582,38 @@ def get_paper(paper_id: str):
         return response[0], response[1]
     return response
 
+@app.route('/api/papers/details', methods=['POST'])
+def get_paper_details_batch():
+    """Get sidebar details for up to MAX_PAPER_DETAILS_BATCH papers in one round-trip.
+    
+    Body: {"ids": ["<uuid>", ...]}. Used by the frontend to prefetch details for
+    hovered or nearby points so clicks render without another request.
+    """
+    stack = InterceptorStack(create_paper_details_batch_endpoint_stack())
+    
+    context = stack.execute({
+        'endpoint': '/api/papers/details',
+        'method': 'POST',
+        'connection_factory': create_connection_factory()
+    })
+    
+    response = context.get('response')
+    if isinstance(response, tuple):
+        return response[0], response[1]
+    return response
+
 @app.route('/api/papers/<paper_id>/details', methods=['GET'])
 def get_paper_details_lazy(paper_id: str):
     """Get detailed paper information for lazy loading (optimized for click responses)."""
     try:
         # Create interceptor stack for this endpoint
-        stack = InterceptorStack(create_paper_detail_endpoint_stack())
+        stack = InterceptorStack(create_paper_sidebar_detail_endpoint_stack())
         
         # Execute with initial context
         context = stack.execute({
-            'endpoint': '/api/papers/<paper_id>',
+            'endpoint': '/api/papers/<paper_id>/details',
             'method': 'GET',
+            'connection_factory': create_connection_factory(),
             'paper_id': paper_id
         })
         
@@ -656,7 +639,11 @@ def get_paper_details_lazy(paper_id: str):
             'doctrove_primary_date': paper_data.get('doctrove_primary_date'),
             'country2': paper_data.get('country2'),
             'doi': paper_data.get('doi'),
-            'links': paper_data.get('doctrove_links')
+            'links': paper_data.get('doctrove_links'),
+            'arxiv_categories': paper_data.get('arxiv_categories'),
+            'arxiv_journal_ref': paper_data.get('arxiv_journal_ref'),
+            'openalex_type': paper_data.get('openalex_type'),
+            'openalex_cited_by_count': paper_data.get('openalex_cited_by_count')
         }
         
         return jsonify(optimized_paper)
@@ -687,13 +674,17 @@ def get_stats():
 def get_max_extent_endpoint():
     """Get the maximum extent (bounding box) of 2D embeddings."""
     try:
-        from business_logic import get_max_extent
+        from business_logic import get_max_extent, resolve_embedding_2d_column
         
         # Get optional SQL filter parameter
         sql_filter = request.args.get('sql_filter', type=str)
+        projection = request.args.get('projection', 'active', type=str)
         
-        # Get max extent
-        extent = get_max_extent(create_connection_factory(), sql_filter=sql_filter)
+        # Get max extent of the requested projection slot
+        connection_factory = create_connection_factory()
+        embedding_2d_column = resolve_embedding_2d_column(projection, connection_factory)
+        extent = get_max_extent(connection_factory, sql_filter=sql_filter,
+                                embedding_2d_column=embedding_2d_column)
         
         if extent:
             return jsonify({
@@ -773,6 +764,89 @@ def system_health_check():
             'error': str(e)
         }), 503
 
+@app.route('/api/debug/traces', methods=['GET', 'POST'])
+def debug_traces():
+    """
+    Recent request-trace events (see request_trace.py).
+
+    GET query parameters: category, request_id, limit (default 100).
+    POST {"categories": [...], "sample_rate": 0.1} changes tracing at runtime;
+    only accepted from the local machine.
+    """
+    if request.method == 'POST':
+        if request.remote_addr not in ('127.0.0.1', '::1'):
+            return jsonify({'error': 'Trace configuration can only be changed from localhost'}), 403
+        data = request.get_json(silent=True) or {}
+        try:
+            categories = data.get('categories')
+            if isinstance(categories, str):
+                categories = [name.strip() for name in categories.split(',') if name.strip()]
+            sample_rate = data.get('sample_rate')
+            config = request_trace.configure(categories, None if sample_rate is None else float(sample_rate))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        logger.info(f"Request tracing reconfigured: categories={config['categories']}, "
+                    f"sample_rate={config['sample_rate']}")
+        return jsonify({'config': config, 'stats': request_trace.stats()})
+    
+    limit = request.args.get('limit', type=int, default=100)
+    traces = request_trace.recent(
+        category=request.args.get('category', type=str),
+        request_id=request.args.get('request_id', type=int),
+        limit=limit
+    )
+    return jsonify({'config': request_trace.config(), 'stats': request_trace.stats(), 'traces': traces})
+
+@app.route('/api/debug/query-plans', methods=['GET', 'POST'])
+def debug_query_plans():
+    """
+    Plan regressions from sampled /api/papers query plans (see plan_capture.py).
+
+    GET query parameters: days (default 7); sample_id returns one stored plan.
+    POST {"sample_rate": 0.05, "slow_ms": 500} changes capture at runtime;
+    only accepted from the local machine.
+    """
+    if request.method == 'POST':
+        if request.remote_addr not in ('127.0.0.1', '::1'):
+            return jsonify({'error': 'Plan capture configuration can only be changed from localhost'}), 403
+        data = request.get_json(silent=True) or {}
+        try:
+            sample_rate, slow_ms = data.get('sample_rate'), data.get('slow_ms')
+            config = plan_capture.configure(None if sample_rate is None else float(sample_rate),
+                                            None if slow_ms is None else float(slow_ms))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        logger.info(f"Plan capture reconfigured: sample_rate={config['sample_rate']}, slow_ms={config['slow_ms']}")
+        return jsonify({'config': config, 'stats': plan_capture.stats()})
+
+    try:
+        sample_id = request.args.get('sample_id', type=int)
+        if sample_id is not None:
+            sample = plan_capture.load_sample(create_connection_factory(), sample_id)
+            if sample is None:
+                return jsonify({'error': f'Plan sample {sample_id} not found'}), 404
+            return jsonify(sample)
+
+        days = request.args.get('days', type=int, default=7)
+        if not 1 <= days <= 365:
+            return jsonify({'error': 'days must be between 1 and 365'}), 400
+        groups = plan_capture.load_plan_groups(create_connection_factory(), days)
+    except psycopg2.errors.UndefinedTable:
+        return jsonify({'error': 'query_plan_samples does not exist; apply '
+                                 'database/migrations/20261018_140000__query_plan_samples.sql'}), 503
+    except Exception as e:
+        logger.error(f"Error loading query plans: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'config': plan_capture.config(),
+        'stats': plan_capture.stats(),
+        'days': days,
+        'templates': len({(group['query_kind'], group['query_hash']) for group in groups}),
+        'plans': len(groups),
+        'regressions': plan_capture.find_regressions(groups),
+    })
+
 @app.route('/api/similarity', methods=['GET'])
 def similarity_search():
     """Search papers by cosine similarity to a text string."""
@@ -787,6 +861,7 @@ def compute_clusters_endpoint():
     """Compute clusters with KMeans, Voronoi polygons, and LLM summaries."""
     try:
         from clustering import compute_clusters
+        from cluster_geometry import POLYGON_ENCODINGS
         
         data = request.get_json()
         if not data:
@@ -812,17 +887,30 @@ def compute_clusters_endpoint():
                 if len(bbox_parts) == 4:
                     bbox = tuple(float(x) for x in bbox_parts)
         
+        # Session / view id: re-clustering after a pan or filter warm-starts from its last centroids
+        lineage = data.get('lineage')
+        if not isinstance(lineage, str) or len(lineage) > 128:
+            lineage = None
+        defer_summaries = data.get('defer_summaries') is True
+        polygon_encoding = data.get('polygon_encoding', 'xy')
+        if polygon_encoding not in POLYGON_ENCODINGS:
+            polygon_encoding = 'xy'
+        
         logger.info(f"Computing {num_clusters} clusters for {len(papers)} papers" + 
                    (f" with bbox {bbox}" if bbox else " without bbox"))
         
         # Compute clusters
-        result = compute_clusters(papers, num_clusters, bbox)
+        result = compute_clusters(papers, num_clusters, bbox, lineage, defer_summaries, polygon_encoding)
         
-        return jsonify({
-            'success': True,
-            'polygons': result.get('polygons', []),
-            'annotations': result.get('annotations', [])
-        })
+        response = {'success': True}
+        if 'geometry' in result:
+            response['geometry'] = result['geometry']
+        else:
+            response['polygons'] = result.get('polygons', [])
+        response['annotations'] = result.get('annotations', [])
+        if result.get('summary_job'):
+            response['summary_job'] = result['summary_job']
+        return jsonify(response)
         
     except ImportError as e:
         logger.error(f"Clustering import error: {e}")
@@ -833,6 +921,64 @@ def compute_clusters_endpoint():
         traceback.print_exc()
         return jsonify({'error': f'Clustering failed: {str(e)}'}), 500
 
+@app.route('/api/clusters/compute', methods=['GET'])
+def compute_clusters_from_query():
+    """
+    Compute clusters over the papers matching /api/papers parameters (sql_filter,
+    bbox, search_text, limit, ...) without the client uploading them.
+    """
+    stack = InterceptorStack(create_clusters_endpoint_stack())
+    
+    context = stack.execute({
+        'endpoint': '/api/clusters/compute',
+        'method': 'GET',
+        'connection_factory': create_connection_factory()
+    })
+    
+    response = context.get('response')
+    if isinstance(response, tuple):
+        return response[0], response[1]
+    return response
+
+@app.route('/api/clusters/tree', methods=['GET'])
+def cluster_tree_nodes():
+    """
+    Precomputed clusters for the current view (bbox, zoom): nodes of the cluster
+    tree level matching the zoom, with stored polygons and labels.
+    """
+    stack = InterceptorStack(create_cluster_tree_endpoint_stack())
+    
+    context = stack.execute({
+        'endpoint': '/api/clusters/tree',
+        'method': 'GET',
+        'connection_factory': create_connection_factory()
+    })
+    
+    response = context.get('response')
+    if isinstance(response, tuple):
+        return response[0], response[1]
+    return response
+
+@app.route('/api/clusters/summaries/<job_id>', methods=['GET'])
+def cluster_summary_job(job_id):
+    """Labels of a /api/clusters/compute call made with defer_summaries; ?wait=<seconds> long-polls."""
+    from summary_cache import get_summary_jobs
+    
+    try:
+        wait = float(request.args.get('wait', '0'))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    job = get_summary_jobs().get(job_id, wait=min(max(wait, 0.0), 30.0))
+    if job is None:
+        return jsonify({'error': f'Unknown summary job: {job_id}'}), 404
+    
+    response = {'success': True, 'job_id': job_id, 'status': job['status']}
+    if job['status'] == 'done':
+        response['annotations'] = job['result']['annotations']
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+    return jsonify(response)
+
 @app.route('/api/clusters/summaries', methods=['POST'])
 def cluster_summaries():
     """Generate cluster summaries using LLM API. Frontend sends titles, backend returns summaries."""
@@ -853,25 +999,10 @@ def cluster_summaries():
         if not isinstance(titles, list) or len(titles) == 0:
             return jsonify({'error': 'Invalid titles format'}), 400
         
-        from clustering import build_llm_prompt, parse_llm_response, get_azure_llm_summaries
+        from clustering import summarize_clusters
         
-        # Build LLM prompt
-        llm_prompt = build_llm_prompt(titles)
-        
-        # Get summaries from LLM
-        try:
-            logger.info(f"Calling LLM API for {len(titles)} clusters")
-            logger.debug(f"LLM prompt length: {len(llm_prompt)} characters")
-            llm_response = get_azure_llm_summaries(llm_prompt)
-            logger.info(f"LLM API response received, length: {len(llm_response)} characters")
-            logger.debug(f"LLM response preview: {llm_response[:200]}")
-            summaries = parse_llm_response(llm_response, len(titles))
-            logger.info(f"Parsed {len(summaries)} summaries")
-        except Exception as e:
-            logger.error(f"LLM API call failed: {e}", exc_info=True)
-            import traceback
-            logger.error(f"Full traceback: {traceback.format_exc()}")
-            summaries = ["Summary unavailable."] * len(titles)
+        # Cached summaries are reused; the rest come from one LLM call
+        summaries = summarize_clusters(titles)
         
         return jsonify({
             'success': True,
@@ -1133,5 +1264,8 @@ if __name__ == '__main__':
         if len(sys.argv) > 2:
             port = int(sys.argv[2])
     
+    # Precompute catalog lookups and keep them current via LISTEN/NOTIFY
+    get_catalog().start()
+    
     print(f"Starting DocTrove API server on port {port}")
     app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
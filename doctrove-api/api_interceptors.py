@@ -4,16 +4,20 @@ These interceptors handle validation, business logic, and error handling for eac
 """
 
 import logging
+import uuid
 from typing import Dict, Any, Optional, Tuple
 from flask import request, jsonify
 from psycopg2.extras import RealDictCursor
 from interceptor import Interceptor
+from db import execute_prepared
+from semantic_planner import apply_index_settings, grow_semantic_plan
+import plan_capture
+import request_trace
 
 # Import our performance interceptor
 from performance_interceptor import (
     log_performance, 
     trace_database_query, 
-    trace_json_serialization,
     performance_context,
     log_timestamp,
     log_duration,
@@ -22,6 +26,34 @@ from performance_interceptor import (
 
 logger = logging.getLogger(__name__)
 
+# Sidebar projection for POST /api/papers/details and GET /api/papers/<id>/details, joined with
+# the source metadata tables. Deliberately excludes doctrove_embedding (1536-d vector) and the
+# 2D columns so a click or prefetch only ships what the sidebar shows.
+# GET /api/papers/<id> keeps returning every column (dp.*).
+PAPER_DETAIL_SELECT = """
+    SELECT dp.doctrove_paper_id,
+           dp.doctrove_source,
+           dp.doctrove_source_id,
+           dp.doctrove_title,
+           dp.doctrove_abstract,
+           dp.doctrove_authors,
+           dp.doctrove_primary_date,
+           dp.doctrove_doi AS doi,
+           dp.doctrove_links,
+           ec.country_name AS country2,
+           am.arxiv_categories,
+           am.arxiv_journal_ref,
+           om.openalex_type,
+           om.openalex_cited_by_count
+    FROM doctrove_papers dp
+    LEFT JOIN arxiv_metadata am ON dp.doctrove_paper_id = am.doctrove_paper_id
+    LEFT JOIN openalex_metadata om ON dp.doctrove_paper_id = om.doctrove_paper_id
+    LEFT JOIN enrichment_country ec ON dp.doctrove_paper_id = ec.doctrove_paper_id
+"""
+
+# Upper bound on ids accepted by POST /api/papers/details
+MAX_PAPER_DETAILS_BATCH = 200
+
 # Validation interceptors
 
 def validate_papers_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
@@ -46,6 +78,15 @@ def validate_papers_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
         # Extract sort control parameter
         disable_sort = request.args.get('disable_sort', 'false').lower() in ['true', '1', 'yes']
         
+        # Extract projection slot: 'active' (live layout) or 'candidate' (blue/green rebuild preview)
+        projection = request.args.get('projection', 'active')
+        
+        # Explicit ivfflat.probes for semantic search (otherwise chosen by the semantic planner)
+        probes = request.args.get('probes', type=int)
+        
+        # Exact rerank of ANN candidates in NumPy for semantic search
+        rerank = request.args.get('rerank', 'false').lower() in ['true', '1', 'yes']
+        
         # CRITICAL FIX: Preserve enrichment parameters from context if they exist
         # This allows symbolization processing to work correctly
         if ctx.get('enrichment_source') is not None:
@@ -88,6 +129,10 @@ def validate_papers_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
         if not is_valid:
             raise ValueError(f"Invalid fields specified: {invalid_fields}")
         
+        # Validate projection slot
+        if projection not in ('active', 'candidate'):
+            raise ValueError(f"Invalid projection: {projection}. Must be 'active' or 'candidate'")
+        
         # Validate similarity threshold
         if not validate_similarity_threshold(similarity_threshold):
             raise ValueError(f"Invalid similarity threshold: {similarity_threshold}. Must be between 0.0 and 1.0")
@@ -132,7 +177,71 @@ def validate_papers_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
         
         # Store sort control parameter
         ctx['disable_sort'] = disable_sort
+        ctx['projection'] = projection
+        ctx['probes'] = probes if probes is not None and 1 <= probes <= 1000 else None
+        ctx['rerank'] = rerank
+        
+        return ctx
         
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
+def validate_clusters_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate parameters for GET /api/clusters/compute (the /api/papers parameters plus num_clusters,
+    lineage, defer_summaries, polygon_encoding)"""
+    from cluster_geometry import POLYGON_ENCODINGS
+    
+    ctx = validate_papers_endpoint_enter(ctx)
+    if 'error' in ctx:
+        return ctx
+    try:
+        num_clusters = request.args.get('num_clusters', '10')
+        if not num_clusters.isdigit() or not 1 <= int(num_clusters) <= 1000:
+            raise ValueError(f"Invalid num_clusters: {num_clusters}. Must be between 1 and 1000")
+        ctx['num_clusters'] = int(num_clusters)
+        lineage = request.args.get('lineage')
+        if lineage is not None and len(lineage) > 128:
+            raise ValueError("Invalid lineage: must be at most 128 characters")
+        ctx['lineage'] = lineage or None
+        ctx['defer_summaries'] = request.args.get('defer_summaries', 'false').lower() in ['true', '1', 'yes']
+        polygon_encoding = request.args.get('polygon_encoding', 'xy')
+        if polygon_encoding not in POLYGON_ENCODINGS:
+            raise ValueError(f"Invalid polygon_encoding: {polygon_encoding}. Must be one of {', '.join(POLYGON_ENCODINGS)}")
+        ctx['polygon_encoding'] = polygon_encoding
+        return ctx
+        
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
+def validate_cluster_tree_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate parameters for GET /api/clusters/tree (bbox, zoom, depth, build_id)"""
+    try:
+        from business_logic import validate_bbox
+        
+        bbox = request.args.get('bbox')
+        if bbox:
+            parsed_bbox = validate_bbox(bbox)
+            if parsed_bbox is None:
+                raise ValueError(f"Invalid bbox format: {bbox}. Expected: x1,y1,x2,y2")
+            ctx['bbox'] = parsed_bbox
+        
+        zoom = request.args.get('zoom')
+        if zoom is not None:
+            try:
+                ctx['zoom'] = float(zoom)
+            except ValueError:
+                raise ValueError(f"Invalid zoom: {zoom}. Must be a number")
+            if not 0 <= ctx['zoom'] <= 30:
+                raise ValueError(f"Invalid zoom: {zoom}. Must be between 0 and 30")
+        
+        for name in ('depth', 'build_id'):
+            value = request.args.get(name)
+            if value is not None:
+                if not value.isdigit() or int(value) < 1:
+                    raise ValueError(f"Invalid {name}: {value}. Must be a positive integer")
+                ctx[name] = int(value)
         return ctx
         
     except Exception as e:
@@ -158,6 +267,51 @@ def validate_paper_detail_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
         ctx['error'] = e
         return ctx
 
+def validate_paper_sidebar_detail_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate parameters for /api/papers/<paper_id>/details endpoint"""
+    try:
+        paper_id = ctx.get('paper_id')
+        try:
+            ctx['paper_ids'] = [str(uuid.UUID(str(paper_id)))]
+        except ValueError:
+            ctx['error'] = ValueError(f"Invalid paper ID: {paper_id}")
+        return ctx
+        
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
+def validate_paper_details_batch_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate JSON body for POST /api/papers/details endpoint"""
+    try:
+        body = request.get_json(silent=True) or {}
+        ids = body.get('ids')
+        if not isinstance(ids, list) or not ids:
+            ctx['error'] = ValueError("'ids' must be a non-empty list of paper IDs")
+            return ctx
+        
+        if len(ids) > MAX_PAPER_DETAILS_BATCH:
+            ctx['error'] = ValueError(f"At most {MAX_PAPER_DETAILS_BATCH} paper IDs may be requested at once")
+            return ctx
+        
+        # Normalise and de-duplicate while keeping request order
+        paper_ids = []
+        for paper_id in ids:
+            try:
+                normalized = str(uuid.UUID(str(paper_id)))
+            except ValueError:
+                ctx['error'] = ValueError(f"Invalid paper ID: {paper_id}")
+                return ctx
+            if normalized not in paper_ids:
+                paper_ids.append(normalized)
+        
+        ctx['paper_ids'] = paper_ids
+        return ctx
+        
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
 def validate_similarity_search_endpoint_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
     """Validate parameters for similarity search"""
     try:
@@ -235,24 +389,46 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
         enrichment_field = ctx.get('enrichment_field')
         disable_sort = ctx.get('disable_sort', False)
         
-        # Debug: Enrichment params from context (commented out for production)
-        # print(f"=== INTERCEPTOR DEBUG: Enrichment params from context: source={enrichment_source}, table={enrichment_table}, field={enrichment_field} ===")
-        
-        # Write to file to verify enrichment params in interceptor
-        with open('/tmp/interceptor_enrichment.txt', 'w') as f:
-            f.write(f"Interceptor enrichment: source={enrichment_source}, table={enrichment_table}, field={enrichment_field}\n")
+        # Resolve which 2D projection slot to serve (cached; flips atomically after a blue/green rebuild)
+        from business_logic import resolve_embedding_2d_column
+        embedding_2d_column = resolve_embedding_2d_column(ctx.get('projection', 'active'), connection_factory)
         
-        # Debug: Check what's actually in the context
-        with open('/tmp/context_keys.txt', 'w') as f:
-            f.write(f"Context keys: {list(ctx.keys())}\n")
-            f.write(f"Context enrichment_source: {ctx.get('enrichment_source')}\n")
-            f.write(f"Context enrichment_table: {ctx.get('enrichment_table')}\n")
-            f.write(f"Context enrichment_field: {ctx.get('enrichment_field')}\n")
+        if request_trace.enabled('enrichment'):
+            request_trace.trace('enrichment', 'fetch_papers_params', source=enrichment_source,
+                                table=enrichment_table, field=enrichment_field, context_keys=sorted(ctx))
         
         # Build query using business logic
-        from business_logic import build_optimized_query_v2, build_count_query_v2
+        from business_logic import build_optimized_query_v2, build_count_query_v2, plan_semantic_search
         import time
         
+        # Semantic search: pick ANN-first / filter-first / iterative and the index parameters
+        probes_override = ctx.get('probes')
+        rerank = bool(ctx.get('rerank') and search_text)
+        semantic_plan = None
+        if search_text:
+            semantic_plan = plan_semantic_search(connection_factory, sql_filter, bbox, limit, probes_override)
+        
+        def build_main_query(plan):
+            return build_optimized_query_v2(
+                fields=fields,
+                sql_filter=sql_filter,
+                bbox=bbox,
+                embedding_type=embedding_type,
+                limit=limit,
+                offset=offset,
+                sort_field=sort_field,
+                search_text=search_text,
+                similarity_threshold=similarity_threshold,
+                target_count=target_count,
+                enrichment_source=enrichment_source,
+                enrichment_table=enrichment_table,
+                enrichment_field=enrichment_field,
+                disable_sort=disable_sort,
+                embedding_2d_column=embedding_2d_column,
+                semantic_plan=plan,
+                rerank=rerank
+            )
+        
         # Debug: About to call build_optimized_query_v2 (commented out for production)
         # print(f"=== INTERCEPTOR DEBUG: About to call build_optimized_query_v2 ===")
         # print(f"=== INTERCEPTOR DEBUG: fields: {fields} ===")
@@ -270,36 +446,16 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"About to call build_optimized_query_v2 with bbox: {bbox}")
                 logger.debug(f"bbox type: {type(bbox)}")
-            query, params, warnings = build_optimized_query_v2(
-                fields=fields,
-                sql_filter=sql_filter,
-                bbox=bbox,
-                embedding_type=embedding_type,
-                limit=limit,
-                offset=offset,
-                sort_field=sort_field,
-                search_text=search_text,
-                similarity_threshold=similarity_threshold,
-                target_count=target_count,
-                enrichment_source=enrichment_source,
-                enrichment_table=enrichment_table,
-                enrichment_field=enrichment_field,
-                disable_sort=disable_sort
-            )
+            query, params, warnings = build_main_query(semantic_plan)
+            if not any(w.startswith('SEMANTIC_SEARCH_POST_PROCESSING') for w in warnings):
+                # search_text was dropped (embedding failed or already in sql_filter): nothing to plan
+                semantic_plan = None
+                rerank = False
             
-            # Log the generated SQL query to file for debugging
-            import time
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-            with open("/tmp/backend_sql_queries.log", "a") as f:
-                f.write(f"\n=== BACKEND SQL QUERY at {timestamp} ===\n")
-                f.write(f"Search text: {search_text}\n")
-                f.write(f"Similarity threshold: {similarity_threshold}\n")
-                f.write(f"SQL filter: {sql_filter}\n")
-                f.write(f"Limit: {limit}\n")
-                f.write(f"Generated SQL:\n{query}\n")
-                f.write(f"Parameters: {params}\n")
-                f.write(f"Warnings: {warnings}\n")
-                f.write("=" * 50 + "\n")
+            # Parameters are compacted by the tracer (a query vector is a ~20k-character literal)
+            request_trace.trace('sql', 'papers_query', search_text=search_text,
+                                similarity_threshold=similarity_threshold, sql_filter=sql_filter,
+                                limit=limit, query=query, params=params, warnings=warnings)
             
             # Debug: Successfully built query (only if debug enabled)
             if logger.isEnabledFor(logging.DEBUG):
@@ -326,11 +482,13 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
                 similarity_threshold=similarity_threshold,
                 enrichment_source=enrichment_source,
                 enrichment_table=enrichment_table,
-                enrichment_field=enrichment_field
+                enrichment_field=enrichment_field,
+                embedding_2d_column=embedding_2d_column
             )
         warnings += count_warnings
         
         # Execute queries with performance tracing
+        plan_sampled = plan_capture.sample_request()
         with performance_context("database_execution") as perf_ctx:
             query_start_time = time.time()
             count_query_start_time = None
@@ -351,17 +509,18 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
                 
                 # Execute main query
                 with conn.cursor() as cur:
+                    if semantic_plan:
+                        apply_index_settings(cur, semantic_plan)
                     if params:
                         try:
                             # Convert list to tuple to avoid psycopg2 issues
                             params_tuple = tuple(params)
-                            # DEBUG: Log parameter details
-                            logger.error(f"🔍 EXEC DEBUG: params_tuple length: {len(params_tuple)}")
-                            logger.error(f"🔍 EXEC DEBUG: params_tuple types: {[type(p) for p in params_tuple]}")
-                            logger.error(f"🔍 EXEC DEBUG: params_tuple[0] length: {len(params_tuple[0]) if isinstance(params_tuple[0], str) else 'N/A'}")
-                            if len(params_tuple) > 1:
-                                logger.error(f"🔍 EXEC DEBUG: params_tuple[1] length: {len(params_tuple[1]) if isinstance(params_tuple[1], str) else 'N/A'}")
-                            cur.execute(query, params_tuple)
+                            if request_trace.enabled('exec'):
+                                request_trace.trace('exec', 'bind_params', count=len(params_tuple),
+                                                    types=[type(p).__name__ for p in params_tuple],
+                                                    lengths=[len(p) if isinstance(p, str) else None for p in params_tuple])
+                            # Same template on the same pooled connection -> server-side prepared plan
+                            execute_prepared(cur, query, params_tuple)
                         except IndexError as e:
                             logger.error(f"IndexError with params: {e}")
                             logger.error(f"Query: {query}")
@@ -370,15 +529,69 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
                         cur.execute(query)
                         
                     results = cur.fetchall()
+                    
+                    # Iterative plans: too few candidates passed the filters, retry with a larger k
+                    while semantic_plan and len(results) < limit:
+                        next_plan = grow_semantic_plan(semantic_plan, probes_override)
+                        if next_plan is None:
+                            break
+                        logger.info(f"Semantic plan round {semantic_plan.round} returned {len(results)} < {limit} rows, "
+                                    f"retrying with k={next_plan.candidates:,}")
+                        semantic_plan = next_plan
+                        query, params, _ = build_main_query(semantic_plan)
+                        apply_index_settings(cur, semantic_plan)
+                        execute_prepared(cur, query, tuple(params))
+                        results = cur.fetchall()
+                    
+                    if semantic_plan:
+                        logger.info(f"Semantic plan {semantic_plan.strategy} executed in "
+                                    f"{(time.time() - query_start_time) * 1000:.1f}ms: {len(results)} rows "
+                                    f"over {semantic_plan.round} round(s) (planned in {semantic_plan.planning_ms:.1f}ms)")
                     log_timestamp(f"Main query completed, got {len(results)} results", "database")
                     
+                    rerank_passed = 0
+                    if rerank:
+                        # Exact rerank: score candidate vectors in NumPy, then fetch fields for the winners only
+                        rerank_start_time = time.time()
+                        from business_logic import (
+                            get_embedding_for_text, decode_vector_binary, exact_rerank, build_papers_by_id_query
+                        )
+                        candidate_count = len(results)
+                        top_ids, top_scores, rerank_passed = exact_rerank(
+                            [row[0] for row in results],
+                            decode_vector_binary([row[1] for row in results]),
+                            get_embedding_for_text(search_text, 'doctrove'),
+                            similarity_threshold, limit, offset
+                        )
+                        # Papers are looked up by id; drop the id column again if it was not requested
+                        skip_id = 0 if 'doctrove_paper_id' in fields else 1
+                        details_query, details_params = build_papers_by_id_query(
+                            ['doctrove_paper_id'] * skip_id + fields, top_ids,
+                            enrichment_table, enrichment_field, embedding_2d_column
+                        )
+                        execute_prepared(cur, details_query, tuple(details_params))
+                        id_index = [desc[0] for desc in cur.description].index('doctrove_paper_id')
+                        rows_by_id = {row[id_index]: row[skip_id:] for row in cur.fetchall()}
+                        results = [rows_by_id[paper_id] + (float(score),)
+                                   for paper_id, score in zip(top_ids, top_scores) if paper_id in rows_by_id]
+                        logger.info(f"Exact rerank: {candidate_count} candidates → {rerank_passed} over threshold "
+                                    f"{similarity_threshold} → {len(results)} returned in "
+                                    f"{(time.time() - rerank_start_time) * 1000:.1f}ms")
+                    
                     # CRITICAL: Capture column names while cursor is still active
-                    column_names = [desc[0] for desc in cur.description]
+                    column_names = [desc[0] for desc in cur.description][skip_id if rerank else 0:]
+                    if rerank:
+                        column_names.append('similarity_score')
                     if logger.isEnabledFor(logging.DEBUG):
                         logger.debug(f"Column names captured: {column_names}")
                     
                     query_execution_time = (time.time() - query_start_time) * 1000
                     log_duration(query_start_time, "main_query_execution")
+                    
+                    # Sampled or slow: EXPLAIN on this connection (plan only) for query_plan_samples
+                    plan_capture.capture(cur, query, tuple(params or ()), query_execution_time, 'papers',
+                                         connection_factory, plan_sampled,
+                                         semantic_strategy=semantic_plan.strategy if semantic_plan else None)
                 
                 # Execute count query with a fresh cursor (skip for similarity)
                 try:
@@ -447,42 +660,31 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
                                     ctx['total_count_is_estimate'] = True
                             count_query_execution_time = (time.time() - count_query_start_time) * 1000
                             log_duration(count_query_start_time, "count_query_execution")
-                        
-                        # 🔍 DEBUG: Log count query completion time
-                        logger.info(f"🔍 COUNT_QUERY_DEBUG: Count query completed in {count_query_execution_time:.2f}ms")
+                            if not ctx['total_count_is_estimate']:
+                                plan_capture.capture(count_cur, count_query, tuple(count_params or ()),
+                                                     count_query_execution_time, 'count', connection_factory,
+                                                     plan_sampled)
                         
                 except Exception as e:
                     logger.error(f"Count query failed: {e}")
                     raise
         
-        # 🔍 DEBUG: Log timing after count query
         after_count_time = time.time()
-        logger.info(f"🔍 TIMING_DEBUG: After count query: {after_count_time:.6f}s")
+        semantic_processing_time = None
+        embeddings_processing_time = None
         
         # Results are tuples with regular cursor - convert to dictionaries
         with performance_context("results_processing") as perf_ctx:
             log_timestamp("Starting results processing", "results")
-            results_start_time = time.time()  # 🔍 DEBUG: Track results processing start
+            results_start_time = time.time()
 
             try:
                 # Since we're using regular cursor, results are tuples
                 # We need to convert them to dictionaries using column names
                 # Column names were captured earlier while cursor was active
-
-                logger.info(f"🔍 RESULTS_DEBUG: Starting to process {len(results)} results")
-                
-                results_list = []
-                for i, result in enumerate(results):
-                    # 🔍 DEBUG: Log progress every 1000 results
-                    if i % 1000 == 0:
-                        logger.info(f"🔍 RESULTS_DEBUG: Processing result {i}/{len(results)}")
-                    
-                    # Convert tuple to dict using column names
-                    result_dict = dict(zip(column_names, result))
-                    results_list.append(result_dict)
+                results_list = [dict(zip(column_names, result)) for result in results]
                 
                 results_processing_time = (time.time() - results_start_time) * 1000
-                logger.info(f"🔍 RESULTS_DEBUG: Results processing completed in {results_processing_time:.2f}ms")
                 log_timestamp(f"Results converted to {len(results_list)} dictionaries", "results")
 
             except Exception as e:
@@ -490,9 +692,13 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
                 raise
         
         # SEMANTIC SEARCH POST-PROCESSING: Calculate similarity scores and apply threshold filtering
-        if search_text and similarity_threshold > 0.0:
+        if rerank:
+            # Already thresholded, ranked and paged by exact_rerank
+            total_count = rerank_passed
+            ctx['total_count_is_estimate'] = True
+        elif search_text and similarity_threshold > 0.0:
             log_timestamp("Starting semantic search post-processing", "semantic_filtering")
-            semantic_start_time = time.time()  # 🔍 DEBUG: Track semantic processing start
+            semantic_start_time = time.time()
             
             # Get embedding for similarity calculation
             from business_logic import get_embedding_for_text
@@ -503,25 +709,16 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
                 original_count = len(results_list)
                 filtered_results = []
                 
-                logger.info(f"🔍 SEMANTIC_DEBUG: Starting similarity calculation for {original_count} results")
-                
-                for i, result in enumerate(results_list):
-                    # 🔍 DEBUG: Log progress every 1000 results
-                    if i % 1000 == 0:
-                        logger.info(f"🔍 SEMANTIC_DEBUG: Processing result {i}/{original_count}")
-                    
-                    # Use the similarity score already calculated by SQL
+                for result in results_list:
+                    # Use the similarity score already calculated by SQL; results without one are skipped
                     if 'similarity_score' in result and result['similarity_score'] is not None:
                         similarity_score = float(result['similarity_score'])
                         
                         # Filter by threshold
                         if similarity_score >= similarity_threshold:
                             filtered_results.append(result)
-                    else:
-                        # Skip results without similarity scores
-                        logger.debug(f"🔍 SEMANTIC_DEBUG: Skipping result {i} - no similarity_score available")
             else:
-                logger.warning("🔍 SEMANTIC_DEBUG: Failed to get embedding for search text, skipping similarity calculation")
+                logger.warning("Failed to get embedding for search text, skipping similarity calculation")
                 filtered_results = results_list
             
             # Apply the original limit after threshold filtering
@@ -529,7 +726,6 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
             final_results = filtered_results[:limit]
             
             semantic_processing_time = (time.time() - semantic_start_time) * 1000
-            logger.info(f"🔍 SEMANTIC_DEBUG: Semantic processing completed in {semantic_processing_time:.2f}ms")
             
             log_timestamp(f"Filtered {original_count} → {len(filtered_results)} → {len(final_results)} (threshold: {similarity_threshold}, limit: {limit})", "semantic_filtering")
             results_list = final_results
@@ -537,7 +733,6 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
             # Update total count to be more accurate for semantic search
             total_count = len(filtered_results)  # More accurate count after filtering
         else:
-            logger.info(f"🔍 SEMANTIC_DEBUG: No semantic search processing needed")
             # Fallback: if no count was performed or it's zero but we have results, use returned size
             if (not count_query or total_count == 0) and results_list:
                 total_count = len(results_list)
@@ -545,14 +740,9 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
         
         # Process embeddings
         try:
-            embeddings_start_time = time.time()  # 🔍 DEBUG: Track embeddings processing start
-            logger.info(f"🔍 EMBEDDINGS_DEBUG: Starting embeddings processing for {len(results_list)} results")
+            embeddings_start_time = time.time()
             
-            for i, result in enumerate(results_list):
-                # 🔍 DEBUG: Log progress every 1000 results
-                if i % 1000 == 0:
-                    logger.info(f"🔍 EMBEDDINGS_DEBUG: Processing result {i}/{len(results_list)}")
-                    
+            for result in results_list:
                 embedding_key = 'doctrove_embedding_2d'
                 if result.get(embedding_key):
                     from enrichment import parse_embedding_string
@@ -561,16 +751,11 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
                         result[embedding_key] = parsed_embedding.tolist()
             
             embeddings_processing_time = (time.time() - embeddings_start_time) * 1000
-            logger.info(f"🔍 EMBEDDINGS_DEBUG: Embeddings processing completed in {embeddings_processing_time:.2f}ms")
             
         except Exception as e:
             logger.error(f"Error processing embeddings: {e}")
             raise
         
-        # 🔍 DEBUG: Log timing before context setting
-        before_context_time = time.time()
-        logger.info(f"🔍 TIMING_DEBUG: Before context setting: {before_context_time:.6f}s")
-        
         ctx['results'] = results_list
         ctx['total_count'] = total_count
         ctx['warnings'] = warnings
@@ -579,17 +764,13 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
         ctx['query_execution_time_ms'] = round(query_execution_time, 2)
         ctx['count_query_execution_time_ms'] = round(count_query_execution_time, 2)
         
-        # 🔍 DEBUG: Log timing after context setting
-        after_context_time = time.time()
-        logger.info(f"🔍 TIMING_DEBUG: After context setting: {after_context_time:.6f}s")
-        
-        # 🔍 DEBUG: Log total time breakdown
-        total_api_time = (after_context_time - after_count_time) * 1000
-        logger.info(f"🔍 TIMING_DEBUG: Total API processing time (after count query): {total_api_time:.2f}ms")
-        logger.info(f"🔍 TIMING_DEBUG: Breakdown - Results: {results_processing_time:.2f}ms, Semantic: {semantic_processing_time if 'semantic_processing_time' in locals() else 'N/A'}ms, Embeddings: {embeddings_processing_time if 'embeddings_processing_time' in locals() else 'N/A'}ms")
-        
-        # fetch_papers_interceptor completed successfully
-        logger.info(f"🔍 TIMING_DEBUG: fetch_papers_interceptor completed successfully")
+        request_trace.trace('timing', 'fetch_papers', result_count=len(results_list),
+                            query_ms=round(query_execution_time, 2),
+                            count_query_ms=round(count_query_execution_time, 2),
+                            results_ms=round(results_processing_time, 2),
+                            semantic_ms=None if semantic_processing_time is None else round(semantic_processing_time, 2),
+                            embeddings_ms=None if embeddings_processing_time is None else round(embeddings_processing_time, 2),
+                            post_query_ms=round((time.time() - after_count_time) * 1000, 2))
         return ctx
         
     except Exception as e:
@@ -600,6 +781,138 @@ def fetch_papers_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
         ctx['context'] = 'fetch_papers_interceptor'
         return ctx
 
+def fetch_cluster_points_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch ids and 2D coordinates of the papers /api/papers would return, as NumPy arrays"""
+    try:
+        connection_factory = ctx.get('connection_factory')
+        if not connection_factory:
+            ctx['error'] = RuntimeError("Database connection factory not available")
+            return ctx
+        
+        from business_logic import (
+            build_optimized_query_v2, build_cluster_points_query, plan_semantic_search, resolve_embedding_2d_column
+        )
+        import numpy as np
+        
+        search_text = ctx.get('search_text')
+        sql_filter = ctx.get('sql_filter')
+        bbox = ctx.get('bbox')
+        limit = ctx.get('limit', 5000)
+        similarity_threshold = ctx.get('similarity_threshold', 0.0)
+        
+        semantic_plan = None
+        if search_text:
+            semantic_plan = plan_semantic_search(connection_factory, sql_filter, bbox, limit, ctx.get('probes'))
+        
+        # Same selection as /api/papers; titles are looked up later for the sampled representatives only
+        query, params, warnings = build_optimized_query_v2(
+            fields=['doctrove_paper_id', 'doctrove_embedding_2d'],
+            sql_filter=sql_filter,
+            bbox=bbox,
+            embedding_type=ctx.get('embedding_type', 'doctrove'),
+            limit=limit,
+            offset=ctx.get('offset', 0),
+            search_text=search_text,
+            similarity_threshold=similarity_threshold,
+            target_count=ctx.get('target_count'),
+            disable_sort=ctx.get('disable_sort', False),
+            embedding_2d_column=resolve_embedding_2d_column(ctx.get('projection', 'active'), connection_factory),
+            semantic_plan=semantic_plan
+        )
+        semantic = any(w.startswith('SEMANTIC_SEARCH_POST_PROCESSING') for w in warnings)
+        query, params = build_cluster_points_query(query, params, similarity_threshold if semantic else 0.0, limit)
+        request_trace.trace('sql', 'cluster_points_query', query=query, params=params, warnings=warnings)
+        
+        with connection_factory() as conn:
+            with conn.cursor() as cur:
+                if semantic and semantic_plan:
+                    apply_index_settings(cur, semantic_plan)
+                execute_prepared(cur, query, tuple(params))
+                rows = cur.fetchall()
+        
+        ctx['paper_ids'] = [row[0] for row in rows]
+        ctx['coords'] = np.array([row[1:] for row in rows], dtype=float).reshape(-1, 2)
+        ctx['warnings'] = warnings
+        return ctx
+        
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
+def compute_clusters_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Cluster the fetched coordinates; titles are fetched for the sampled representatives only"""
+    try:
+        from clustering import cluster_points
+        from business_logic import build_papers_by_id_query
+        
+        connection_factory = ctx['connection_factory']
+        paper_ids = ctx['paper_ids']
+        
+        def titles_for(samples):
+            sampled_ids = list({paper_ids[idx] for indices in samples for idx in indices})
+            query, params = build_papers_by_id_query(['doctrove_paper_id', 'doctrove_title'], sampled_ids)
+            with connection_factory() as conn:
+                with conn.cursor() as cur:
+                    execute_prepared(cur, query, tuple(params))
+                    title_by_id = dict(cur.fetchall())
+            return [[title_by_id.get(paper_ids[idx]) for idx in indices] for indices in samples]
+        
+        ctx['clusters'] = cluster_points(ctx['coords'], ctx['num_clusters'], ctx.get('bbox'), titles_for,
+                                         ctx.get('lineage'), ctx.get('defer_summaries', False),
+                                         ctx.get('polygon_encoding', 'xy'))
+        return ctx
+        
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
+def fetch_cluster_tree_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch the precomputed cluster tree nodes visible at the requested bbox and zoom"""
+    try:
+        from business_logic import resolve_embedding_2d_column
+        from cluster_tree import build_tree_build_query, build_tree_nodes_query, depth_for_zoom, zoom_for_bbox
+        
+        connection_factory = ctx['connection_factory']
+        bbox = ctx.get('bbox')
+        active_column = resolve_embedding_2d_column('active', connection_factory)
+        
+        with connection_factory() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(*build_tree_build_query(ctx.get('build_id')))
+                build = cur.fetchone()
+                if build is None:
+                    ctx['error'] = LookupError(
+                        f"Cluster tree build {ctx['build_id']} not found" if ctx.get('build_id')
+                        else "No active cluster tree; run cluster_tree.py build")
+                    return ctx
+                
+                # Polygons are in the coordinate space of the slot the tree was built on
+                if build['embedding_2d_column'] != active_column:
+                    ctx['error'] = LookupError(
+                        f"Cluster tree build {build['build_id']} was built on {build['embedding_2d_column']} "
+                        f"but the active projection is {active_column}; rebuild required "
+                        f"(python cluster_tree.py build)")
+                    return ctx
+                
+                zoom = ctx.get('zoom')
+                if zoom is None:
+                    zoom = zoom_for_bbox(bbox, (build['x_min'], build['x_max'], build['y_min'], build['y_max']))
+                depth = min(ctx.get('depth') or depth_for_zoom(zoom, build['branching'], build['max_depth']),
+                            build['max_depth'])
+                
+                query, params = build_tree_nodes_query(build['build_id'], depth, bbox)
+                cur.execute(query, params)
+                ctx['tree_nodes'] = cur.fetchall()
+        
+        ctx['tree_build'] = dict(build)
+        ctx['tree_depth'] = depth
+        ctx['tree_zoom'] = zoom
+        return ctx
+        
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
 def fetch_paper_detail_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
     """Fetch specific paper details from database"""
     try:
@@ -631,62 +944,48 @@ def fetch_paper_detail_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
         ctx['error'] = e
         return ctx
 
-def fetch_stats_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
-    """Fetch database statistics"""
+def fetch_paper_details_batch_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch sidebar details for several papers in one round-trip"""
     try:
         connection_factory = ctx.get('connection_factory')
         if not connection_factory:
             ctx['error'] = RuntimeError("Database connection factory not available")
             return ctx
         
+        paper_ids = ctx.get('paper_ids', [])
+        
         with connection_factory() as conn:
-            with conn.cursor() as cur:
-                # Get total papers count
-                cur.execute("SELECT COUNT(*) as total_papers FROM doctrove_papers")
-                total_papers_result = cur.fetchone()
-                if total_papers_result is None:
-                    total_papers = 0
-                else:
-                    # Since we're using regular cursor, result is a tuple
-                    total_papers = total_papers_result[0]  # First column is total_papers
-                
-                # Get papers with embeddings
-                cur.execute("""
-                    SELECT 
-                        COUNT(*) as papers_with_embeddings
-                    FROM doctrove_papers
-                    WHERE doctrove_embedding_2d IS NOT NULL
-                """)
-                embedding_stats = cur.fetchone()
-                
-                # Get source distribution - OPTIMIZED: Use individual COUNT queries instead of GROUP BY
-                # This avoids the expensive GROUP BY operation that scans the entire table
-                source_distribution = []
-                known_sources = ['openalex', 'randpub', 'extpub', 'aipickle', 'arxiv']  # Known sources from our data
-                
-                for source in known_sources:
-                    cur.execute("""
-                        SELECT COUNT(*) as count
-                        FROM doctrove_papers
-                        WHERE doctrove_source = %s
-                    """, (source,))
-                    source_count = cur.fetchone()
-                    if source_count and source_count[0] > 0:
-                        source_distribution.append({
-                            'doctrove_source': source,
-                            'count': source_count[0]
-                        })
-                
-                # Sort by count descending to maintain the same API response format
-                source_distribution.sort(key=lambda x: x['count'], reverse=True)
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(PAPER_DETAIL_SELECT + " WHERE dp.doctrove_paper_id = ANY(%s::uuid[])", (paper_ids,))
+                rows = cur.fetchall()
         
-        stats = {
-            'total_papers': total_papers,
-            'papers_with_embeddings': embedding_stats[0] if embedding_stats else 0,  # First column
-            'source_distribution': source_distribution
-        }
+        by_id = {str(row['doctrove_paper_id']): dict(row) for row in rows}
+        ctx['papers'] = [by_id[paper_id] for paper_id in paper_ids if paper_id in by_id]
+        ctx['missing_ids'] = [paper_id for paper_id in paper_ids if paper_id not in by_id]
+        return ctx
         
-        ctx['stats'] = stats
+    except Exception as e:
+        ctx['error'] = e
+        return ctx
+
+def fetch_paper_sidebar_detail_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch the sidebar projection of one paper (the batch query with a single id)"""
+    ctx = fetch_paper_details_batch_interceptor(ctx)
+    if 'error' in ctx:
+        return ctx
+    
+    if not ctx['papers']:
+        ctx['error'] = ValueError(f"Paper with ID {ctx['paper_id']} not found")
+        return ctx
+    
+    ctx['paper'] = ctx['papers'][0]
+    return ctx
+
+def fetch_stats_interceptor(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch database statistics from the catalog cache (refreshed on schedule or NOTIFY)"""
+    try:
+        from catalog import get_catalog
+        ctx['stats'] = get_catalog().stats()
         return ctx
         
     except Exception as e:
@@ -700,8 +999,7 @@ def format_papers_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
     """Format papers response"""
     import time
     
-    response_start_time = time.time()  # 🔍 DEBUG: Track response formatting start
-    logger.info(f"🔍 RESPONSE_DEBUG: Starting response formatting")
+    response_start_time = time.time()
     
     results = ctx.get('results', [])
     total_count = ctx.get('total_count', 0)
@@ -711,8 +1009,6 @@ def format_papers_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
     query_execution_time_ms = ctx.get('query_execution_time_ms', 0)
     count_query_execution_time_ms = ctx.get('count_query_execution_time_ms', 0)
     
-    logger.info(f"🔍 RESPONSE_DEBUG: Formatting response for {len(results)} results, total_count: {total_count}")
-    
     # Calculate total execution time
     total_execution_time = query_execution_time_ms + count_query_execution_time_ms
     
@@ -730,22 +1026,10 @@ def format_papers_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
         'count_query_execution_time_ms': count_query_execution_time_ms
     }
     
-    logger.info(f"🔍 RESPONSE_DEBUG: Response data structure created")
-    
-    # Trace JSON serialization
-    json_start_time = time.time()  # 🔍 DEBUG: Track JSON serialization start
-    logger.info(f"🔍 RESPONSE_DEBUG: Starting JSON serialization")
-    
-    with trace_json_serialization(response_data, "papers_response"):
-        pass  # Context manager just for timing
-    
-    json_serialization_time = (time.time() - json_start_time) * 1000
-    logger.info(f"🔍 RESPONSE_DEBUG: JSON serialization completed in {json_serialization_time:.2f}ms")
-    
     ctx['response'] = jsonify(response_data)
     
-    response_formatting_time = (time.time() - response_start_time) * 1000
-    logger.info(f"🔍 RESPONSE_DEBUG: Response formatting completed in {response_formatting_time:.2f}ms")
+    request_trace.trace('timing', 'format_papers_response', result_count=len(results), total_count=total_count,
+                        formatting_ms=round((time.time() - response_start_time) * 1000, 2))
     
     log_timestamp("Response formatting completed", "response_formatting")
     
@@ -763,12 +1047,69 @@ def format_papers_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
     
     return ctx
 
+def format_clusters_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Format server-side clustering response (same shape as POST /api/clusters/compute)"""
+    clusters = ctx.get('clusters', {})
+    response = {'success': True}
+    if 'geometry' in clusters:
+        response['geometry'] = clusters['geometry']
+    else:
+        response['polygons'] = clusters.get('polygons', [])
+    response.update({
+        'annotations': clusters.get('annotations', []),
+        'point_count': len(ctx.get('paper_ids', [])),
+        'warnings': ctx.get('warnings', [])
+    })
+    if clusters.get('summary_job'):
+        response['summary_job'] = clusters['summary_job']
+    ctx['response'] = jsonify(response)
+    return ctx
+
+def format_cluster_tree_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Format cluster tree nodes as an overlay (polygons and annotations, like /api/clusters/compute)"""
+    from clustering import clean_summary, smart_wrap
+    
+    build = ctx.get('tree_build', {})
+    nodes = ctx.get('tree_nodes', [])
+    ctx['response'] = jsonify({
+        'success': True,
+        'build_id': build.get('build_id'),
+        'built_at': build['built_at'].isoformat() if build.get('built_at') else None,
+        'depth': ctx.get('tree_depth'),
+        'max_depth': build.get('max_depth'),
+        'zoom': ctx.get('tree_zoom'),
+        'polygons': [{'x': node['polygon_x'], 'y': node['polygon_y']} for node in nodes],
+        'annotations': [
+            {'x': node['center_x'], 'y': node['center_y'], 'text': smart_wrap(clean_summary(node['label']))}
+            for node in nodes if node['label']
+        ],
+        'nodes': [
+            {
+                'node_id': node['node_id'],
+                'parent_id': node['parent_id'],
+                'depth': node['depth'],
+                'point_count': node['point_count'],
+                'label': node['label']
+            }
+            for node in nodes
+        ]
+    })
+    return ctx
+
 def format_paper_detail_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
     """Format paper detail response"""
     paper = ctx.get('paper')
     ctx['response'] = jsonify(paper)
     return ctx
 
+def format_paper_details_batch_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Format batched paper details response"""
+    ctx['response'] = jsonify({
+        'papers': ctx.get('papers', []),
+        'missing': ctx.get('missing_ids', [])
+    })
+    return ctx
+
 def format_stats_response_leave(ctx: Dict[str, Any]) -> Dict[str, Any]:
     """Format stats response"""
     stats = ctx.get('stats')
@@ -879,6 +1220,43 @@ def create_papers_endpoint_stack() -> list[Interceptor]:
         Interceptor(error=handle_general_error_error)
     ]
 
+def create_clusters_endpoint_stack() -> list[Interceptor]:
+    """Create interceptor stack for GET /api/clusters/compute (server-side clustering)"""
+    from interceptor import (
+        log_request_enter, log_request_leave, log_error,
+        timing_enter, timing_leave, setup_database_enter,
+        cleanup_database_leave
+    )
+    
+    return [
+        Interceptor(enter=log_request_enter, leave=log_request_leave, error=log_error),
+        Interceptor(enter=timing_enter, leave=timing_leave),
+        Interceptor(enter=setup_database_enter, leave=cleanup_database_leave),
+        Interceptor(enter=validate_clusters_endpoint_enter, error=handle_validation_error_error),
+        Interceptor(enter=fetch_cluster_points_interceptor, error=handle_database_error_error),
+        Interceptor(enter=compute_clusters_interceptor, error=handle_general_error_error),
+        Interceptor(leave=format_clusters_response_leave),
+        Interceptor(error=handle_general_error_error)
+    ]
+
+def create_cluster_tree_endpoint_stack() -> list[Interceptor]:
+    """Create interceptor stack for GET /api/clusters/tree (precomputed multi-scale clusters)"""
+    from interceptor import (
+        log_request_enter, log_request_leave, log_error,
+        timing_enter, timing_leave, setup_database_enter,
+        cleanup_database_leave
+    )
+    
+    return [
+        Interceptor(enter=log_request_enter, leave=log_request_leave, error=log_error),
+        Interceptor(enter=timing_enter, leave=timing_leave),
+        Interceptor(enter=setup_database_enter, leave=cleanup_database_leave),
+        Interceptor(enter=validate_cluster_tree_endpoint_enter, error=handle_validation_error_error),
+        Interceptor(enter=fetch_cluster_tree_interceptor, error=handle_not_found_error_error),
+        Interceptor(leave=format_cluster_tree_response_leave),
+        Interceptor(error=handle_general_error_error)
+    ]
+
 def create_paper_detail_endpoint_stack() -> list[Interceptor]:
     """Create interceptor stack for /api/papers/<paper_id> endpoint"""
     from interceptor import (
@@ -897,6 +1275,42 @@ def create_paper_detail_endpoint_stack() -> list[Interceptor]:
         Interceptor(error=handle_general_error_error)
     ]
 
+def create_paper_sidebar_detail_endpoint_stack() -> list[Interceptor]:
+    """Create interceptor stack for /api/papers/<paper_id>/details endpoint"""
+    from interceptor import (
+        log_request_enter, log_request_leave, log_error,
+        timing_enter, timing_leave, setup_database_enter,
+        cleanup_database_leave
+    )
+    
+    return [
+        Interceptor(enter=log_request_enter, leave=log_request_leave, error=log_error),
+        Interceptor(enter=timing_enter, leave=timing_leave),
+        Interceptor(enter=setup_database_enter, leave=cleanup_database_leave),
+        Interceptor(enter=validate_paper_sidebar_detail_endpoint_enter, error=handle_validation_error_error),
+        Interceptor(enter=fetch_paper_sidebar_detail_interceptor, error=handle_not_found_error_error),
+        Interceptor(leave=format_paper_detail_response_leave),
+        Interceptor(error=handle_general_error_error)
+    ]
+
+def create_paper_details_batch_endpoint_stack() -> list[Interceptor]:
+    """Create interceptor stack for POST /api/papers/details endpoint"""
+    from interceptor import (
+        log_request_enter, log_request_leave, log_error,
+        timing_enter, timing_leave, setup_database_enter,
+        cleanup_database_leave
+    )
+    
+    return [
+        Interceptor(enter=log_request_enter, leave=log_request_leave, error=log_error),
+        Interceptor(enter=timing_enter, leave=timing_leave),
+        Interceptor(enter=setup_database_enter, leave=cleanup_database_leave),
+        Interceptor(enter=validate_paper_details_batch_endpoint_enter, error=handle_validation_error_error),
+        Interceptor(enter=fetch_paper_details_batch_interceptor, error=handle_database_error_error),
+        Interceptor(leave=format_paper_details_batch_response_leave),
+        Interceptor(error=handle_general_error_error)
+    ]
+
 def create_stats_endpoint_stack() -> list[Interceptor]:
     """Create interceptor stack for /api/stats endpoint"""
     from interceptor import (
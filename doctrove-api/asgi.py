@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the DocTrove API.
+
+Serves the same routes and interceptor stacks as api.py, but keeps network waits
+off worker threads:
+
+- Flask views run in a bounded thread pool through a small WSGI bridge. The
+  database connection a view needs is leased from an asyncio pool *before* the
+  view is dispatched, so requests queue on the event loop (not in a thread)
+  while all connections are busy, and give up with 503 after a timeout.
+- Query embeddings for /api/papers?search_text=... are fetched with an async
+  HTTP client and seeded into the embedding cache before the view runs.
+- The LLM summary endpoints are served natively with the async client.
+
+Run with (requires `pip install uvicorn httpx`):
+    uvicorn asgi:app --host 0.0.0.0 --port $DOCTROVE_API_PORT
+
+Environment:
+    DOCTROVE_ASGI_THREADS          worker threads for Flask views (default 16)
+    DOCTROVE_ASGI_POOL_MAX         max database connections (default 10)
+    DOCTROVE_POOL_ACQUIRE_TIMEOUT  seconds to wait for a connection (default 30)
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import httpx
+import psycopg2
+from psycopg2 import extensions
+
+from config import (
+    DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD,
+    OPENAI_API_KEY, USE_OPENAI_LLM
+)
+from api import app as flask_app, CONNECTION_LEASE_ENVIRON_KEY, _POOL_MAX
+from connection_pool import (
+    PoolMetrics, PoolTimeout, POOL_ACQUIRE_TIMEOUT_SECONDS, apply_session_settings,
+    settings_committed, settings_rolled_back, register_pool
+)
+from business_logic import embedding_request, parse_embedding_response, get_cached_embedding, cache_embedding
+from catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+ASGI_WORKER_THREADS = int(os.getenv('DOCTROVE_ASGI_THREADS', '16'))
+ASGI_POOL_MAX = int(os.getenv('DOCTROVE_ASGI_POOL_MAX', str(_POOL_MAX)))
+
+EMBEDDING_TIMEOUT_SECONDS = 10
+LLM_TIMEOUT_SECONDS = 30
+
+# Paths whose views check out a connection; the lease is taken before dispatch.
+# Other views still get a lease, acquired lazily on first checkout.
+DATABASE_PATH_PREFIXES = ('/api/papers', '/api/symbolizations', '/api/max-extent', '/api/sources/')
+
+class AsyncConnectionPool:
+    """
+    Asyncio pool of psycopg2 connections.
+
+    Acquisition is awaited on the event loop (FIFO, with a timeout) and new
+    connections are opened in the default executor, so neither waiting nor
+    connecting ties up a request thread. Connections are used synchronously by
+    the thread a request is dispatched to; closed ones are dropped on release.
+    """
+
+    def __init__(self, connect: Callable[[], Any], maxconn: int, timeout: float):
+        self._connect = connect
+        self._maxconn = maxconn
+        self._timeout = timeout
+        self._slots = asyncio.Semaphore(maxconn)
+        self._idle: List[Any] = []
+        self._in_use = 0
+        self._waiting = 0
+        self.metrics = PoolMetrics()
+
+    async def acquire(self):
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._timeout)
+        except asyncio.TimeoutError:
+            self.metrics.record('timeouts')
+            raise PoolTimeout(f"No database connection available after {self._timeout:.0f}s")
+        finally:
+            self._waiting -= 1
+
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed:
+                    break
+                self.metrics.record('broken')
+            else:
+                conn = await asyncio.get_running_loop().run_in_executor(None, self._connect)
+                self.metrics.record('connects')
+        except BaseException:
+            self._slots.release()
+            raise
+        self._in_use += 1
+        self.metrics.record_acquire(time.monotonic() - start)
+        return conn
+
+    def release(self, conn) -> None:
+        """Return a connection (must be idle; see ConnectionLease.finish)."""
+        self._in_use -= 1
+        if not conn.closed:
+            self._idle.append(conn)
+        else:
+            self.metrics.record('broken')
+        self._slots.release()
+
+    def close(self) -> None:
+        while self._idle:
+            try:
+                self._idle.pop().close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return self.metrics.snapshot(max=self._maxconn, size=self._in_use + len(self._idle),
+                                     in_use=self._in_use, idle=len(self._idle), waiting=self._waiting)
+
+class ConnectionLease:
+    """
+    The pooled connection bound to one request.
+
+    Passed to Flask in the WSGI environ; api.create_connection_factory() returns
+    checkout(probes) instead of a PooledConnection, so every `with
+    connection_factory() as conn:` in the request shares this connection.
+    """
+
+    def __init__(self, pool: AsyncConnectionPool, loop: asyncio.AbstractEventLoop):
+        self._pool = pool
+        self._loop = loop
+        self._depth = 0
+        self.connection = None
+
+    async def acquire(self) -> None:
+        self.connection = await self._pool.acquire()
+
+    def checkout(self, desired_probes: int) -> '_LeaseCheckout':
+        return _LeaseCheckout(self, desired_probes)
+
+    def finish(self) -> None:
+        """Called on the request thread after the view: never hand back a connection mid-transaction."""
+        conn = self.connection
+        if conn is None or conn.closed:
+            return
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+                settings_rolled_back(conn)
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def release(self) -> None:
+        if self.connection is not None:
+            self._pool.release(self.connection)
+            self.connection = None
+
+class _LeaseCheckout:
+    """Re-entrant checkout with PooledConnection semantics (commit on success, rollback on error)."""
+
+    def __init__(self, lease: ConnectionLease, desired_probes: int):
+        self._lease = lease
+        self._desired_probes = desired_probes
+
+    def __enter__(self):
+        lease = self._lease
+        if lease.connection is None:
+            # View outside DATABASE_PATH_PREFIXES: wait for the pool from this thread
+            asyncio.run_coroutine_threadsafe(lease.acquire(), lease._loop).result()
+        if lease._depth == 0:
+            try:
+                apply_session_settings(lease.connection, {'ivfflat.probes': self._desired_probes},
+                                       lease._pool.metrics)
+            except Exception:
+                self._rollback()
+        lease._depth += 1
+        return lease.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        lease = self._lease
+        lease._depth -= 1
+        if lease._depth == 0 and not lease.connection.closed:
+            try:
+                if exc_type is None:
+                    lease.connection.commit()
+                    settings_committed(lease.connection)
+                else:
+                    self._rollback()
+            except Exception:
+                self._rollback()
+        return False
+
+    def _rollback(self):
+        try:
+            self._lease.connection.rollback()
+        except Exception:
+            pass
+        settings_rolled_back(self._lease.connection)
+
+def _connect():
+    return psycopg2.connect(host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD)
+
+def _wsgi_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """Build a PEP 3333 environ for an ASGI http scope."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def _call_wsgi(wsgi_app, environ: Dict[str, Any]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """Run a WSGI app to completion on the calling thread and buffer the response."""
+    started: List[Any] = []
+    chunks: List[bytes] = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [status, headers]
+        return chunks.append
+
+    result = wsgi_app(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                chunks.append(chunk)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+        lease = environ.get(CONNECTION_LEASE_ENVIRON_KEY)
+        if lease is not None:
+            lease.finish()
+    status, headers = started
+    return int(status.split(' ', 1)[0]), headers, b''.join(chunks)
+
+class DocTroveASGI:
+    """ASGI application: native async handlers plus the Flask app behind a WSGI bridge."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=ASGI_WORKER_THREADS, thread_name_prefix='doctrove-asgi')
+        self.pool: Optional[AsyncConnectionPool] = None
+        self.http: Optional[httpx.AsyncClient] = None
+        self.native_routes = {
+            ('POST', '/api/clusters/summaries'): self.cluster_summaries,
+            ('POST', '/api/clustering/summarize'): self.cluster_summarize,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def startup(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.pool = AsyncConnectionPool(_connect, ASGI_POOL_MAX, POOL_ACQUIRE_TIMEOUT_SECONDS)
+        register_pool('asgi', self.pool.stats)
+        self.http = httpx.AsyncClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=20))
+        # Precompute catalog lookups and keep them current via LISTEN/NOTIFY
+        await loop.run_in_executor(self.executor, get_catalog().start)
+        logger.info(f"ASGI server ready: {ASGI_WORKER_THREADS} worker threads, {ASGI_POOL_MAX} database connections")
+
+    async def shutdown(self) -> None:
+        if self.http is not None:
+            await self.http.aclose()
+        if self.pool is not None:
+            self.pool.close()
+        self.executor.shutdown(wait=False)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    logger.exception("ASGI startup failed")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        if self.pool is None:
+            # Server without lifespan support
+            await self.startup()
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.extend(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body = bytes(body)
+
+        handler = self.native_routes.get((scope['method'], scope['path']))
+        if handler is not None:
+            status, payload = await handler(body)
+            headers = [('Content-Type', 'application/json'), ('Access-Control-Allow-Origin', '*')]
+            await self._send(send, status, headers, json.dumps(payload).encode('utf-8'))
+            return
+
+        try:
+            status, headers, content = await self._dispatch_wsgi(scope, body)
+        except PoolTimeout as e:
+            logger.warning(f"{scope['method']} {scope['path']}: {e}")
+            status, headers = 503, [('Content-Type', 'application/json'), ('Retry-After', '1')]
+            content = json.dumps({'error': 'Database busy, please retry'}).encode('utf-8')
+        await self._send(send, status, headers, content)
+
+    async def _dispatch_wsgi(self, scope, body: bytes):
+        loop = asyncio.get_running_loop()
+        environ = _wsgi_environ(scope, body)
+        path = scope['path']
+
+        if scope['method'] == 'GET' and path == '/api/papers':
+            await self.prefetch_embedding(environ['QUERY_STRING'])
+
+        lease = ConnectionLease(self.pool, loop)
+        environ[CONNECTION_LEASE_ENVIRON_KEY] = lease
+        try:
+            if path.startswith(DATABASE_PATH_PREFIXES):
+                await lease.acquire()
+            future = self.executor.submit(_call_wsgi, self.wsgi_app, environ)
+        except BaseException:
+            lease.release()
+            raise
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            if future.done():
+                lease.release()
+            else:
+                # Cancelled (client went away) while the view is still running on its thread
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(lease.release))
+
+    @staticmethod
+    async def _send(send, status: int, headers, content: bytes):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def prefetch_embedding(self, query_string: str) -> None:
+        """Fetch the search_text embedding without holding a thread; the view then hits the cache."""
+        search_text = parse_qs(query_string).get('search_text', [None])[0]
+        if not search_text or get_cached_embedding(search_text) is not None:
+            return
+        request_spec = embedding_request(search_text)
+        if request_spec is None:
+            return
+        url, headers, data = request_spec
+        start_time = time.time()
+        try:
+            response = await self.http.post(url, headers=headers, json=data, timeout=EMBEDDING_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            embedding = parse_embedding_response(response.json())
+        except (httpx.HTTPError, ValueError) as e:
+            # The view retries synchronously
+            logger.warning(f"Async embedding request failed after {(time.time() - start_time) * 1000:.0f}ms: {e}")
+            return
+        if embedding is not None:
+            cache_embedding(search_text, embedding)
+
+    async def llm_content(self, prompt: str) -> str:
+        """Async counterpart of clustering.get_azure_llm_summaries."""
+        from clustering import llm_request, parse_llm_content
+        request_spec = llm_request(prompt)
+        if request_spec is None:
+            return "LLM features disabled."
+        url, headers, data = request_spec
+        response = await self.http.post(url, headers=headers, json=data, timeout=LLM_TIMEOUT_SECONDS)
+        if response.status_code != 200:
+            logger.error(f"LLM API returned non-200 status: {response.status_code}")
+            logger.error(f"Response body: {response.text[:500]}")
+        response.raise_for_status()
+        return parse_llm_content(response.json())
+
+    @staticmethod
+    def _llm_unavailable() -> Optional[Tuple[int, Dict[str, Any]]]:
+        if not USE_OPENAI_LLM:
+            return 503, {'error': 'LLM features disabled via configuration'}
+        if not OPENAI_API_KEY or OPENAI_API_KEY == 'your_personal_openai_api_key_here':
+            return 503, {'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY in .env.local'}
+        return None
+
+    async def cluster_summaries(self, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """POST /api/clusters/summaries (same contract as the Flask view)."""
+        unavailable = self._llm_unavailable()
+        if unavailable:
+            return unavailable
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            return 400, {'error': 'Invalid JSON body'}
+        if not isinstance(data, dict) or 'titles' not in data:
+            return 400, {'error': 'Missing titles in request body'}
+        titles = data['titles']
+        if not isinstance(titles, list) or len(titles) == 0:
+            return 400, {'error': 'Invalid titles format'}
+
+        from clustering import (SUMMARY_UNAVAILABLE, build_llm_prompt, cache_summaries, cached_summaries,
+                                parse_llm_response)
+        try:
+            summaries = cached_summaries(titles)
+            missing = [i for i, summary in enumerate(summaries) if summary is None]
+            llm_prompt = build_llm_prompt([titles[i] for i in missing]) if missing else None
+        except Exception as e:
+            logger.error(f"Cluster summaries error: {e}")
+            return 500, {'error': f'Cluster summaries failed: {str(e)}'}
+        if missing:
+            try:
+                logger.info(f"Calling LLM API for {len(missing)} of {len(titles)} clusters")
+                llm_response = await self.llm_content(llm_prompt)
+                generated = parse_llm_response(llm_response, len(missing))
+            except Exception as e:
+                logger.error(f"LLM API call failed: {e}", exc_info=True)
+                generated = [SUMMARY_UNAVAILABLE] * len(missing)
+            for i, summary in zip(missing, generated):
+                summaries[i] = summary
+            cache_summaries([titles[i] for i in missing], generated)
+        return 200, {'success': True, 'summaries': summaries}
+
+    async def cluster_summarize(self, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """POST /api/clustering/summarize (same contract as the Flask view)."""
+        unavailable = self._llm_unavailable()
+        if unavailable:
+            return unavailable
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            return 400, {'error': 'Invalid JSON body'}
+        if not isinstance(data, dict) or 'prompt' not in data:
+            return 400, {'error': 'Missing prompt in request body'}
+        try:
+            content = await self.llm_content(data['prompt'])
+        except httpx.TimeoutException:
+            logger.error("LLM API request timed out")
+            return 504, {'error': 'LLM API request timed out'}
+        except httpx.HTTPStatusError as e:
+            logger.error(f"LLM API HTTP error: {e}")
+            return 502, {'error': f'LLM API HTTP error: {e}'}
+        except httpx.TransportError:
+            logger.error("LLM API connection failed")
+            return 502, {'error': 'LLM API connection failed'}
+        except Exception as e:
+            logger.error(f"Cluster summarization error: {e}")
+            return 500, {'error': f'Cluster summarization failed: {str(e)}'}
+        return 200, {'success': True, 'content': content}
+
+app = DocTroveASGI(flask_app)
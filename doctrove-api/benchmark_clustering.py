@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for clustering.py on synthetic points.
+
+Default: compares sample_cluster_representatives (vectorized Gumbel-top-k over
+all clusters) with the per-cluster Python loop it replaced.
+
+--kmeans: compares full KMeans(n_init=10) with cluster_engine's cold fit, a
+warm start after a small pan (same lineage) and a cache hit.
+
+--geometry: compares cluster_geometry's vectorized Voronoi stage with the
+per-cell shapely loop it replaced, and the JSON size of each polygon encoding.
+
+Usage:
+    python benchmark_clustering.py --points 100000 --clusters 100 --repeat 5
+    python benchmark_clustering.py --kmeans --points 100000 --clusters 30 --repeat 1
+    python benchmark_clustering.py --geometry --points 100000 --clusters 500
+"""
+
+import argparse
+import json
+import time
+from typing import List
+
+import numpy as np
+
+from doctrove_shared.cluster_engine import KMeansEngine
+from cluster_geometry import (convex_hull, coordinate_decimals, encode_flat, encode_xy, simplify_cells,
+                              simplify_tolerance, voronoi_cells)
+from clustering import sample_cluster_representatives
+
+def loop_sample_cluster_representatives(coords: np.ndarray, centroids: np.ndarray,
+                                        cluster_assignments: np.ndarray, n: int = 10) -> List[List[int]]:
+    """The previous implementation: renormalize a Python weight list and walk its cumulative sum per draw."""
+    representatives = []
+    for cluster_id, centroid in enumerate(centroids):
+        cluster_indices = np.where(cluster_assignments == cluster_id)[0]
+        if len(cluster_indices) == 0:
+            representatives.append([])
+            continue
+        dists = np.linalg.norm(coords[cluster_indices] - centroid, axis=1)
+        max_dist, min_dist = np.max(dists), np.min(dists)
+        range_dist = max_dist - min_dist if max_dist > min_dist else 1.0
+        normalized_dists = (dists - min_dist) / (range_dist + range_dist * 0.01)
+        remaining_weights = (1 / (normalized_dists ** 2 + 0.1)).tolist()
+        remaining_indices = list(range(len(cluster_indices)))
+        selected = []
+        for _ in range(min(n, len(cluster_indices))):
+            total_weight = sum(remaining_weights)
+            probabilities = [w / total_weight for w in remaining_weights]
+            random_val = np.random.random()
+            selected_idx, cumsum = 0, 0.0
+            for j, prob in enumerate(probabilities):
+                cumsum += prob
+                if random_val <= cumsum:
+                    selected_idx = j
+                    break
+            selected.append(cluster_indices[remaining_indices.pop(selected_idx)])
+            remaining_weights.pop(selected_idx)
+        representatives.append(selected)
+    return representatives
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def benchmark_kmeans(coords: np.ndarray, k: int, repeat: int) -> None:
+    from sklearn.cluster import KMeans
+
+    full_ms = best_of(repeat, lambda: KMeans(n_clusters=k, random_state=42, n_init=10).fit(coords))
+    print(f"{'KMeans(n_init=10)':<18} {full_ms:>10.1f} ms")
+
+    def engine_run(label: str, prepare):
+        timings = []
+        for _ in range(repeat):
+            engine = KMeansEngine()
+            data = prepare(engine)
+            start = time.perf_counter()
+            result = engine.fit(data, k, lineage='benchmark')
+            timings.append(time.perf_counter() - start)
+        ms = min(timings) * 1000
+        print(f"{label:<18} {ms:>10.1f} ms  ({result.method}, {full_ms / max(ms, 1e-3):.0f}x)")
+
+    def after_first_fit(data: np.ndarray):
+        def prepare(engine: KMeansEngine) -> np.ndarray:
+            engine.fit(coords, k, lineage='benchmark')
+            return data
+        return prepare
+
+    panned = coords + (coords.max(axis=0) - coords.min(axis=0)) * 0.02
+    engine_run('engine cold', lambda engine: coords)
+    engine_run('engine warm start', after_first_fit(panned))
+    engine_run('engine cached', after_first_fit(coords))
+
+def loop_voronoi_polygons(coords: np.ndarray, centers: np.ndarray) -> List[dict]:
+    """The previous implementation: clip each cell on its own and convert points one by one."""
+    from shapely.geometry import MultiPoint, Point, box
+    from shapely.ops import voronoi_diagram
+
+    hull = MultiPoint(coords).convex_hull
+    bounding_rect = box(*coords.min(axis=0), *coords.max(axis=0))
+    regions = voronoi_diagram(MultiPoint([Point(x, y) for x, y in centers]), envelope=bounding_rect, edges=False)
+    polygons = []
+    for poly in regions.geoms:
+        clipped_poly = poly.intersection(hull)
+        if clipped_poly.is_empty or not clipped_poly.is_valid:
+            continue
+        x, y = clipped_poly.exterior.xy
+        poly_points = np.column_stack((x, y)).tolist()
+        polygons.append({'x': [float(pt[0]) for pt in poly_points], 'y': [float(pt[1]) for pt in poly_points]})
+    return polygons
+
+def benchmark_geometry(coords: np.ndarray, centers: np.ndarray, repeat: int) -> None:
+    import shapely
+
+    def vectorized(polygon_encoding: str):
+        hull = convex_hull(coords)
+        envelope = shapely.box(*coords.min(axis=0), *coords.max(axis=0))
+        tolerance = simplify_tolerance(shapely.bounds(envelope))
+        cells = simplify_cells(voronoi_cells(centers, hull, envelope), tolerance)
+        cells = cells[~shapely.is_missing(cells)]
+        if polygon_encoding == 'flat':
+            return encode_flat(cells, coordinate_decimals(tolerance))
+        return encode_xy(cells)
+
+    rows = [('per-cell loop', lambda: loop_voronoi_polygons(coords, centers)),
+            ('vectorized xy', lambda: vectorized('xy')),
+            ('vectorized flat', lambda: vectorized('flat'))]
+    loop_ms = None
+    for label, run in rows:
+        ms = best_of(repeat, run)
+        loop_ms = loop_ms or ms
+        size = len(json.dumps(run(), separators=(',', ':')))
+        print(f"{label:<16} {ms:>8.1f} ms  ({loop_ms / max(ms, 1e-3):.1f}x)  {size / 1024:>8.1f} KiB")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark representative sampling for cluster summaries')
+    parser.add_argument('--points', type=int, default=100000, help='Number of 2D points')
+    parser.add_argument('--clusters', type=int, default=100, help='Number of clusters')
+    parser.add_argument('--samples', type=int, default=10, help='Representatives per cluster')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs (best is reported)')
+    parser.add_argument('--kmeans', action='store_true', help='Benchmark K-means instead of sampling')
+    parser.add_argument('--geometry', action='store_true', help='Benchmark Voronoi polygons instead of sampling')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centroids = rng.uniform(-10, 10, size=(args.clusters, 2))
+    assignments = rng.integers(0, args.clusters, size=args.points)
+    coords = centroids[assignments] + rng.normal(0, 0.5, size=(args.points, 2))
+
+    if args.kmeans:
+        print(f"{args.points} points, k={args.clusters} (best of {args.repeat})")
+        benchmark_kmeans(coords, args.clusters, args.repeat)
+        return
+    if args.geometry:
+        print(f"{args.points} points, k={args.clusters} (best of {args.repeat})")
+        benchmark_geometry(coords, centroids, args.repeat)
+        return
+
+    vectorized_ms = best_of(args.repeat, sample_cluster_representatives, coords, centroids, assignments, args.samples)
+    loop_ms = best_of(args.repeat, loop_sample_cluster_representatives, coords, centroids, assignments, args.samples)
+    print(f"{args.points} points, {args.clusters} clusters, {args.samples} samples per cluster (best of {args.repeat})")
+    print(f"{'python loop':<12} {loop_ms:>10.1f} ms")
+    print(f"{'vectorized':<12} {vectorized_ms:>10.1f} ms  ({loop_ms / vectorized_ms:.0f}x)")
+
+if __name__ == '__main__':
+    main()
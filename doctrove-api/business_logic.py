@@ -6,15 +6,17 @@ Enhanced filtering system with query optimization and comprehensive field valida
 import numpy as np
 import requests
 import json
+import re
 import logging
 import certifi
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from typing import List, Dict, Any, Optional, Tuple, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 import hashlib
 import time
+from functools import lru_cache
 
 # Import our performance interceptor
 from performance_interceptor import (
@@ -26,6 +28,15 @@ from performance_interceptor import (
     log_duration
 )
 
+from sql_filter_parser import (
+    parse_sql_filter, ParsedFilter, SqlFilterError, ColumnRef, Comparison, InList, Literal, DEFAULT_INEQ_SEL,
+    ALLOWED_FUNCTIONS, KEYWORDS
+)
+from semantic_planner import (
+    SemanticPlan, SEMANTIC_PLANS, PLAN_DIRECT, PLAN_ANN_FIRST, PLAN_ITERATIVE, PLAN_FILTER_FIRST,
+    DEFAULT_BBOX_FRACTION, get_planner_statistics, column_estimator, bbox_fraction, choose_semantic_plan
+)
+
 # Import OpenAI configuration
 from config import (
     OPENAI_API_KEY,
@@ -45,6 +56,27 @@ logger = logging.getLogger(__name__)
 _embedding_cache = {}
 _cache_ttl_seconds = 3600  # Cache embeddings for 1 hour
 
+# Blue/green 2D projection slots (see database/migrations/*__umap_blue_green_projection.sql)
+# Only these column names may ever be interpolated into SQL as the 2D coordinate column.
+DEFAULT_EMBEDDING_2D_COLUMN = 'doctrove_embedding_2d'
+EMBEDDING_2D_COLUMNS = ('doctrove_embedding_2d', 'doctrove_embedding_2d_shadow')
+
+# Equality selectivity for low-cardinality filter columns (see sql_filter_parser.estimate_selectivity);
+# doctrove_source has a handful of values (arxiv, openalex, randpub, extpub)
+SQL_FILTER_EQ_SELECTIVITY = {'doctrove_source': 0.25}
+
+# Exact rerank mode: ANN candidates fetched per row needed (limit + offset) before exact_rerank
+RERANK_OVERSAMPLE = 2
+
+# Without a planner decision (see plan_semantic_search), semantic search filters keeping less
+# than this fraction of rows use the semantic-first CTE: a direct IVFFlat scan would discard
+# most of its candidates in the WHERE clause
+SEMANTIC_CTE_MAX_SELECTIVITY = 0.5
+
+# Cached (active_slot, candidate_slot, timestamp) read from umap_projection_state
+_projection_state_cache = None
+_projection_state_ttl_seconds = 30
+
 class FilterType(Enum):
     """Types of filters supported by the v2 API."""
     SQL = "sql"
@@ -980,14 +1012,40 @@ def validate_sql_filter_v2(sql_filter: str) -> Tuple[bool, List[str]]:
     """
     Enhanced SQL injection prevention with comprehensive validation.
     
+    Filters are parsed (sql_filter_parser) so only boolean expressions over columns are
+    accepted; statements, comments and reserved words are rejected. Filters using syntax
+    the parser does not model get the keyword/pattern text checks instead.
+    
     Returns:
         Tuple of (is_valid, warnings)
     """
-    warnings = []
-    
     if not sql_filter or not isinstance(sql_filter, str):
         return False, ["SQL filter must be a non-empty string"]
     
+    try:
+        parsed = parse_sql_filter(sql_filter)
+    except SqlFilterError as e:
+        if e.forbidden:
+            return False, [str(e)]
+        return _validate_sql_filter_text(sql_filter)
+    
+    warnings = []
+    
+    # At least one referenced column must be a known field
+    if not any(column.name in FIELD_DEFINITIONS or column.qualified_name in FIELD_DEFINITIONS
+               for column in parsed.columns):
+        return False, ["No valid column names found in SQL filter"]
+    
+    # Check for table aliases
+    if any(column.qualifier in ('dp', 'am') for column in parsed.columns):
+        warnings.append("Table aliases detected in SQL filter - ensure proper usage")
+    
+    return True, warnings
+
+def _validate_sql_filter_text(sql_filter: str) -> Tuple[bool, List[str]]:
+    """Keyword/pattern checks for filters the parser cannot read."""
+    warnings = []
+    
     sql_upper = sql_filter.upper()
     
     # Check for dangerous keywords that could cause data modification
@@ -1009,11 +1067,17 @@ def validate_sql_filter_v2(sql_filter: str) -> Tuple[bool, List[str]]:
         if pattern in sql_filter:
             return False, [f"SQL injection pattern detected: {pattern}"]
     
+    # Same function allow-list as the parser
+    for match in re.finditer(r'([A-Za-z_][A-Za-z0-9_.]*)\s*\(', sql_filter):
+        name = match.group(1).lower()
+        if name.upper() not in KEYWORDS and name not in ALLOWED_FUNCTIONS:
+            return False, [f"Function not allowed in filters: {match.group(1)}"]
+    
     # Check for allowed column names
     allowed_columns = set(FIELD_DEFINITIONS.keys())
     found_columns = set()
     
-    # Simple column name detection (this could be enhanced with proper SQL parsing)
+    # Simple column name detection
     for column in allowed_columns:
         if column in sql_filter:
             found_columns.add(column)
@@ -1027,6 +1091,139 @@ def validate_sql_filter_v2(sql_filter: str) -> Tuple[bool, List[str]]:
     
     return True, warnings
 
+def prepare_sql_filter(sql_filter: Optional[str]) -> Union[ParsedFilter, str, None]:
+    """
+    Parse sql_filter for query building.
+    
+    Returns:
+        The (cached) ParsedFilter; the raw string when the parser does not model its
+        syntax (legacy text handling); None when there is no filter
+        
+    Raises:
+        ValueError: If the filter is invalid
+    """
+    if not sql_filter:
+        return None
+    is_valid, filter_warnings = validate_sql_filter_v2(sql_filter)
+    if not is_valid:
+        raise ValueError(f"Invalid SQL filter: {filter_warnings}")
+    try:
+        return parse_sql_filter(sql_filter)
+    except SqlFilterError:
+        return sql_filter
+
+# Aliases that may qualify filter columns (dp.doctrove_title, ec.country_uschina, ...)
+_FILTER_TABLE_ALIASES = (
+    {info['alias'] for info in FIELD_DEFINITIONS.values() if info.get('alias')}
+    | {'dp', 'rm', 'em', 'am', 'ec', 'ej', 'ei', 'ea', 'er'}
+)
+
+def _filter_column_info(column: ColumnRef) -> Optional[Dict[str, Any]]:
+    """Field info for a filter column, resolving `table.column` and `alias.column` references."""
+    if column.qualifier and column.qualifier not in _FILTER_TABLE_ALIASES:
+        return get_field_info(column.qualified_name) or process_qualified_field(column.qualified_name)
+    return get_field_info(column.name) or get_field_info_dynamic(column.name)
+
+def _filter_column_table(column: ColumnRef) -> Optional[Tuple[str, str]]:
+    """(table, column) a filter column reads, for the statistics-based selectivity estimate."""
+    field_info = _filter_column_info(column)
+    if not field_info or not field_info.get('table'):
+        return None
+    return field_info['table'], field_info.get('column', column.name)
+
+def sql_filter_join_tables(sql_filter: Union[ParsedFilter, str, None]) -> List[Tuple[str, str, str]]:
+    """
+    Tables (other than doctrove_papers) a filter needs joined.
+    
+    Returns:
+        List of (table, alias, field_name) in first-reference order
+    """
+    if not sql_filter:
+        return []
+    
+    if isinstance(sql_filter, ParsedFilter):
+        field_infos = [(column.qualified_name, _filter_column_info(column)) for column in sql_filter.columns]
+    else:
+        # Legacy text path: every identifier-looking word is a candidate field
+        field_infos = []
+        for field_name in re.findall(r'\b([a-zA-Z_][a-zA-Z0-9_]*)\b', sql_filter):
+            # Skip SQL keywords and common table aliases
+            sql_keywords = {'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'NULL', 'IS', 'IN', 'LIKE', 'BETWEEN'}
+            if field_name.upper() in sql_keywords or field_name in ['dp', 'rm', 'em', 'ec', 'ej', 'ei', 'ea']:
+                continue
+            field_infos.append((field_name, get_field_info(field_name) or get_field_info_dynamic(field_name)))
+    
+    tables = []
+    seen = set()
+    for field_name, field_info in field_infos:
+        table = field_info.get('table') if field_info else None
+        if table and table != 'doctrove_papers' and table not in seen:
+            seen.add(table)
+            tables.append((table, field_info.get('alias'), field_name))
+    return tables
+
+def sql_filter_tables_used(sql_filter: Union[ParsedFilter, str, None]) -> set:
+    """
+    Tables whose predefined fields a filter references (these JOINs get an IS NOT NULL guard).
+    """
+    if not sql_filter:
+        return set()
+    
+    if isinstance(sql_filter, ParsedFilter):
+        tables = set()
+        for column in sql_filter.columns:
+            field_info = get_field_info(column.name) or get_field_info(column.qualified_name)
+            if field_info and field_info.get('table'):
+                tables.add(field_info['table'])
+        return tables
+    
+    # Legacy text path: look for exact field references with table aliases or table names
+    tables = set()
+    for field_name, field_info in FIELD_DEFINITIONS.items():
+        field_patterns = [
+            field_name,  # Exact field name
+            f"{field_info.get('alias', '')}.{field_name}",  # With table alias
+            f"{field_info.get('table', '')}.{field_name}"   # With table name
+        ]
+        if any(pattern in sql_filter for pattern in field_patterns if pattern):
+            tables.add(field_info.get('table'))
+    return tables
+
+def render_sql_filter(sql_filter: Union[ParsedFilter, str], table_aliases: dict,
+                      placeholder=lambda index: '%s', escape_percent: bool = True) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    SQL for a filter with `table.column` references rewritten to the query's aliases.
+    
+    Parsed filters come back parameterized (literals as placeholders, values returned in
+    order); legacy text filters are returned inline, with % doubled when `escape_percent`.
+    The result is wrapped in parentheses.
+    
+    Returns:
+        Tuple of (sql, params)
+    """
+    if isinstance(sql_filter, ParsedFilter):
+        def column_sql(column: ColumnRef) -> str:
+            alias = table_aliases.get(column.qualifier) if column.qualifier else None
+            return f"{alias}.{column.name}" if alias else column.qualified_name
+        return f"({sql_filter.to_sql(column_sql, placeholder)})", sql_filter.params
+    
+    # CRITICAL FIX: Replace fully qualified field names with aliased versions
+    processed_filter = process_sql_filter_field_names(sql_filter, table_aliases)
+    if escape_percent:
+        # Parameterized queries: LIKE '%pattern%' must be escaped as '%%pattern%%'
+        processed_filter = processed_filter.replace('%', '%%')
+    
+    # Avoid double-wrapping parentheses - check if sql_filter already has them
+    if not (processed_filter.strip().startswith('(') and processed_filter.strip().endswith(')')):
+        processed_filter = f"({processed_filter})"
+    return processed_filter, ()
+
+def sql_filter_selectivity(sql_filter: Union[ParsedFilter, str, None]) -> Optional[float]:
+    """Estimated fraction of rows a filter keeps (None for no filter or unparsed filters)."""
+    if isinstance(sql_filter, ParsedFilter):
+        return sql_filter.selectivity(SQL_FILTER_EQ_SELECTIVITY)
+    return None
+
 def validate_limit(limit: Any) -> bool:
     """Validate limit parameter."""
     try:
@@ -1098,134 +1295,88 @@ def validate_sql_filter(sql_filter: str) -> bool:
     
     return True
 
-@log_performance("build_optimized_query_v2")
-def build_optimized_query_v2(
-    fields: List[str],
-    sql_filter: Optional[str] = None,
-    bbox: Optional[Tuple[float, float, float, float]] = None,
-    embedding_type: str = 'doctrove',
-    limit: int = 100,
-    offset: int = 0,
-    sort_field: Optional[str] = None,
-    sort_direction: str = "ASC",
-    search_text: Optional[str] = None,
-    similarity_threshold: float = 0.0,
-    target_count: Optional[int] = None,
-    enrichment_source: Optional[str] = None,
-    enrichment_table: Optional[str] = None,
-    enrichment_field: Optional[str] = None,
-    disable_sort: bool = False
-) -> Tuple[str, List[Any], List[str]]:
+@dataclass(frozen=True)
+class CompiledQuery:
     """
-    Build optimized query with comprehensive filtering and semantic similarity search.
+    Query template for one request shape, produced by compile_query_v2.
     
-    Args:
-        fields: List of fields to select
-        sql_filter: SQL WHERE clause (optional)
-        bbox: Bounding box coordinates (optional)
-        embedding_type: Type of embedding for bbox ('doctrove' - unified embeddings)
-        limit: Maximum number of results
-        offset: Number of results to skip
-        sort_field: Field to sort by
-        sort_direction: Sort direction (ASC/DESC)
-        search_text: Text to search for semantic similarity
-        similarity_threshold: Minimum similarity score (0.0 to 1.0)
-        target_count: Target number of semantically similar papers (optional)
-        enrichment_source: Source for enrichment data (optional)
-        enrichment_table: Table name for enrichment data (optional)
-        enrichment_field: Field name for enrichment data (optional)
-        disable_sort: If True, skip all sorting for maximum performance (optional)
-        
-    Returns:
-        Tuple of (query, parameters, warnings)
+    `sql` uses positional %s placeholders; `slots` names the per-call value
+    bound to each placeholder, in order (see bind_query_parameters).
     """
-    warnings = []
+    sql: str
+    slots: Tuple[str, ...]
+    warnings: Tuple[str, ...]
+    semantic_strategy: Optional[str]  # one of SEMANTIC_PLANS for semantic queries
+
+_QUERY_SLOT_PATTERN = re.compile(r"%%|%\((\w+)\)s")
+
+def _positional_template(named_sql: str) -> Tuple[str, Tuple[str, ...]]:
+    """Turn %(name)s markers into %s and return the slot names in placeholder order."""
+    slots = []
     
-    # Auto-detect enrichment parameters if not provided
-    # Enrichment is now handled generically through field definitions
+    def replace(match):
+        if match.group(1) is None:
+            return match.group(0)  # escaped %% from the sql_filter
+        slots.append(match.group(1))
+        return '%s'
     
-    # Validate fields
-    if not validate_fields(fields):
-        raise ValueError("Invalid fields specified")
+    return _QUERY_SLOT_PATTERN.sub(replace, named_sql), tuple(slots)
+
+def _bbox_condition(embedding_2d_column: str) -> str:
+    # Use spatial operator <@ (contained within) with box() constructor for efficient GiST index usage
+    return f"dp.{embedding_2d_column} <@ box(point(%(x_min)s, %(y_min)s), point(%(x_max)s, %(y_max)s))"
+
+@lru_cache(maxsize=256)
+def compile_query_v2(
+    fields: Tuple[str, ...],
+    sql_filter: Union[ParsedFilter, str, None],
+    has_bbox: bool,
+    semantic: bool,
+    has_offset: bool,
+    sort_field: Optional[str],
+    sort_direction: str,
+    enrichment_table: Optional[str],
+    enrichment_field: Optional[str],
+    disable_sort: bool,
+    embedding_2d_column: str,
+    semantic_strategy: Optional[str] = None,
+    rerank: bool = False,
+    by_paper_ids: bool = False
+) -> CompiledQuery:
+    """
+    Compile the structural part of a /api/papers query (memoised).
     
-    # Validate similarity threshold
-    if similarity_threshold < 0.0 or similarity_threshold > 1.0:
-        raise ValueError("Similarity threshold must be between 0.0 and 1.0")
+    Everything here depends only on the request shape: field resolution, join
+    detection, sql_filter validation and SQL assembly. Values that change per
+    call (bbox corners, search vector, limits, offset, filter literals) are left
+    as slots and bound by bind_query_parameters.
     
-    # Validate target_count
-    if target_count is not None:
-        if target_count <= 0:
-            raise ValueError("Target count must be positive")
-        # Use the smaller of limit and target_count to avoid conflicts
-        effective_limit = min(limit, target_count)
-        if effective_limit != limit:
-            warnings.append(f"Using effective limit of {effective_limit} (minimum of limit={limit} and target_count={target_count})")
-        limit = effective_limit
+    `sql_filter` comes from prepare_sql_filter. A ParsedFilter hashes by its
+    parameterized shape, so filters differing only in literal values share a
+    template; its literals bind to the `filter_<n>` slots.
     
-    # Get embedding for search text if provided
-    search_embedding = None
-    if search_text:
-        # Check if search_text is already included in sql_filter to avoid double search
-        if sql_filter and search_text.strip():
-            search_pattern = search_text.strip().lower()
-            sql_filter_lower = sql_filter.lower()
-            
-            # Look for duplicate search patterns in sql_filter
-            title_pattern = f"doctrove_title ilike '%{search_pattern}%'"
-            abstract_pattern = f"doctrove_abstract ilike '%{search_pattern}%'"
-            
-            if (title_pattern in sql_filter_lower or abstract_pattern in sql_filter_lower):
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"🔍 BUSINESS LOGIC: Search text '{search_pattern}' already in sql_filter - skipping semantic similarity to avoid double search")
-                search_text = None
-            else:
-                # No duplicate found, proceed with semantic similarity
-                search_embedding = get_embedding_for_text(search_text, embedding_type)
-                if search_embedding is None:
-                    warnings.append(f"Failed to generate embedding for search text: '{search_text[:50]}...'")
-                    # Continue without semantic search if embedding fails
-                    search_text = None
-                else:
-                    # Log the embedding for performance testing (debug level only)
-                    if logger.isEnabledFor(logging.DEBUG):
-                        embedding_list = search_embedding.tolist()
-                        vector_string = "[" + ",".join(map(str, embedding_list)) + "]"
-                        logger.debug(f"🔍 PERFORMANCE TEST: Search embedding generated - first 5 values: {embedding_list[:5]}")
-                        logger.debug(f"🔍 PERFORMANCE TEST: Full vector string: {vector_string}")
-                        
-                        # Also write to a temporary file for easy access
-                        try:
-                            with open('/tmp/embedding_test.txt', 'w') as f:
-                                f.write(f"Search text: {search_text[:100]}...\n")
-                                f.write(f"First 5 values: {embedding_list[:5]}\n")
-                                f.write(f"Full vector: {vector_string}\n")
-                            logger.debug(f"🔍 PERFORMANCE TEST: Embedding saved to /tmp/embedding_test.txt")
-                        except Exception as e:
-                            logger.debug(f"🔍 PERFORMANCE TEST: Failed to save to file: {e}")
-        else:
-            # No sql_filter conflict, proceed with semantic similarity
-            search_embedding = get_embedding_for_text(search_text, embedding_type)
-            if search_embedding is None:
-                warnings.append(f"Failed to generate embedding for search text: '{search_text[:50]}...'")
-                # Continue without semantic search if embedding fails
-                search_text = None
-            else:
-                # Log the embedding for performance testing (debug level only)
-                if logger.isEnabledFor(logging.DEBUG):
-                    embedding_list = search_embedding.tolist()
-                    vector_string = "[" + ",".join(map(str, embedding_list)) + "]"
-                    logger.debug(f"🔍 PERFORMANCE TEST: Search embedding generated - first 5 values: {embedding_list[:5]}")
-                    logger.debug(f"🔍 PERFORMANCE TEST: Full vector string: {vector_string}")
-                    
-                    # Also write to a temporary file for easy access
-                    try:
-                        with open('/tmp/embedding_test.txt', 'w') as f:
-                            f.write(f"Search text: {search_text[:100]}...\n")
-                            f.write(f"First 5 values: {embedding_list[:5]}\n")
-                            f.write(f"Full vector: {vector_string}\n")
-                        logger.debug(f"🔍 PERFORMANCE TEST: Embedding saved to /tmp/embedding_test.txt")
-                    except Exception as e:
-                        logger.debug(f"🔍 PERFORMANCE TEST: Failed to save to file: {e}")
+    `semantic_strategy` is the semantic_planner strategy (direct, ann_first, iterative
+    or filter_first). Without one, semantic queries use the semantic-first CTE for
+    selective filters and the direct query otherwise.
+    
+    With `rerank`, semantic queries select only the candidate ids and their raw
+    vectors (vector_send) for exact_rerank. `by_paper_ids` restricts the query to
+    the `paper_ids` slot (an array of ids), as used to hydrate reranked ids.
+    
+    Raises:
+        ValueError: For invalid fields, sql_filter, projection column or strategy
+    """
+    warnings = []
+    
+    if embedding_2d_column not in EMBEDDING_2D_COLUMNS:
+        raise ValueError(f"Invalid 2D embedding column: {embedding_2d_column}")
+    
+    if semantic_strategy is not None and semantic_strategy not in SEMANTIC_PLANS:
+        raise ValueError(f"Invalid semantic strategy: {semantic_strategy}")
+    
+    # Validate fields
+    if not validate_fields(list(fields)):
+        raise ValueError("Invalid fields specified")
     
     # Generic field processing - infer tables and aliases from field names
     tables_needed = set()
@@ -1261,6 +1412,9 @@ def build_optimized_query_v2(
                 # Build field mapping with proper alias and column name
                 column_name = field_info.get('column', field)
                 field_mapping = f"{alias}.{column_name}"
+                if field == DEFAULT_EMBEDDING_2D_COLUMN and embedding_2d_column != DEFAULT_EMBEDDING_2D_COLUMN:
+                    # Serve the selected projection slot under the usual response key
+                    field_mapping = f"{alias}.{embedding_2d_column} AS {DEFAULT_EMBEDDING_2D_COLUMN}"
                 field_mappings.append(field_mapping)
             else:
                 # Main table field
@@ -1271,44 +1425,12 @@ def build_optimized_query_v2(
             warnings.append(f"Unknown field: {field}")
     
     # CRITICAL FIX: Also check sql_filter for fields that require JOINs
-    if sql_filter:
-        # Extract field names from sql_filter that require JOINs
-        # Use dynamic field detection for better flexibility
-        import re
-        
-        # Pattern to match field names in SQL (word boundaries)
-        field_pattern = r'\b([a-zA-Z_][a-zA-Z0-9_]*)\b'
-        potential_fields = re.findall(field_pattern, sql_filter)
-        
-        # Check each potential field name
-        for field_name in potential_fields:
-            # Skip SQL keywords and common table aliases
-            sql_keywords = {'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'NULL', 'IS', 'IN', 'LIKE', 'BETWEEN'}
-            if field_name.upper() in sql_keywords or field_name in ['dp', 'rm', 'em', 'ec', 'ej', 'ei', 'ea']:
-                continue
-            
-            # Try static field definitions first
-            field_info = get_field_info(field_name)
-            
-            # If field not found in static definitions, try qualified field parsing
-            if not field_info:
-                if '.' in field_name:
-                    # Fully qualified field name like 'randpub_metadata.corporate_names'
-                    field_info = process_qualified_field(field_name)
-                else:
-                    # Try dynamic translation for legacy field names
-                    field_info = get_field_info_dynamic(field_name)
-            
-            # If we found field info and it requires a JOIN
-            if field_info and field_info.get('table') and field_info.get('table') != 'doctrove_papers':
-                table = field_info.get('table')
-                alias = field_info.get('alias')
-                if table not in tables_needed:
-                    tables_needed.add(table)
-                    table_aliases[table] = alias
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"🔍 BUSINESS LOGIC: Added table {table} (alias: {alias}) from sql_filter field: {field_name}")
-                        logger.debug(f"🔍 BUSINESS LOGIC: Field info: {field_info}")
+    for table, alias, field_name in sql_filter_join_tables(sql_filter):
+        if table not in tables_needed:
+            tables_needed.add(table)
+            table_aliases[table] = alias
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 BUSINESS LOGIC: Added table {table} (alias: {alias}) from sql_filter field: {field_name}")
     
     # Collect warnings for invalid fields (now using qualified field processing)
     invalid_fields = []
@@ -1369,171 +1491,85 @@ def build_optimized_query_v2(
     
     # SEMANTIC SEARCH: Check if we should use CTE approach
     # Use CTE when we have semantic search + selective filters (bbox, universe, etc.)
-    use_semantic_cte = False
-    if search_text and search_embedding is not None:
-        # Convert numpy array to list for psycopg2 compatibility
-        embedding_array = search_embedding.tolist() if hasattr(search_embedding, 'tolist') else search_embedding
-        embedding_column = 'doctrove_embedding'
-        
-        # Use CTE if we have selective filters (bbox or complex sql_filter)
+    embedding_column = 'doctrove_embedding'
+    if not semantic:
+        semantic_strategy = None
+    elif semantic_strategy is None:
+        # Use CTE if we have selective filters (bbox, or a sql_filter estimated to keep
+        # under SEMANTIC_CTE_MAX_SELECTIVITY of rows; unparsed filters use their length)
         # This allows IVFFlat to work on full dataset, then filter the top results
-        has_selective_filters = bool(bbox or (sql_filter and len(sql_filter) > 50))
+        filter_selectivity = sql_filter_selectivity(sql_filter)
+        if filter_selectivity is not None:
+            selective_filter = filter_selectivity < SEMANTIC_CTE_MAX_SELECTIVITY
+        else:
+            selective_filter = bool(sql_filter and len(sql_filter) > 50)
+        has_selective_filters = bool(has_bbox or selective_filter)
         
         if has_selective_filters:
-            use_semantic_cte = True
+            semantic_strategy = PLAN_ANN_FIRST
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"🚀 PERFORMANCE: Using semantic-first CTE approach (IVFFlat on full dataset, then filter)")
         else:
             # Direct query for simple semantic search
+            semantic_strategy = PLAN_DIRECT
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"🚀 PERFORMANCE: Using direct IVFFlat query (no selective filters)")
     
-    # Initialize parameters
-    if search_text and search_embedding is not None:
-        # Convert embedding to pgvector string format
-        # pgvector expects: '[1.0,2.0,3.0]'::vector
-        embedding_str = '[' + ','.join(map(str, embedding_array)) + ']'
-        
+    if semantic:
         # Add similarity calculation using pgvector cosine distance
-        # Use %s for the string parameter, PostgreSQL will cast to vector
-        similarity_calc = f"(1 - (dp.{embedding_column} <=> %s::vector)) as similarity_score"
-        field_mappings.append(similarity_calc)
-        
-        parameters = [embedding_str]
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"Initialized parameters with embedding string (length: {len(embedding_str)})")
-    else:
-        parameters = []
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"Initialized parameters as empty list: {parameters}")
+        # The search vector is bound as a pgvector string ('[1.0,2.0,3.0]') and cast to vector
+        field_mappings.append(f"(1 - (dp.{embedding_column} <=> %(embedding)s::vector)) as similarity_score")
     
     select_clause = f"SELECT {', '.join(field_mappings)}"
+    if semantic and rerank:
+        # Exact rerank mode: ids and binary vectors only, fields are fetched for the winners
+        select_clause = f"SELECT dp.doctrove_paper_id, vector_send(dp.{embedding_column}) AS embedding_binary"
     
-    # Debug: SELECT clause and field mappings (commented out for production)
-    # print(f"=== BUSINESS LOGIC DEBUG: Final SELECT clause: {select_clause} ===")
-    # print(f"=== BUSINESS LOGIC DEBUG: Field mappings count: {len(field_mappings)} ===")
-    # print(f"=== BUSINESS LOGIC DEBUG: All field mappings: {field_mappings} ===")
-
     # Build WHERE clause (non-similarity path)
     conditions = []
     
     # Add basic filters for all queries
     conditions.append("dp.doctrove_source IN ('arxiv', 'randpub', 'extpub')")
     
-    # Log the filtering approach for debugging
-    if logger.isEnabledFor(logging.DEBUG):
-        logger.debug("🚀 PERFORMANCE: Added basic source filter")
-    
-    # Add SQL filter
+    # Add SQL filter (table.column references rewritten to aliases; literals bound as filter_<n>)
+    processed_filter = None
     if sql_filter:
-        is_valid, filter_warnings = validate_sql_filter_v2(sql_filter)
+        source_filter = sql_filter.source if isinstance(sql_filter, ParsedFilter) else sql_filter
+        is_valid, filter_warnings = validate_sql_filter_v2(source_filter)
         if not is_valid:
             raise ValueError(f"Invalid SQL filter: {filter_warnings}")
         warnings.extend(filter_warnings)
-        
-        # CRITICAL FIX: Replace fully qualified field names with aliased versions
-        processed_filter = process_sql_filter_field_names(sql_filter, table_aliases)
-        
-        # CRITICAL FIX: When using parameterized queries (%s placeholders),
-        # psycopg2 treats % as special. LIKE '%pattern%' must be escaped as '%%pattern%%'
-        if search_text and search_embedding is not None:
-            # Escape % for parameterized query
-            processed_filter = processed_filter.replace('%', '%%')
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"🔍 Escaped % in sql_filter for parameterized query: {processed_filter}")
-        
-        # Avoid double-wrapping parentheses - check if sql_filter already has them
-        if processed_filter.strip().startswith('(') and processed_filter.strip().endswith(')'):
-            # Already has parentheses, don't wrap again
-            conditions.append(processed_filter)
-        else:
-            # No parentheses, wrap for safety
-            conditions.append(f"({processed_filter})")
+        processed_filter, _ = render_sql_filter(sql_filter, table_aliases,
+                                                placeholder=lambda index: f"%(filter_{index})s")
+        conditions.append(processed_filter)
     
-    # Add bounding box filter
-    if bbox:
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"Processing bbox: {bbox} (type: {type(bbox)})")
-        try:
-            # Convert bbox string to tuple if needed
-            if isinstance(bbox, str):
-                # Parse "x1,y1,x2,y2" string format
-                bbox_parts = bbox.split(',')
-                if len(bbox_parts) == 4:
-                    x1, y1, x2, y2 = map(float, bbox_parts)
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"Converted bbox string to tuple: x1={x1}, y1={y1}, x2={x2}, y2={y2}")
-                else:
-                    raise ValueError(f"Invalid bbox string format: {bbox} (expected 4 comma-separated values)")
-            else:
-                # Assume it's already a tuple/list
-                x1, y1, x2, y2 = bbox
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"Successfully unpacked bbox: x1={x1}, y1={y1}, x2={x2}, y2={y2}")
-        except Exception as e:
-            logger.error(f"Error unpacking bbox: {e}")
-            raise
-        
-        # Use doctrove_embedding_2d for bbox filtering (unified embedding field)
-        # PERFORMANCE OPTIMIZATION: Use spatial operators instead of array indexing for GiST index efficiency
-        coords_column = 'doctrove_embedding_2d'
-        x_min, x_max = min(x1, x2), max(x1, x2)
-        y_min, y_max = min(y1, y2), max(y1, y2)
-        # Use spatial operator <@ (contained within) with box() constructor for efficient GiST index usage
-        conditions.append(f"dp.{coords_column} <@ box(point({x_min}, {y_min}), point({x_max}, {y_max}))")
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"🌍 BUSINESS LOGIC: Added optimized bbox filter using spatial operators: x={x_min} to {x_max}, y={y_min} to {y_max}")
-            logger.debug(f"🚀 PERFORMANCE: Using GiST spatial index for efficient bbox queries")
+    # Add bounding box filter on the active projection slot
+    # PERFORMANCE OPTIMIZATION: Use spatial operators instead of array indexing for GiST index efficiency
+    if has_bbox:
+        conditions.append(_bbox_condition(embedding_2d_column))
+    
+    if by_paper_ids:
+        # Bound as text[] (psycopg2 adapts a list of strings so) and cast server-side
+        conditions.append("dp.doctrove_paper_id = ANY(%(paper_ids)s::text[]::uuid[])")
     
     # OPTIMIZED: Use index-friendly vector search without threshold filtering in SQL
     # This avoids scanning all 226K rows and instead uses the pgvector index efficiently
-    if search_text and search_embedding is not None:
-        conditions.append(f"dp.{embedding_column} IS NOT NULL")
-        
-        # PERFORMANCE OPTIMIZATION: Use ORDER BY distance instead of threshold filtering
-        # This allows PostgreSQL to use the vector index effectively
-        # We'll fetch more results and filter by threshold in application code
-        
+    if semantic:
         # Don't add similarity threshold to WHERE clause - it forces full table scan
-        # Instead, we'll use ORDER BY embedding <=> query_vector LIMIT larger_number
+        # Instead, we ORDER BY embedding <=> query_vector LIMIT larger_number
         # and then filter results by threshold in Python (much faster)
-        
-        # No need to add embedding parameter again - already added for SELECT clause
-        
-        # PERFORMANCE MONITORING: Log that we're using the optimized path (debug level only)
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"🚀 PERFORMANCE: Using optimized semantic search (pgvector index + application filtering)")
-            logger.debug(f"🚀 PERFORMANCE: Search text: '{search_text[:50]}...', threshold: {similarity_threshold}")
+        conditions.append(f"dp.{embedding_column} IS NOT NULL")
     
     # Add enrichment table filters generically
+    # Only require data from tables that are actually used in filtering
+    # This prevents overly restrictive JOINs that filter out valid results
+    filter_tables_used = sql_filter_tables_used(sql_filter)
     for table in tables_needed:
-        if table != 'doctrove_papers':
+        if table != 'doctrove_papers' and table in filter_tables_used:
             alias = table_aliases.get(table, table[:3])
-            # Only require data from tables that are actually used in filtering
-            # This prevents overly restrictive JOINs that filter out valid results
-            if sql_filter:
-                # Check if this table is actually referenced in the WHERE clause
-                # Look for exact field references with table aliases or table names
-                table_fields_used = []
-                for field_name, field_info in FIELD_DEFINITIONS.items():
-                    if field_info.get('table') == table:
-                        # Check for exact field references in the sql_filter
-                        field_patterns = [
-                            field_name,  # Exact field name
-                            f"{field_info.get('alias', '')}.{field_name}",  # With table alias
-                            f"{field_info.get('table', '')}.{field_name}"   # With table name
-                        ]
-                        if any(pattern in sql_filter for pattern in field_patterns if pattern):
-                            table_fields_used.append(field_name)
-                
-                # Only add IS NOT NULL if fields from this table are actually used in filtering
-                if table_fields_used:
-                    conditions.append(f"{alias}.doctrove_paper_id IS NOT NULL")
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"🔍 BUSINESS LOGIC: Added IS NOT NULL for table {table} (alias: {alias}) - fields used: {table_fields_used}")
-                else:
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"🔍 BUSINESS LOGIC: Skipped IS NOT NULL for table {table} (alias: {alias}) - no fields used in filtering")
+            conditions.append(f"{alias}.doctrove_paper_id IS NOT NULL")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 BUSINESS LOGIC: Added IS NOT NULL for table {table} (alias: {alias}) - referenced in sql_filter")
     
     # Combine conditions
     where_clause = ""
@@ -1547,7 +1583,7 @@ def build_optimized_query_v2(
     if disable_sort:
         # Skip all sorting for maximum performance
         pass
-    elif search_text and search_embedding is not None:
+    elif semantic:
         # Semantic search ORDER BY will be added in final query construction
         # (Different for CTE vs direct path)
         pass
@@ -1570,16 +1606,11 @@ def build_optimized_query_v2(
             # Sort by: enrichment field IS NOT NULL first (to prioritize papers with data),
             # then publication_year DESC, then paper_id
             order_clause = f" ORDER BY ({enrichment_alias}.{enrichment_field} IS NOT NULL) DESC, dp.publication_year DESC NULLS LAST, dp.doctrove_paper_id ASC"
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"🔍 ENRICHMENT ORDER: Prioritizing papers with enrichment data ({enrichment_table}.{enrichment_field})")
-        elif bbox:
-            # Use publication_year field for fast integer sorting, then randomize within year
+        else:
+            # Use publication_year field for fast integer sorting
             # This ensures RAND papers (2024-01-01) and arXiv papers (2024-06-15) are treated equally
             # Papers with NULL years will naturally sort to the end and rarely appear
             order_clause = " ORDER BY dp.publication_year DESC NULLS LAST, dp.doctrove_paper_id ASC"
-        else:
-            # Standard ordering for non-bbox queries - sort by year only for consistent grouping
-            order_clause = " ORDER BY dp.publication_year DESC NULLS LAST, dp.doctrove_paper_id ASC"
     
     # PERFORMANCE OPTIMIZATION: Use materialized view for sorted queries
     # The materialized view is pre-sorted by publication_year, making queries much faster
@@ -1590,188 +1621,371 @@ def build_optimized_query_v2(
         "publication_year" in order_clause and 
         len(tables_needed) == 1 and  # Only doctrove_papers table needed
         'doctrove_papers' in tables_needed and
-        not disable_sort  # Don't use pre-sorted view when sorting is disabled
+        not disable_sort and  # Don't use pre-sorted view when sorting is disabled
+        embedding_2d_column == DEFAULT_EMBEDDING_2D_COLUMN  # View predates the shadow projection slot
     )
     
     if use_materialized_view:
         from_clause = from_clause.replace("FROM doctrove_papers dp", "FROM mv_papers_sorted_by_year dp")
-        logger.debug(f"🚀 Using materialized view for sorted query (no enrichment tables needed): {order_clause}")
-    else:
-        logger.debug(f"📊 Using main table (enrichment tables needed: {tables_needed})")
-        logger.debug(f"📊 Fields requested: {fields}")
-        logger.debug(f"📊 Tables detected: {tables_needed}")
     
-    # Build final query with optimized limit for semantic search
-    if search_text and search_embedding is not None:
-        # PERFORMANCE OPTIMIZATION: Use intelligent limit calculation
-        # The pgvector index is very efficient for nearest-neighbor search
-        # We can fetch closer to the actual limit needed while maintaining performance
+    offset_clause = " OFFSET %(offset)s" if has_offset else ""
+    
+    # Build final query
+    if semantic_strategy in (PLAN_ANN_FIRST, PLAN_ITERATIVE):
+        # SEMANTIC-FIRST CTE APPROACH
+        # Stage 1 (CTE): Use IVFFlat on full dataset to get top N most semantically similar
+        cte_query = (
+            "WITH semantic_candidates AS (\n"
+            "  SELECT dp.*\n"
+            "  FROM doctrove_papers dp\n"
+            "  WHERE dp.doctrove_source IN ('arxiv', 'randpub', 'extpub')\n"
+            f"    AND dp.{embedding_column} IS NOT NULL\n"
+            f"  ORDER BY dp.{embedding_column} <=> %(embedding)s::vector\n"
+            "  LIMIT %(cte_limit)s\n"
+            ")\n"
+        )
         
-        if limit <= 100:
-            # For small limits, use a modest multiplier to ensure we have enough results after threshold filtering
-            search_limit = max(limit * 3, 500)
-        elif limit <= 1000:
-            # For medium limits, use a smaller multiplier since pgvector is efficient
-            search_limit = max(limit * 1.5, 1500)
-        else:
-            # For large limits (like 5000), fetch close to what's needed
-            # pgvector can handle this efficiently with proper indexing
-            search_limit = max(limit + 500, 2000)
+        # Stage 2: Filter those candidates by bbox, universe, etc.
+        filter_conditions = []
+        if processed_filter:
+            filter_conditions.append(processed_filter)
+        if has_bbox:
+            filter_conditions.append(_bbox_condition(embedding_2d_column))
         
-        # SEMANTIC-FIRST CTE APPROACH
-        if use_semantic_cte:
-            # CTE cap: get many candidates for filtering (50K-100K depending on request size)
-            cte_limit = max(50000, search_limit * 10)
-            
-            # Stage 1 (CTE): Use IVFFlat on full dataset to get top N most semantically similar
-            cte_query = (
-                "WITH semantic_candidates AS (\n"
-                "  SELECT dp.*\n"
-                "  FROM doctrove_papers dp\n"
-                "  WHERE dp.doctrove_source IN ('arxiv', 'randpub', 'extpub')\n"
-                f"    AND dp.{embedding_column} IS NOT NULL\n"
-                f"  ORDER BY dp.{embedding_column} <=> %s::vector\n"
-                f"  LIMIT {cte_limit}\n"
-                ")\n"
-            )
-            
-            # Stage 2: Filter those candidates by bbox, universe, etc.
-            # Build WHERE clause for filtering the CTE results
-            filter_conditions = []
-            if sql_filter:
-                # CRITICAL FIX: Replace fully qualified field names with aliased versions
-                processed_filter_cte = process_sql_filter_field_names(sql_filter, table_aliases)
-                
-                # CRITICAL FIX: Escape % for parameterized queries (same as non-CTE path)
-                processed_filter_cte = processed_filter_cte.replace('%', '%%')
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"🔍 CTE: Processed sql_filter: {sql_filter} → {processed_filter_cte}")
-                
-                if processed_filter_cte.strip().startswith('(') and processed_filter_cte.strip().endswith(')'):
-                    filter_conditions.append(processed_filter_cte)
-                else:
-                    filter_conditions.append(f"({processed_filter_cte})")
-            
-            if bbox:
-                # Add bbox filter
-                try:
-                    if isinstance(bbox, str):
-                        bbox_parts = bbox.split(',')
-                        x1, y1, x2, y2 = map(float, bbox_parts)
-                    else:
-                        x1, y1, x2, y2 = bbox
-                    x_min, x_max = min(x1, x2), max(x1, x2)
-                    y_min, y_max = min(y1, y2), max(y1, y2)
-                    filter_conditions.append(f"dp.doctrove_embedding_2d <@ box(point({x_min}, {y_min}), point({x_max}, {y_max}))")
-                except Exception as e:
-                    logger.error(f"Error processing bbox in CTE: {e}")
-            
-            filter_clause = ""
-            if filter_conditions:
-                filter_clause = " WHERE " + " AND ".join(filter_conditions)
-            
-            # Build main SELECT with similarity score
-            similarity_select = f"(1 - (dp.{embedding_column} <=> %s::vector)) AS similarity_score"
-            # Note: field_mappings[-1] already has similarity_score from line 638, replace it
-            select_fields = field_mappings[:-1] + [similarity_select]
-            main_select = f"SELECT {', '.join(select_fields)}"
-            
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"CTE main_select fields: {len(select_fields)}, field_mappings had: {len(field_mappings)}")
-            
-            # Build FROM clause with JOINs
-            main_from = " FROM semantic_candidates dp"
-            for table in tables_needed:
-                if table != 'doctrove_papers':
-                    alias = table_aliases.get(table, table[:3])
-                    main_from += f" LEFT JOIN {table} {alias} ON dp.doctrove_paper_id = {alias}.doctrove_paper_id"
-            
-            # Final query
-            query = f"{cte_query}{main_select}{main_from}{filter_clause} ORDER BY dp.{embedding_column} <=> %s::vector LIMIT {search_limit}"
-            if offset > 0:
-                query += f" OFFSET {offset}"
-            
-            # Need embedding STRING parameter 3 times: CTE ORDER BY, similarity SELECT, main ORDER BY
-            parameters = [embedding_str, embedding_str, embedding_str]
-            
-            # DEBUG: Count placeholders in query - be careful about LIKE patterns with %
-            # Count actual %s placeholders (not just any %)
-            import re
-            placeholder_count = len(re.findall(r'%s', query))
-            param_count = len(parameters)
-            logger.error(f"🔍 DEBUG: CTE Query has {placeholder_count} '%s' placeholders, {param_count} parameters")
-            logger.error(f"🔍 DEBUG: sql_filter was: {sql_filter}")
-            logger.error(f"🔍 DEBUG: Query preview: {query[:800]}...")
-            if placeholder_count != param_count:
-                logger.error(f"🚨 PARAMETER MISMATCH: Query has {placeholder_count} placeholders but {param_count} parameters!")
-            
-            warnings.append(f"SEMANTIC_CTE: IVFFlat on full dataset → {cte_limit} candidates → filtered → top {search_limit}")
-            warnings.append(f"SEMANTIC_SEARCH_POST_PROCESSING: Will filter {search_limit} results by threshold >= {similarity_threshold}")
-            
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"🚀 CTE: Getting {cte_limit} semantic candidates, filtering to {search_limit}")
-                logger.debug(f"CTE Query placeholders: {placeholder_count}, Parameters: {param_count}")
-        else:
-            # Direct query (no CTE) for simple semantic search
-            # Build ORDER BY for semantic search (not built earlier)
-            semantic_order_clause = f" ORDER BY dp.{embedding_column} <=> %s::vector"
-            query = f"{select_clause} {from_clause}{where_clause}{semantic_order_clause} LIMIT {search_limit}"
-            if offset > 0:
-                query += f" OFFSET {offset}"
-            
-            # Parameters: [emb for SELECT similarity_score, emb for ORDER BY]
-            parameters.append(embedding_str)  # Add second embedding parameter for ORDER BY
-            
-            # Add metadata to indicate this needs post-processing
-            warnings.append(f"SEMANTIC_SEARCH_POST_PROCESSING: Will filter {search_limit} results by threshold >= {similarity_threshold}")
-            warnings.append(f"PERFORMANCE_NOTE: Using pgvector index for efficient similarity search")
+        filter_clause = ""
+        if filter_conditions:
+            filter_clause = " WHERE " + " AND ".join(filter_conditions)
+        
+        # Build FROM clause with JOINs
+        main_from = " FROM semantic_candidates dp"
+        for table in tables_needed:
+            if table != 'doctrove_papers':
+                alias = table_aliases.get(table, table[:3])
+                main_from += f" LEFT JOIN {table} {alias} ON dp.doctrove_paper_id = {alias}.doctrove_paper_id"
+        
+        named_sql = (f"{cte_query}{select_clause}{main_from}{filter_clause}"
+                     f" ORDER BY dp.{embedding_column} <=> %(embedding)s::vector LIMIT %(search_limit)s{offset_clause}")
+    elif semantic_strategy == PLAN_FILTER_FIRST:
+        # FILTER-FIRST EXACT SCAN (highly selective filters)
+        # The materialized CTE has no ORDER BY, so it cannot use the ANN index: it computes the
+        # exact distance for every row passing the filters, and the outer query sorts those
+        cte_query = (
+            "WITH filtered_candidates AS MATERIALIZED (\n"
+            f"  SELECT dp.doctrove_paper_id, dp.{embedding_column} <=> %(embedding)s::vector AS distance\n"
+            f"  {from_clause}{where_clause}\n"
+            ")\n"
+        )
+        main_from = " FROM filtered_candidates fc JOIN doctrove_papers dp ON dp.doctrove_paper_id = fc.doctrove_paper_id"
+        for table in tables_needed:
+            if table != 'doctrove_papers':
+                alias = table_aliases.get(table, table[:3])
+                main_from += f" LEFT JOIN {table} {alias} ON dp.doctrove_paper_id = {alias}.doctrove_paper_id"
+        
+        named_sql = (f"{cte_query}{select_clause}{main_from}"
+                     f" ORDER BY fc.distance, dp.doctrove_paper_id LIMIT %(search_limit)s{offset_clause}")
+    elif semantic:
+        # Direct query (no CTE) for simple semantic search
+        named_sql = (f"{select_clause} {from_clause}{where_clause}"
+                     f" ORDER BY dp.{embedding_column} <=> %(embedding)s::vector LIMIT %(search_limit)s{offset_clause}")
     else:
         # Standard query for non-semantic search
-        query = f"{select_clause} {from_clause}{where_clause}{order_clause} LIMIT {limit}"
-        if offset > 0:
-            query += f" OFFSET {offset}"
+        named_sql = f"{select_clause} {from_clause}{where_clause}{order_clause} LIMIT %(limit)s{offset_clause}"
+    
+    sql, slots = _positional_template(named_sql)
     
-    # Debug logging for the final query (only if debug enabled)
     if logger.isEnabledFor(logging.DEBUG):
-        logger.debug(f"build_optimized_query_v2 - Final query: {query}")
-        logger.debug(f"build_optimized_query_v2 - Parameters: {parameters}")
-        logger.debug(f"build_optimized_query_v2 - Warnings: {warnings}")
-        logger.debug(f"build_optimized_query_v2 - Tables needed: {tables_needed}")
+        logger.debug(f"compile_query_v2 - Template: {sql}")
+        logger.debug(f"compile_query_v2 - Slots: {slots}")
+        logger.debug(f"compile_query_v2 - Tables needed: {tables_needed}")
     
-    # PERFORMANCE VALIDATION: Ensure semantic search optimization is applied
-    if search_text and search_embedding is not None:
-        if use_semantic_cte:
-            # CTE approach: check for semantic_candidates
-            if "semantic_candidates" not in query:
-                logger.error(f"❌ PERFORMANCE ISSUE: Semantic CTE not applied! Query: {query[:200]}...")
-                warnings.append("PERFORMANCE_WARNING: Semantic CTE may not be working correctly")
-            else:
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"✅ PERFORMANCE: Semantic-first CTE confirmed - IVFFlat on full dataset, then filter")
-        else:
-            # Direct approach: check for ORDER BY
-            if "ORDER BY dp.doctrove_embedding <=> %s" not in query:
-                logger.error(f"❌ PERFORMANCE ISSUE: Semantic search optimization not applied! Query: {query[:200]}...")
-                warnings.append("PERFORMANCE_WARNING: Semantic search optimization may not be working correctly")
-            else:
+    return CompiledQuery(sql=sql, slots=slots, warnings=tuple(warnings), semantic_strategy=semantic_strategy)
+
+def semantic_search_limits(limit: int) -> Tuple[int, int]:
+    """
+    Candidate counts for semantic search: (search_limit, cte_limit).
+    
+    The pgvector index is very efficient for nearest-neighbor search, so we fetch
+    a modest multiple of the requested limit and filter by threshold in Python.
+    """
+    if limit <= 100:
+        # For small limits, use a modest multiplier to ensure we have enough results after threshold filtering
+        search_limit = max(limit * 3, 500)
+    elif limit <= 1000:
+        # For medium limits, use a smaller multiplier since pgvector is efficient
+        search_limit = int(max(limit * 1.5, 1500))
+    else:
+        # For large limits (like 5000), fetch close to what's needed
+        search_limit = max(limit + 500, 2000)
+    
+    # CTE cap: get many candidates for filtering (50K-100K depending on request size)
+    cte_limit = max(50000, search_limit * 10)
+    return search_limit, cte_limit
+
+def plan_semantic_search(connection_factory: callable, sql_filter: Optional[str] = None,
+                         bbox: Optional[Tuple[float, float, float, float]] = None, limit: int = 100,
+                         probes_override: Optional[int] = None) -> Optional[SemanticPlan]:
+    """
+    Choose how to run a semantic /api/papers query (see semantic_planner).
+    
+    Estimates the fraction of embedded papers passing sql_filter and bbox from pg_stats
+    and the corpus_stats extent, then picks the strategy, ANN candidate count and index
+    parameters. The decision and its planning time are logged.
+    
+    Returns:
+        The plan, or None when statistics are unavailable (build_optimized_query_v2
+        then uses its structural choice)
+    """
+    started = time.time()
+    prepared_filter = prepare_sql_filter(sql_filter)
+    try:
+        join_tables = [table for table, _, _ in sql_filter_join_tables(prepared_filter)]
+        statistics = get_planner_statistics(connection_factory, join_tables)
+    except Exception as e:
+        logger.warning(f"Semantic planner statistics unavailable, using the structural plan: {e}")
+        return None
+    if statistics.embedded_rows is None:
+        logger.info("Semantic planner: doctrove_papers has no row estimate yet, using the structural plan")
+        return None
+    
+    selectivity, confident = 1.0, True
+    if isinstance(prepared_filter, ParsedFilter):
+        estimator, misses = column_estimator(statistics, _filter_column_table)
+        selectivity = prepared_filter.selectivity(SQL_FILTER_EQ_SELECTIVITY, estimator)
+        confident = not misses
+    elif prepared_filter:
+        # Legacy text filter: nothing to estimate from
+        selectivity, confident = DEFAULT_INEQ_SEL, False
+    if bbox:
+        fraction = bbox_fraction(_normalize_bbox(bbox), statistics.extent)
+        if fraction is None:
+            fraction, confident = DEFAULT_BBOX_FRACTION, False
+        selectivity *= fraction
+    
+    search_limit, _ = semantic_search_limits(limit)
+    plan = choose_semantic_plan(search_limit, selectivity, confident, bool(prepared_filter or bbox),
+                                statistics, probes_override)
+    plan = replace(plan, planning_ms=(time.time() - started) * 1000)
+    logger.info(f"Semantic plan: {plan.describe()} planned in {plan.planning_ms:.1f}ms")
+    return plan
+
+def build_papers_by_id_query(
+    fields: List[str],
+    paper_ids: List[str],
+    enrichment_table: Optional[str] = None,
+    enrichment_field: Optional[str] = None,
+    embedding_2d_column: str = DEFAULT_EMBEDDING_2D_COLUMN
+) -> Tuple[str, List[Any]]:
+    """
+    Query for `fields` of the given papers, in no particular order (hydrates reranked ids).
+    
+    Returns:
+        Tuple of (query, parameters)
+    """
+    template = compile_query_v2(
+        tuple(fields), None, False, False, False, None, 'ASC', enrichment_table, enrichment_field,
+        True, embedding_2d_column, None, False, True
+    )
+    return template.sql, bind_query_parameters(template, {'paper_ids': list(paper_ids), 'limit': max(1, len(paper_ids))})
+
+def build_cluster_points_query(query: str, params: List[Any], similarity_threshold: float = 0.0,
+                               limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    """
+    Narrow a build_optimized_query_v2 query over (doctrove_paper_id, doctrove_embedding_2d)
+    to (paper id, x, y) rows with coordinates, for clustering in the API.
+    
+    Args:
+        query, params: From build_optimized_query_v2
+        similarity_threshold: For semantic queries, minimum similarity_score to keep;
+            like /api/papers, the `limit` most similar papers over it are kept
+        limit: Rows kept after the threshold (with similarity_threshold > 0)
+    
+    Returns:
+        Tuple of (query, parameters)
+    """
+    sql = (f"SELECT q.doctrove_paper_id, (q.doctrove_embedding_2d)[0], (q.doctrove_embedding_2d)[1] "
+           f"FROM ({query}) q WHERE q.doctrove_embedding_2d IS NOT NULL")
+    params = list(params)
+    if similarity_threshold > 0.0:
+        sql += " AND q.similarity_score >= %s ORDER BY q.similarity_score DESC LIMIT %s"
+        params += [similarity_threshold, limit]
+    return sql, params
+
+def bind_query_parameters(template: CompiledQuery, values: Dict[str, Any]) -> List[Any]:
+    """Positional parameters for `template.sql` from named per-call values."""
+    return [values[slot] for slot in template.slots]
+
+def clear_query_template_cache():
+    """Clear the compiled query template cache (e.g. after FIELD_DEFINITIONS change)."""
+    compile_query_v2.cache_clear()
+
+def get_query_template_cache_stats() -> Dict[str, int]:
+    """Hit/miss statistics for the compiled query template cache."""
+    info = compile_query_v2.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'current_size': info.currsize,
+        'max_size': info.maxsize
+    }
+
+def _normalize_bbox(bbox: Union[str, Tuple[float, float, float, float]]) -> Tuple[float, float, float, float]:
+    """Return (x_min, y_min, x_max, y_max) from a bbox tuple or "x1,y1,x2,y2" string."""
+    if isinstance(bbox, str):
+        # Parse "x1,y1,x2,y2" string format
+        bbox_parts = bbox.split(',')
+        if len(bbox_parts) != 4:
+            raise ValueError(f"Invalid bbox string format: {bbox} (expected 4 comma-separated values)")
+        x1, y1, x2, y2 = map(float, bbox_parts)
+    else:
+        # Assume it's already a tuple/list
+        x1, y1, x2, y2 = bbox
+    return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+@log_performance("build_optimized_query_v2")
+def build_optimized_query_v2(
+    fields: List[str],
+    sql_filter: Optional[str] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    embedding_type: str = 'doctrove',
+    limit: int = 100,
+    offset: int = 0,
+    sort_field: Optional[str] = None,
+    sort_direction: str = "ASC",
+    search_text: Optional[str] = None,
+    similarity_threshold: float = 0.0,
+    target_count: Optional[int] = None,
+    enrichment_source: Optional[str] = None,
+    enrichment_table: Optional[str] = None,
+    enrichment_field: Optional[str] = None,
+    disable_sort: bool = False,
+    embedding_2d_column: str = DEFAULT_EMBEDDING_2D_COLUMN,
+    semantic_plan: Optional[SemanticPlan] = None,
+    rerank: bool = False
+) -> Tuple[str, List[Any], List[str]]:
+    """
+    Build optimized query with comprehensive filtering and semantic similarity search.
+    
+    The SQL template comes from compile_query_v2, memoised on the request shape;
+    only the bbox corners, search vector, limits, offset and sql_filter literals
+    are bound per call.
+    
+    Args:
+        fields: List of fields to select
+        sql_filter: SQL WHERE clause (optional)
+        bbox: Bounding box coordinates (optional)
+        embedding_type: Type of embedding for bbox ('doctrove' - unified embeddings)
+        limit: Maximum number of results
+        offset: Number of results to skip
+        sort_field: Field to sort by
+        sort_direction: Sort direction (ASC/DESC)
+        search_text: Text to search for semantic similarity
+        similarity_threshold: Minimum similarity score (0.0 to 1.0)
+        target_count: Target number of semantically similar papers (optional)
+        enrichment_source: Source for enrichment data (optional)
+        enrichment_table: Table name for enrichment data (optional)
+        enrichment_field: Field name for enrichment data (optional)
+        disable_sort: If True, skip all sorting for maximum performance (optional)
+        embedding_2d_column: 2D coordinate column (projection slot) used for bbox
+            filtering and returned as doctrove_embedding_2d (optional)
+        semantic_plan: Strategy and ANN candidate count from plan_semantic_search (optional)
+        rerank: For semantic search, return the query for exact_rerank instead: candidate
+            ids and binary vectors, RERANK_OVERSAMPLE times more rows, offset left to
+            the rerank (optional)
+        
+    Returns:
+        Tuple of (query, parameters, warnings)
+    """
+    warnings = []
+    
+    if embedding_2d_column not in EMBEDDING_2D_COLUMNS:
+        raise ValueError(f"Invalid 2D embedding column: {embedding_2d_column}")
+    
+    # Validate similarity threshold
+    if similarity_threshold < 0.0 or similarity_threshold > 1.0:
+        raise ValueError("Similarity threshold must be between 0.0 and 1.0")
+    
+    # Validate target_count
+    if target_count is not None:
+        if target_count <= 0:
+            raise ValueError("Target count must be positive")
+        # Use the smaller of limit and target_count to avoid conflicts
+        effective_limit = min(limit, target_count)
+        if effective_limit != limit:
+            warnings.append(f"Using effective limit of {effective_limit} (minimum of limit={limit} and target_count={target_count})")
+        limit = effective_limit
+    
+    # Get embedding for search text if provided
+    search_embedding = None
+    if search_text:
+        # Check if search_text is already included in sql_filter to avoid double search
+        if sql_filter and search_text.strip():
+            search_pattern = search_text.strip().lower()
+            sql_filter_lower = sql_filter.lower()
+            
+            # Look for duplicate search patterns in sql_filter
+            title_pattern = f"doctrove_title ilike '%{search_pattern}%'"
+            abstract_pattern = f"doctrove_abstract ilike '%{search_pattern}%'"
+            
+            if (title_pattern in sql_filter_lower or abstract_pattern in sql_filter_lower):
                 if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"✅ PERFORMANCE: Semantic search optimization confirmed - using pgvector index efficiently")
+                    logger.debug(f"🔍 BUSINESS LOGIC: Search text '{search_pattern}' already in sql_filter - skipping semantic similarity to avoid double search")
+                search_text = None
+        
+        if search_text:
+            search_embedding = get_embedding_for_text(search_text, embedding_type)
+            if search_embedding is None:
+                warnings.append(f"Failed to generate embedding for search text: '{search_text[:50]}...'")
+                # Continue without semantic search if embedding fails
+                search_text = None
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 PERFORMANCE TEST: Search embedding generated - first 5 values: {search_embedding.tolist()[:5]}")
     
-    # CRITICAL: Count SQL placeholders to catch parameter mismatches
-    placeholder_count = query.count('%s')
-    if logger.isEnabledFor(logging.DEBUG):
-        logger.debug(f"🌍 BUSINESS LOGIC: Query has {placeholder_count} placeholders, {len(parameters)} parameters")
+    semantic = bool(search_text and search_embedding is not None)
+    rerank = rerank and semantic
     
-    if placeholder_count != len(parameters):
-        logger.error(f"⚠️ CRITICAL MISMATCH: SQL expects {placeholder_count} parameters but only {len(parameters)} provided!")
-        logger.error(f"⚠️ This will cause IndexError: list index out of range")
+    prepared_filter = prepare_sql_filter(sql_filter)
     
-    # Debug: Final query and parameters (commented out for production)
-    # print(f"=== BUSINESS LOGIC DEBUG: Final query: {query} ===")
-    # print(f"=== BUSINESS LOGIC DEBUG: Parameters: {parameters} ===")
-    # print(f"=== BUSINESS LOGIC DEBUG: Enrichment: source={enrichment_source}, table={enrichment_table}, field={enrichment_field} ===")
+    template = compile_query_v2(
+        tuple(fields), prepared_filter, bool(bbox), semantic, offset > 0 and not rerank,
+        sort_field, sort_direction, enrichment_table, enrichment_field,
+        disable_sort, embedding_2d_column, semantic_plan.strategy if semantic_plan else None,
+        rerank
+    )
+    warnings.extend(template.warnings)
     
-    return query, parameters, warnings
+    values = {'limit': limit, 'offset': offset}
+    if isinstance(prepared_filter, ParsedFilter):
+        values.update({f"filter_{index}": value for index, value in enumerate(prepared_filter.params)})
+    if bbox:
+        values['x_min'], values['y_min'], values['x_max'], values['y_max'] = _normalize_bbox(bbox)
+    if semantic:
+        # pgvector expects: '[1.0,2.0,3.0]'::vector
+        embedding_array = search_embedding.tolist() if hasattr(search_embedding, 'tolist') else search_embedding
+        values['embedding'] = '[' + ','.join(map(str, embedding_array)) + ']'
+        values['search_limit'], values['cte_limit'] = semantic_search_limits(limit)
+        if semantic_plan:
+            values['cte_limit'] = semantic_plan.candidates
+        if rerank:
+            values['search_limit'] = max(values['search_limit'], limit + offset) * RERANK_OVERSAMPLE
+            values['cte_limit'] = max(values['cte_limit'], values['search_limit'])
+            warnings.append(f"SEMANTIC_RERANK: Exact rerank of {values['search_limit']} ANN candidates")
+        
+        if template.semantic_strategy in (PLAN_ANN_FIRST, PLAN_ITERATIVE):
+            warnings.append(f"SEMANTIC_CTE: IVFFlat on full dataset → {values['cte_limit']} candidates → filtered → top {values['search_limit']}")
+        elif template.semantic_strategy == PLAN_FILTER_FIRST:
+            warnings.append(f"SEMANTIC_FILTER_FIRST: Exact distance over filtered rows → top {values['search_limit']}")
+        warnings.append(f"SEMANTIC_SEARCH_POST_PROCESSING: Will filter {values['search_limit']} results by threshold >= {similarity_threshold}")
+        if template.semantic_strategy == PLAN_DIRECT:
+            warnings.append(f"PERFORMANCE_NOTE: Using pgvector index for efficient similarity search")
+    
+    parameters = bind_query_parameters(template, values)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"build_optimized_query_v2 - Final query: {template.sql}")
+        logger.debug(f"build_optimized_query_v2 - Parameter slots: {template.slots}")
+        logger.debug(f"build_optimized_query_v2 - Warnings: {warnings}")
+    
+    return template.sql, parameters, warnings
 
 def build_count_query_v2(
     fields: List[str],
@@ -1782,7 +1996,8 @@ def build_count_query_v2(
     similarity_threshold: float = 0.0,
     enrichment_source: Optional[str] = None,
     enrichment_table: Optional[str] = None,
-    enrichment_field: Optional[str] = None
+    enrichment_field: Optional[str] = None,
+    embedding_2d_column: str = DEFAULT_EMBEDDING_2D_COLUMN
 ) -> Tuple[str, List[Any], List[str]]:
     """
     Build optimized count query for pagination with semantic similarity support.
@@ -1797,12 +2012,16 @@ def build_count_query_v2(
         enrichment_source: Source for enrichment data (optional)
         enrichment_table: Table name for enrichment data (optional)
         enrichment_field: Field name for enrichment data (optional)
+        embedding_2d_column: 2D coordinate column (projection slot) used for bbox filtering (optional)
         
     Returns:
         Tuple of (query, parameters, warnings)
     """
     warnings = []
     
+    if embedding_2d_column not in EMBEDDING_2D_COLUMNS:
+        raise ValueError(f"Invalid 2D embedding column: {embedding_2d_column}")
+    
     # Validate similarity threshold
     if similarity_threshold < 0.0 or similarity_threshold > 1.0:
         raise ValueError("Similarity threshold must be between 0.0 and 1.0")
@@ -1862,42 +2081,13 @@ def build_count_query_v2(
                 table_aliases[table] = alias
     
     # CRITICAL FIX: Also check sql_filter for fields that require JOINs
-    if sql_filter:
-        # Extract field names from sql_filter that require JOINs
-        # Use dynamic field detection for better flexibility
-        import re
-        
-        # Pattern to match field names in SQL (word boundaries)
-        field_pattern = r'\b([a-zA-Z_][a-zA-Z0-9_]*)\b'
-        potential_fields = re.findall(field_pattern, sql_filter)
-        
-        # Check each potential field name
-        for field_name in potential_fields:
-            # Skip SQL keywords and common table aliases
-            sql_keywords = {'SELECT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'NULL', 'IS', 'IN', 'LIKE', 'BETWEEN'}
-            if field_name.upper() in sql_keywords or field_name in ['dp', 'rm', 'em', 'ec', 'ej', 'ei', 'ea']:
-                continue
-            
-            # Try static field definitions first
-            field_info = get_field_info(field_name)
-            
-            # If field not found in static definitions, try qualified field parsing
-            if not field_info:
-                if '.' in field_name:
-                    field_info = process_qualified_field(field_name)
-                else:
-                    field_info = get_field_info_dynamic(field_name)
-            
-            # If we found field info and it requires a JOIN
-            if field_info and field_info.get('table') and field_info.get('table') != 'doctrove_papers':
-                table = field_info.get('table')
-                alias = field_info.get('alias')
-                if table not in tables_needed:
-                    tables_needed.add(table)
-                    table_aliases[table] = alias
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"🔍 BUSINESS LOGIC COUNT: Added table {table} (alias: {alias}) from sql_filter field: {field_name}")
-                        logger.debug(f"🔍 BUSINESS LOGIC COUNT: Field info: {field_info}")
+    prepared_filter = prepare_sql_filter(sql_filter)
+    for table, alias, field_name in sql_filter_join_tables(prepared_filter):
+        if table not in tables_needed:
+            tables_needed.add(table)
+            table_aliases[table] = alias
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 BUSINESS LOGIC COUNT: Added table {table} (alias: {alias}) from sql_filter field: {field_name}")
     
     # CRITICAL FIX: Add enrichment table if enrichment parameters are provided
     if enrichment_table and enrichment_field:
@@ -1937,26 +2127,13 @@ def build_count_query_v2(
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug("🚀 PERFORMANCE COUNT: Using minimal filtering to allow efficient IVFFlat index usage")
     
-    # Add SQL filter
-    if sql_filter:
-        is_valid, filter_warnings = validate_sql_filter_v2(sql_filter)
-        if not is_valid:
-            raise ValueError(f"Invalid SQL filter: {filter_warnings}")
-        warnings.extend(filter_warnings)
-        
-        # CRITICAL FIX: Replace fully qualified field names with aliased versions
-        processed_filter = process_sql_filter_field_names(sql_filter, table_aliases)
-        
-        # Avoid double-wrapping parentheses - check if sql_filter already has them
-        if processed_filter.strip().startswith('(') and processed_filter.strip().endswith(')'):
-            # Already has parentheses, don't wrap again
-            conditions.append(processed_filter)
-        else:
-            # No parentheses, wrap for safety
-            conditions.append(f"({processed_filter})")
-    
-    # Initialize parameters list
+    # Add SQL filter (parsed filters are parameterized; legacy text filters run inline)
     parameters = []
+    if prepared_filter:
+        warnings.extend(validate_sql_filter_v2(sql_filter)[1])
+        processed_filter, filter_params = render_sql_filter(prepared_filter, table_aliases, escape_percent=False)
+        conditions.append(processed_filter)
+        parameters.extend(filter_params)
     
     # Add bounding box filter
     if bbox:
@@ -1973,9 +2150,9 @@ def build_count_query_v2(
                 # Assume it's already a tuple/list
                 x1, y1, x2, y2 = bbox
             
-            # Use doctrove_embedding_2d for bbox filtering (unified embedding field)
+            # Use the active projection slot for bbox filtering (unified embedding field)
             # ✅ FIXED: Use spatial operators for GiST index efficiency
-            coords_column = 'doctrove_embedding_2d'
+            coords_column = embedding_2d_column
             x_min, x_max = min(x1, x2), max(x1, x2)
             y_min, y_max = min(y1, y2), max(y1, y2)
             conditions.append(f"dp.{coords_column} <@ box(point({x_min}, {y_min}), point({x_max}, {y_max}))")
@@ -1998,34 +2175,18 @@ def build_count_query_v2(
         # This is much faster than calculating similarity for 226K rows
     
     # Add enrichment table filters generically
+    # Only require data from tables that are actually used in filtering
+    # This prevents overly restrictive JOINs that filter out valid results
+    filter_tables_used = sql_filter_tables_used(prepared_filter)
     for table in tables_needed:
         if table != 'doctrove_papers':
             alias = table_aliases.get(table, table[:3])
-            # Only require data from tables that are actually used in filtering
-            # This prevents overly restrictive JOINs that filter out valid results
-            if sql_filter:
-                # Check if this table is actually referenced in the WHERE clause
-                # Look for exact field references with table aliases or table names
-                table_fields_used = []
-                for field_name, field_info in FIELD_DEFINITIONS.items():
-                    if field_info.get('table') == table:
-                        # Check for exact field references in the sql_filter
-                        field_patterns = [
-                            field_name,  # Exact field name
-                            f"{field_info.get('alias', '')}.{field_name}",  # With table alias
-                            f"{field_info.get('table', '')}.{field_name}"   # With table name
-                        ]
-                        if any(pattern in sql_filter for pattern in field_patterns if pattern):
-                            table_fields_used.append(field_name)
-                
-                # Only add IS NOT NULL if fields from this table are actually used in filtering
-                if table_fields_used:
-                    conditions.append(f"{alias}.doctrove_paper_id IS NOT NULL")
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"🔍 BUSINESS LOGIC COUNT: Added IS NOT NULL for table {table} (alias: {alias}) - fields used: {table_fields_used}")
-                else:
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"🔍 BUSINESS LOGIC COUNT: Skipped IS NOT NULL for table {table} (alias: {alias}) - no fields used in filtering")
+            if table in filter_tables_used:
+                conditions.append(f"{alias}.doctrove_paper_id IS NOT NULL")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"🔍 BUSINESS LOGIC COUNT: Added IS NOT NULL for table {table} (alias: {alias}) - referenced in sql_filter")
+            elif prepared_filter and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🔍 BUSINESS LOGIC COUNT: Skipped IS NOT NULL for table {table} (alias: {alias}) - no fields used in filtering")
     
     # Combine conditions
     where_clause = ""
@@ -2045,17 +2206,14 @@ def build_count_query_v2(
     
     return query, parameters, warnings
 
-def get_embedding_for_text(text: str, embedding_type: str = 'doctrove') -> Optional[np.ndarray]:
+def embedding_request(text: str, embedding_type: str = 'doctrove') -> Optional[Tuple[str, Dict[str, str], Dict[str, Any]]]:
     """
-    Get embedding for a text string using OpenAI service (configurable via environment).
-    Includes caching to avoid repeated API calls for the same text.
+    Build the OpenAI embeddings request (url, headers, json payload) for a text.
+    
+    Shared by the synchronous path below and the async client in asgi.py.
     
-    Args:
-        text: Text to embed
-        embedding_type: 'doctrove' (unified embeddings, used for logging)
-        
     Returns:
-        Numpy array of embedding values or None if failed
+        (url, headers, data), or None if the text is empty or embeddings are disabled/unconfigured
     """
     if not text or not text.strip():
         logger.warning(f"Empty text provided for {embedding_type} embedding")
@@ -2071,64 +2229,88 @@ def get_embedding_for_text(text: str, embedding_type: str = 'doctrove') -> Optio
         logger.error("OpenAI API key not configured. Please set OPENAI_API_KEY in .env.local")
         return None
     
-    # Check cache first
+    # OpenAI API configuration (works with both standard OpenAI and Azure OpenAI)
+    url = f"{OPENAI_BASE_URL}/embeddings"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {OPENAI_API_KEY}"
+    }
+    data = {
+        "model": OPENAI_EMBEDDING_MODEL,
+        "input": text.strip(),
+        "encoding_format": "float"
+    }
+    return url, headers, data
+
+def parse_embedding_response(result: Any, embedding_type: str = 'doctrove') -> Optional[np.ndarray]:
+    """Extract the embedding from an OpenAI embeddings response body."""
+    if isinstance(result, dict) and 'data' in result and len(result['data']) > 0:
+        return np.array(result['data'][0]['embedding'], dtype=np.float32)
+    logger.error(f"Unexpected response format for {embedding_type} embedding: {result}")
+    return None
+
+def get_cached_embedding(text: str) -> Optional[np.ndarray]:
+    """Return the cached embedding for text, or None if absent or expired."""
     text_hash = hashlib.md5(text.strip().encode()).hexdigest()
-    current_time = time.time()
+    cached = _embedding_cache.get(text_hash)
+    if cached is None:
+        return None
+    cached_embedding, cache_time = cached
+    if time.time() - cache_time < _cache_ttl_seconds:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🎯 CACHE HIT: Using cached embedding for text: '{text[:50]}...'")
+        return cached_embedding
+    # Cache expired, remove it
+    _embedding_cache.pop(text_hash, None)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"🗑️ CACHE EXPIRED: Removed expired cache for text: '{text[:50]}...'")
+    return None
+
+def cache_embedding(text: str, embedding: np.ndarray) -> None:
+    """Store an embedding for text (also used to seed the cache from asgi.py)."""
+    _embedding_cache[hashlib.md5(text.strip().encode()).hexdigest()] = (embedding, time.time())
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"💾 CACHE STORE: Cached embedding for future use (cache size: {len(_embedding_cache)})")
+
+def get_embedding_for_text(text: str, embedding_type: str = 'doctrove') -> Optional[np.ndarray]:
+    """
+    Get embedding for a text string using OpenAI service (configurable via environment).
+    Includes caching to avoid repeated API calls for the same text.
     
-    if text_hash in _embedding_cache:
-        cached_embedding, cache_time = _embedding_cache[text_hash]
-        if current_time - cache_time < _cache_ttl_seconds:
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"🎯 CACHE HIT: Using cached embedding for text: '{text[:50]}...'")
-            return cached_embedding
-        else:
-            # Cache expired, remove it
-            del _embedding_cache[text_hash]
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"🗑️ CACHE EXPIRED: Removed expired cache for text: '{text[:50]}...'")
+    Args:
+        text: Text to embed
+        embedding_type: 'doctrove' (unified embeddings, used for logging)
+        
+    Returns:
+        Numpy array of embedding values or None if failed
+    """
+    request_spec = embedding_request(text, embedding_type)
+    if request_spec is None:
+        return None
+    
+    # Check cache first
+    cached_embedding = get_cached_embedding(text)
+    if cached_embedding is not None:
+        return cached_embedding
     
     start_time = time.time()
     
     try:
-        # OpenAI API configuration (works with both standard OpenAI and Azure OpenAI)
-        url = f"{OPENAI_BASE_URL}/embeddings"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {OPENAI_API_KEY}"
-        }
-        
-        # Prepare the request payload
-        data = {
-            "model": OPENAI_EMBEDDING_MODEL,
-            "input": text.strip(),
-            "encoding_format": "float"
-        }
+        url, headers, data = request_spec
         
         # Make the API request with SSL verification using certifi
         # Reduced timeout for faster failure detection and retry logic
         response = requests.post(url, headers=headers, json=data, timeout=10, verify=certifi.where())
         response.raise_for_status()
         
-        # Parse the response
-        result = response.json()
-        
-        if 'data' in result and len(result['data']) > 0:
-            embedding = result['data'][0]['embedding']
-            end_time = time.time()
-            duration_ms = (end_time - start_time) * 1000
+        embedding_array = parse_embedding_response(response.json(), embedding_type)
+        if embedding_array is not None:
             if logger.isEnabledFor(logging.DEBUG):
+                duration_ms = (time.time() - start_time) * 1000
                 logger.debug(f"🚀 PERFORMANCE: Embedding generation took {duration_ms:.2f}ms for text: '{text[:50]}...'")
-            
             # Store in cache for future use
-            embedding_array = np.array(embedding, dtype=np.float32)
-            _embedding_cache[text_hash] = (embedding_array, current_time)
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"💾 CACHE STORE: Cached embedding for future use (cache size: {len(_embedding_cache)})")
-            
-            return embedding_array
-        else:
-            logger.error(f"Unexpected response format for {embedding_type} embedding: {result}")
-            return None
+            cache_embedding(text, embedding_array)
+        return embedding_array
             
     except requests.exceptions.RequestException as e:
         end_time = time.time()
@@ -2290,7 +2472,191 @@ def calculate_cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray)
     similarity = np.dot(embedding1, embedding2) / (norm1 * norm2)
     return float(similarity)
 
-def get_max_extent(connection_factory: callable = None, sql_filter: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def decode_vector_binary(buffers: List[bytes]) -> np.ndarray:
+    """
+    Stack pgvector binary values (vector_send) into an (n, dim) float32 matrix.
+    
+    Each value is an int16 dimension and an int16 reserved field, then `dim`
+    big-endian float4s; all values must have the same dimension.
+    """
+    if not buffers:
+        return np.empty((0, 0), dtype=np.float32)
+    dim = len(buffers[0]) // 4 - 1
+    # The 4-byte header occupies one float4 slot per row; drop that column
+    raw = np.frombuffer(b''.join(buffers), dtype='>f4').reshape(len(buffers), dim + 1)
+    return raw[:, 1:].astype(np.float32)
+
+def exact_rerank(candidate_ids: List[Any], candidate_vectors: np.ndarray, query_embedding: np.ndarray,
+                 similarity_threshold: float = 0.0, limit: int = 100,
+                 offset: int = 0) -> Tuple[List[Any], np.ndarray, int]:
+    """
+    Rank ANN candidates by exact cosine similarity to the query.
+    
+    One matrix-vector product scores every candidate; the threshold is a mask and the
+    top `offset + limit` come from argpartition, so no per-row Python work is done.
+    
+    Returns:
+        Tuple of (ids, similarity scores, number of candidates passing the threshold),
+        best first, after skipping `offset`
+    """
+    if len(candidate_ids) == 0:
+        return [], np.empty(0, dtype=np.float32), 0
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(candidate_vectors, axis=1) * np.linalg.norm(query)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = (candidate_vectors @ query) / norms
+    scores = np.nan_to_num(scores, nan=-1.0)  # zero vectors never pass
+    
+    passing = np.flatnonzero(scores >= similarity_threshold)
+    passed = len(passing)
+    wanted = offset + limit
+    if passed > wanted:
+        passing = passing[np.argpartition(-scores[passing], wanted - 1)[:wanted]]
+    ranked = passing[np.argsort(-scores[passing], kind='stable')][offset:]
+    return [candidate_ids[i] for i in ranked], scores[ranked], passed
+
+def get_projection_slots(connection_factory: callable = None) -> Tuple[str, str]:
+    """
+    Get the (active, candidate) 2D coordinate columns from umap_projection_state.
+
+    The active slot is what the map serves; the candidate slot is where a
+    blue/green UMAP rebuild writes its new layout. The lookup is cached for
+    a short TTL so a switch is picked up by every API worker within seconds
+    without adding a round-trip to each request. Falls back to the primary
+    column if the state table is missing or unreadable.
+
+    Args:
+        connection_factory: Database connection factory function
+
+    Returns:
+        Tuple of (active_column, candidate_column)
+    """
+    global _projection_state_cache
+
+    fallback = (DEFAULT_EMBEDDING_2D_COLUMN, EMBEDDING_2D_COLUMNS[1])
+    current_time = time.time()
+
+    if _projection_state_cache is not None:
+        active, candidate, cache_time = _projection_state_cache
+        if current_time - cache_time < _projection_state_ttl_seconds:
+            return active, candidate
+
+    if connection_factory is None:
+        return fallback
+
+    try:
+        with connection_factory() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT slot
+                    FROM umap_projection_state
+                    WHERE is_active
+                    LIMIT 1
+                """)
+                row = cur.fetchone()
+    except Exception as e:
+        logger.debug(f"Projection state unavailable, using {DEFAULT_EMBEDDING_2D_COLUMN}: {e}")
+        _projection_state_cache = (*fallback, current_time)
+        return fallback
+
+    active = row[0] if row and row[0] in EMBEDDING_2D_COLUMNS else DEFAULT_EMBEDDING_2D_COLUMN
+    candidate = next(col for col in EMBEDDING_2D_COLUMNS if col != active)
+    _projection_state_cache = (active, candidate, current_time)
+    return active, candidate
+
+def clear_projection_state_cache():
+    """Forget the cached projection slots so the next lookup hits the database."""
+    global _projection_state_cache
+    _projection_state_cache = None
+
+def resolve_embedding_2d_column(projection: Optional[str], connection_factory: callable = None) -> str:
+    """
+    Map the `projection` request parameter to a 2D coordinate column.
+
+    'active' (the default) serves the live layout; 'candidate' previews the
+    layout being built by a blue/green UMAP rebuild so the two can be compared.
+    """
+    active, candidate = get_projection_slots(connection_factory)
+    if projection == 'candidate':
+        return candidate
+    return active
+
+def parse_source_filter(sql_filter: Optional[str]) -> Optional[List[str]]:
+    """
+    Recognise filters that only restrict doctrove_source.
+    
+    Returns:
+        List of sources for `doctrove_source = 'x'` or `doctrove_source IN ('x', 'y')`
+        (optionally prefixed with `dp.` or parenthesized), otherwise None.
+    """
+    if not sql_filter:
+        return None
+    
+    try:
+        node = parse_sql_filter(sql_filter).root
+    except SqlFilterError:
+        return None
+    
+    def is_source_column(operand) -> bool:
+        return isinstance(operand, ColumnRef) and operand.name == 'doctrove_source' \
+            and operand.qualifier in (None, 'dp')
+    
+    def is_text(operand) -> bool:
+        return isinstance(operand, Literal) and isinstance(operand.value, str)
+    
+    if isinstance(node, Comparison) and node.op == '=':
+        if is_source_column(node.left) and is_text(node.right):
+            return [node.right.value]
+        if is_source_column(node.right) and is_text(node.left):
+            return [node.left.value]
+    
+    if isinstance(node, InList) and not node.negated and is_source_column(node.operand) \
+            and all(is_text(item) for item in node.items):
+        return [item.value for item in node.items]
+    
+    return None
+
+def get_precomputed_extent(connection_factory: callable,
+                           sources: Optional[List[str]] = None,
+                           embedding_2d_column: str = DEFAULT_EMBEDDING_2D_COLUMN) -> Optional[Dict[str, Any]]:
+    """
+    Read the 2D extent from corpus_stats (O(number of sources)).
+    
+    corpus_stats reports the active projection slot (its embedding_2d_column).
+    Returns None when the view is missing, reports another slot, has no 2D
+    points for the requested sources, or any requested source is flagged
+    extent_stale, so the caller can fall back to scanning doctrove_papers.
+    """
+    try:
+        with connection_factory() as conn:
+            with conn.cursor() as cur:
+                query = """
+                    SELECT MIN(x_min), MAX(x_max), MIN(y_min), MAX(y_max), BOOL_OR(extent_stale)
+                    FROM corpus_stats
+                    WHERE with_embedding_2d > 0 AND embedding_2d_column = %s
+                """
+                params = (embedding_2d_column,)
+                if sources:
+                    query += " AND doctrove_source = ANY(%s)"
+                    params += (sources,)
+                cur.execute(query, params)
+                result = cur.fetchone()
+    except Exception as e:
+        logger.debug(f"corpus_stats unavailable, computing extent on the fly: {e}")
+        return None
+    
+    if not result or result[0] is None or result[4]:
+        return None
+    
+    return {
+        'x_min': float(result[0]),
+        'x_max': float(result[1]),
+        'y_min': float(result[2]),
+        'y_max': float(result[3])
+    }
+
+def get_max_extent(connection_factory: callable = None, sql_filter: Optional[str] = None,
+                   embedding_2d_column: str = DEFAULT_EMBEDDING_2D_COLUMN) -> Optional[Dict[str, Any]]:
     """
     Get the maximum extent (bounding box) of 2D embeddings.
     
@@ -2300,6 +2666,7 @@ def get_max_extent(connection_factory: callable = None, sql_filter: Optional[str
     Args:
         connection_factory: Database connection factory function
         sql_filter: Optional SQL WHERE clause to filter papers
+        embedding_2d_column: 2D coordinate column (projection slot) to measure
         
     Returns:
         Dictionary with x_min, x_max, y_min, y_max, or None if no data
@@ -2313,31 +2680,49 @@ def get_max_extent(connection_factory: callable = None, sql_filter: Optional[str
         logger.error("get_max_extent requires a connection factory")
         return None
     
+    if embedding_2d_column not in EMBEDDING_2D_COLUMNS:
+        logger.error(f"Unknown 2D embedding column: {embedding_2d_column}")
+        return None
+    
+    # Unfiltered and per-source requests are answered from corpus_stats
+    sources = parse_source_filter(sql_filter)
+    if not sql_filter or sources:
+        extent = get_precomputed_extent(connection_factory, sources, embedding_2d_column)
+        if extent:
+            return extent
+    
     try:
         with connection_factory() as conn:
             with conn.cursor() as cur:
                 # Build base query
-                query = """
+                query = f"""
                     SELECT 
-                        MIN((doctrove_embedding_2d)[0]) as x_min,
-                        MAX((doctrove_embedding_2d)[0]) as x_max,
-                        MIN((doctrove_embedding_2d)[1]) as y_min,
-                        MAX((doctrove_embedding_2d)[1]) as y_max
+                        MIN(({embedding_2d_column})[0]) as x_min,
+                        MAX(({embedding_2d_column})[0]) as x_max,
+                        MIN(({embedding_2d_column})[1]) as y_min,
+                        MAX(({embedding_2d_column})[1]) as y_max
                     FROM doctrove_papers
-                    WHERE doctrove_embedding_2d IS NOT NULL
+                    WHERE {embedding_2d_column} IS NOT NULL
                 """
                 
                 # Add SQL filter if provided
+                params = None
                 if sql_filter:
-                    # Basic validation - ensure filter doesn't contain dangerous operations
-                    if any(op in sql_filter.upper() for op in ['DROP', 'DELETE', 'UPDATE', 'INSERT', 'ALTER', 'CREATE']):
-                        logger.error("SQL filter contains forbidden operations")
+                    is_valid, warnings = validate_sql_filter_v2(sql_filter)
+                    if not is_valid:
+                        logger.error(f"SQL filter rejected: {'; '.join(warnings)}")
                         return None
-                    
-                    query += f" AND {sql_filter}"
+                    try:
+                        parsed = parse_sql_filter(sql_filter)
+                        query += f" AND ({parsed.to_sql()})"
+                        params = parsed.params
+                    except SqlFilterError:
+                        # Syntax the parser does not model, accepted by the text checks above;
+                        # parenthesised so an OR cannot escape the IS NOT NULL predicate
+                        query += f" AND ({sql_filter})"
                 
                 logger.debug(f"Executing max extent query: {query}")
-                cur.execute(query)
+                cur.execute(query, params)
                 
                 result = cur.fetchone()
                 
@@ -0,0 +1,257 @@
+"""
+Catalog cache for doctrove-api schema-introspection endpoints.
+
+The UI populates its dropdowns from /api/sources, /api/sources/<source>/enrichment-fields,
+the unique-count endpoint and /api/stats. Each of those used to scan doctrove_papers or
+information_schema on every call. The catalog computes them once (per-source counts come
+from corpus_stats when that table exists), serves them from memory, and refreshes when:
+
+- the snapshot is older than CATALOG_REFRESH_SECONDS (checked on access and by the listener), or
+- a NOTIFY arrives on CATALOG_CHANNEL (sent by the doctrove_papers trigger and by enrichment
+  writers), debounced to at most one refresh per CATALOG_MIN_REFRESH_SECONDS.
+"""
+
+import logging
+import os
+import re
+import select
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANNEL = 'doctrove_catalog_changed'
+CATALOG_REFRESH_SECONDS = int(os.getenv('DOCTROVE_CATALOG_REFRESH_SECONDS', 300))
+CATALOG_MIN_REFRESH_SECONDS = int(os.getenv('DOCTROVE_CATALOG_MIN_REFRESH_SECONDS', 15))
+
+# Sources exposed through /api/sources
+VALID_SOURCES = ['arxiv', 'randpub', 'extpub']
+
+# Columns never offered as enrichment fields
+EXCLUDED_ENRICHMENT_COLUMNS = ('doctrove_paper_id', 'processed_at', 'version')
+
+
+class Catalog:
+    """In-memory snapshot of sources, per-source counts and table columns."""
+
+    def __init__(self, connect: Callable, refresh_seconds: int = CATALOG_REFRESH_SECONDS,
+                 min_refresh_seconds: int = CATALOG_MIN_REFRESH_SECONDS):
+        """
+        Args:
+            connect: Callable returning a new psycopg2 connection (closed after each use)
+            refresh_seconds: Maximum age of a snapshot before it is recomputed
+            min_refresh_seconds: Debounce interval for notification-driven refreshes
+        """
+        self._connect = connect
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._unique_counts: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+
+    # Refresh
+
+    def refresh(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Recompute the snapshot.
+
+        With `max_age`, a snapshot younger than that is returned as is: callers that
+        found it stale and queued on the lock reuse the refresh the first one did.
+        """
+        with self._refresh_lock:
+            snapshot = self._snapshot
+            if max_age is not None and snapshot is not None and time.time() - snapshot['refreshed_at'] < max_age:
+                return snapshot
+            started = time.time()
+            conn = self._connect()
+            try:
+                with conn.cursor() as cur:
+                    # Trigger-maintained corpus_stats when present, else one GROUP BY scan
+                    cur.execute("SELECT to_regclass('corpus_stats') IS NOT NULL")
+                    if cur.fetchone()[0]:
+                        cur.execute("""
+                            SELECT doctrove_source, paper_count, with_embedding_2d
+                            FROM corpus_stats
+                        """)
+                    else:
+                        cur.execute("""
+                            SELECT doctrove_source, COUNT(*), COUNT(doctrove_embedding_2d)
+                            FROM doctrove_papers
+                            GROUP BY doctrove_source
+                        """)
+                    source_rows = cur.fetchall()
+
+                    cur.execute("""
+                        SELECT table_name, column_name, data_type, is_nullable
+                        FROM information_schema.columns
+                        WHERE table_schema = current_schema()
+                        ORDER BY table_name, ordinal_position
+                    """)
+                    column_rows = cur.fetchall()
+            finally:
+                conn.close()
+
+            source_counts = {source: count for source, count, _ in source_rows if source}
+            columns: Dict[str, List[Dict[str, Any]]] = {}
+            for table_name, column_name, data_type, is_nullable in column_rows:
+                columns.setdefault(table_name, []).append({
+                    'column_name': column_name,
+                    'data_type': data_type,
+                    'nullable': is_nullable == 'YES'
+                })
+
+            self._snapshot = {
+                'source_counts': source_counts,
+                'total_papers': sum(count for _, count, _ in source_rows),
+                'papers_with_embeddings': sum(with_2d for _, _, with_2d in source_rows),
+                'columns': columns,
+                'refreshed_at': time.time()
+            }
+            self._unique_counts = {}
+            logger.info(f"Catalog refreshed in {(time.time() - started) * 1000:.1f}ms "
+                        f"({len(source_counts)} sources, {len(columns)} tables)")
+            return self._snapshot
+
+    def _current(self) -> Dict[str, Any]:
+        """Return the snapshot, refreshing synchronously if missing or stale."""
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - snapshot['refreshed_at'] >= self.refresh_seconds:
+            snapshot = self.refresh(max_age=self.refresh_seconds)
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot so the next access recomputes it."""
+        self._snapshot = None
+        self._unique_counts = {}
+
+    # Lookups
+
+    def sources(self) -> List[str]:
+        """Sources with at least one paper, restricted to VALID_SOURCES, sorted."""
+        source_counts = self._current()['source_counts']
+        return sorted(s for s, count in source_counts.items() if count > 0 and s in VALID_SOURCES)
+
+    def enrichment_fields(self, source: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Columns of `%source%enrichment%` / `%source%metadata%` tables, grouped by table."""
+        pattern = re.compile(f".*{re.escape(source)}.*(enrichment|metadata)")
+        fields = {}
+        for table_name, columns in sorted(self._current()['columns'].items()):
+            if not pattern.match(table_name):
+                continue
+            fields[table_name] = [
+                col for col in columns if col['column_name'] not in EXCLUDED_ENRICHMENT_COLUMNS
+            ]
+        return fields
+
+    def has_column(self, table: str, field: str) -> bool:
+        """True if `table.field` exists in the current schema."""
+        columns = self._current()['columns'].get(table, [])
+        return any(col['column_name'] == field for col in columns)
+
+    def unique_count(self, table: str, field: str,
+                     compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Memoise the unique-count/sample-values result for `table.field` until next refresh."""
+        self._current()
+        key = (table, field)
+        if key not in self._unique_counts:
+            self._unique_counts[key] = compute()
+        return self._unique_counts[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals and per-source distribution in the /api/stats response shape."""
+        snapshot = self._current()
+        source_distribution = [
+            {'doctrove_source': source, 'count': count}
+            for source, count in snapshot['source_counts'].items() if count > 0
+        ]
+        source_distribution.sort(key=lambda x: x['count'], reverse=True)
+        return {
+            'total_papers': snapshot['total_papers'],
+            'papers_with_embeddings': snapshot['papers_with_embeddings'],
+            'source_distribution': source_distribution
+        }
+
+    # Background refresh
+
+    @property
+    def listening(self) -> bool:
+        return self._listener is not None and self._listener.is_alive()
+
+    def start(self) -> None:
+        """Warm the snapshot and start the LISTEN/refresh thread (idempotent, also after a fork)."""
+        with self._start_lock:
+            if self.listening:
+                return
+            try:
+                self.refresh(max_age=self.refresh_seconds)
+            except Exception as e:
+                logger.warning(f"Initial catalog refresh failed, will retry on access: {e}")
+            self._stop.clear()
+            self._listener = threading.Thread(target=self._listen_loop, name='catalog-listener', daemon=True)
+            self._listener.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _listen_loop(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CATALOG_CHANNEL}")
+                self._wait_for_changes(conn)
+            except Exception as e:
+                logger.warning(f"Catalog listener error, reconnecting: {e}")
+                self._stop.wait(self.min_refresh_seconds)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _wait_for_changes(self, conn) -> None:
+        dirty = False
+        while not self._stop.is_set():
+            snapshot = self._snapshot
+            last_refresh = snapshot['refreshed_at'] if snapshot else 0.0
+            due = last_refresh + (self.min_refresh_seconds if dirty else self.refresh_seconds)
+            timeout = max(0.0, due - time.time())
+
+            if select.select([conn], [], [], timeout) != ([], [], []):
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    dirty = True
+                continue
+
+            self.refresh()
+            dirty = False
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """
+    Process-wide catalog backed by plain (non-pooled) connections.
+
+    The listener starts on first use in each process, so NOTIFY-driven refresh also
+    works under WSGI servers (e.g. gunicorn workers) that never run api.py's __main__.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                from db import create_connection_factory
+                _catalog = Catalog(create_connection_factory())
+    if not _catalog.listening:
+        _catalog.start()
+    return _catalog
@@ -0,0 +1,158 @@
+"""
+Vectorized Voronoi geometry for cluster overlays.
+
+The cells of all cluster centers are computed, matched to their centers,
+clipped and simplified with shapely 2.x array operations (no per-cell Python
+loop), then encoded either as the legacy per-polygon {x, y} lists or as one
+compact set of flat arrays (see encode_flat).
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Cells are simplified to about one pixel of a view this many pixels across
+GEOMETRY_RESOLUTION = 1000
+
+POLYGON_ENCODINGS = ('xy', 'flat')
+
+def voronoi_cells(centers: np.ndarray, boundary, envelope=None) -> np.ndarray:
+    """
+    Voronoi cell of each center clipped to boundary, as an object array in the
+    order of centers (None where nothing polygonal remains). MultiPolygons and
+    holes from non-convex boundaries are kept.
+
+    Args:
+        centers: (k, 2) cluster centers
+        boundary: shapely geometry the cells are clipped to
+        envelope: Extent the diagram is built over (defaults to boundary)
+    """
+    import shapely
+
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    cells = np.full(len(centers), None, dtype=object)
+    if len(centers) == 0:
+        return cells
+
+    diagram = shapely.voronoi_polygons(shapely.multipoints(centers),
+                                       extend_to=boundary if envelope is None else envelope)
+    parts = shapely.get_parts(diagram)
+    # voronoi_polygons does not keep input order: match each center to the cell containing it
+    center_idx, part_idx = shapely.STRtree(parts).query(shapely.points(centers), predicate='intersects')
+    owner = np.full(len(centers), -1)
+    owner[center_idx[::-1]] = part_idx[::-1]  # First match for a center on a shared edge
+    # Duplicate centers share one cell; only the first keeps it
+    _, first = np.unique(owner, return_index=True)
+    found = np.zeros(len(centers), dtype=bool)
+    found[first] = True
+    found &= owner >= 0
+
+    clipped = shapely.intersection(parts[owner[found]], boundary)
+    type_ids = shapely.get_type_id(clipped)
+    for i in np.flatnonzero(type_ids == shapely.GeometryType.GEOMETRYCOLLECTION):
+        # Clipping to a non-convex boundary can add stray lines or points to the polygons
+        polygons = [part for part in shapely.get_parts(clipped[i]) if part.geom_type == 'Polygon']
+        clipped[i] = shapely.multipolygons(polygons) if polygons else None
+    polygonal = np.isin(type_ids, [shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON,
+                                   shapely.GeometryType.GEOMETRYCOLLECTION])
+    cells[found] = np.where(polygonal & ~shapely.is_empty(clipped) & ~shapely.is_missing(clipped), clipped, None)
+    return cells
+
+def convex_hull(coords: np.ndarray):
+    """
+    Convex hull of (n, 2) coords. Building a MultiPoint of every point dominates
+    the cost, so points strictly inside the polygon of the extreme points in
+    eight directions (Akl-Toussaint) are discarded first.
+    """
+    import shapely
+
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    if len(coords) > 64:
+        # Extremes in counterclockwise order of direction
+        directions = np.array([[1, 0], [1, 1], [0, 1], [-1, 1], [-1, 0], [-1, -1], [0, -1], [1, -1]], dtype=float)
+        extremes = np.argmax(coords @ directions.T, axis=0)
+        extremes = extremes[np.r_[True, extremes[1:] != extremes[:-1]]]
+        if len(extremes) > 1 and extremes[0] == extremes[-1]:
+            extremes = extremes[:-1]
+        if len(extremes) >= 3:
+            start = coords[extremes]
+            edge = np.roll(start, -1, axis=0) - start
+            cross = (edge[:, 0] * (coords[:, 1, np.newaxis] - start[:, 1])
+                     - edge[:, 1] * (coords[:, 0, np.newaxis] - start[:, 0]))
+            coords = coords[~(cross > 0).all(axis=1)]
+    return shapely.convex_hull(shapely.multipoints(coords))
+
+def simplify_tolerance(bounds: Tuple[float, float, float, float]) -> float:
+    """Simplification tolerance for a view with bounds (x_min, y_min, x_max, y_max): about one pixel."""
+    x_min, y_min, x_max, y_max = bounds
+    return max(x_max - x_min, y_max - y_min) / GEOMETRY_RESOLUTION
+
+def simplify_cells(cells: np.ndarray, tolerance: float) -> np.ndarray:
+    """Drop vertices that move the outline by less than tolerance (topology preserved)."""
+    import shapely
+
+    if tolerance <= 0:
+        return cells
+    return shapely.simplify(cells, tolerance, preserve_topology=True)
+
+def coordinate_decimals(tolerance: float) -> Optional[int]:
+    """Decimals that keep rounding error an order of magnitude below tolerance (None: do not round)."""
+    if not tolerance > 0 or not math.isfinite(tolerance):
+        return None
+    return max(0, math.ceil(-math.log10(tolerance)) + 1)
+
+def encode_xy(cells: np.ndarray) -> List[Dict[str, List[float]]]:
+    """
+    Legacy encoding: one closed {x: [...], y: [...]} ring per polygon, for
+    Plotly fill='toself'. MultiPolygon cells give one entry per part; holes
+    cannot be expressed and are left out (use encode_flat).
+    """
+    import shapely
+
+    polygons = shapely.get_parts(cells)
+    if len(polygons) == 0:
+        return []
+    coords, index = shapely.get_coordinates(shapely.get_exterior_ring(polygons), return_index=True)
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(index)) + 1, [len(index)]]).tolist()
+    xs, ys = coords[:, 0].tolist(), coords[:, 1].tolist()
+    return [{'x': xs[start:end], 'y': ys[start:end]} for start, end in zip(bounds[:-1], bounds[1:])]
+
+def encode_flat(cells: np.ndarray, decimals: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compact encoding of cells (the GeoArrow MultiPolygon layout):
+
+        coords:          x0, y0, x1, y1, ... (rounded to decimals)
+        ring_offsets:    ring r is points ring_offsets[r] .. ring_offsets[r + 1] (closed)
+        polygon_offsets: polygon p is rings polygon_offsets[p] .. polygon_offsets[p + 1];
+                         the first is its exterior, the rest are holes
+        cell_offsets:    cell c is polygons cell_offsets[c] .. cell_offsets[c + 1]
+
+    Missing cells encode as zero polygons, so cell c stays aligned with cells[c].
+    """
+    import shapely
+
+    cells = np.asarray(cells, dtype=object)
+    if len(cells) == 0 or shapely.is_missing(cells).all():
+        coords = np.empty((0, 2))
+        ring_offsets, polygon_offsets = np.zeros(1, dtype=int), np.zeros(1, dtype=int)
+        cell_offsets = np.zeros(len(cells) + 1, dtype=int)
+    else:
+        geometry_type, coords, offsets = shapely.to_ragged_array(cells)
+        if geometry_type == shapely.GeometryType.POLYGON:
+            ring_offsets, cell_rings = offsets
+            # One polygon per present cell; missing cells have no rings, so no polygon either
+            polygon_offsets = np.unique(cell_rings)
+            cell_offsets = np.concatenate([[0], np.cumsum(np.diff(cell_rings) > 0)])
+        else:
+            ring_offsets, polygon_offsets, cell_offsets = offsets
+    if decimals is not None:
+        coords = coords.round(decimals)
+    return {
+        'encoding': 'flat',
+        'decimals': decimals,
+        'coords': coords.ravel().tolist(),
+        'ring_offsets': np.asarray(ring_offsets).tolist(),
+        'polygon_offsets': np.asarray(polygon_offsets).tolist(),
+        'cell_offsets': np.asarray(cell_offsets).tolist(),
+    }
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Hierarchical cluster tree of the 2D map for instant multi-scale labels.
+
+Built offline: every paper with 2D coordinates is clustered with K-means, then
+each cluster is clustered again, down to --depth levels (nodes with fewer than
+MIN_NODE_POINTS points are not split). Each node stores the Voronoi cell of its
+centroid clipped to its parent's cell, so every level tiles the map, and an LLM
+label generated together with its siblings (one prompt per parent, through the
+cluster summary cache).
+
+GET /api/clusters/tree?bbox=&zoom= then returns the stored nodes of the level
+matching the zoom, with no K-means or LLM work at request time.
+
+Usage:
+    python cluster_tree.py build --branching 8 --depth 4
+    python cluster_tree.py build --source arxiv --no-labels
+
+Tables: database/migrations/20261018_130000__cluster_tree.sql
+"""
+
+import argparse
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from doctrove_shared.cluster_engine import KMeansEngine
+from cluster_geometry import convex_hull, voronoi_cells
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BRANCHING = 8
+DEFAULT_MAX_DEPTH = 4
+# Nodes with fewer points are leaves
+MIN_NODE_POINTS = 50
+REPRESENTATIVES_PER_NODE = 10
+TITLE_BATCH_SIZE = 5000
+# Builds kept after a new one is activated (the new one and its predecessor)
+KEEP_BUILDS = 2
+
+@dataclass
+class TreeNode:
+    node_id: int
+    parent_id: Optional[int]
+    depth: int
+    rows: np.ndarray          # Rows of the coordinate array in this node
+    center: np.ndarray
+    polygon: Any              # shapely Polygon
+    sample: np.ndarray        # Rows the label is generated from
+    is_leaf: bool = True
+    label: Optional[str] = None
+
+def build_tree(coords: np.ndarray, branching: int = DEFAULT_BRANCHING, max_depth: int = DEFAULT_MAX_DEPTH,
+               min_node_points: int = MIN_NODE_POINTS, engine: Optional[KMeansEngine] = None) -> List[TreeNode]:
+    """
+    Recursively cluster coords (n, 2) into a tree; nodes are returned breadth-first
+    with node_id equal to their position.
+    """
+    from clustering import REPRESENTATIVE_SAMPLING_SEED, sample_cluster_representatives
+
+    engine = engine or KMeansEngine(cache_size=0)
+    rng = np.random.default_rng(REPRESENTATIVE_SAMPLING_SEED)
+    hull = convex_hull(coords)
+    if hull.geom_type != 'Polygon':
+        hull = hull.buffer(1e-6)  # Collinear or single points
+    root = TreeNode(0, None, 0, np.arange(len(coords)), coords.mean(axis=0), hull, np.empty(0, dtype=np.intp))
+    nodes = [root]
+    queue = deque([root])
+
+    while queue:
+        node = queue.popleft()
+        if node.depth >= max_depth or len(node.rows) < max(min_node_points, 2 * branching):
+            continue
+        points = coords[node.rows]
+        fit = engine.fit(points, branching)
+        # Nodes store one ring; cells of a convex parent are convex polygons
+        cells = [cell if cell is not None and cell.geom_type == 'Polygon' else None
+                 for cell in voronoi_cells(fit.centers, node.polygon)]
+        samples = sample_cluster_representatives(points, fit.centers, fit.labels, n=REPRESENTATIVES_PER_NODE, rng=rng)
+        order = np.argsort(fit.labels, kind='stable')
+        members = np.split(node.rows[order], np.cumsum(np.bincount(fit.labels, minlength=branching))[:-1])
+        survivors = [cluster_id for cluster_id in range(branching)
+                     if len(members[cluster_id]) and cells[cluster_id] is not None]
+        if not survivors:
+            continue
+        members = reassign_orphans(coords, fit.centers, members, survivors, node.node_id)
+
+        for cluster_id in survivors:
+            child = TreeNode(len(nodes), node.node_id, node.depth + 1, members[cluster_id],
+                             fit.centers[cluster_id], cells[cluster_id], node.rows[samples[cluster_id]])
+            nodes.append(child)
+            queue.append(child)
+            node.is_leaf = False
+
+    logger.info(f"Cluster tree: {len(nodes):,} nodes over {len(coords):,} points, "
+                f"depth {max(node.depth for node in nodes)}")
+    return nodes
+
+def reassign_orphans(coords: np.ndarray, centers: np.ndarray, members: List[np.ndarray],
+                     survivors: List[int], node_id: int) -> List[np.ndarray]:
+    """
+    Move the points of clusters without a usable cell (degenerate Voronoi
+    intersections) to the nearest surviving sibling, so no point leaves the tree.
+    """
+    orphans = [members[cluster_id] for cluster_id in range(len(members))
+               if cluster_id not in survivors and len(members[cluster_id])]
+    if not orphans:
+        return members
+    rows = np.concatenate(orphans)
+    distances = np.linalg.norm(coords[rows][:, None, :] - centers[survivors][None, :, :], axis=2)
+    nearest = np.asarray(survivors)[distances.argmin(axis=1)]
+    members = list(members)
+    for cluster_id in survivors:
+        members[cluster_id] = np.concatenate([members[cluster_id], rows[nearest == cluster_id]])
+    logger.warning(f"Node {node_id}: {len(orphans)} children had no cell; "
+                   f"{len(rows):,} points moved to the nearest sibling")
+    return members
+
+def label_tree(nodes: List[TreeNode], titles_for: Callable[[List[np.ndarray]], List[List[str]]],
+               summarize: Optional[Callable[[List[List[str]]], List[str]]] = None) -> None:
+    """
+    Label every non-root node; siblings are summarized together so their labels
+    tell them apart.
+    """
+    if summarize is None:
+        from clustering import summarize_clusters
+        summarize = summarize_clusters
+    children: Dict[int, List[TreeNode]] = {}
+    for node in nodes[1:]:
+        children.setdefault(node.parent_id, []).append(node)
+    titles = titles_for([node.sample for node in nodes[1:]])
+    titles_by_node = {node.node_id: node_titles for node, node_titles in zip(nodes[1:], titles)}
+    for number, siblings in enumerate(children.values(), 1):
+        summaries = summarize([titles_by_node[node.node_id] for node in siblings])
+        for node, summary in zip(siblings, summaries):
+            node.label = summary
+        if number % 50 == 0:
+            logger.info(f"Labelled {number}/{len(children)} sibling groups")
+
+def depth_for_zoom(zoom: float, branching: int, max_depth: int) -> int:
+    """
+    Tree level to show at a zoom of log2(map extent / view extent).
+
+    Each level has `branching` times as many nodes as the one above; choosing
+    depth 1 + zoom * log(4) / log(branching) keeps about `branching` nodes in view.
+    """
+    depth = 1 + round(max(zoom, 0.0) * math.log(4) / math.log(max(branching, 2)))
+    return int(min(max(depth, 1), max(max_depth, 1)))
+
+def zoom_for_bbox(bbox: Optional[Tuple[float, float, float, float]],
+                  extent: Tuple[Optional[float], Optional[float], Optional[float], Optional[float]]) -> float:
+    """log2 of how many times smaller the view is than the map extent (0 for the whole map)."""
+    if not bbox or None in extent:
+        return 0.0
+    x_min, x_max, y_min, y_max = extent
+    view_width, view_height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    if view_width <= 0 or view_height <= 0:
+        return 0.0
+    ratio = max((x_max - x_min) / view_width, (y_max - y_min) / view_height)
+    return max(0.0, math.log2(ratio)) if ratio > 0 else 0.0
+
+def build_tree_build_query(build_id: Optional[int] = None) -> Tuple[str, List[Any]]:
+    """Query for the active tree build, or a specific one."""
+    query = """
+        SELECT build_id, embedding_2d_column, sources, branching, max_depth, point_count, node_count,
+               x_min, x_max, y_min, y_max, built_at
+        FROM cluster_tree_builds
+    """
+    if build_id is None:
+        return query + " WHERE is_active", []
+    return query + " WHERE build_id = %s", [build_id]
+
+def build_tree_nodes_query(build_id: int, depth: int,
+                           bbox: Optional[Tuple[float, float, float, float]] = None) -> Tuple[str, List[Any]]:
+    """
+    Query for the nodes shown at `depth`: the nodes of that level plus leaves
+    above it (so areas that were not split further stay covered), optionally
+    only those whose bounding box intersects bbox (x_min, y_min, x_max, y_max).
+    """
+    query = """
+        SELECT node_id, parent_id, depth, point_count, center_x, center_y, polygon_x, polygon_y, label
+        FROM cluster_tree_nodes
+        WHERE build_id = %s AND depth >= 1 AND (depth = %s OR (is_leaf AND depth < %s))
+    """
+    params: List[Any] = [build_id, depth, depth]
+    if bbox:
+        query += " AND x_max >= %s AND x_min <= %s AND y_max >= %s AND y_min <= %s"
+        params += [bbox[0], bbox[2], bbox[1], bbox[3]]
+    return query + " ORDER BY node_id", params
+
+def fetch_points(conn, column: str, sources: Optional[Sequence[str]] = None) -> Tuple[List[str], np.ndarray]:
+    """Ids and (n, 2) coordinates of every paper with a position in `column`."""
+    from business_logic import EMBEDDING_2D_COLUMNS
+    if column not in EMBEDDING_2D_COLUMNS:
+        raise ValueError(f"Unknown 2D embedding column: {column}")
+    query = f"""
+        SELECT doctrove_paper_id::text, ({column})[0], ({column})[1]
+        FROM doctrove_papers
+        WHERE {column} IS NOT NULL
+    """
+    params: List[Any] = []
+    if sources:
+        query += " AND doctrove_source = ANY(%s)"
+        params.append(list(sources))
+    paper_ids: List[str] = []
+    chunks: List[np.ndarray] = []
+    with conn.cursor(name='cluster_tree_points') as cur:
+        cur.itersize = 50000
+        cur.execute(query, params)
+        while True:
+            rows = cur.fetchmany(50000)
+            if not rows:
+                break
+            paper_ids.extend(row[0] for row in rows)
+            chunks.append(np.array([(row[1], row[2]) for row in rows], dtype=float))
+    coords = np.vstack(chunks) if chunks else np.empty((0, 2))
+    return paper_ids, coords
+
+def fetch_titles(conn, paper_ids: Sequence[str]) -> Dict[str, str]:
+    titles: Dict[str, str] = {}
+    unique_ids = list(dict.fromkeys(paper_ids))
+    with conn.cursor() as cur:
+        for start in range(0, len(unique_ids), TITLE_BATCH_SIZE):
+            cur.execute("SELECT doctrove_paper_id::text, doctrove_title FROM doctrove_papers "
+                        "WHERE doctrove_paper_id = ANY(%s::uuid[])", (unique_ids[start:start + TITLE_BATCH_SIZE],))
+            titles.update(cur.fetchall())
+    return titles
+
+def store_tree(conn, nodes: List[TreeNode], paper_ids: Sequence[str], column: str,
+               sources: Optional[Sequence[str]], branching: int, max_depth: int) -> int:
+    """Insert a build and its nodes, activate it and drop older builds; returns the build id."""
+    from psycopg2.extras import execute_values
+
+    rows = []
+    for node in nodes:
+        ring = np.asarray(node.polygon.exterior.coords)
+        x_min, y_min, x_max, y_max = node.polygon.bounds
+        rows.append((
+            node.node_id, node.parent_id, node.depth, node.is_leaf, len(node.rows),
+            float(node.center[0]), float(node.center[1]), x_min, x_max, y_min, y_max,
+            ring[:, 0].tolist(), ring[:, 1].tolist(), node.label,
+            [paper_ids[row] for row in node.sample]
+        ))
+    x_min, y_min, x_max, y_max = nodes[0].polygon.bounds
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO cluster_tree_builds (embedding_2d_column, sources, branching, max_depth, point_count,
+                                             node_count, x_min, x_max, y_min, y_max)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING build_id
+        """, (column, list(sources) if sources else None, branching, max_depth, len(nodes[0].rows), len(nodes),
+              x_min, x_max, y_min, y_max))
+        build_id = cur.fetchone()[0]
+        execute_values(cur, """
+            INSERT INTO cluster_tree_nodes (build_id, node_id, parent_id, depth, is_leaf, point_count,
+                                            center_x, center_y, x_min, x_max, y_min, y_max,
+                                            polygon_x, polygon_y, label, sample_paper_ids)
+            VALUES %s
+        """, rows, template=f"({int(build_id)}, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::uuid[])",
+            page_size=500)
+        cur.execute("UPDATE cluster_tree_builds SET is_active = FALSE WHERE is_active")
+        cur.execute("UPDATE cluster_tree_builds SET is_active = TRUE, activated_at = NOW() WHERE build_id = %s",
+                    (build_id,))
+        cur.execute("""
+            DELETE FROM cluster_tree_builds
+            WHERE build_id NOT IN (SELECT build_id FROM cluster_tree_builds ORDER BY build_id DESC LIMIT %s)
+        """, (KEEP_BUILDS,))
+    conn.commit()
+    return build_id
+
+def build(args) -> int:
+    from business_logic import get_projection_slots
+    from db import create_connection_factory
+
+    connection_factory = create_connection_factory()
+    column = get_projection_slots(connection_factory)[0]
+    conn = connection_factory()
+    try:
+        started = time.time()
+        paper_ids, coords = fetch_points(conn, column, args.source)
+        conn.commit()  # Close the named cursor's transaction
+        if len(coords) < 2:
+            raise SystemExit(f"Not enough papers with {column} to build a cluster tree ({len(coords)})")
+        logger.info(f"Fetched {len(coords):,} points from {column} in {time.time() - started:.1f}s")
+
+        nodes = build_tree(coords, args.branching, args.depth, args.min_node_points)
+        if not args.no_labels:
+            sample_ids = [paper_ids[row] for node in nodes for row in node.sample]
+            titles = fetch_titles(conn, sample_ids)
+            label_tree(nodes, lambda samples: [[titles.get(paper_ids[row]) for row in rows] for rows in samples])
+
+        build_id = store_tree(conn, nodes, paper_ids, column, args.source, args.branching, args.depth)
+        logger.info(f"Activated cluster tree build {build_id} ({len(nodes):,} nodes) "
+                    f"in {time.time() - started:.1f}s")
+        return build_id
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the hierarchical cluster tree served by /api/clusters/tree')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Cluster the active 2D projection and activate the new tree')
+    build_parser.add_argument('--branching', type=int, default=DEFAULT_BRANCHING, help='Children per node')
+    build_parser.add_argument('--depth', type=int, default=DEFAULT_MAX_DEPTH, help='Levels below the root')
+    build_parser.add_argument('--min-node-points', type=int, default=MIN_NODE_POINTS,
+                              help='Nodes with fewer points are not split')
+    build_parser.add_argument('--source', action='append', help='Only papers of this source (repeatable)')
+    build_parser.add_argument('--no-labels', action='store_true', help='Skip the LLM labels')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if args.branching < 2 or args.depth < 1:
+        parser.error('--branching must be at least 2 and --depth at least 1')
+    build(args)
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,27 @@ Replicates Dash clustering_service.py functionality
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import logging
 import requests
 import re
 import certifi
 import json
 
+from doctrove_shared.cluster_engine import get_kmeans_engine
+from cluster_geometry import (convex_hull, coordinate_decimals, encode_flat, encode_xy, simplify_cells,
+                              simplify_tolerance, voronoi_cells)
+from summary_cache import get_summary_cache, get_summary_jobs
+
 logger = logging.getLogger(__name__)
 
+# Seed for picking representative titles, so re-clustering the same data labels it the same way
+REPRESENTATIVE_SAMPLING_SEED = 42
+
+SUMMARY_UNAVAILABLE = "Summary unavailable."
+# Label shown until a deferred summary arrives
+SUMMARY_PENDING = "Summarizing..."
+
 # Import OpenAI configuration from the main API config
 # Use lazy import to avoid breaking API startup if config is not available
 OPENAI_API_KEY = None
@@ -38,14 +50,18 @@ def _load_config():
             OPENAI_CHAT_MODEL = "gpt-4o"
             USE_OPENAI_LLM = False
 
-def get_azure_llm_summaries(prompt: str) -> str:
-    """Get LLM summaries from OpenAI API (using config values)."""
+def llm_request(prompt: str) -> Optional[Tuple[str, Dict[str, str], Dict[str, Any]]]:
+    """
+    Build the chat-completions request (url, headers, json payload) for a prompt.
+    
+    Shared by get_azure_llm_summaries and the async client in asgi.py.
+    Returns None when LLM features are disabled; raises ValueError when unconfigured.
+    """
     _load_config()  # Load config lazily
-    logger.info(f"get_azure_llm_summaries called with prompt length: {len(prompt) if prompt else 0}")
     
     if not USE_OPENAI_LLM:
         logger.warning("LLM features disabled via configuration. Returning dummy summary.")
-        return "LLM features disabled."
+        return None
     
     if not OPENAI_API_KEY or OPENAI_API_KEY == 'your_personal_openai_api_key_here':
         logger.error("OpenAI API key not configured. Please set OPENAI_API_KEY in .env.local")
@@ -56,10 +72,6 @@ def get_azure_llm_summaries(prompt: str) -> str:
         raise ValueError("Invalid prompt")
     
     url = f"{OPENAI_BASE_URL}/chat/completions"
-    logger.info(f"Making LLM API request to: {url}")
-    logger.debug(f"Using model: {OPENAI_CHAT_MODEL}")
-    logger.debug(f"API key configured: {bool(OPENAI_API_KEY)} (length: {len(OPENAI_API_KEY) if OPENAI_API_KEY else 0})")
-    
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {OPENAI_API_KEY}"
@@ -70,6 +82,39 @@ def get_azure_llm_summaries(prompt: str) -> str:
         "max_tokens": 2000,
         "temperature": 0.3
     }
+    return url, headers, data
+
+def parse_llm_content(response_data: Any) -> str:
+    """Extract the message content from a chat-completions response body."""
+    if not isinstance(response_data, dict) or "choices" not in response_data:
+        raise ValueError("Invalid response format from LLM API")
+    
+    choices = response_data["choices"]
+    if not choices or not isinstance(choices, list):
+        raise ValueError("No choices in LLM API response")
+    
+    first_choice = choices[0]
+    if not isinstance(first_choice, dict) or "message" not in first_choice:
+        raise ValueError("Invalid choice format in LLM API response")
+    
+    message = first_choice["message"]
+    if not isinstance(message, dict) or "content" not in message:
+        raise ValueError("Invalid message format in LLM API response")
+    
+    return message["content"]
+
+def get_azure_llm_summaries(prompt: str) -> str:
+    """Get LLM summaries from OpenAI API (using config values)."""
+    logger.info(f"get_azure_llm_summaries called with prompt length: {len(prompt) if prompt else 0}")
+    
+    request_spec = llm_request(prompt)
+    if request_spec is None:
+        return "LLM features disabled."
+    url, headers, data = request_spec
+    
+    logger.info(f"Making LLM API request to: {url}")
+    logger.debug(f"Using model: {OPENAI_CHAT_MODEL}")
+    logger.debug(f"API key configured: {bool(OPENAI_API_KEY)} (length: {len(OPENAI_API_KEY) if OPENAI_API_KEY else 0})")
     
     try:
         # Log request info without full content (to avoid huge logs)
@@ -83,23 +128,7 @@ def get_azure_llm_summaries(prompt: str) -> str:
         
         response.raise_for_status()
         
-        response_data = response.json()
-        if not isinstance(response_data, dict) or "choices" not in response_data:
-            raise ValueError("Invalid response format from LLM API")
-        
-        choices = response_data["choices"]
-        if not choices or not isinstance(choices, list):
-            raise ValueError("No choices in LLM API response")
-        
-        first_choice = choices[0]
-        if not isinstance(first_choice, dict) or "message" not in first_choice:
-            raise ValueError("Invalid choice format in LLM API response")
-        
-        message = first_choice["message"]
-        if not isinstance(message, dict) or "content" not in message:
-            raise ValueError("Invalid message format in LLM API response")
-        
-        return message["content"]
+        return parse_llm_content(response.json())
     except requests.exceptions.Timeout:
         logger.error("LLM API request timed out")
         raise
@@ -117,89 +146,71 @@ def get_azure_llm_summaries(prompt: str) -> str:
         raise
 
 
-def get_nearest_titles(df: pd.DataFrame, centroids: np.ndarray, cluster_assignments: np.ndarray, n: int = 10) -> List[List[str]]:
+def sample_cluster_representatives(coords: np.ndarray, centroids: np.ndarray, cluster_assignments: np.ndarray,
+                                   n: int = 10, rng: Optional[np.random.Generator] = None) -> List[np.ndarray]:
     """
-    Get representative titles for each cluster using weighted sampling.
+    Pick representative papers (row indices into coords) for each cluster using weighted sampling.
     
     Samples papers from each cluster with probability weighted by inverse distance squared
     from the cluster center. This ensures:
     1. Only papers within the cluster are selected
     2. Closer papers are more likely, but farther papers still have a chance
     3. More representative sample of the cluster's diversity
+    
+    All clusters are sampled at once with the Gumbel-top-k trick: the n largest
+    log(weight) + Gumbel noise keys in a cluster are a weighted sample without
+    replacement, in draw order. The default generator is seeded, so the same
+    clustering always yields the same representatives.
     """
-    nearest_titles = []
-    coords = df[['x', 'y']].values
-    title_col = 'doctrove_title' if 'doctrove_title' in df.columns else 'Title'
+    rng = np.random.default_rng(REPRESENTATIVE_SAMPLING_SEED) if rng is None else rng
+    n_clusters = len(centroids)
+    assignments = np.asarray(cluster_assignments, dtype=np.intp)
+    # Stable sorts on a 16-bit key are radix sorts (cluster_points caps k at 1000)
+    sort_key = assignments.astype(np.int16) if n_clusters <= np.iinfo(np.int16).max else assignments
     
-    for cluster_id, centroid in enumerate(centroids):
-        # Get all papers belonging to this cluster
-        cluster_mask = cluster_assignments == cluster_id
-        cluster_indices = np.where(cluster_mask)[0]
-        
-        if len(cluster_indices) == 0:
-            nearest_titles.append([])
-            continue
-        
-        # If cluster has fewer than n papers, use all of them
-        max_sample = min(n, len(cluster_indices))
-        
-        # Calculate distances from cluster center for papers in this cluster
-        cluster_coords = coords[cluster_indices]
-        dists = np.linalg.norm(cluster_coords - centroid, axis=1)
-        
-        # Find max and min distances for normalization
-        max_dist = np.max(dists) if len(dists) > 0 else 1.0
-        min_dist = np.min(dists) if len(dists) > 0 else 0.0
-        range_dist = max_dist - min_dist if max_dist > min_dist else 1.0
-        
-        # Weight by inverse distance squared (closer = higher weight)
-        # Normalize distances first
-        epsilon = range_dist * 0.01  # 1% of range to avoid division by zero
-        normalized_dists = (dists - min_dist) / (range_dist + epsilon)
-        
-        # Inverse distance squared weighting
-        # Add small constant (0.1) to prevent infinity at exact center
-        weights = 1 / (normalized_dists ** 2 + 0.1)
-        
-        # Weighted random sampling without replacement
-        selected_indices = []
-        remaining_indices = list(range(len(cluster_indices)))
-        remaining_weights = weights.tolist()
-        
-        for _ in range(max_sample):
-            if len(remaining_indices) == 0:
-                break
-            
-            # Normalize remaining weights to probabilities
-            total_weight = sum(remaining_weights)
-            if total_weight == 0:
-                # If all weights are zero, sample uniformly
-                probabilities = [1.0 / len(remaining_weights)] * len(remaining_weights)
-            else:
-                probabilities = [w / total_weight for w in remaining_weights]
-            
-            # Select one index based on weighted probability
-            random_val = np.random.random()
-            selected_idx = 0
-            cumsum = 0.0
-            for j, prob in enumerate(probabilities):
-                cumsum += prob
-                if random_val <= cumsum:
-                    selected_idx = j
-                    break
-            
-            # Add to selected and remove from remaining
-            actual_cluster_idx = remaining_indices[selected_idx]
-            selected_indices.append(cluster_indices[actual_cluster_idx])
-            remaining_indices.pop(selected_idx)
-            remaining_weights.pop(selected_idx)
-        
+    # Distances from each paper to its own cluster center
+    dists = np.linalg.norm(coords - centroids[assignments], axis=1)
+    
+    # Per-cluster min and max distance for normalization (papers grouped by cluster)
+    counts = np.bincount(assignments, minlength=n_clusters)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    nonempty = counts > 0
+    by_cluster = np.argsort(sort_key, kind='stable')
+    min_dist = np.zeros(n_clusters)
+    max_dist = np.zeros(n_clusters)
+    min_dist[nonempty] = np.minimum.reduceat(dists[by_cluster], starts[nonempty])
+    max_dist[nonempty] = np.maximum.reduceat(dists[by_cluster], starts[nonempty])
+    range_dist = np.where(max_dist > min_dist, max_dist - min_dist, 1.0)
+    
+    # Weight by inverse distance squared (closer = higher weight)
+    # Normalize distances first, with 1% of the range added to avoid division by zero
+    normalized_dists = (dists - min_dist[assignments]) / (range_dist[assignments] * 1.01)
+    # Add small constant (0.1) to prevent infinity at exact center
+    weights = 1 / (normalized_dists ** 2 + 0.1)
+    
+    # Gumbel-top-k: order papers by perturbed log-weight (descending), then stably by cluster
+    keys = np.log(weights) + rng.gumbel(size=len(weights))
+    ranked = np.argsort(-keys)
+    ranked = ranked[np.argsort(sort_key[ranked], kind='stable')]
+    rank_in_cluster = np.arange(len(ranked)) - starts[assignments[ranked]]
+    selected = ranked[rank_in_cluster < n]
+    
+    # If a cluster has fewer than n papers, all of them are used
+    return np.split(selected, np.cumsum(np.minimum(counts, n))[:-1])
+
+
+def get_nearest_titles(df: pd.DataFrame, centroids: np.ndarray, cluster_assignments: np.ndarray, n: int = 10) -> List[List[str]]:
+    """
+    Get representative titles for each cluster (see sample_cluster_representatives).
+    """
+    title_col = 'doctrove_title' if 'doctrove_title' in df.columns else 'Title'
+    nearest_titles = []
+    for selected_indices in sample_cluster_representatives(df[['x', 'y']].values, centroids, cluster_assignments, n):
         # Extract titles
         if title_col in df.columns:
             titles = df.iloc[selected_indices][title_col].tolist()
         else:
             titles = [f"Paper {idx}" for idx in selected_indices]
-        
         nearest_titles.append(titles)
     
     return nearest_titles
@@ -219,6 +230,50 @@ def build_llm_prompt(nearest_titles: List[List[str]]) -> str:
     return prompt
 
 
+def summarize_clusters(nearest_titles: List[List[str]], summaries: Optional[List[Optional[str]]] = None) -> List[str]:
+    """
+    Summaries for each cluster's titles: cached ones are reused, the rest are
+    requested in a single LLM call and cached.
+    
+    Args:
+        nearest_titles: Sampled titles of each cluster
+        summaries: Summaries already known (None where missing), e.g. from cached_summaries
+    """
+    if summaries is None:
+        summaries = cached_summaries(nearest_titles)
+    summaries = list(summaries)
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if not missing:
+        return summaries
+    try:
+        _load_config()  # Ensure config is loaded before calling LLM
+        llm_response = get_azure_llm_summaries(build_llm_prompt([nearest_titles[i] for i in missing]))
+        generated = parse_llm_response(llm_response, len(missing))
+    except Exception as e:
+        logger.error(f"LLM API call failed: {e}")
+        generated = [SUMMARY_UNAVAILABLE] * len(missing)
+    for i, summary in zip(missing, generated):
+        summaries[i] = summary
+    cache_summaries([nearest_titles[i] for i in missing], generated)
+    logger.info(f"Summarized {len(missing)} of {len(summaries)} clusters with the LLM "
+                f"({len(summaries) - len(missing)} cached)")
+    return summaries
+
+
+def cached_summaries(nearest_titles: List[List[str]]) -> List[Optional[str]]:
+    """Cached summary of each cluster's titles, None where there is none."""
+    cache = get_summary_cache()
+    return [cache.get(titles) for titles in nearest_titles]
+
+
+def cache_summaries(nearest_titles: List[List[str]], summaries: List[str]) -> None:
+    """Cache generated summaries (placeholders for failed or missing ones are not cached)."""
+    cache = get_summary_cache()
+    for titles, summary in zip(nearest_titles, summaries):
+        if summary not in ("No summary available.", SUMMARY_UNAVAILABLE):
+            cache.put(titles, summary)
+
+
 def clean_summary(summary: str) -> str:
     """Clean the summary text."""
     return re.sub(r'^\*\*?Cluster \d+\*\*?:\s*', '', summary).strip()
@@ -257,7 +312,10 @@ def smart_wrap(text: str, width: int = 27) -> str:
 def compute_clusters(
     papers: List[Dict[str, Any]], 
     num_clusters: int,
-    bbox: Optional[Tuple[float, float, float, float]] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    lineage: Optional[str] = None,
+    defer_summaries: bool = False,
+    polygon_encoding: str = 'xy'
 ) -> Dict[str, Any]:
     """
     Compute K-means clusters with Voronoi polygons and LLM summaries.
@@ -269,6 +327,14 @@ def compute_clusters(
         bbox: Optional bounding box (x_min, y_min, x_max, y_max) to clip clusters to.
               If provided, clusters will be clipped to this box and will completely
               cover it. If None, uses the convex hull of the data points.
+        lineage: Optional session / view id; K-means warm-starts from the centroids
+                 last computed for it (see cluster_engine)
+        defer_summaries: Return immediately with cached labels and SUMMARY_PENDING for the
+                         rest; the LLM runs in the background and the overlay's
+                         'summary_job' id polls for the complete annotations
+        polygon_encoding: 'xy' returns 'polygons' as {x, y} lists; 'flat' returns 'geometry'
+                          as flat arrays (cluster_geometry.encode_flat). Cells are simplified
+                          to about a pixel of the bbox (or data extent) either way.
     """
     try:
         # Input validation
@@ -276,10 +342,6 @@ def compute_clusters(
             logger.warning("No papers provided for clustering")
             return {'polygons': [], 'annotations': []}
         
-        if num_clusters < 1 or num_clusters > 1000:
-            logger.warning(f"Invalid num_clusters: {num_clusters}, using default 30")
-            num_clusters = 30
-        
         # Extract coordinates from papers first
         # Papers have doctrove_embedding_2d as {x: number, y: number} or [x, y]
         def extract_coords(paper: Dict) -> tuple:
@@ -291,122 +353,127 @@ def compute_clusters(
                     return (float(embedding[0]), float(embedding[1]))
             return (None, None)
         
-        # Extract coordinates and titles before creating DataFrame
-        papers_with_coords = []
-        for paper in papers:
-            coords = extract_coords(paper)
-            paper['x'] = coords[0]
-            paper['y'] = coords[1]
-            papers_with_coords.append(paper)
+        coords = np.array([extract_coords(paper) for paper in papers], dtype=float)  # None -> nan
+        valid = ~np.isnan(coords).any(axis=1)
+        valid_papers = [paper for paper, ok in zip(papers, valid) if ok]
+        title_key = 'doctrove_title' if any('doctrove_title' in paper for paper in papers) else 'Title'
+        has_titles = any(title_key in paper for paper in papers)
         
-        # Convert to DataFrame
-        df = pd.DataFrame(papers_with_coords)
+        def titles_for(samples: List[np.ndarray]) -> List[List[str]]:
+            if not has_titles:
+                return [[f"Paper {idx}" for idx in indices] for indices in samples]
+            return [[valid_papers[idx].get(title_key) for idx in indices] for indices in samples]
         
-        # Check for x, y coordinates
-        if 'x' not in df.columns or 'y' not in df.columns:
-            logger.error("Missing x or y coordinates for clustering")
-            return {'polygons': [], 'annotations': []}
+        return cluster_points(coords[valid], num_clusters, bbox, titles_for, lineage, defer_summaries,
+                              polygon_encoding)
         
-        # Filter valid coordinates
-        valid_coords = df[['x', 'y']].dropna()
-        if len(valid_coords) < num_clusters:
-            logger.warning(f"Not enough valid coordinates ({len(valid_coords)}) for {num_clusters} clusters")
-            num_clusters = min(len(valid_coords), 30)
+    except (ValueError, TypeError, KeyError) as e:
+        logger.error(f"Data processing error in clustering: {e}")
+        return {'polygons': [], 'annotations': []}
+
+
+def cluster_points(
+    coords: np.ndarray,
+    num_clusters: int,
+    bbox: Optional[Tuple[float, float, float, float]],
+    titles_for: Callable[[List[np.ndarray]], List[List[str]]],
+    lineage: Optional[str] = None,
+    defer_summaries: bool = False,
+    polygon_encoding: str = 'xy'
+) -> Dict[str, Any]:
+    """
+    K-means clusters with Voronoi polygons and LLM summaries for an (n, 2) coordinate array.
+    
+    Args:
+        coords: Valid (non-null) 2D coordinates, one row per paper
+        num_clusters: Number of clusters to create
+        bbox: Optional bounding box (x_min, y_min, x_max, y_max) to clip clusters to
+              (see compute_clusters)
+        titles_for: Called once with the sampled row indices of each cluster; returns
+                    their titles for the LLM prompt. Only representatives are looked up.
+        lineage: Optional session / view id for K-means warm starts (see compute_clusters)
+        defer_summaries: Return geometry without waiting for the LLM (see compute_clusters)
+        polygon_encoding: 'xy' or 'flat' (see compute_clusters)
+    """
+    try:
+        if num_clusters < 1 or num_clusters > 1000:
+            logger.warning(f"Invalid num_clusters: {num_clusters}, using default 30")
+            num_clusters = 30
+        
+        if len(coords) < num_clusters:
+            logger.warning(f"Not enough valid coordinates ({len(coords)}) for {num_clusters} clusters")
+            num_clusters = min(len(coords), 30)
             if num_clusters < 2:
                 logger.warning("Not enough data points for clustering")
                 return {'polygons': [], 'annotations': []}
         
-        # KMeans clustering
+        # KMeans clustering (MiniBatch for large inputs, cached, warm-started per lineage)
         try:
-            from sklearn.cluster import KMeans
+            kmeans = get_kmeans_engine().fit(coords, num_clusters, lineage)
         except ImportError:
             logger.error("sklearn not available for clustering")
             return {'polygons': [], 'annotations': []}
         
-        coords = valid_coords[['x', 'y']].values
-        kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init=10)
-        cluster_assignments = kmeans.fit_predict(coords)
-        df.loc[valid_coords.index, 'cluster'] = cluster_assignments
-        cluster_centers = kmeans.cluster_centers_
+        cluster_assignments = kmeans.labels
+        cluster_centers = kmeans.centers
         
         # LLM summaries - use weighted sampling for more representative titles
-        nearest_titles = get_nearest_titles(df.loc[valid_coords.index], cluster_centers, cluster_assignments, n=10)
-        llm_prompt = build_llm_prompt(nearest_titles)
-        try:
-            _load_config()  # Ensure config is loaded before calling LLM
-            llm_response = get_azure_llm_summaries(llm_prompt)
-            region_summaries = parse_llm_response(llm_response, len(cluster_centers))
-        except Exception as e:
-            logger.error(f"LLM API call failed: {e}")
-            region_summaries = ["Summary unavailable."] * len(cluster_centers)
-        
-        # Voronoi polygons
+        nearest_titles = titles_for(sample_cluster_representatives(coords, cluster_centers, cluster_assignments, n=10))
+        region_summaries = cached_summaries(nearest_titles)
+        pending = None in region_summaries
+        if pending and not defer_summaries:
+            region_summaries = summarize_clusters(nearest_titles, region_summaries)
+            pending = False
+        
+        # Voronoi cells, clipped and simplified as arrays (see cluster_geometry)
         try:
-            from shapely.geometry import Point, MultiPoint, box
-            from shapely.ops import voronoi_diagram
+            import shapely
         except ImportError:
             logger.error("shapely not available for Voronoi diagrams")
             return {'polygons': [], 'annotations': []}
         
-        points = [Point(x, y) for x, y in cluster_centers]
-        
         # Determine clipping boundary: use bbox if provided, otherwise use convex hull
         if bbox:
-            # Use bbox as clipping boundary
-            x_min, y_min, x_max, y_max = bbox
-            clipping_boundary = box(x_min, y_min, x_max, y_max)
-            # Use bbox as envelope for Voronoi diagram generation
-            bounding_rect = box(x_min, y_min, x_max, y_max)
-            logger.info(f"Using bbox for clustering: ({x_min}, {y_min}, {x_max}, {y_max})")
+            # The bbox is both the clipping boundary and the Voronoi envelope
+            clipping_boundary = bounding_rect = shapely.box(*bbox)
+            logger.info(f"Using bbox for clustering: {tuple(bbox)}")
         else:
             # Use convex hull of data points (legacy behavior)
-            hull = MultiPoint(valid_coords[['x', 'y']].values).convex_hull
-            clipping_boundary = hull
-            min_x, min_y = valid_coords[['x', 'y']].min()
-            max_x, max_y = valid_coords[['x', 'y']].max()
-            bounding_rect = box(min_x, min_y, max_x, max_y)
+            clipping_boundary = convex_hull(coords)
+            bounding_rect = shapely.box(*coords.min(axis=0), *coords.max(axis=0))
             logger.info(f"Using convex hull for clustering (no bbox provided)")
         
-        # Generate Voronoi diagram with bounding rect as envelope
-        regions = voronoi_diagram(MultiPoint(points), envelope=bounding_rect, edges=False)
-        
-        voronoi_regions = []
-        for i, poly in enumerate(regions.geoms):
-            # Clip polygon to the clipping boundary (bbox or convex hull)
-            clipped_poly = poly.intersection(clipping_boundary)
-            if clipped_poly.is_empty or not clipped_poly.is_valid:
-                continue
-            x, y = clipped_poly.exterior.xy
-            clipped_points = np.column_stack((x, y))
-            voronoi_regions.append({
-                'region_id': i,
-                'polygon': clipped_points.tolist(),
-                'center': cluster_centers[i].tolist() if i < len(cluster_centers) else None
-            })
+        # Tolerance follows the view size, so zooming in keeps detail and zooming out drops it
+        tolerance = simplify_tolerance(shapely.bounds(bounding_rect))
+        cells = simplify_cells(voronoi_cells(cluster_centers, clipping_boundary, bounding_rect), tolerance)
+        shown = np.flatnonzero(~shapely.is_missing(cells))
         
-        # Build overlay structure
-        overlay = {'polygons': [], 'annotations': []}
-        
-        for i, region in enumerate(voronoi_regions):
-            poly_points = region['polygon']
-            # Close polygon if not already closed
-            if len(poly_points) > 0 and (poly_points[0] != poly_points[-1]):
-                poly_points.append(poly_points[0])
-            overlay['polygons'].append({
-                'x': [float(pt[0]) for pt in poly_points],
-                'y': [float(pt[1]) for pt in poly_points]
-            })
-        
-        for i, region in enumerate(voronoi_regions):
-            summary = region_summaries[i] if i < len(region_summaries) else "Summary unavailable."
-            summary_clean = clean_summary(summary)
-            centroid = region['center']
-            label_text = smart_wrap(summary_clean)
-            overlay['annotations'].append({
-                'x': float(centroid[0]),
-                'y': float(centroid[1]),
-                'text': label_text
-            })
+        # Build overlay structure: annotations[i] labels the cell of cluster shown[i]
+        overlay = {}
+        if polygon_encoding == 'flat':
+            overlay['geometry'] = encode_flat(cells[shown], coordinate_decimals(tolerance))
+        else:
+            overlay['polygons'] = encode_xy(cells[shown])
+        
+        def annotations_for(summaries: List[Optional[str]]) -> List[Dict[str, Any]]:
+            annotations = []
+            for cluster_id in shown:
+                summary = summaries[cluster_id] if cluster_id < len(summaries) else SUMMARY_UNAVAILABLE
+                summary_clean = clean_summary(summary if summary is not None else SUMMARY_PENDING)
+                centroid = cluster_centers[cluster_id]
+                label_text = smart_wrap(summary_clean)
+                annotations.append({
+                    'x': float(centroid[0]),
+                    'y': float(centroid[1]),
+                    'text': label_text
+                })
+            return annotations
+        
+        overlay['annotations'] = annotations_for(region_summaries)
+        if pending:
+            # Labels follow from GET /api/clusters/summaries/<summary_job>
+            overlay['summary_job'] = get_summary_jobs().submit(
+                lambda: {'annotations': annotations_for(summarize_clusters(nearest_titles, region_summaries))})
         
         return overlay
         
@@ -15,7 +15,10 @@ import os
 env_local_path = os.path.join(os.path.dirname(__file__), '..', '.env.local')
 print(f"Loading .env.local from: {env_local_path}")
 print(f"File exists: {os.path.exists(env_local_path)}")
-load_dotenv(env_local_path, override=True)
+# Offline benchmarks point the API at a synthetic database through the environment;
+# DOCTROVE_IGNORE_ENV_LOCAL=true keeps .env.local from overriding that
+if os.getenv('DOCTROVE_IGNORE_ENV_LOCAL', 'false').lower() != 'true':
+    load_dotenv(env_local_path, override=True)
 print(f"After loading .env.local, DOCTROVE_API_PORT = {os.getenv('DOCTROVE_API_PORT', 'NOT_SET')}")
 
 # Database configuration
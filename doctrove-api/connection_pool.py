@@ -0,0 +1,280 @@
+"""
+Thread-safe, instrumented psycopg2 connection pool.
+
+Replaces psycopg2.pool.SimpleConnectionPool (not thread-safe, raises as soon as
+it is exhausted) for the API:
+
+- getconn() blocks until a connection is free, up to a timeout (PoolTimeout);
+- connections that psycopg2 marked closed (lost mid-request), or that fail
+  a ping after sitting idle or after another connection broke, are discarded
+  and replaced;
+- session settings (e.g. ivfflat.probes) are cached per connection, so the
+  SET round-trip is skipped when the value is already in effect;
+- acquisition counts, wait times, timeouts and broken connections are recorded and
+  exposed through /api/health/system (see registered_pool_stats).
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+logger = logging.getLogger(__name__)
+
+POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv('DOCTROVE_POOL_ACQUIRE_TIMEOUT', '30'))
+# Ping connections that have been idle longer than this before handing them out
+POOL_VALIDATE_AFTER_IDLE_SECONDS = float(os.getenv('DOCTROVE_POOL_VALIDATE_AFTER_IDLE', '30'))
+
+class PoolTimeout(PoolError):
+    """No database connection became available within the acquire timeout."""
+
+class PoolMetrics:
+    """Counters shared by the sync pool here and the asyncio pool in asgi.py."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.broken = 0
+        self.session_sets = 0
+        self.session_sets_skipped = 0
+
+    def record_acquire(self, wait_seconds: float) -> None:
+        with self._lock:
+            self.acquired += 1
+            if wait_seconds > 0.001:
+                self.waited += 1
+                self.wait_seconds_total += wait_seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, **gauges: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **gauges,
+                'acquired': self.acquired,
+                'waited': self.waited,
+                'wait_ms_avg': round(self.wait_seconds_total * 1000 / self.waited, 2) if self.waited else 0.0,
+                'wait_ms_max': round(self.wait_seconds_max * 1000, 2),
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'broken': self.broken,
+                'session_sets': self.session_sets,
+                'session_sets_skipped': self.session_sets_skipped,
+            }
+
+class ConnectionPool:
+    """
+    Blocking, thread-safe pool of psycopg2 connections.
+
+    Args:
+        minconn: Connections opened on first use and kept open
+        maxconn: Upper bound on open connections
+        acquire_timeout: Default seconds getconn() waits for a free connection
+        validate_after_idle: Ping connections idle longer than this on checkout
+        connect: Connection factory (default: psycopg2.connect(**connect_kwargs))
+        **connect_kwargs: Passed to psycopg2.connect
+    """
+
+    def __init__(self, minconn: int, maxconn: int, acquire_timeout: float = POOL_ACQUIRE_TIMEOUT_SECONDS,
+                 validate_after_idle: float = POOL_VALIDATE_AFTER_IDLE_SECONDS,
+                 connect: Optional[Callable[[], Any]] = None, **connect_kwargs):
+        self._connect_fn = connect or (lambda: psycopg2.connect(**connect_kwargs))
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.validate_after_idle = validate_after_idle
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[Any, float]] = []  # (connection, returned_at), most recent last
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        # Connections returned before the last breakage are pinged on checkout
+        # (a server restart or network blip usually takes all of them at once)
+        self._suspect_before = 0.0
+        self.metrics = PoolMetrics()
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        conn = self._connect_fn()
+        self.metrics.record('connects')
+        return conn
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a connection, waiting up to `timeout` seconds (default acquire_timeout)."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    conn, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics.record('timeouts')
+                    raise PoolTimeout(f"No database connection available after {timeout:.0f}s "
+                                      f"({self._in_use} in use, {self._waiting} waiting)")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+
+        # Connect / validate outside the lock so other threads can proceed
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif not self._usable(conn, returned_at):
+                self._suspect_before = time.monotonic()
+                self.metrics.record('broken')
+                logger.warning("Replacing broken pooled database connection")
+                self._close_quietly(conn)
+                conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self.metrics.record_acquire(time.monotonic() - start)
+        return conn
+
+    def _usable(self, conn, returned_at: float) -> bool:
+        if conn.closed:
+            return False
+        if returned_at > self._suspect_before and time.monotonic() - returned_at < self.validate_after_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """Return a connection; closed (broken) ones are discarded, open transactions rolled back."""
+        broken = bool(conn.closed)
+        if not broken and not close:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                    settings_rolled_back(conn)
+            except Exception:
+                broken = True
+        if broken:
+            self._suspect_before = time.monotonic()
+            self.metrics.record('broken')
+        with self._cond:
+            self._in_use -= 1
+            keep = not (broken or close or self._closed)
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(conn)
+
+    def closeall(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            gauges = dict(max=self.maxconn, size=self._size, in_use=self._in_use,
+                          idle=len(self._idle), waiting=self._waiting)
+        return self.metrics.snapshot(**gauges)
+
+# Session settings in effect per connection, plus those SET in the current
+# (uncommitted) transaction: a rollback reverts SET, so only commits confirm them.
+_settings_lock = threading.Lock()
+_settings_by_connection: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def apply_session_settings(conn, settings: Dict[str, Any], metrics: Optional[PoolMetrics] = None) -> bool:
+    """
+    SET the given session settings on conn, skipping those already in effect.
+
+    Call settings_committed(conn) / settings_rolled_back(conn) when the
+    transaction the SET ran in ends.
+
+    Returns:
+        True if a SET was issued, False if every value was already in effect
+    """
+    with _settings_lock:
+        state = _settings_by_connection.get(conn)
+        if state is None:
+            state = _settings_by_connection[conn] = ({}, {})
+        current, pending = state
+        changed = {name: str(value) for name, value in settings.items()
+                   if pending.get(name, current.get(name)) != str(value)}
+        if not changed:
+            if metrics is not None:
+                metrics.record('session_sets_skipped')
+            return False
+    args = [arg for item in changed.items() for arg in item]
+    with conn.cursor() as cur:
+        cur.execute("SELECT " + ", ".join(["set_config(%s, %s, false)"] * len(changed)), args)
+    with _settings_lock:
+        pending.update(changed)
+    if metrics is not None:
+        metrics.record('session_sets')
+    return True
+
+def settings_committed(conn) -> None:
+    with _settings_lock:
+        state = _settings_by_connection.get(conn)
+        if state and state[1]:
+            state[0].update(state[1])
+            state[1].clear()
+
+def settings_rolled_back(conn) -> None:
+    with _settings_lock:
+        state = _settings_by_connection.get(conn)
+        if state:
+            state[1].clear()
+
+# Pools reported by /api/health/system
+_registered_pools: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register_pool(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    _registered_pools[name] = stats
+
+def registered_pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: stats() for name, stats in list(_registered_pools.items())}
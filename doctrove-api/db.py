@@ -5,9 +5,20 @@ Uses dependency injection with connection factory pattern.
 
 import psycopg2
 import json
-from typing import List, Dict, Any, Callable, Optional, Tuple
+import hashlib
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Tuple, Sequence
 from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
 
+# Server-side prepared statements (see execute_prepared)
+PREPARED_STATEMENTS_PER_CONNECTION = 64
+_PLACEHOLDER_PATTERN = re.compile(r"%%|%s")
+_prepared_by_connection: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
 def create_connection_factory():
     """
     Creates a database connection factory using dependency injection.
@@ -29,6 +40,94 @@ def create_connection_factory():
 # Removed get_db_connection() - violates dependency injection principle
 # Use create_connection_factory() instead for proper dependency injection
 
+def _to_server_placeholders(query: str) -> str:
+    """Rewrite psycopg2 placeholders (%s, %%) into PREPARE syntax ($1, %)."""
+    counter = iter(range(1, query.count('%s') + 1))
+    return _PLACEHOLDER_PATTERN.sub(
+        lambda m: '%' if m.group(0) == '%%' else f"${next(counter)}", query)
+
+def execute_prepared(cur, query: str, params: Sequence[Any]) -> None:
+    """
+    Execute `query` through a server-side prepared statement on cur.connection.
+    
+    Intended for pooled connections that serve the same query templates over and
+    over (see business_logic.compile_query_v2): the first time a template is seen
+    on a connection it is executed normally; from the second time on it is
+    PREPAREd once and then run with EXECUTE, so Postgres skips parse/analyze and
+    can reuse its plan. Each connection keeps at most
+    PREPARED_STATEMENTS_PER_CONNECTION statements (least recently used are
+    DEALLOCATEd). Statements survive rollbacks and live until the connection closes.
+    
+    Args:
+        cur: psycopg2 cursor
+        query: SQL with psycopg2 %s placeholders
+        params: Positional parameters
+    """
+    conn = cur.connection
+    name = 'q_' + hashlib.sha1(query.encode('utf-8')).hexdigest()[:16]
+    
+    with _prepared_lock:
+        statements = _prepared_by_connection.get(conn)
+        if statements is None:
+            statements = _prepared_by_connection[conn] = OrderedDict()
+        state = statements.get(name)
+        statements[name] = 'prepared' if state else 'seen'
+        statements.move_to_end(name)
+        evicted = []
+        while len(statements) > PREPARED_STATEMENTS_PER_CONNECTION:
+            old_name, old_state = statements.popitem(last=False)
+            if old_state == 'prepared':
+                evicted.append(old_name)
+    
+    for old_name in evicted:
+        cur.execute(f"DEALLOCATE {old_name}")
+    
+    if state is None:
+        # First sighting on this connection: a one-off query costs no extra round trip
+        cur.execute(query, params)
+        return
+    
+    if state == 'seen':
+        try:
+            cur.execute(f"PREPARE {name} AS {_to_server_placeholders(query)}")
+        except psycopg2.Error:
+            with _prepared_lock:
+                statements.pop(name, None)
+            raise
+    
+    if params:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+def explain_prepared(cur, query: str, params: Sequence[Any]) -> Dict[str, Any]:
+    """
+    EXPLAIN (FORMAT JSON) of `query` as execute_prepared would run it on
+    cur.connection: through EXECUTE when the statement is prepared there (so
+    the plan is the cached generic or custom plan actually used), else with
+    the parameters inlined. Plans only; the query is not executed.
+
+    Returns:
+        The top-level plan object ({'Plan': {...}, ...})
+    """
+    name = 'q_' + hashlib.sha1(query.encode('utf-8')).hexdigest()[:16]
+    with _prepared_lock:
+        statements = _prepared_by_connection.get(cur.connection)
+        prepared = statements is not None and statements.get(name) == 'prepared'
+
+    if prepared and params:
+        cur.execute(f"EXPLAIN (FORMAT JSON) EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    elif prepared:
+        cur.execute(f"EXPLAIN (FORMAT JSON) EXECUTE {name}")
+    elif params:
+        cur.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+    else:
+        cur.execute(f"EXPLAIN (FORMAT JSON) {query}")
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
 def get_papers_with_embeddings(connection_factory: Callable, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Retrieves papers that have unified embeddings.
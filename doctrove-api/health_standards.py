@@ -125,6 +125,20 @@ def create_api_health_response() -> Dict[str, Any]:
         details={"port": 5001, "host": "0.0.0.0"}
     )
     
+    # Database connection pools (registered by api.py / asgi.py once created)
+    try:
+        from connection_pool import registered_pool_stats
+        pools = registered_pool_stats()
+    except ImportError:
+        pools = {}
+    for name, stats in pools.items():
+        manager.add_check(
+            name=f"connection_pool_{name}",
+            status=HealthStatus.HEALTHY,
+            message=f"{stats['in_use']}/{stats['max']} connections in use, {stats['waiting']} waiting",
+            details=stats
+        )
+    
     return manager.to_dict()
 
 def create_enrichment_health_response() -> Dict[str, Any]:
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Index advisor and maintenance for the ANN index on doctrove_papers.doctrove_embedding.
+
+The one maintenance path for that index: the shell scripts it replaced
+(create_optimized_hnsw.sh, create_ivfflat_index*.sh, scripts/create_*_index.sh,
+scripts/adaptive_reindex_hnsw.sh, scripts/monitor_index_health.sh and
+scripts/rebuild_vector_index.sh) hard-coded thresholds, index parameters and
+credentials and have been removed; scripts/rebuild_all_indexes.sh calls this
+module for the vector index. Connection settings come from config.py like the API's.
+
+- evaluate: recall@k of the index against an exact scan for a sample of stored
+  paper vectors (each paper's own neighbours, excluding itself), and the
+  latency of both, per ivfflat.probes / hnsw.ef_search value. The smallest
+  value reaching the target recall is recorded in vector_index_evaluations;
+  the API's semantic planner uses it as the floor for that setting.
+- advise: from the evaluation, the index parameters and the rows embedded
+  since the last recorded build (vector_index_builds), decide on
+      create   no ANN index
+      retune   IVFFlat lists far from the recommended count for the corpus
+               size, or HNSW that cannot reach the target recall at the largest
+               ef_search: build a new index with new parameters, then swap
+      reindex  the corpus grew by REBUILD_GROWTH since the build, or IVFFlat
+               cannot reach the target recall within the latency budget
+               (centroids trained on a different distribution)
+- run: advise, then carry out the action with CREATE INDEX / REINDEX
+  CONCURRENTLY, only inside the maintenance window (or with --force), and
+  re-evaluate the new index. --reindex rebuilds the existing index even when
+  the advice is none (e.g. after a table swap or bulk delete).
+
+Usage:
+    python index_maintenance.py status
+    python index_maintenance.py evaluate --sample 20
+    python index_maintenance.py run --window 01:00-05:00 [--dry-run] [--force]
+    python index_maintenance.py run --reindex --force
+
+Tables: database/migrations/20261018_150000__vector_index_maintenance.sql
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from semantic_planner import (ANN_INDEX_DEFAULTS, EMBEDDING_COLUMN, MAX_HNSW_EF_SEARCH, PAPERS_TABLE,
+                              ann_index_params, clear_planner_statistics_cache)
+
+logger = logging.getLogger(__name__)
+
+TARGET_RECALL = float(os.getenv('DOCTROVE_ANN_TARGET_RECALL', '0.95'))
+# p95 latency (ms) an IVFFlat index should reach the target recall within
+LATENCY_BUDGET_MS = float(os.getenv('DOCTROVE_ANN_LATENCY_BUDGET_MS', '500'))
+MAINTENANCE_WINDOW = os.getenv('DOCTROVE_MAINTENANCE_WINDOW', '01:00-05:00')
+MAINTENANCE_WORK_MEM = os.getenv('DOCTROVE_INDEX_MAINTENANCE_WORK_MEM', '1GB')
+
+RECALL_K = 10
+EVALUATION_SAMPLE = 20
+EVALUATION_SEED = 42
+IVFFLAT_PROBES_GRID = (1, 2, 5, 10, 20, 40, 80, 160, 320)
+HNSW_EF_SEARCH_GRID = (10, 20, 40, 80, 160, 320, 640, MAX_HNSW_EF_SEARCH)
+
+# Embedded rows added since the build, as a fraction of rows at build time, that warrant a REINDEX.
+# IVFFlat centroids are trained once, so new data drifts from them; HNSW inserts incrementally.
+REBUILD_GROWTH = {'ivfflat': 0.2, 'hnsw': 0.5}
+# IVFFlat lists further than this factor from recommended_lists() are retuned
+LISTS_TOLERANCE = 2.0
+MAX_HNSW_M = 48
+MAX_HNSW_EF_CONSTRUCTION = 512
+DEFAULT_METHOD = 'ivfflat'
+DEFAULT_INDEX_NAME = 'idx_papers_embedding_ivfflat'
+# Too few vectors for an ANN index to pay off
+MIN_INDEX_ROWS = 10000
+
+SETTING_NAMES = {'ivfflat': 'ivfflat.probes', 'hnsw': 'hnsw.ef_search'}
+
+
+@dataclass
+class AnnIndex:
+    name: str
+    method: str                 # 'ivfflat' or 'hnsw'
+    params: Dict[str, int]
+    valid: bool
+    size_bytes: int
+
+
+@dataclass
+class Evaluation:
+    index: AnnIndex
+    embedded_rows: int
+    rows_since_build: Optional[int]
+    sample_size: int
+    k: int
+    setting_name: str
+    target_recall: float
+    results: List[Dict[str, float]]   # Per setting: recall, p50_ms, p95_ms
+    exact_p50_ms: Optional[float]
+    recommended_setting: Optional[int]
+
+
+@dataclass
+class Advice:
+    action: str                 # 'none', 'create', 'reindex' or 'retune'
+    reason: str
+    method: Optional[str] = None
+    params: Dict[str, int] = field(default_factory=dict)
+
+
+def recommended_lists(rows: int) -> int:
+    """IVFFlat lists for a corpus size (pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) above)."""
+    if rows <= 1_000_000:
+        return max(10, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def recommended_setting(results: Sequence[Dict[str, float]], target_recall: float) -> Optional[int]:
+    """Smallest measured setting whose mean recall reaches target_recall."""
+    for result in sorted(results, key=lambda result: result['setting']):
+        if result['recall'] >= target_recall:
+            return int(result['setting'])
+    return None
+
+
+def advise(index: Optional[AnnIndex], embedded_rows: int, rows_at_build: Optional[int],
+           evaluation: Optional[Evaluation], method: str = DEFAULT_METHOD,
+           latency_budget_ms: float = LATENCY_BUDGET_MS) -> Advice:
+    """Decide what to do with the ANN index (see the module docstring)."""
+    if index is None:
+        if embedded_rows < MIN_INDEX_ROWS:
+            return Advice('none', f"{embedded_rows:,} embedded rows; no ANN index needed below {MIN_INDEX_ROWS:,}")
+        params = {'lists': recommended_lists(embedded_rows)} if method == 'ivfflat' else dict(ANN_INDEX_DEFAULTS['hnsw'])
+        return Advice('create', 'no ANN index on doctrove_embedding', method, params)
+    if not index.valid:
+        return Advice('reindex', f"{index.name} is invalid (failed concurrent build)", index.method, index.params)
+
+    if index.method == 'ivfflat':
+        lists, target = index.params['lists'], recommended_lists(embedded_rows)
+        if lists > target * LISTS_TOLERANCE or lists * LISTS_TOLERANCE < target:
+            return Advice('retune', f"lists={lists} is far from {target} recommended for {embedded_rows:,} rows",
+                          'ivfflat', {'lists': target})
+
+    growth = None
+    if rows_at_build:
+        growth = (embedded_rows - rows_at_build) / rows_at_build
+        if growth >= REBUILD_GROWTH[index.method]:
+            return Advice('reindex', f"{embedded_rows - rows_at_build:,} rows embedded since the build "
+                                     f"({growth:.0%} >= {REBUILD_GROWTH[index.method]:.0%})",
+                          index.method, index.params)
+
+    if evaluation is not None:
+        best = max(evaluation.results, key=lambda result: result['recall']) if evaluation.results else None
+        if evaluation.recommended_setting is None:
+            reached = f"best recall {best['recall']:.3f}" if best else "no measurements"
+            if index.method == 'hnsw':
+                m = min(MAX_HNSW_M, index.params['m'] * 2)
+                ef_construction = min(MAX_HNSW_EF_CONSTRUCTION, max(2 * m, index.params['ef_construction'] * 2))
+                if (m, ef_construction) != (index.params['m'], index.params['ef_construction']):
+                    return Advice('retune', f"recall {evaluation.target_recall} not reached at ef_search "
+                                            f"{evaluation.results[-1]['setting']} ({reached})",
+                                  'hnsw', {'m': m, 'ef_construction': ef_construction})
+            return Advice('reindex', f"recall {evaluation.target_recall} not reached ({reached})",
+                          index.method, index.params)
+        chosen = next(result for result in evaluation.results if result['setting'] == evaluation.recommended_setting)
+        if index.method == 'ivfflat' and chosen['p95_ms'] > latency_budget_ms:
+            return Advice('reindex', f"recall {evaluation.target_recall} needs probes={evaluation.recommended_setting} "
+                                     f"at p95 {chosen['p95_ms']:.0f}ms > {latency_budget_ms:.0f}ms budget",
+                          index.method, index.params)
+
+    growth_note = f"{growth:.0%} growth since the build" if growth is not None else "no build recorded"
+    return Advice('none', f"{index.name} is healthy ({growth_note})", index.method, index.params)
+
+
+def in_window(window: str, now: Optional[datetime] = None) -> bool:
+    """Whether local time is inside 'HH:MM-HH:MM' (may wrap midnight)."""
+    start, end = (datetime.strptime(part.strip(), '%H:%M').time() for part in window.split('-'))
+    current = (now or datetime.now()).time()
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+# Database access
+
+def find_ann_index(cur) -> Optional[AnnIndex]:
+    cur.execute("""
+        SELECT ic.relname, am.amname, ic.reloptions, i.indisvalid, pg_relation_size(ic.oid)
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        JOIN pg_am am ON am.oid = ic.relam
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = to_regclass(%s) AND a.attname = %s AND am.amname IN ('hnsw', 'ivfflat')
+          AND ic.relname NOT LIKE '%%\\_ccnew%%' AND ic.relname NOT LIKE '%%\\_retune'
+        ORDER BY i.indisvalid DESC, am.amname
+    """, (PAPERS_TABLE, EMBEDDING_COLUMN))
+    row = cur.fetchone()
+    if row is None:
+        return None
+    name, method, reloptions, valid, size = row
+    return AnnIndex(name, method, ann_index_params(method, reloptions), valid, size)
+
+
+def count_embedded_rows(cur) -> int:
+    """Papers with doctrove_embedding (corpus_stats when present, else an exact count)."""
+    cur.execute("SELECT to_regclass('corpus_stats') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("SELECT SUM(with_embedding) FROM corpus_stats")
+        embedded = cur.fetchone()[0]
+        if embedded is not None:
+            return int(embedded)
+    cur.execute(f"SELECT COUNT(*) FROM {PAPERS_TABLE} WHERE {EMBEDDING_COLUMN} IS NOT NULL")
+    return int(cur.fetchone()[0])
+
+
+def last_build(cur, index_name: str) -> Optional[Dict[str, Any]]:
+    cur.execute("""
+        SELECT build_id, action, build_params, rows_at_build, started_at, finished_at
+        FROM vector_index_builds
+        WHERE index_name = %s AND status = 'succeeded'
+        ORDER BY started_at DESC
+        LIMIT 1
+    """, (index_name,))
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return dict(zip(['build_id', 'action', 'build_params', 'rows_at_build', 'started_at', 'finished_at'], row))
+
+
+def sample_queries(cur, sample_size: int, seed: int = EVALUATION_SEED) -> List[Tuple[str, str]]:
+    """(paper id, vector literal) of about sample_size embedded papers, repeatable for a seed."""
+    cur.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", (PAPERS_TABLE,))
+    rows = max(1.0, float(cur.fetchone()[0] or 1.0))
+    # Block sampling reads ~percent of the table; oversample for rows without embeddings
+    percent = min(100.0, 100.0 * sample_size * 20 / rows)
+    cur.execute(f"""
+        SELECT doctrove_paper_id::text, {EMBEDDING_COLUMN}::text
+        FROM {PAPERS_TABLE} TABLESAMPLE BERNOULLI (%s) REPEATABLE (%s)
+        WHERE {EMBEDDING_COLUMN} IS NOT NULL
+        LIMIT %s
+    """, (percent, seed, sample_size))
+    return cur.fetchall()
+
+
+def _neighbours(cur, paper_id: str, vector: str, k: int) -> Tuple[List[str], float]:
+    started = time.perf_counter()
+    cur.execute(f"""
+        SELECT doctrove_paper_id::text
+        FROM {PAPERS_TABLE}
+        WHERE doctrove_paper_id <> %s::uuid AND {EMBEDDING_COLUMN} IS NOT NULL
+        ORDER BY {EMBEDDING_COLUMN} <=> %s::vector
+        LIMIT %s
+    """, (paper_id, vector, k))
+    ids = [row[0] for row in cur.fetchall()]
+    return ids, (time.perf_counter() - started) * 1000
+
+
+def evaluate_index(conn, index: AnnIndex, embedded_rows: int, rows_since_build: Optional[int],
+                   sample_size: int = EVALUATION_SAMPLE, k: int = RECALL_K,
+                   target_recall: float = TARGET_RECALL, settings: Optional[Sequence[int]] = None) -> Evaluation:
+    """
+    Recall@k and latency of the index per setting against exact scans.
+
+    Each exact scan reads every embedded row; on a large corpus keep sample_size small.
+    """
+    setting_name = SETTING_NAMES[index.method]
+    if settings is None:
+        settings = IVFFLAT_PROBES_GRID if index.method == 'ivfflat' else HNSW_EF_SEARCH_GRID
+        if index.method == 'ivfflat':
+            # Probing every list is already an exact scan
+            settings = [probes for probes in settings if probes < index.params['lists']] + [index.params['lists']]
+    with conn.cursor() as cur:
+        queries = sample_queries(cur, sample_size)
+        conn.commit()
+        if not queries:
+            raise SystemExit("No embedded papers to evaluate the index with")
+
+        truth, exact_ms = [], []
+        cur.execute("SET LOCAL enable_indexscan = off")
+        cur.execute("SET LOCAL enable_bitmapscan = off")
+        for paper_id, vector in queries:
+            ids, elapsed = _neighbours(cur, paper_id, vector, k)
+            truth.append(set(ids))
+            exact_ms.append(elapsed)
+        conn.commit()
+
+        results = []
+        for setting in settings:
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute("SELECT set_config(%s, %s, true)", (setting_name, str(setting)))
+            recalls, latencies = [], []
+            for (paper_id, vector), expected in zip(queries, truth):
+                ids, elapsed = _neighbours(cur, paper_id, vector, k)
+                recalls.append(len(expected.intersection(ids)) / max(1, len(expected)))
+                latencies.append(elapsed)
+            conn.commit()
+            p50, p95 = np.percentile(latencies, [50, 95])
+            results.append({'setting': int(setting), 'recall': round(float(np.mean(recalls)), 4),
+                            'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2)})
+            logger.info(f"{index.name} {setting_name}={setting}: recall@{k} {results[-1]['recall']:.3f}, "
+                        f"p50 {p50:.1f}ms, p95 {p95:.1f}ms")
+
+    return Evaluation(
+        index=index, embedded_rows=embedded_rows, rows_since_build=rows_since_build,
+        sample_size=len(queries), k=k, setting_name=setting_name, target_recall=target_recall,
+        results=results, exact_p50_ms=round(float(np.median(exact_ms)), 2),
+        recommended_setting=recommended_setting(results, target_recall)
+    )
+
+
+def record_evaluation(conn, evaluation: Evaluation, advice: Optional[Advice] = None) -> int:
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO vector_index_evaluations
+                (index_name, index_method, build_params, embedded_rows, rows_since_build, sample_size, k,
+                 setting_name, target_recall, recommended_setting, exact_p50_ms, results, advice)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING evaluation_id
+        """, (evaluation.index.name, evaluation.index.method, json.dumps(evaluation.index.params),
+              evaluation.embedded_rows, evaluation.rows_since_build, evaluation.sample_size, evaluation.k,
+              evaluation.setting_name, evaluation.target_recall, evaluation.recommended_setting,
+              evaluation.exact_p50_ms, json.dumps(evaluation.results),
+              json.dumps(asdict(advice)) if advice else None))
+        evaluation_id = cur.fetchone()[0]
+    conn.commit()
+    return evaluation_id
+
+
+def start_build(conn, name: str, method: str, params: Dict[str, int], action: str, reason: str,
+                rows: int, status: str = 'running') -> int:
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO vector_index_builds (index_name, index_method, build_params, action, reason, rows_at_build,
+                                             status, finished_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, CASE WHEN %s = 'running' THEN NULL ELSE NOW() END)
+            RETURNING build_id
+        """, (name, method, json.dumps(params), action, reason, rows, status, status))
+        build_id = cur.fetchone()[0]
+    conn.commit()
+    return build_id
+
+
+def finish_build(conn, build_id: int, error: Optional[str] = None) -> None:
+    with conn.cursor() as cur:
+        cur.execute("UPDATE vector_index_builds SET status = %s, error = %s, finished_at = NOW() WHERE build_id = %s",
+                    ('failed' if error else 'succeeded', error, build_id))
+    conn.commit()
+
+
+def index_definition(name: str, method: str, params: Dict[str, int]) -> str:
+    options = ', '.join(f"{key} = {int(value)}" for key, value in sorted(params.items()))
+    return (f"CREATE INDEX CONCURRENTLY {name} ON {PAPERS_TABLE} "
+            f"USING {method} ({EMBEDDING_COLUMN} vector_cosine_ops) WITH ({options})")
+
+
+def _drop_leftovers(cur, name: str) -> None:
+    """Drop invalid indexes left by an interrupted concurrent build of `name`."""
+    cur.execute("""
+        SELECT ic.relname FROM pg_index i JOIN pg_class ic ON ic.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(%s) AND NOT i.indisvalid
+          AND (ic.relname LIKE %s OR ic.relname = %s)
+    """, (PAPERS_TABLE, name.replace('_', '\\_') + '\\_ccnew%', f"{name}_retune"))
+    for (leftover,) in cur.fetchall():
+        logger.warning(f"Dropping invalid index {leftover} left by an interrupted build")
+        cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{leftover}"')
+
+
+def apply_advice(connection_factory, advice: Advice, index: Optional[AnnIndex], embedded_rows: int,
+                 maintenance_work_mem: str = MAINTENANCE_WORK_MEM) -> Optional[str]:
+    """
+    Carry out a create / reindex / retune (concurrently; queries keep running).
+    Returns the name of the index afterwards.
+    """
+    name = index.name if index else DEFAULT_INDEX_NAME if advice.method == 'ivfflat' else 'idx_papers_embedding_hnsw'
+    log_conn = connection_factory()
+    conn = connection_factory()
+    conn.autocommit = True  # CONCURRENTLY cannot run inside a transaction block
+    build_id = start_build(log_conn, name, advice.method, advice.params, advice.action, advice.reason, embedded_rows)
+    started = time.time()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_config('maintenance_work_mem', %s, false)", (maintenance_work_mem,))
+            _drop_leftovers(cur, name)
+            if advice.action == 'create':
+                cur.execute(index_definition(name, advice.method, advice.params))
+            elif advice.action == 'reindex':
+                cur.execute(f'REINDEX INDEX CONCURRENTLY "{name}"')
+            elif advice.action == 'retune':
+                # Build alongside, then swap: the old index serves queries until the new one is valid
+                replacement = f"{name}_retune"
+                cur.execute(index_definition(replacement, advice.method, advice.params))
+                cur.execute(f'DROP INDEX CONCURRENTLY "{name}"')
+                cur.execute(f'ALTER INDEX "{replacement}" RENAME TO "{name}"')
+            else:
+                raise ValueError(f"Nothing to apply for action {advice.action!r}")
+            cur.execute(f'ANALYZE {PAPERS_TABLE}')
+        finish_build(log_conn, build_id)
+        logger.info(f"{advice.action} of {name} finished in {time.time() - started:.1f}s")
+        clear_planner_statistics_cache()
+        return name
+    except Exception as e:
+        finish_build(log_conn, build_id, str(e))
+        raise
+    finally:
+        conn.close()
+        log_conn.close()
+
+
+# Commands
+
+def _rows_since(build: Optional[Dict[str, Any]], embedded_rows: int) -> Optional[int]:
+    return None if build is None else embedded_rows - int(build['rows_at_build'])
+
+
+def status(connection_factory) -> Dict[str, Any]:
+    conn = connection_factory()
+    try:
+        with conn.cursor() as cur:
+            index = find_ann_index(cur)
+            embedded_rows = count_embedded_rows(cur)
+            build = last_build(cur, index.name) if index else None
+            evaluation = None
+            if index:
+                cur.execute("""
+                    SELECT evaluated_at, setting_name, recommended_setting, target_recall, results, build_params
+                    FROM vector_index_evaluations WHERE index_name = %s ORDER BY evaluated_at DESC LIMIT 1
+                """, (index.name,))
+                row = cur.fetchone()
+                if row:
+                    evaluation = dict(zip(['evaluated_at', 'setting_name', 'recommended_setting', 'target_recall',
+                                           'results', 'build_params'], row))
+                    evaluation['current'] = evaluation.pop('build_params') == index.params
+        return {'index': asdict(index) if index else None, 'embedded_rows': embedded_rows,
+                'last_build': build, 'rows_since_build': _rows_since(build, embedded_rows),
+                'last_evaluation': evaluation}
+    finally:
+        conn.close()
+
+
+def evaluate_and_advise(connection_factory, sample_size: int, method: str,
+                        record: bool = True) -> Tuple[Optional[AnnIndex], int, Optional[Evaluation], Advice]:
+    conn = connection_factory()
+    try:
+        with conn.cursor() as cur:
+            index = find_ann_index(cur)
+            embedded_rows = count_embedded_rows(cur)
+            build = last_build(cur, index.name) if index else None
+        conn.commit()
+        if index is not None and index.valid and build is None and record:
+            # First run against an existing index: its size now is the baseline for growth
+            start_build(conn, index.name, index.method, index.params, 'baseline',
+                        'existing index adopted', embedded_rows, status='succeeded')
+            build = {'rows_at_build': embedded_rows}
+        evaluation = None
+        if index is not None and index.valid:
+            evaluation = evaluate_index(conn, index, embedded_rows, _rows_since(build, embedded_rows), sample_size)
+        advice = advise(index, embedded_rows, build['rows_at_build'] if build else None, evaluation, method)
+        if evaluation is not None and record:
+            record_evaluation(conn, evaluation, advice)
+        return index, embedded_rows, evaluation, advice
+    finally:
+        conn.close()
+
+
+def run(args) -> int:
+    from db import create_connection_factory
+
+    connection_factory = create_connection_factory()
+    if args.command == 'status':
+        print(json.dumps(status(connection_factory), indent=2, default=str))
+        return 0
+
+    index, embedded_rows, evaluation, advice = evaluate_and_advise(
+        connection_factory, args.sample, args.method, record=not getattr(args, 'dry_run', False))
+    if evaluation is not None:
+        logger.info(f"{evaluation.setting_name} reaching recall {evaluation.target_recall}: "
+                    f"{evaluation.recommended_setting} (exact scan p50 {evaluation.exact_p50_ms}ms)")
+    if getattr(args, 'reindex', False) and index is not None and advice.action == 'none':
+        advice = Advice('reindex', 'requested with --reindex', index.method, index.params)
+    logger.info(f"Advice: {advice.action} ({advice.reason})")
+    if args.command == 'evaluate' or advice.action == 'none':
+        return 0
+    if args.dry_run:
+        logger.info("Dry run: no changes made")
+        return 0
+    if not args.force and not in_window(args.window):
+        logger.info(f"Outside the maintenance window {args.window}; deferred")
+        return 0
+
+    name = apply_advice(connection_factory, advice, index, embedded_rows, args.maintenance_work_mem)
+    # Measure the new index so the planner gets a floor that matches it
+    evaluate_and_advise(connection_factory, args.sample, args.method)
+    logger.info(f"{name} rebuilt and re-evaluated")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate and maintain the ANN index on doctrove_embedding')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help='Index, rows since the last build and the latest evaluation')
+    for command, help_text in (('evaluate', 'Measure recall and latency and record the result'),
+                               ('run', 'Evaluate, then create / reindex / retune inside the maintenance window')):
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument('--sample', type=int, default=EVALUATION_SAMPLE,
+                                    help='Query vectors measured (each needs an exact scan)')
+        command_parser.add_argument('--method', choices=['ivfflat', 'hnsw'], default=DEFAULT_METHOD,
+                                    help='Index type to create when there is none')
+        if command == 'run':
+            command_parser.add_argument('--window', default=MAINTENANCE_WINDOW,
+                                        help='Local maintenance window HH:MM-HH:MM')
+            command_parser.add_argument('--force', action='store_true', help='Ignore the maintenance window')
+            command_parser.add_argument('--dry-run', action='store_true', help='Report the advice only')
+            command_parser.add_argument('--reindex', action='store_true',
+                                        help='Rebuild the existing index even if the advice is none')
+            command_parser.add_argument('--maintenance-work-mem', default=MAINTENANCE_WORK_MEM,
+                                        help='maintenance_work_mem for the build')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    run(args)
+
+if __name__ == '__main__':
+    main()
@@ -105,7 +105,13 @@ def validate_input_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
     return ctx
 
 def setup_database_enter(ctx: Dict[str, Any]) -> Dict[str, Any]:
-    """Setup database connection using dependency injection"""
+    """Setup database connection using dependency injection
+    
+    Keeps a connection_factory already injected by the caller (e.g. the API's pooled factory).
+    """
+    if ctx.get('connection_factory') is not None:
+        return ctx
+    
     from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
     import psycopg2
     
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for the DocTrove API.
+
+Sends the same request mix to one or more running servers (e.g. the Flask
+server from api.py and the ASGI server from asgi.py) and reports throughput
+and latency percentiles for each.
+
+Usage:
+    python load_test.py --url http://localhost:5001 --url http://localhost:5002 \\
+        --path "/api/papers?fields=doctrove_paper_id,doctrove_title&limit=50&search_text=graph+networks+{i}" \\
+        --concurrency 32 --requests 500
+
+`{i}` in a path is replaced by the request number, e.g. to defeat the
+embedding cache so every semantic search waits on the embedding service.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+def run_load(base_url: str, paths: List[str], total: int, concurrency: int, timeout: float) -> Dict[str, float]:
+    """Issue `total` GET requests over `concurrency` threads; returns summary statistics."""
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        nonlocal errors
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        path = paths[i % len(paths)].replace('{i}', str(i))
+        start = time.perf_counter()
+        try:
+            ok = session.get(base_url + path, timeout=timeout).status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else float('nan')
+
+    return {
+        'ok': len(latencies),
+        'errors': errors,
+        'seconds': wall,
+        'rps': len(latencies) / wall if wall else 0.0,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else float('nan'),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test for the DocTrove API')
+    parser.add_argument('--url', action='append', required=True, help='Server base URL (repeat to compare servers)')
+    parser.add_argument('--path', action='append', help='Request path with query string (repeat for a mix)')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per server')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+    args = parser.parse_args()
+    paths = args.path or ['/api/papers?fields=doctrove_paper_id,doctrove_title&limit=50&search_text=graph+networks+{i}']
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {len(paths)} path(s)")
+    print(f"{'server':<32} {'ok':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for base_url in args.url:
+        result = run_load(base_url.rstrip('/'), paths, args.requests, args.concurrency, args.timeout)
+        print(f"{base_url:<32} {result['ok']:>6} {result['errors']:>6} {result['rps']:>8.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI-compatible LLM server for offline development and tests.
+
+Serves POST .../chat/completions and POST .../embeddings with a configurable
+latency, so cluster summary caching and deferred labels can be exercised
+without network access or API keys. Chat replies are deterministic: one
+numbered line per "Cluster N:" block of the prompt, built from its first title.
+
+Usage:
+    python mock_llm_server.py --port 5900 --latency 2.0
+    OPENAI_BASE_URL=http://localhost:5900/v1 OPENAI_API_KEY=mock python api.py
+
+GET /stats returns request counts; POST /stats/reset clears them.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 1536
+
+def mock_chat_content(prompt: str) -> str:
+    """Numbered list with one label per cluster of a build_llm_prompt prompt."""
+    labels = []
+    for block in re.split(r'^Cluster \d+:\n', prompt, flags=re.MULTILINE)[1:]:
+        titles = re.findall(r'^- (.+)$', block, flags=re.MULTILINE)
+        words = titles[0].split()[:4] if titles else ['Untitled']
+        labels.append(' '.join(words))
+    if not labels:
+        labels = ['Mock response']
+    return '\n'.join(f"{i}. {label}" for i, label in enumerate(labels, 1))
+
+def mock_embedding(text: str) -> List[float]:
+    """Deterministic unit vector for a text."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+    vector = np.random.default_rng(seed).normal(size=EMBEDDING_DIMENSIONS)
+    return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.5, jitter: float = 0.0,
+                 fail_rate: float = 0.0):
+        super().__init__(address, MockLLMHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.stats_lock = threading.Lock()
+        self.stats = {'chat_requests': 0, 'embedding_requests': 0, 'failures': 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, name: str) -> None:
+        with self.stats_lock:
+            self.stats[name] += 1
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    server: MockLLMServer
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            with self.server.stats_lock:
+                return self._send(200, dict(self.server.stats))
+        self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send(400, {'error': {'message': 'Invalid JSON body'}})
+
+        path = self.path.rstrip('/')
+        if path == '/stats/reset':
+            with self.server.stats_lock:
+                self.server.stats = {name: 0 for name in self.server.stats}
+            return self._send(200, {'reset': True})
+
+        server = self.server
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+        if server.fail_rate and random.random() < server.fail_rate:
+            server.count('failures')
+            return self._send(500, {'error': {'message': 'Injected mock failure'}})
+
+        if path.endswith('/chat/completions'):
+            server.count('chat_requests')
+            prompt = '\n'.join(str(message.get('content', '')) for message in body.get('messages', []))
+            return self._send(200, {
+                'object': 'chat.completion',
+                'model': body.get('model', 'mock'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': mock_chat_content(prompt)}}],
+            })
+        if path.endswith('/embeddings'):
+            server.count('embedding_requests')
+            inputs = body.get('input', '')
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            return self._send(200, {
+                'object': 'list',
+                'model': body.get('model', 'mock'),
+                'data': [{'object': 'embedding', 'index': i, 'embedding': mock_embedding(str(text))}
+                         for i, text in enumerate(inputs)],
+            })
+        self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def start_mock_llm_server(port: int = 0, latency: float = 0.5, jitter: float = 0.0,
+                          fail_rate: float = 0.0, host: str = '127.0.0.1') -> MockLLMServer:
+    """Start a server in a daemon thread (port 0 picks a free port); stop it with shutdown()."""
+    server = MockLLMServer((host, port), latency, jitter, fail_rate)
+    threading.Thread(target=server.serve_forever, name='mock-llm-server', daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock OpenAI-compatible LLM server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=5900, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=2.0, help='Seconds before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random +/- seconds added to the latency')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockLLMServer((args.host, args.port), args.latency, args.jitter, args.fail_rate)
+    print(f"Mock LLM server at {server.base_url} (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
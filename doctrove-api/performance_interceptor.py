@@ -4,26 +4,46 @@ Uses functional programming principles to add comprehensive debug tracing with t
 """
 
 import time
+import atexit
 import logging
+import logging.handlers
 import json
+import queue
 from typing import Dict, Any, Callable
 from functools import wraps
 from datetime import datetime
 
-# Configure logging to file
+# Configure logging to file. Records are queued and written by a listener
+# thread, so request threads never wait on the disk.
 logger = logging.getLogger('performance_tracer')
 logger.setLevel(logging.DEBUG)
 
 # Create file handler
-file_handler = logging.FileHandler('/tmp/doctrove_performance.log')
+file_handler = logging.FileHandler('/tmp/doctrove_performance.log', delay=True)
 file_handler.setLevel(logging.DEBUG)
 
 # Create formatter
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(formatter)
 
-# Add handler to logger
-logger.addHandler(file_handler)
+# Metrics rows for monitor_performance.py, written the same way
+metrics_logger = logging.getLogger('performance_metrics')
+metrics_logger.setLevel(logging.INFO)
+metrics_logger.propagate = False
+metrics_file_handler = logging.FileHandler('/tmp/doctrove_performance_metrics.csv', delay=True)
+metrics_file_handler.setFormatter(logging.Formatter('%(message)s'))
+
+_log_queue: queue.Queue = queue.Queue()
+_metrics_queue: queue.Queue = queue.Queue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+metrics_logger.addHandler(logging.handlers.QueueHandler(_metrics_queue))
+_listeners = [
+    logging.handlers.QueueListener(_log_queue, file_handler),
+    logging.handlers.QueueListener(_metrics_queue, metrics_file_handler),
+]
+for _listener in _listeners:
+    _listener.start()
+    atexit.register(_listener.stop)
 
 def log_performance(phase: str) -> Callable:
     """
@@ -244,8 +264,4 @@ def log_performance_metrics(operation: str, duration_ms: float, result_count: in
         logger.info(message)
     
     # Also log to performance metrics file for analysis
-    try:
-        with open('/tmp/doctrove_performance_metrics.csv', 'a') as f:
-            f.write(f"{timestamp},{operation},{duration_ms:.2f},{result_count or 0},{search_text or ''}\n")
-    except Exception as e:
-        logger.warning(f"Failed to write performance metrics: {e}")
+    metrics_logger.info(f"{timestamp},{operation},{duration_ms:.2f},{result_count or 0},{search_text or ''}")
@@ -0,0 +1,366 @@
+"""
+Sampled query-plan capture for /api/papers.
+
+QueryAnalyzer.analyze_query runs a query a second time under EXPLAIN ANALYZE,
+which is too expensive for the request path. Instead, for a sampled fraction
+of requests and for every query slower than a threshold, the plan is taken
+with EXPLAIN (FORMAT JSON) -- planning only -- on the connection that just ran
+the query, so it reflects the same prepared statement and ANN settings
+(db.explain_prepared). The request only pays for that EXPLAIN; fingerprinting,
+checks and the INSERT into query_plan_samples happen in a background thread.
+
+Each stored plan carries:
+    plan_fingerprint  hash of the plan shape (node types, relations, indexes,
+                      join types; no costs or row counts)
+    findings          FINDING_* checks that failed for the plan
+
+find_regressions() reports query templates whose latest plan has findings, or
+whose plan changed and got REGRESSION_SLOWDOWN times slower than an earlier
+plan. Served by GET /api/debug/query-plans.
+
+Configuration (environment; sample rate and threshold can also be changed at
+runtime with POST /api/debug/query-plans):
+    DOCTROVE_PLAN_SAMPLE          Fraction of requests whose plans are captured (default 0.01)
+    DOCTROVE_PLAN_SLOW_MS         Queries at least this slow are always captured (default 1000; 0: off)
+    DOCTROVE_PLAN_MAX_PER_MINUTE  Captures per minute at most, sampled and slow together (default 60)
+    DOCTROVE_PLAN_RETENTION_DAYS  Stored samples older than this are deleted (default 14)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from db import explain_prepared
+
+logger = logging.getLogger(__name__)
+
+PLAN_SAMPLE_RATE = min(1.0, max(0.0, float(os.getenv('DOCTROVE_PLAN_SAMPLE', '0.01'))))
+PLAN_SLOW_MS = float(os.getenv('DOCTROVE_PLAN_SLOW_MS', '1000'))
+PLAN_MAX_PER_MINUTE = int(os.getenv('DOCTROVE_PLAN_MAX_PER_MINUTE', '60'))
+PLAN_RETENTION_DAYS = int(os.getenv('DOCTROVE_PLAN_RETENTION_DAYS', '14'))
+
+PAPERS_TABLE = 'doctrove_papers'
+FINDING_SEQ_SCAN = 'seq_scan_doctrove_papers'
+FINDING_ANN_UNUSED = 'ann_index_unused'
+FINDING_PLAN_CHANGED = 'plan_changed'
+# A template whose new plan is this many times slower (median) than an earlier plan has regressed
+REGRESSION_SLOWDOWN = 1.5
+# Semantic strategies that deliberately compute exact distances without the ANN index
+EXACT_SEMANTIC_STRATEGIES = ('filter_first',)
+# Plan node keys that make up its shape
+FINGERPRINT_KEYS = ('Node Type', 'Parent Relationship', 'Relation Name', 'Index Name', 'Join Type',
+                    'Strategy', 'CTE Name', 'Subplan Name')
+
+PLAN_WRITE_QUEUE_SIZE = 1000
+RETENTION_CHECK_SECONDS = 3600
+MAX_QUERY_TEXT_LENGTH = 20000
+
+_sample_rate = PLAN_SAMPLE_RATE
+_slow_ms = PLAN_SLOW_MS
+
+_stats_lock = threading.Lock()
+_window_start = 0.0
+_window_count = 0
+_counts = {'captured': 0, 'rate_limited': 0, 'explain_errors': 0, 'dropped_writes': 0, 'written': 0,
+           'write_errors': 0}
+_table_missing = False
+_writer_queue: "queue.Queue" = queue.Queue(maxsize=PLAN_WRITE_QUEUE_SIZE)
+_writer_thread: Optional[threading.Thread] = None
+_last_retention = 0.0
+
+def configure(sample_rate: Optional[float] = None, slow_ms: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Change the sample rate and/or slow-query threshold at runtime.
+
+    Raises:
+        ValueError: Sample rate outside 0.0-1.0 or negative threshold
+    """
+    global _sample_rate, _slow_ms
+    if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+        raise ValueError(f"sample_rate must be between 0.0 and 1.0, got {sample_rate}")
+    if slow_ms is not None and slow_ms < 0:
+        raise ValueError(f"slow_ms must be >= 0, got {slow_ms}")
+    if sample_rate is not None:
+        _sample_rate = float(sample_rate)
+    if slow_ms is not None:
+        _slow_ms = float(slow_ms)
+    return config()
+
+def config() -> Dict[str, Any]:
+    return {
+        'sample_rate': _sample_rate,
+        'slow_ms': _slow_ms,
+        'max_per_minute': PLAN_MAX_PER_MINUTE,
+        'retention_days': PLAN_RETENTION_DAYS,
+    }
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        counts = dict(_counts)
+    return {**counts, 'pending_writes': _writer_queue.qsize(), 'table_missing': _table_missing}
+
+def sample_request() -> bool:
+    """Whether this request's plans are captured regardless of latency (decide once per request)."""
+    return _sample_rate > 0 and (_sample_rate >= 1.0 or random.random() < _sample_rate)
+
+def capture_reason(execution_ms: float, sampled: bool) -> Optional[str]:
+    """'slow', 'sampled' or None (not captured, including over the per-minute cap)."""
+    global _window_start, _window_count
+    if _slow_ms > 0 and execution_ms >= _slow_ms:
+        reason = 'slow'
+    elif sampled:
+        reason = 'sampled'
+    else:
+        return None
+    now = time.monotonic()
+    with _stats_lock:
+        if now - _window_start >= 60:
+            _window_start, _window_count = now, 0
+        if _window_count >= PLAN_MAX_PER_MINUTE:
+            _counts['rate_limited'] += 1
+            return None
+        _window_count += 1
+    return reason
+
+def capture(cur, query: str, params: Sequence[Any], execution_ms: float, query_kind: str,
+            connection_factory: Callable, sampled: bool, semantic_strategy: Optional[str] = None,
+            endpoint: str = '/api/papers') -> Optional[str]:
+    """
+    Capture the plan of a query that just ran on cur, if sampled or slow.
+
+    The EXPLAIN runs inside a savepoint, so a failure leaves the request's
+    transaction usable. Never raises.
+
+    Returns:
+        The capture reason, or None when nothing was captured
+    """
+    reason = capture_reason(execution_ms, sampled)
+    if reason is None or _table_missing:
+        return None
+    try:
+        cur.execute("SAVEPOINT plan_capture")
+        try:
+            plan = explain_prepared(cur, query, params)
+        except Exception:
+            cur.execute("ROLLBACK TO SAVEPOINT plan_capture")
+            raise
+        cur.execute("RELEASE SAVEPOINT plan_capture")
+    except Exception as e:
+        with _stats_lock:
+            _counts['explain_errors'] += 1
+        logger.warning(f"Plan capture failed for {query_kind} query: {e}")
+        return None
+    record = {
+        'endpoint': endpoint,
+        'query_kind': query_kind,
+        'query': query,
+        'reason': reason,
+        'execution_ms': round(execution_ms, 2),
+        'semantic_strategy': semantic_strategy,
+        'plan': plan,
+    }
+    with _stats_lock:
+        _counts['captured'] += 1
+    _enqueue_write(connection_factory, record)
+    return reason
+
+# Plan analysis
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Every node of an EXPLAIN JSON plan tree, parents first."""
+    yield node
+    for child in node.get('Plans', ()):
+        yield from plan_nodes(child)
+
+def _shape(node: Dict[str, Any]) -> list:
+    return [[node.get(key) for key in FINGERPRINT_KEYS], [_shape(child) for child in node.get('Plans', ())]]
+
+def plan_fingerprint(plan: Dict[str, Any]) -> str:
+    """Hash of the plan shape; stable across cost, row estimate and parameter changes."""
+    shape = json.dumps(_shape(plan['Plan']), separators=(',', ':'))
+    return hashlib.blake2b(shape.encode('utf-8'), digest_size=8).hexdigest()
+
+def query_hash(query: str) -> str:
+    return hashlib.blake2b(query.encode('utf-8'), digest_size=8).hexdigest()
+
+def plan_findings(plan: Dict[str, Any], query: str, semantic_strategy: Optional[str] = None) -> List[str]:
+    """FINDING_* checks failed by a plan."""
+    nodes = list(plan_nodes(plan['Plan']))
+    findings = []
+    if any(node.get('Node Type') in ('Seq Scan', 'Parallel Seq Scan') and node.get('Relation Name') == PAPERS_TABLE
+           for node in nodes):
+        findings.append(FINDING_SEQ_SCAN)
+    # An ANN index scan orders by the distance operator
+    if '<=>' in query and semantic_strategy not in EXACT_SEMANTIC_STRATEGIES \
+            and not any('<=>' in str(node.get('Order By', '')) for node in nodes if node.get('Index Name')):
+        findings.append(FINDING_ANN_UNUSED)
+    return findings
+
+def find_regressions(groups: List[Dict[str, Any]], slowdown: float = REGRESSION_SLOWDOWN) -> List[Dict[str, Any]]:
+    """
+    Regressions from per-(query_kind, query_hash, plan_fingerprint) aggregates
+    (keys: samples, median_ms, first_seen, last_seen, findings, ...).
+
+    A template is reported when the plan it was last seen with has findings, or
+    when that plan first appeared after another plan of the same template whose
+    median was `slowdown` times lower.
+    """
+    by_template: Dict[tuple, List[Dict[str, Any]]] = {}
+    for group in groups:
+        by_template.setdefault((group['query_kind'], group['query_hash']), []).append(group)
+
+    regressions = []
+    for (kind, template), plans in by_template.items():
+        current = max(plans, key=lambda group: group['last_seen'])
+        issues = list(current['findings'])
+        earlier = [group for group in plans if group is not current and group['first_seen'] < current['first_seen']]
+        previous = min(earlier, key=lambda group: group['median_ms']) if earlier else None
+        if previous is not None and current['median_ms'] > previous['median_ms'] * slowdown:
+            issues.append(FINDING_PLAN_CHANGED)
+        if not issues:
+            continue
+        regressions.append({
+            'query_kind': kind,
+            'query_hash': template,
+            'issues': issues,
+            'plan_fingerprint': current['plan_fingerprint'],
+            'samples': current['samples'],
+            'median_ms': current['median_ms'],
+            'max_ms': current.get('max_ms'),
+            'first_seen': current['first_seen'],
+            'last_seen': current['last_seen'],
+            'semantic_strategy': current.get('semantic_strategy'),
+            'latest_sample_id': current.get('latest_sample_id'),
+            'query_text': current.get('query_text'),
+            'previous_plan': None if previous is None else {
+                'plan_fingerprint': previous['plan_fingerprint'],
+                'samples': previous['samples'],
+                'median_ms': previous['median_ms'],
+                'last_seen': previous['last_seen'],
+            },
+        })
+    regressions.sort(key=lambda regression: regression['median_ms'] or 0, reverse=True)
+    return regressions
+
+# Storage
+
+def build_plan_groups_query(days: int):
+    """Per-plan aggregates of the last `days` days, for find_regressions."""
+    query = """
+        SELECT query_kind, query_hash, plan_fingerprint,
+               COUNT(*) AS samples,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY execution_ms) AS median_ms,
+               MAX(execution_ms) AS max_ms,
+               MIN(captured_at) AS first_seen,
+               MAX(captured_at) AS last_seen,
+               (array_agg(array_to_string(findings, ',') ORDER BY captured_at DESC))[1] AS findings,
+               (array_agg(semantic_strategy ORDER BY captured_at DESC))[1] AS semantic_strategy,
+               (array_agg(sample_id ORDER BY captured_at DESC))[1] AS latest_sample_id,
+               (array_agg(LEFT(query_text, 500) ORDER BY captured_at DESC))[1] AS query_text
+        FROM query_plan_samples
+        WHERE captured_at >= NOW() - make_interval(days => %s)
+        GROUP BY query_kind, query_hash, plan_fingerprint
+    """
+    return query, [days]
+
+def load_plan_groups(connection_factory: Callable, days: int = 7) -> List[Dict[str, Any]]:
+    query, params = build_plan_groups_query(days)
+    with connection_factory() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            columns = [desc[0] for desc in cur.description]
+            groups = [dict(zip(columns, row)) for row in cur.fetchall()]
+    for group in groups:
+        group['findings'] = [finding for finding in (group['findings'] or '').split(',') if finding]
+        group['median_ms'] = round(float(group['median_ms']), 2)
+        group['max_ms'] = round(float(group['max_ms']), 2)
+        group['first_seen'] = group['first_seen'].isoformat()
+        group['last_seen'] = group['last_seen'].isoformat()
+    return groups
+
+def load_sample(connection_factory: Callable, sample_id: int) -> Optional[Dict[str, Any]]:
+    with connection_factory() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT sample_id, captured_at, endpoint, query_kind, query_hash, plan_fingerprint, reason,
+                       execution_ms, total_cost, plan_rows, semantic_strategy, findings, query_text, plan
+                FROM query_plan_samples WHERE sample_id = %s
+            """, (sample_id,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            sample = dict(zip([desc[0] for desc in cur.description], row))
+    sample['captured_at'] = sample['captured_at'].isoformat()
+    return sample
+
+def sample_row(record: Dict[str, Any]) -> tuple:
+    """query_plan_samples column values of a captured record."""
+    plan, query = record['plan'], record['query']
+    top = plan.get('Plan', {})
+    return (
+        record['endpoint'], record['query_kind'], query_hash(query), plan_fingerprint(plan), record['reason'],
+        record['execution_ms'], top.get('Total Cost'), top.get('Plan Rows'), record['semantic_strategy'],
+        plan_findings(plan, query, record['semantic_strategy']), query[:MAX_QUERY_TEXT_LENGTH], json.dumps(plan),
+    )
+
+def _enqueue_write(connection_factory: Callable, record: Dict[str, Any]) -> None:
+    _ensure_writer()
+    try:
+        _writer_queue.put_nowait((connection_factory, record))
+    except queue.Full:
+        with _stats_lock:
+            _counts['dropped_writes'] += 1
+
+def _ensure_writer() -> None:
+    global _writer_thread
+    if _writer_thread is not None:
+        return
+    with _stats_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_write_loop, name='doctrove-plan-writer', daemon=True)
+            _writer_thread.start()
+
+def _write_loop() -> None:
+    """Insert queued plans, one transaction per batch; prune old samples about hourly."""
+    global _table_missing, _last_retention
+    while True:
+        batch = [_writer_queue.get()]
+        while len(batch) < 100:
+            try:
+                batch.append(_writer_queue.get_nowait())
+            except queue.Empty:
+                break
+        connection_factory = batch[-1][0]
+        try:
+            rows = [sample_row(record) for _, record in batch]
+            with connection_factory() as conn:
+                with conn.cursor() as cur:
+                    execute_values(cur, """
+                        INSERT INTO query_plan_samples
+                            (endpoint, query_kind, query_hash, plan_fingerprint, reason, execution_ms,
+                             total_cost, plan_rows, semantic_strategy, findings, query_text, plan)
+                        VALUES %s
+                    """, rows)
+                    if time.monotonic() - _last_retention >= RETENTION_CHECK_SECONDS:
+                        cur.execute("DELETE FROM query_plan_samples WHERE captured_at < NOW() - make_interval(days => %s)",
+                                    (PLAN_RETENTION_DAYS,))
+                        _last_retention = time.monotonic()
+            with _stats_lock:
+                _counts['written'] += len(rows)
+        except psycopg2.errors.UndefinedTable:
+            _table_missing = True
+            logger.warning("query_plan_samples does not exist; plan capture disabled "
+                           "(apply database/migrations/20261018_140000__query_plan_samples.sql)")
+        except Exception as e:
+            with _stats_lock:
+                _counts['write_errors'] += len(batch)
+            logger.warning(f"Failed to store {len(batch)} query plans: {e}")
@@ -0,0 +1,218 @@
+"""
+Sampled, asynchronous request tracing for the DocTrove API.
+
+Replaces the debug files the request path used to open and write on every
+request (/tmp/api_debug.txt, /tmp/backend_sql_queries.log, ...). Trace events
+are appended to an in-memory ring buffer, served by GET /api/debug/traces, and
+optionally written as JSON lines by a background thread, so a request never
+waits on disk I/O. With no category enabled, trace() is a set lookup.
+
+Configuration (environment; categories and sample rate can also be changed at
+runtime with POST /api/debug/traces):
+    DOCTROVE_TRACE          Comma-separated categories to record, or 'all' (default: none)
+    DOCTROVE_TRACE_SAMPLE   Fraction of requests traced, 0.0-1.0 (default: 1.0)
+    DOCTROVE_TRACE_BUFFER   Events kept in memory (default: 2000)
+    DOCTROVE_TRACE_FILE     JSON-lines file appended by the background writer (default: none)
+
+Categories:
+    request     endpoint arguments
+    enrichment  symbolization / enrichment parameters resolved for the query
+    sql         generated SQL and parameters
+    exec        parameters as bound at execution
+    timing      per-phase timings of /api/papers
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ('request', 'enrichment', 'sql', 'exec', 'timing')
+
+TRACE_BUFFER_SIZE = int(os.getenv('DOCTROVE_TRACE_BUFFER', '2000'))
+TRACE_FILE = os.getenv('DOCTROVE_TRACE_FILE') or None
+# Events waiting for the background writer; beyond this they are dropped, never waited on
+TRACE_WRITE_QUEUE_SIZE = 10000
+# Long strings (e.g. a 1536-dimension vector literal) are cut to this many characters
+MAX_STRING_LENGTH = 500
+MAX_SEQUENCE_LENGTH = 50
+
+def _parse_categories(value: Optional[str]) -> frozenset:
+    names = {name.strip() for name in (value or '').split(',') if name.strip()}
+    if 'all' in names:
+        return frozenset(CATEGORIES)
+    unknown = names - set(CATEGORIES)
+    if unknown:
+        logger.warning(f"Ignoring unknown trace categories: {sorted(unknown)}")
+    return frozenset(names & set(CATEGORIES))
+
+_enabled = _parse_categories(os.getenv('DOCTROVE_TRACE'))
+_sample_rate = min(1.0, max(0.0, float(os.getenv('DOCTROVE_TRACE_SAMPLE', '1.0'))))
+
+_buffer: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+_request_ids = itertools.count(1)
+# (request_id, endpoint, sampled) of the request running in this thread / task
+_current = contextvars.ContextVar('doctrove_request_trace', default=None)
+
+_stats_lock = threading.Lock()
+_recorded = 0
+_dropped = 0
+_writer_queue: "queue.Queue" = queue.Queue(maxsize=TRACE_WRITE_QUEUE_SIZE)
+_writer_thread: Optional[threading.Thread] = None
+
+def enabled(category: str) -> bool:
+    """True if events of this category are recorded (guard expensive trace arguments with this)."""
+    return category in _enabled
+
+def configure(categories: Optional[Iterable[str]] = None, sample_rate: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Change the enabled categories and/or sample rate at runtime.
+
+    Raises:
+        ValueError: Unknown category or sample rate outside 0.0-1.0
+    """
+    global _enabled, _sample_rate
+    if categories is not None:
+        names = set(categories)
+        if 'all' in names:
+            names = set(CATEGORIES)
+        unknown = names - set(CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown trace categories: {sorted(unknown)}. Valid: {list(CATEGORIES)}")
+    if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+        raise ValueError(f"sample_rate must be between 0.0 and 1.0, got {sample_rate}")
+    if categories is not None:
+        _enabled = frozenset(names)
+    if sample_rate is not None:
+        _sample_rate = float(sample_rate)
+    return config()
+
+def config() -> Dict[str, Any]:
+    return {
+        'categories': sorted(_enabled),
+        'available_categories': list(CATEGORIES),
+        'sample_rate': _sample_rate,
+        'buffer_size': TRACE_BUFFER_SIZE,
+        'file': TRACE_FILE,
+    }
+
+def begin_request(endpoint: str) -> None:
+    """Start tracing a request: the sampling decision covers all of its events."""
+    if not _enabled:
+        _current.set(None)
+        return
+    sampled = _sample_rate >= 1.0 or random.random() < _sample_rate
+    _current.set((next(_request_ids), endpoint, sampled))
+
+def trace(category: str, event: str, **fields: Any) -> None:
+    """Record an event if its category is enabled and the current request is sampled."""
+    global _recorded
+    if category not in _enabled:
+        return
+    current = _current.get()
+    if current is None:
+        # Outside a traced request (e.g. a background task): sample per event
+        if _sample_rate < 1.0 and random.random() >= _sample_rate:
+            return
+        request_id, endpoint = None, None
+    else:
+        request_id, endpoint, sampled = current
+        if not sampled:
+            return
+    record = {
+        'ts': round(time.time(), 6),
+        'request_id': request_id,
+        'endpoint': endpoint,
+        'category': category,
+        'event': event,
+        **{name: _compact(value) for name, value in fields.items()},
+    }
+    with _buffer_lock:
+        _buffer.append(record)
+    with _stats_lock:
+        _recorded += 1
+    if TRACE_FILE:
+        _enqueue_write(record)
+
+def _compact(value: Any, depth: int = 0) -> Any:
+    """JSON-safe copy with long strings and sequences shortened."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) > MAX_STRING_LENGTH:
+            return f"{value[:MAX_STRING_LENGTH]}... <{len(value)} chars>"
+        return value
+    if depth >= 3:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        return {str(key): _compact(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_compact(item, depth + 1) for item in itertools.islice(value, MAX_SEQUENCE_LENGTH)]
+        if len(value) > MAX_SEQUENCE_LENGTH:
+            items.append(f"... <{len(value)} items>")
+        return items
+    return _compact(repr(value))
+
+def recent(category: Optional[str] = None, request_id: Optional[int] = None,
+           limit: int = 100) -> List[Dict[str, Any]]:
+    """The most recent buffered events (oldest first), optionally filtered."""
+    with _buffer_lock:
+        events = list(_buffer)
+    if category:
+        events = [event for event in events if event['category'] == category]
+    if request_id is not None:
+        events = [event for event in events if event['request_id'] == request_id]
+    return events[-limit:] if limit > 0 else []
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        recorded, dropped = _recorded, _dropped
+    return {
+        'recorded': recorded,
+        'buffered': len(_buffer),
+        'dropped_writes': dropped,
+        'pending_writes': _writer_queue.qsize(),
+    }
+
+def _enqueue_write(record: Dict[str, Any]) -> None:
+    global _dropped
+    _ensure_writer()
+    try:
+        _writer_queue.put_nowait(record)
+    except queue.Full:
+        with _stats_lock:
+            _dropped += 1
+
+def _ensure_writer() -> None:
+    global _writer_thread
+    if _writer_thread is not None:
+        return
+    with _stats_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_write_loop, name='doctrove-trace-writer', daemon=True)
+            _writer_thread.start()
+
+def _write_loop() -> None:
+    """Append queued events to TRACE_FILE, one flush per batch."""
+    while True:
+        batch = [_writer_queue.get()]
+        while len(batch) < 1000:
+            try:
+                batch.append(_writer_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with open(TRACE_FILE, 'a') as f:
+                f.write(''.join(json.dumps(record, default=str) + '\n' for record in batch))
+        except OSError as e:
+            logger.warning(f"Failed to write {len(batch)} trace events to {TRACE_FILE}: {e}")
@@ -0,0 +1,498 @@
+"""
+Adaptive planner for semantic (pgvector) search on /api/papers.
+
+A semantic query ranks papers by `doctrove_embedding <=> query_vector` and also applies
+the request's sql_filter and bbox. How to combine the two depends on how many rows the
+filters keep, so each request is planned from table statistics:
+
+- direct:       ANN index scan with the filters in the same WHERE clause. Used when the
+                filters keep most rows (or there are none).
+- ann_first:    ANN top-k over the whole corpus (k oversampled by the estimated
+                selectivity), then filter the candidates.
+- iterative:    ann_first when the estimate is uncertain (no statistics for a column,
+                pattern matches, legacy filters): if too few candidates pass, re-run
+                with k grown by ITERATIVE_GROWTH.
+- filter_first: exact distance over the rows the filters keep, skipping the ANN index.
+                Used when few enough rows remain (FILTER_FIRST_MAX_ROWS); it is both
+                faster and exact for highly selective filters.
+
+Selectivity comes from pg_stats (MCVs, histograms, null fractions) through
+sql_filter_parser.estimate_selectivity; row counts from corpus_stats when present, else
+pg_class.reltuples. The plan also sets ivfflat.probes / hnsw.ef_search (SET LOCAL) so the
+index can return k candidates: IVFFlat scans probes * rows_per_list rows, HNSW returns at
+most ef_search rows. When index_maintenance.py has measured the current index, the smallest
+setting that reached its target recall is the floor for either parameter.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sql_filter_parser import ColumnRef, ColumnEstimator
+
+logger = logging.getLogger(__name__)
+
+PLAN_DIRECT = 'direct'
+PLAN_ANN_FIRST = 'ann_first'
+PLAN_ITERATIVE = 'iterative'
+PLAN_FILTER_FIRST = 'filter_first'
+SEMANTIC_PLANS = (PLAN_DIRECT, PLAN_ANN_FIRST, PLAN_ITERATIVE, PLAN_FILTER_FIRST)
+
+# Table statistics are re-read at most this often (ANALYZE moves them slowly)
+PLANNER_STATS_TTL_SECONDS = int(os.getenv('DOCTROVE_PLANNER_STATS_TTL_SECONDS', 600))
+
+# Exact scans over at most this many embedded rows beat an oversampled ANN search
+FILTER_FIRST_MAX_ROWS = int(os.getenv('DOCTROVE_FILTER_FIRST_MAX_ROWS', 20000))
+
+# Filters keeping at least this fraction of rows run in the same ANN scan (direct)
+DIRECT_MIN_SELECTIVITY = 0.5
+
+# ANN candidates = search_limit / selectivity * ANN_OVERSAMPLE, within these bounds
+ANN_OVERSAMPLE = 2.0
+MAX_ANN_CANDIDATES = int(os.getenv('DOCTROVE_MAX_ANN_CANDIDATES', 200000))
+
+# Iterative plans multiply k by this factor per extra round
+ITERATIVE_GROWTH = 4
+ITERATIVE_MAX_ROUNDS = 3
+
+# Index parameters: probes never drop below the previous fixed default; ef_search is
+# clamped to pgvector's accepted range
+DEFAULT_IVFFLAT_PROBES = 5
+IVFFLAT_PROBE_HEADROOM = 2.0
+MIN_HNSW_EF_SEARCH = 40
+MAX_HNSW_EF_SEARCH = 1000
+
+# Fraction of the 2D extent assumed for a bbox when the extent is unknown
+DEFAULT_BBOX_FRACTION = 0.1
+
+# Columns wider than this (abstracts, vectors) are not loaded from pg_stats
+STATS_MAX_AVG_WIDTH = 256
+
+PAPERS_TABLE = 'doctrove_papers'
+EMBEDDING_COLUMN = 'doctrove_embedding'
+
+# pgvector's build parameter defaults
+ANN_INDEX_DEFAULTS = {'ivfflat': {'lists': 100}, 'hnsw': {'m': 16, 'ef_construction': 64}}
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _scalars(*values: Any) -> Optional[Tuple[float, ...]]:
+    """All values as numbers, or all as ISO dates/timestamps (epoch seconds); else None."""
+    try:
+        return tuple(float(value) for value in values)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return tuple((datetime.fromisoformat(str(value)).replace(tzinfo=None) - _EPOCH).total_seconds()
+                     for value in values)
+    except ValueError:
+        return None
+
+
+def _comparable(a: Any, b: Any) -> Tuple[Any, Any]:
+    """Compare as numbers/dates when both sides are, else as text."""
+    return _scalars(a, b) or (str(a), str(b))
+
+
+def _less(a: Any, b: Any) -> bool:
+    a, b = _comparable(a, b)
+    return a < b
+
+
+@dataclass(frozen=True)
+class ColumnStatistics:
+    """One pg_stats row (values as text, as pg_stats exposes them)."""
+    null_frac: float
+    n_distinct: float  # negative: -(distinct values / rows)
+    most_common_vals: Tuple[str, ...] = ()
+    most_common_freqs: Tuple[float, ...] = ()
+    histogram_bounds: Tuple[str, ...] = ()
+
+    def distinct_values(self, rows: float) -> float:
+        return -self.n_distinct * rows if self.n_distinct < 0 else self.n_distinct
+
+    def _histogram_fraction(self) -> float:
+        """Fraction of rows covered by the histogram (non-null, non-MCV)."""
+        return max(0.0, 1.0 - self.null_frac - sum(self.most_common_freqs))
+
+    def eq(self, value: Any, rows: float) -> float:
+        """Fraction of rows equal to `value` (as PostgreSQL's var_eq_const)."""
+        if value is None:
+            return 0.0
+        for mcv, freq in zip(self.most_common_vals, self.most_common_freqs):
+            left, right = _comparable(mcv, value)
+            if left == right:
+                return freq
+        remaining = self.distinct_values(rows) - len(self.most_common_vals)
+        if remaining <= 0:
+            return 0.0
+        return self._histogram_fraction() / remaining
+
+    def below(self, value: Any, inclusive: bool) -> Optional[float]:
+        """Fraction of rows `< value` (or `<=`); None without MCVs or a histogram."""
+        if not self.most_common_vals and len(self.histogram_bounds) < 2:
+            return None
+        fraction = 0.0
+        for mcv, freq in zip(self.most_common_vals, self.most_common_freqs):
+            if _less(mcv, value) or (inclusive and not _less(value, mcv)):
+                fraction += freq
+
+        bounds = self.histogram_bounds
+        if len(bounds) >= 2:
+            if _less(value, bounds[0]):
+                position = 0.0
+            elif not _less(value, bounds[-1]):
+                position = 1.0
+            else:
+                bucket = next(i for i in range(1, len(bounds)) if _less(value, bounds[i]))
+                scalars = _scalars(value, bounds[bucket - 1], bounds[bucket])
+                if scalars and scalars[2] > scalars[1]:
+                    within = (scalars[0] - scalars[1]) / (scalars[2] - scalars[1])
+                else:
+                    within = 0.5  # text bounds: assume the middle of the bucket
+                position = (bucket - 1 + min(1.0, max(0.0, within))) / (len(bounds) - 1)
+            fraction += position * self._histogram_fraction()
+        return fraction
+
+    def selectivity(self, op: str, value: Any, rows: float) -> Optional[float]:
+        if op == 'IS NULL':
+            return self.null_frac
+        if op == '=':
+            return self.eq(value, rows)
+        if op in ('<', '<='):
+            return self.below(value, inclusive=op == '<=')
+        if op in ('>', '>='):
+            below = self.below(value, inclusive=op == '>')
+            return None if below is None else max(0.0, 1.0 - self.null_frac - below)
+        return None  # LIKE/ILIKE: left to the default
+
+
+@dataclass(frozen=True)
+class TableStatistics:
+    rows: float
+    columns: Dict[str, ColumnStatistics] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class PlannerStatistics:
+    """Inputs for one planning decision."""
+    tables: Dict[str, TableStatistics]
+    embedded_rows: Optional[float]  # None: doctrove_papers never analyzed and no corpus_stats
+    ann_index: Optional[str] = None  # 'ivfflat', 'hnsw' or None
+    ivfflat_lists: Optional[int] = None
+    extent: Optional[Tuple[float, float, float, float]] = None  # (x_min, y_min, x_max, y_max)
+    ann_min_setting: Optional[int] = None  # Measured probes / ef_search floor (index_maintenance.py)
+
+
+@dataclass(frozen=True)
+class SemanticPlan:
+    """How to run one semantic query; see the module docstring for the strategies."""
+    strategy: str
+    candidates: int  # ANN k for ann_first/iterative (the CTE limit)
+    probes: Optional[int]
+    ef_search: Optional[int]
+    selectivity: float
+    estimated_rows: float
+    confident: bool
+    reason: str
+    planning_ms: float = 0.0
+    round: int = 1
+    ann_index: Optional[str] = None
+    rows_per_list: Optional[float] = None
+    ivfflat_lists: Optional[int] = None
+    ann_min_setting: Optional[int] = None
+
+    def describe(self) -> str:
+        settings = []
+        if self.probes is not None:
+            settings.append(f"probes={self.probes}")
+        if self.ef_search is not None:
+            settings.append(f"ef_search={self.ef_search}")
+        return (f"{self.strategy} (selectivity={self.selectivity:.4g}, est_rows={self.estimated_rows:,.0f}, "
+                f"k={self.candidates:,}{', ' if settings else ''}{', '.join(settings)}; {self.reason})")
+
+
+# Statistics loading
+
+class StatisticsCache:
+    """pg_stats/pg_class/corpus_stats snapshot per table, re-read after `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: int = PLANNER_STATS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._tables: Dict[str, Tuple[TableStatistics, float]] = {}
+        self._corpus: Optional[Tuple[Dict[str, Any], float]] = None
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables = {}
+            self._corpus = None
+
+    def get(self, connection_factory: Callable, tables: Iterable[str]) -> PlannerStatistics:
+        now = time.time()
+        wanted = {PAPERS_TABLE, *tables}
+        with self._lock:
+            stale = sorted(t for t in wanted
+                           if t not in self._tables or now - self._tables[t][1] >= self.ttl_seconds)
+            corpus_stale = self._corpus is None or now - self._corpus[1] >= self.ttl_seconds
+            if stale or corpus_stale:
+                with connection_factory() as conn:
+                    with conn.cursor() as cur:
+                        if stale:
+                            for table, stats in _load_table_statistics(cur, stale).items():
+                                self._tables[table] = (stats, now)
+                        if corpus_stale:
+                            self._corpus = (_load_corpus_statistics(cur), now)
+            tables_stats = {t: self._tables[t][0] for t in wanted if t in self._tables}
+            corpus = self._corpus[0]
+
+        papers = tables_stats.get(PAPERS_TABLE)
+        embedded_rows = corpus.get('embedded_rows')
+        if embedded_rows is None and papers is not None:
+            embedding_stats = papers.columns.get(EMBEDDING_COLUMN)
+            null_frac = embedding_stats.null_frac if embedding_stats else 0.0
+            embedded_rows = papers.rows * (1.0 - null_frac)
+        return PlannerStatistics(
+            tables=tables_stats,
+            embedded_rows=embedded_rows,
+            ann_index=corpus.get('ann_index'),
+            ivfflat_lists=corpus.get('ivfflat_lists'),
+            extent=corpus.get('extent'),
+            ann_min_setting=corpus.get('ann_min_setting')
+        )
+
+
+def _load_table_statistics(cur, tables: List[str]) -> Dict[str, TableStatistics]:
+    cur.execute("""
+        SELECT c.relname, c.reltuples
+        FROM pg_class c
+        WHERE c.relname = ANY(%s) AND c.relnamespace = current_schema()::regnamespace
+    """, (tables,))
+    # reltuples is -1 for tables never vacuumed/analyzed: no usable statistics
+    rows = {name: float(reltuples) for name, reltuples in cur.fetchall() if reltuples >= 0}
+
+    cur.execute("""
+        SELECT tablename, attname, null_frac, n_distinct,
+               most_common_vals::text::text[], most_common_freqs,
+               histogram_bounds::text::text[]
+        FROM pg_stats
+        WHERE schemaname = current_schema() AND tablename = ANY(%s) AND avg_width <= %s
+    """, (tables, STATS_MAX_AVG_WIDTH))
+    columns: Dict[str, Dict[str, ColumnStatistics]] = {}
+    for table, column, null_frac, n_distinct, mcv, mcf, histogram in cur.fetchall():
+        columns.setdefault(table, {})[column] = ColumnStatistics(
+            null_frac=float(null_frac or 0.0),
+            n_distinct=float(n_distinct or 0.0),
+            most_common_vals=tuple(mcv or ()),
+            most_common_freqs=tuple(float(f) for f in (mcf or ())),
+            histogram_bounds=tuple(histogram or ())
+        )
+    return {table: TableStatistics(rows=count, columns=columns.get(table, {}))
+            for table, count in rows.items()}
+
+
+def _load_corpus_statistics(cur) -> Dict[str, Any]:
+    """Embedded-row count and 2D extent (corpus_stats) plus the ANN index on doctrove_embedding."""
+    corpus: Dict[str, Any] = {}
+    cur.execute("SELECT to_regclass('corpus_stats') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("""
+            SELECT SUM(with_embedding), MIN(x_min), MIN(y_min), MAX(x_max), MAX(y_max), BOOL_OR(extent_stale)
+            FROM corpus_stats
+        """)
+        embedded, x_min, y_min, x_max, y_max, stale = cur.fetchone()
+        if embedded is not None:
+            corpus['embedded_rows'] = float(embedded)
+        # A stale extent only ever over-covers, which keeps the bbox estimate conservative
+        if x_min is not None and x_max > x_min and y_max > y_min:
+            corpus['extent'] = (float(x_min), float(y_min), float(x_max), float(y_max))
+
+    cur.execute("""
+        SELECT am.amname, ic.reloptions, ic.relname
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        JOIN pg_am am ON am.oid = ic.relam
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = to_regclass(%s) AND a.attname = %s AND am.amname IN ('hnsw', 'ivfflat')
+        ORDER BY am.amname
+    """, (PAPERS_TABLE, EMBEDDING_COLUMN))
+    index = cur.fetchone()
+    if index:
+        method, reloptions, name = index
+        params = ann_index_params(method, reloptions)
+        corpus['ann_index'] = method
+        if method == 'ivfflat':
+            corpus['ivfflat_lists'] = params['lists']
+
+        # Recall measured by index_maintenance.py, if it still describes this index
+        cur.execute("SELECT to_regclass('vector_index_evaluations') IS NOT NULL")
+        if cur.fetchone()[0]:
+            cur.execute("""
+                SELECT build_params, recommended_setting
+                FROM vector_index_evaluations
+                WHERE index_name = %s AND index_method = %s
+                ORDER BY evaluated_at DESC
+                LIMIT 1
+            """, (name, method))
+            evaluation = cur.fetchone()
+            if evaluation and evaluation[0] == params and evaluation[1] is not None:
+                corpus['ann_min_setting'] = int(evaluation[1])
+    return corpus
+
+
+def ann_index_params(method: str, reloptions: Optional[Iterable[str]]) -> Dict[str, int]:
+    """Build parameters of an ivfflat/hnsw index from pg_class.reloptions ('lists=1000', ...)."""
+    params = dict(ANN_INDEX_DEFAULTS.get(method, {}))
+    for option in reloptions or []:
+        key, _, value = option.partition('=')
+        if key in params:
+            params[key] = int(value)
+    return params
+
+
+_statistics_cache = StatisticsCache()
+
+
+def get_planner_statistics(connection_factory: Callable, tables: Iterable[str] = ()) -> PlannerStatistics:
+    """Process-wide cached statistics for doctrove_papers plus `tables`."""
+    return _statistics_cache.get(connection_factory, tables)
+
+
+def clear_planner_statistics_cache() -> None:
+    _statistics_cache.clear()
+
+
+# Estimation
+
+def column_estimator(statistics: PlannerStatistics,
+                     resolve: Callable[[ColumnRef], Optional[Tuple[str, str]]]
+                     ) -> Tuple[ColumnEstimator, List[ColumnRef]]:
+    """
+    A pg_stats-backed estimator for sql_filter_parser.estimate_selectivity.
+
+    `resolve` maps a filter column to its (table, column). Predicates on joined tables
+    are scaled by that table's coverage of doctrove_papers. Returns the estimator and a
+    list that collects the columns it could not estimate (which makes a plan uncertain).
+    """
+    misses: List[ColumnRef] = []
+    papers = statistics.tables.get(PAPERS_TABLE)
+
+    def estimate(column: ColumnRef, op: str, value: Any) -> Optional[float]:
+        resolved = resolve(column)
+        table_stats = statistics.tables.get(resolved[0]) if resolved else None
+        column_stats = table_stats.columns.get(resolved[1]) if table_stats else None
+        result = column_stats.selectivity(op, value, table_stats.rows) if column_stats else None
+        if result is None:
+            misses.append(column)
+            return None
+        if resolved[0] != PAPERS_TABLE and papers and papers.rows > 0:
+            # LEFT JOINed one row per paper at most: unmatched papers read as NULL
+            coverage = min(1.0, table_stats.rows / papers.rows)
+            result = result * coverage + ((1.0 - coverage) if op == 'IS NULL' else 0.0)
+        return result
+
+    return estimate, misses
+
+
+def bbox_fraction(bbox: Tuple[float, float, float, float],
+                  extent: Optional[Tuple[float, float, float, float]]) -> Optional[float]:
+    """Share of the 2D extent a bbox covers (points assumed uniform); None without an extent."""
+    if extent is None:
+        return None
+    x_min, y_min, x_max, y_max = bbox
+    e_x_min, e_y_min, e_x_max, e_y_max = extent
+    width = max(0.0, min(x_max, e_x_max) - max(x_min, e_x_min))
+    height = max(0.0, min(y_max, e_y_max) - max(y_min, e_y_min))
+    return (width * height) / ((e_x_max - e_x_min) * (e_y_max - e_y_min))
+
+
+# Planning
+
+def _index_settings(candidates: int, ann_index: Optional[str], rows_per_list: Optional[float],
+                    ivfflat_lists: Optional[int], probes_override: Optional[int],
+                    min_setting: Optional[int] = None) -> Tuple[Optional[int], Optional[int]]:
+    """(ivfflat.probes, hnsw.ef_search) able to return `candidates` rows, at least `min_setting`."""
+    probes = ef_search = None
+    if ann_index in ('ivfflat', None):
+        floor = max(DEFAULT_IVFFLAT_PROBES, min_setting or 0)
+        probes = floor
+        if ivfflat_lists and rows_per_list:
+            needed = math.ceil(candidates / rows_per_list * IVFFLAT_PROBE_HEADROOM)
+            probes = min(ivfflat_lists, max(floor, needed))
+        if probes_override is not None:
+            probes = probes_override
+    if ann_index == 'hnsw':
+        ef_search = min(MAX_HNSW_EF_SEARCH, max(MIN_HNSW_EF_SEARCH, min_setting or 0, candidates))
+    return probes, ef_search
+
+
+def choose_semantic_plan(search_limit: int, selectivity: float, confident: bool, has_filters: bool,
+                         statistics: PlannerStatistics, probes_override: Optional[int] = None) -> SemanticPlan:
+    """
+    Pick the strategy for one semantic query.
+
+    Args:
+        search_limit: Rows the query must return (before threshold filtering)
+        selectivity: Estimated fraction of embedded rows passing sql_filter and bbox
+        confident: False when part of the estimate is a default guess
+        has_filters: Whether the request has a sql_filter or bbox at all
+        statistics: Row counts and ANN index description
+        probes_override: Explicit `?probes=` from the request (wins over the planner)
+    """
+    embedded_rows = statistics.embedded_rows
+    estimated_rows = embedded_rows * selectivity
+    rows_per_list = embedded_rows / statistics.ivfflat_lists if statistics.ivfflat_lists else None
+
+    def plan(strategy: str, candidates: int, reason: str) -> SemanticPlan:
+        probes = ef_search = None
+        if strategy != PLAN_FILTER_FIRST:
+            probes, ef_search = _index_settings(candidates, statistics.ann_index, rows_per_list,
+                                                statistics.ivfflat_lists, probes_override,
+                                                statistics.ann_min_setting)
+        return SemanticPlan(
+            strategy=strategy, candidates=candidates, probes=probes, ef_search=ef_search,
+            selectivity=selectivity, estimated_rows=estimated_rows, confident=confident,
+            reason=reason, ann_index=statistics.ann_index, rows_per_list=rows_per_list,
+            ivfflat_lists=statistics.ivfflat_lists, ann_min_setting=statistics.ann_min_setting
+        )
+
+    if not has_filters:
+        return plan(PLAN_DIRECT, search_limit, "no filters")
+    if estimated_rows <= FILTER_FIRST_MAX_ROWS and (confident or embedded_rows <= FILTER_FIRST_MAX_ROWS):
+        return plan(PLAN_FILTER_FIRST, search_limit,
+                    f"at most {FILTER_FIRST_MAX_ROWS:,} rows to scan exactly")
+    if selectivity >= DIRECT_MIN_SELECTIVITY:
+        return plan(PLAN_DIRECT, min(MAX_ANN_CANDIDATES, math.ceil(search_limit / max(selectivity, 1e-9))),
+                    "filters keep most rows")
+
+    candidates = math.ceil(search_limit / max(selectivity, 1e-9) * ANN_OVERSAMPLE)
+    candidates = min(MAX_ANN_CANDIDATES, max(search_limit, candidates))
+    if confident:
+        return plan(PLAN_ANN_FIRST, candidates, "oversampled ANN candidates")
+    return plan(PLAN_ITERATIVE, candidates, "uncertain estimate, growing k on demand")
+
+
+def grow_semantic_plan(plan: SemanticPlan, probes_override: Optional[int] = None) -> Optional[SemanticPlan]:
+    """The next round of an iterative plan (k * ITERATIVE_GROWTH), or None when exhausted."""
+    if plan.strategy != PLAN_ITERATIVE or plan.round >= ITERATIVE_MAX_ROUNDS \
+            or plan.candidates >= MAX_ANN_CANDIDATES:
+        return None
+    candidates = min(MAX_ANN_CANDIDATES, plan.candidates * ITERATIVE_GROWTH)
+    probes, ef_search = _index_settings(candidates, plan.ann_index, plan.rows_per_list,
+                                        plan.ivfflat_lists, probes_override, plan.ann_min_setting)
+    return replace(plan, candidates=candidates, probes=probes, ef_search=ef_search, round=plan.round + 1)
+
+
+def apply_index_settings(cur, plan: SemanticPlan) -> None:
+    """SET LOCAL the plan's ANN parameters for the current transaction."""
+    if plan.probes is not None:
+        cur.execute("SELECT set_config('ivfflat.probes', %s, true)", (str(plan.probes),))
+    if plan.ef_search is not None:
+        cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(plan.ef_search),))
@@ -0,0 +1,752 @@
+"""
+WHERE-clause parser for the `sql_filter` accepted by /api/papers, /api/max-extent and friends.
+
+Filters are boolean expressions over paper/enrichment columns, e.g.
+
+    (doctrove_source IN ('openalex')) AND (doctrove_primary_date >= '2000-01-01'
+        AND doctrove_primary_date <= '2025-12-31') AND enrichment_country.country_uschina = 'China'
+
+parse_sql_filter() turns one into a small AST (memoised per filter string) from which
+business_logic derives:
+
+- the columns referenced (and therefore the JOINs needed), without matching words inside
+  string literals;
+- a selectivity estimate (structural, or from pg_stats via semantic_planner) used to pick
+  the semantic-search plan;
+- parameterized SQL: literals become bind parameters, so filters that differ only in
+  values (years, sources, search terms) share one query template and prepared plan.
+
+Statements, comments and `;` are rejected (SqlFilterError with forbidden=True). Syntax the
+parser does not model raises SqlFilterError with forbidden=False; callers fall back to the
+legacy text handling for those filters.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Words that may never appear in a filter (whole-word, case-insensitive)
+FORBIDDEN_KEYWORDS = frozenset({
+    'DROP', 'DELETE', 'UPDATE', 'INSERT', 'CREATE', 'ALTER', 'EXEC', 'EXECUTE',
+    'TRUNCATE', 'MERGE', 'REPLACE', 'GRANT', 'REVOKE', 'COMMIT', 'ROLLBACK',
+    'SAVEPOINT', 'TRANSACTION', 'LOCK', 'UNLOCK', 'ANALYZE', 'VACUUM',
+    'REINDEX', 'CLUSTER', 'COPY', 'BULK', 'LOAD', 'IMPORT', 'EXPORT',
+    'UNION', 'SELECT', 'FROM', 'WHERE', 'JOIN', 'HAVING', 'GROUP', 'ORDER',
+    'INTO', 'LIMIT', 'OFFSET', 'RETURNING', 'WITH', 'DO'
+})
+
+# The only functions a filter may call (lower-case): pure scalar functions over values.
+# Anything else (query_to_xml, current_setting, set_config, pg_*, lo_*, dblink, ...) can
+# run SQL or reach server state, so every other call is rejected.
+ALLOWED_FUNCTIONS = frozenset({
+    'lower', 'upper', 'initcap', 'length', 'char_length', 'trim', 'btrim', 'ltrim', 'rtrim',
+    'substr', 'left', 'right', 'split_part', 'strpos', 'starts_with', 'concat', 'concat_ws',
+    'coalesce', 'nullif', 'greatest', 'least',
+    'abs', 'round', 'floor', 'ceil', 'ceiling', 'sign',
+    'date_part', 'date_trunc', 'to_char', 'to_date', 'make_date', 'age',
+    'array_to_string', 'array_length', 'cardinality', 'array_position',
+})
+
+KEYWORDS = frozenset({
+    'AND', 'OR', 'NOT', 'IN', 'LIKE', 'ILIKE', 'BETWEEN', 'IS', 'NULL', 'TRUE', 'FALSE',
+    'ANY', 'ALL', 'ARRAY'
+})
+
+COMPARISON_OPERATORS = frozenset({
+    '=', '<>', '!=', '<', '>', '<=', '>=', '~', '~*', '!~', '!~*', '@>', '<@', '&&'
+})
+ARITHMETIC_OPERATORS = frozenset({'+', '-', '*', '/', '||'})
+
+# PostgreSQL's planner defaults (src/include/utils/selfuncs.h), used when no hint is given
+DEFAULT_EQ_SEL = 0.005
+DEFAULT_INEQ_SEL = 1.0 / 3.0
+DEFAULT_RANGE_INEQ_SEL = 0.005
+DEFAULT_MATCH_SEL = 0.005
+DEFAULT_NULL_SEL = 0.005
+DEFAULT_BOOL_SEL = 0.5
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>!~\*|<=|>=|<>|!=|::|\|\||@>|<@|&&|~\*|!~|[=<>~(),.\[\]+\-*/])
+""", re.VERBOSE)
+
+
+class SqlFilterError(ValueError):
+    """Filter rejected by the parser.
+
+    `forbidden` is True for statements, comments and reserved words (always invalid) and
+    False for syntax the parser simply does not model.
+    """
+
+    def __init__(self, message: str, forbidden: bool = False):
+        super().__init__(message)
+        self.forbidden = forbidden
+
+
+# AST
+
+@dataclass(frozen=True)
+class ColumnRef:
+    name: str
+    qualifier: Optional[str] = None
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.qualifier}.{self.name}" if self.qualifier else self.name
+
+
+@dataclass(frozen=True)
+class Literal:
+    value: Any  # str, int, float, bool or None
+    raw: str
+
+
+@dataclass(frozen=True)
+class FuncCall:
+    name: str
+    args: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class ArrayLiteral:
+    items: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class Cast:
+    operand: Any
+    type_name: str
+
+
+@dataclass(frozen=True)
+class Subscript:
+    operand: Any
+    index: int
+
+
+@dataclass(frozen=True)
+class Negate:
+    operand: Any
+
+
+@dataclass(frozen=True)
+class Arithmetic:
+    op: str
+    left: Any
+    right: Any
+
+
+@dataclass(frozen=True)
+class Comparison:
+    op: str
+    left: Any
+    right: Any
+
+
+@dataclass(frozen=True)
+class InList:
+    operand: Any
+    items: Tuple[Any, ...]
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Like:
+    operand: Any
+    pattern: Any
+    case_insensitive: bool = False
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Between:
+    operand: Any
+    low: Any
+    high: Any
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class IsTest:
+    operand: Any
+    value: str  # 'NULL', 'TRUE' or 'FALSE'
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: Any
+
+
+@dataclass(frozen=True)
+class BoolOp:
+    op: str  # 'AND' or 'OR'
+    operands: Tuple[Any, ...]
+
+
+Node = Union[ColumnRef, Literal, FuncCall, ArrayLiteral, Cast, Subscript, Negate, Arithmetic,
+             Comparison, InList, Like, Between, IsTest, Not, BoolOp]
+
+
+# Tokenizer / parser
+
+@dataclass(frozen=True)
+class _Token:
+    kind: str  # 'string', 'number', 'ident', 'keyword', 'op', 'end'
+    text: str
+
+
+def tokenize(sql_filter: str) -> List[_Token]:
+    """Split a filter into tokens; raises SqlFilterError for anything unexpected."""
+    if ';' in sql_filter:
+        raise SqlFilterError("Statement separator ';' is not allowed", forbidden=True)
+    if '--' in sql_filter or '/*' in sql_filter:
+        raise SqlFilterError("SQL comments are not allowed", forbidden=True)
+
+    tokens = []
+    position = 0
+    while position < len(sql_filter):
+        match = _TOKEN_PATTERN.match(sql_filter, position)
+        if not match:
+            raise SqlFilterError(f"Unsupported character {sql_filter[position]!r} at position {position}")
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'ws':
+            continue
+        if kind == 'ident':
+            upper = text.upper()
+            if upper in FORBIDDEN_KEYWORDS:
+                raise SqlFilterError(f"Dangerous SQL keyword detected: {upper}", forbidden=True)
+            if upper in KEYWORDS:
+                kind, text = 'keyword', upper
+        tokens.append(_Token(kind, text))
+    tokens.append(_Token('end', ''))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser for boolean filter expressions."""
+
+    def __init__(self, tokens: List[_Token]):
+        self.tokens = tokens
+        self.index = 0
+
+    # Token helpers
+
+    def peek(self, offset: int = 0) -> _Token:
+        return self.tokens[min(self.index + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> _Token:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def accept(self, kind: str, text: Optional[str] = None) -> Optional[_Token]:
+        token = self.peek()
+        if token.kind == kind and (text is None or token.text == text):
+            return self.advance()
+        return None
+
+    def expect(self, kind: str, text: Optional[str] = None) -> _Token:
+        token = self.accept(kind, text)
+        if token is None:
+            found = self.peek().text or 'end of filter'
+            raise SqlFilterError(f"Expected {text or kind}, found {found!r}")
+        return token
+
+    # Grammar
+
+    def parse(self) -> Node:
+        node = self.parse_or()
+        if self.peek().kind != 'end':
+            raise SqlFilterError(f"Unexpected {self.peek().text!r}")
+        return node
+
+    def parse_or(self) -> Node:
+        operands = [self.parse_and()]
+        while self.accept('keyword', 'OR'):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else BoolOp('OR', tuple(operands))
+
+    def parse_and(self) -> Node:
+        operands = [self.parse_not()]
+        while self.accept('keyword', 'AND'):
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else BoolOp('AND', tuple(operands))
+
+    def parse_not(self) -> Node:
+        if self.accept('keyword', 'NOT'):
+            return Not(self.parse_not())
+        return self.parse_predicate()
+
+    def parse_predicate(self) -> Node:
+        left = self.parse_additive()
+        token = self.peek()
+
+        if token.kind == 'op' and token.text in COMPARISON_OPERATORS:
+            self.advance()
+            return Comparison(token.text, left, self.parse_additive())
+
+        if token.kind == 'keyword' and token.text == 'IS':
+            self.advance()
+            negated = bool(self.accept('keyword', 'NOT'))
+            value = self.peek()
+            if value.kind != 'keyword' or value.text not in ('NULL', 'TRUE', 'FALSE'):
+                raise SqlFilterError(f"Expected NULL, TRUE or FALSE after IS, found {value.text!r}")
+            self.advance()
+            return IsTest(left, value.text, negated)
+
+        negated = False
+        if token.kind == 'keyword' and token.text == 'NOT' and self.peek(1).kind == 'keyword' \
+                and self.peek(1).text in ('IN', 'LIKE', 'ILIKE', 'BETWEEN'):
+            self.advance()
+            negated = True
+            token = self.peek()
+
+        if token.kind == 'keyword' and token.text == 'IN':
+            self.advance()
+            self.expect('op', '(')
+            items = [self.parse_additive()]
+            while self.accept('op', ','):
+                items.append(self.parse_additive())
+            self.expect('op', ')')
+            return InList(left, tuple(items), negated)
+
+        if token.kind == 'keyword' and token.text in ('LIKE', 'ILIKE'):
+            self.advance()
+            return Like(left, self.parse_additive(), token.text == 'ILIKE', negated)
+
+        if token.kind == 'keyword' and token.text == 'BETWEEN':
+            self.advance()
+            low = self.parse_additive()
+            self.expect('keyword', 'AND')
+            return Between(left, low, self.parse_additive(), negated)
+
+        if negated:
+            raise SqlFilterError("Expected IN, LIKE, ILIKE or BETWEEN after NOT")
+        return left
+
+    def parse_additive(self) -> Node:
+        node = self.parse_unary()
+        while self.peek().kind == 'op' and self.peek().text in ARITHMETIC_OPERATORS:
+            op = self.advance().text
+            node = Arithmetic(op, node, self.parse_unary())
+        return node
+
+    def parse_unary(self) -> Node:
+        if self.accept('op', '-'):
+            return Negate(self.parse_unary())
+        return self.parse_postfix()
+
+    def parse_postfix(self) -> Node:
+        node = self.parse_primary()
+        while True:
+            if self.accept('op', '::'):
+                type_name = self.expect('ident').text
+                if self.accept('op', '['):
+                    self.expect('op', ']')
+                    type_name += '[]'
+                node = Cast(node, type_name)
+            elif self.accept('op', '['):
+                index = self.expect('number').text
+                if not index.isdigit():
+                    raise SqlFilterError(f"Array subscript must be an integer, found {index!r}")
+                self.expect('op', ']')
+                node = Subscript(node, int(index))
+            else:
+                return node
+
+    def parse_primary(self) -> Node:
+        token = self.advance()
+
+        if token.kind == 'string':
+            return Literal(token.text[1:-1].replace("''", "'"), token.text)
+        if token.kind == 'number':
+            number = float(token.text) if any(c in token.text for c in '.eE') else int(token.text)
+            return Literal(number, token.text)
+        if token.kind == 'keyword' and token.text in ('NULL', 'TRUE', 'FALSE'):
+            return Literal({'NULL': None, 'TRUE': True, 'FALSE': False}[token.text], token.text)
+        if token.kind == 'op' and token.text == '(':
+            node = self.parse_or()
+            self.expect('op', ')')
+            return node
+        if token.kind == 'keyword' and token.text == 'ARRAY':
+            self.expect('op', '[')
+            items = []
+            if not self.accept('op', ']'):
+                items.append(self.parse_additive())
+                while self.accept('op', ','):
+                    items.append(self.parse_additive())
+                self.expect('op', ']')
+            return ArrayLiteral(tuple(items))
+        if token.kind == 'keyword' and token.text in ('ANY', 'ALL'):
+            self.expect('op', '(')
+            argument = self.parse_additive()
+            self.expect('op', ')')
+            return FuncCall(token.text, (argument,))
+        if token.kind == 'ident':
+            if self.peek().kind == 'op' and self.peek().text == '(':
+                return self.parse_call(token.text)
+            if self.accept('op', '.'):
+                name = self.expect('ident').text
+                if self.peek().kind == 'op' and self.peek().text == '(':
+                    raise SqlFilterError(f"Function not allowed in filters: {token.text}.{name}", forbidden=True)
+                return ColumnRef(name, token.text)
+            return ColumnRef(token.text)
+
+        raise SqlFilterError(f"Unexpected {token.text or 'end of filter'!r}")
+
+    def parse_call(self, name: str) -> FuncCall:
+        if name.lower() not in ALLOWED_FUNCTIONS:
+            raise SqlFilterError(f"Function not allowed in filters: {name}", forbidden=True)
+        self.expect('op', '(')
+        args = []
+        if not self.accept('op', ')'):
+            args.append(self.parse_additive())
+            while self.accept('op', ','):
+                args.append(self.parse_additive())
+            self.expect('op', ')')
+        return FuncCall(name, tuple(args))
+
+
+# Traversal
+
+def iter_nodes(node: Node) -> Iterator[Node]:
+    """Yield `node` and all of its descendants (depth-first, left to right)."""
+    yield node
+    if isinstance(node, (ColumnRef, Literal)):
+        return
+    if isinstance(node, (FuncCall, ArrayLiteral, BoolOp)):
+        children = node.args if isinstance(node, FuncCall) else (
+            node.items if isinstance(node, ArrayLiteral) else node.operands)
+    elif isinstance(node, (Cast, Subscript, Negate, Not)):
+        children = (node.operand,)
+    elif isinstance(node, (Arithmetic, Comparison)):
+        children = (node.left, node.right)
+    elif isinstance(node, InList):
+        children = (node.operand,) + node.items
+    elif isinstance(node, Like):
+        children = (node.operand, node.pattern)
+    elif isinstance(node, Between):
+        children = (node.operand, node.low, node.high)
+    elif isinstance(node, IsTest):
+        children = (node.operand,)
+    else:
+        children = ()
+    for child in children:
+        yield from iter_nodes(child)
+
+
+def _is_bindable(node: Node) -> bool:
+    """String and numeric literals become parameters; NULL/TRUE/FALSE stay inline."""
+    return isinstance(node, Literal) and isinstance(node.value, (str, int, float)) \
+        and not isinstance(node.value, bool)
+
+
+# Rendering
+
+def render(node: Node, column_sql: Callable[[ColumnRef], str], placeholder: Callable[[int], str],
+           params: Optional[List[Any]] = None) -> str:
+    """
+    Render `node` back to SQL.
+
+    Args:
+        column_sql: Maps each column reference to its SQL (e.g. to apply table aliases)
+        placeholder: Maps the n-th bindable literal to its SQL
+        params: Collects literal values in placeholder order; when None, literals are
+            rendered as written and `placeholder` is unused
+    """
+    def walk(n: Node) -> str:
+        if isinstance(n, ColumnRef):
+            return column_sql(n)
+        if isinstance(n, Literal):
+            if not _is_bindable(n):
+                return n.raw
+            if params is not None:
+                params.append(n.value)
+                return placeholder(len(params) - 1)
+            return n.raw
+        if isinstance(n, FuncCall):
+            return f"{n.name}({', '.join(walk(a) for a in n.args)})"
+        if isinstance(n, ArrayLiteral):
+            return f"ARRAY[{', '.join(walk(i) for i in n.items)}]"
+        if isinstance(n, Cast):
+            return f"{walk(n.operand)}::{n.type_name}"
+        if isinstance(n, Subscript):
+            return f"({walk(n.operand)})[{n.index}]"
+        if isinstance(n, Negate):
+            return f"-{walk(n.operand)}"
+        if isinstance(n, Arithmetic):
+            return f"({walk(n.left)} {n.op} {walk(n.right)})"
+        if isinstance(n, Comparison):
+            return f"{walk(n.left)} {n.op} {walk(n.right)}"
+        if isinstance(n, InList):
+            keyword = 'NOT IN' if n.negated else 'IN'
+            return f"{walk(n.operand)} {keyword} ({', '.join(walk(i) for i in n.items)})"
+        if isinstance(n, Like):
+            keyword = ('NOT ' if n.negated else '') + ('ILIKE' if n.case_insensitive else 'LIKE')
+            return f"{walk(n.operand)} {keyword} {walk(n.pattern)}"
+        if isinstance(n, Between):
+            keyword = 'NOT BETWEEN' if n.negated else 'BETWEEN'
+            return f"{walk(n.operand)} {keyword} {walk(n.low)} AND {walk(n.high)}"
+        if isinstance(n, IsTest):
+            return f"{walk(n.operand)} IS {'NOT ' if n.negated else ''}{n.value}"
+        if isinstance(n, Not):
+            return f"NOT ({walk(n.operand)})"
+        if isinstance(n, BoolOp):
+            return f" {n.op} ".join(f"({walk(o)})" for o in n.operands)
+        raise TypeError(f"Unknown filter node: {n!r}")
+
+    return walk(node)
+
+
+# Selectivity
+
+def _column_of(node: Node) -> Optional[ColumnRef]:
+    """The column a predicate side refers to, looking through casts and subscripts."""
+    while isinstance(node, (Cast, Subscript)):
+        node = node.operand
+    return node if isinstance(node, ColumnRef) else None
+
+
+def _constant_of(node: Node) -> Tuple[bool, Any]:
+    """(True, value) when a predicate side is a constant (looking through casts and unary minus)."""
+    while isinstance(node, Cast):
+        node = node.operand
+    if isinstance(node, Negate) and isinstance(node.operand, Literal) \
+            and isinstance(node.operand.value, (int, float)):
+        return True, -node.operand.value
+    if isinstance(node, Literal) and not isinstance(node.value, bool):
+        return True, node.value
+    return False, None
+
+
+# Operator with its operands swapped (`'2020' < col` is `col > '2020'`)
+_COMMUTED_OPERATORS = {'=': '=', '<>': '<>', '!=': '!=', '<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+# Column statistics hook: (column, operator, constant) -> fraction of rows, or None if unknown.
+# Operators are '=', '<', '<=', '>', '>=', 'IS NULL', 'LIKE' and 'ILIKE'.
+ColumnEstimator = Callable[[ColumnRef, str, Any], Optional[float]]
+
+
+def estimate_selectivity(node: Node, eq_selectivity: Optional[Dict[str, float]] = None,
+                         estimator: Optional[ColumnEstimator] = None) -> float:
+    """
+    Estimate the fraction of rows a filter keeps.
+
+    Uses PostgreSQL's default selectivities (equality 0.5%, open range 1/3, bounded
+    range 0.5%, pattern match 0.5%, IS NULL 0.5%) and treats AND/OR operands as
+    independent. `eq_selectivity` overrides the equality selectivity per column name
+    for low-cardinality columns such as doctrove_source.
+
+    `estimator`, when given, is asked first for every `column <op> constant` predicate
+    (typically backed by pg_stats); the defaults above only apply where it returns None.
+    Bounded ranges are then combined as the planner does: sel(>= a) + sel(<= b) - 1.
+    """
+    eq_selectivity = eq_selectivity or {}
+
+    def clamp(value: float) -> float:
+        return min(1.0, max(0.0, value))
+
+    def column_stat(operand: Node, op: str, value: Any) -> Optional[float]:
+        column = _column_of(operand)
+        if estimator is None or column is None:
+            return None
+        return estimator(column, op, value)
+
+    def eq_sel(operand: Node, value: Any = None, known: bool = False) -> float:
+        if known:
+            estimate = column_stat(operand, '=', value)
+            if estimate is not None:
+                return estimate
+        column = _column_of(operand)
+        if column is not None and column.name in eq_selectivity:
+            return eq_selectivity[column.name]
+        return DEFAULT_EQ_SEL
+
+    def range_bound(n: Node) -> Optional[Tuple[ColumnRef, str, bool, Any]]:
+        """(column, op, is_constant, value) for `column <op> x` range comparisons."""
+        if not isinstance(n, Comparison) or n.op not in ('<', '>', '<=', '>='):
+            return None
+        column = _column_of(n.left)
+        if column is not None:
+            return (column, n.op) + _constant_of(n.right)
+        column = _column_of(n.right)
+        if column is not None:
+            return (column, _COMMUTED_OPERATORS[n.op]) + _constant_of(n.left)
+        return None
+
+    def range_sel(operand: Node, op: str, known: bool, value: Any) -> Optional[float]:
+        return column_stat(operand, op, value) if known else None
+
+    def sel(n: Node) -> float:
+        if isinstance(n, BoolOp):
+            if n.op == 'OR':
+                keep_none = 1.0
+                for operand in n.operands:
+                    keep_none *= 1.0 - sel(operand)
+                return clamp(1.0 - keep_none)
+            # Pair `col >= a AND col <= b` into one bounded range, as the planner does
+            result = 1.0
+            open_ranges: Dict[ColumnRef, List[Tuple[str, Optional[float]]]] = {}
+            for operand in n.operands:
+                bound = range_bound(operand)
+                if bound is None:
+                    result *= sel(operand)
+                    continue
+                column, op, known, value = bound
+                open_ranges.setdefault(column, []).append((op, range_sel(column, op, known, value)))
+            for bounds in open_ranges.values():
+                lower = [s for op, s in bounds if op in ('>', '>=')]
+                upper = [s for op, s in bounds if op in ('<', '<=')]
+                if not lower or not upper:
+                    for _, s in bounds:
+                        result *= DEFAULT_INEQ_SEL if s is None else s
+                    continue
+                if lower[0] is not None and upper[0] is not None:
+                    combined = lower[0] + upper[0] - 1.0
+                    # Slightly negative sums are rounding on an empty range; large ones mean
+                    # the statistics disagree with each other, so fall back to the default
+                    result *= max(combined, 1.0e-10) if combined > -0.01 else DEFAULT_RANGE_INEQ_SEL
+                else:
+                    result *= DEFAULT_RANGE_INEQ_SEL
+                for _, s in lower[1:] + upper[1:]:
+                    result *= DEFAULT_INEQ_SEL if s is None else s
+            return clamp(result)
+        if isinstance(n, Not):
+            return clamp(1.0 - sel(n.operand))
+        if isinstance(n, Comparison):
+            if n.op in ('=', '<>', '!='):
+                operand, other = (n.left, n.right) if _column_of(n.left) else (n.right, n.left)
+                known, constant = _constant_of(other)
+                value = eq_sel(operand, constant, known)
+                return value if n.op == '=' else clamp(1.0 - value)
+            if n.op in ('<', '>', '<=', '>='):
+                bound = range_bound(n)
+                if bound is not None:
+                    column, op, known, value = bound
+                    estimate = range_sel(column, op, known, value)
+                    if estimate is not None:
+                        return clamp(estimate)
+                return DEFAULT_INEQ_SEL
+            if n.op in ('~', '~*', '!~', '!~*'):
+                return DEFAULT_MATCH_SEL if not n.op.startswith('!') else 1.0 - DEFAULT_MATCH_SEL
+            return DEFAULT_EQ_SEL  # array/containment operators
+        if isinstance(n, InList):
+            total = 0.0
+            for item in n.items:
+                known, constant = _constant_of(item)
+                total += eq_sel(n.operand, constant, known)
+            value = clamp(total)
+            return 1.0 - value if n.negated else value
+        if isinstance(n, Like):
+            known, pattern = _constant_of(n.pattern)
+            value = column_stat(n.operand, 'ILIKE' if n.case_insensitive else 'LIKE', pattern) \
+                if known else None
+            value = DEFAULT_MATCH_SEL if value is None else clamp(value)
+            return 1.0 - value if n.negated else value
+        if isinstance(n, Between):
+            known_low, low = _constant_of(n.low)
+            known_high, high = _constant_of(n.high)
+            lower = range_sel(n.operand, '>=', known_low, low)
+            upper = range_sel(n.operand, '<=', known_high, high)
+            if lower is not None and upper is not None:
+                value = clamp(max(lower + upper - 1.0, 1.0e-10))
+            else:
+                value = DEFAULT_RANGE_INEQ_SEL
+            return 1.0 - value if n.negated else value
+        if isinstance(n, IsTest):
+            if n.value == 'NULL':
+                value = column_stat(n.operand, 'IS NULL', None)
+                value = DEFAULT_NULL_SEL if value is None else clamp(value)
+            else:
+                value = DEFAULT_BOOL_SEL
+            return 1.0 - value if n.negated else value
+        return DEFAULT_BOOL_SEL
+
+    return sel(node)
+
+
+# Entry point
+
+@dataclass(frozen=True, eq=False)
+class ParsedFilter:
+    """
+    A parsed sql_filter.
+
+    Equality and hashing use `shape` (the parameterized SQL), so two filters that differ
+    only in literal values compare equal; that is what lets query templates keyed on a
+    ParsedFilter be shared across values.
+    """
+    source: str
+    root: Node
+    shape: str
+    params: Tuple[Any, ...]
+    columns: Tuple[ColumnRef, ...]
+
+    def __eq__(self, other):
+        return isinstance(other, ParsedFilter) and self.shape == other.shape
+
+    def __hash__(self):
+        return hash(self.shape)
+
+    def to_sql(self, column_sql: Optional[Callable[[ColumnRef], str]] = None,
+               placeholder: Callable[[int], str] = lambda index: '%s') -> str:
+        """Parameterized SQL for this filter; bind `params` in order."""
+        return render(self.root, column_sql or (lambda c: c.qualified_name), placeholder, [])
+
+    def selectivity(self, eq_selectivity: Optional[Dict[str, float]] = None,
+                    estimator: Optional[ColumnEstimator] = None) -> float:
+        return estimate_selectivity(self.root, eq_selectivity, estimator)
+
+    def top_level_conjuncts(self) -> Tuple[Node, ...]:
+        """The AND-ed predicates at the top of the filter (the whole filter if it is not an AND)."""
+        if isinstance(self.root, BoolOp) and self.root.op == 'AND':
+            return self.root.operands
+        return (self.root,)
+
+
+@lru_cache(maxsize=512)
+def parse_sql_filter(sql_filter: str) -> ParsedFilter:
+    """
+    Parse (and memoise) a filter.
+
+    Raises:
+        SqlFilterError: Forbidden content (forbidden=True) or unsupported syntax
+    """
+    if not sql_filter or not sql_filter.strip():
+        raise SqlFilterError("SQL filter must be a non-empty string")
+
+    root = _Parser(tokenize(sql_filter)).parse()
+
+    params: List[Any] = []
+    shape = render(root, lambda c: c.qualified_name, lambda index: '%s', params)
+
+    columns = []
+    for node in iter_nodes(root):
+        if isinstance(node, ColumnRef) and node not in columns:
+            columns.append(node)
+
+    return ParsedFilter(source=sql_filter, root=root, shape=shape, params=tuple(params),
+                        columns=tuple(columns))
+
+
+def clear_sql_filter_cache():
+    """Clear the parsed-filter cache."""
+    parse_sql_filter.cache_clear()
+
+
+def get_sql_filter_cache_stats() -> Dict[str, int]:
+    """Hit/miss statistics for the parsed-filter cache."""
+    info = parse_sql_filter.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'current_size': info.currsize,
+        'max_size': info.maxsize
+    }
@@ -59,9 +59,16 @@ fi
 
 # Start the API server
 API_PORT="${NEW_API_PORT:-${DOCTROVE_API_PORT:-5001}}"
+cd "$SCRIPT_DIR"
+if [[ "${ASGI:-0}" == "1" ]]; then
+    echo "Starting ASGI API server on http://localhost:${API_PORT}"
+    echo "Press Ctrl+C to stop the server"
+    echo ""
+    exec uvicorn asgi:app --host 0.0.0.0 --port "${API_PORT}"
+fi
+
 echo "Starting Flask API server on http://localhost:${API_PORT}"
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-cd "$SCRIPT_DIR"
 python api.py 
\ No newline at end of file
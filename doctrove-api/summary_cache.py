@@ -0,0 +1,194 @@
+"""
+Cluster summary cache and background summary jobs.
+
+Every cluster computation used to send all clusters to the LLM in one prompt
+and block for the reply (up to 30s), even when re-clustering the same region.
+
+- SummaryCache maps the sampled title set of a cluster to its summary. Keys are
+  a hash of the normalized, sorted titles; a cluster whose titles overlap a
+  cached set by NEAR_DUPLICATE_JACCARD or more reuses that set's summary.
+- SummaryJobs runs the remaining LLM call in a background thread so geometry
+  can be returned immediately; clients poll (or long-poll) the job for labels.
+"""
+
+import hashlib
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_SIZE = int(os.getenv('DOCTROVE_SUMMARY_CACHE_SIZE', '5000'))
+# Minimum |A & B| / |A | B| of two title sets for one to reuse the other's summary
+NEAR_DUPLICATE_JACCARD = 0.8
+SUMMARY_JOB_WORKERS = 4
+SUMMARY_JOBS_KEPT = 1000
+
+def _normalize_title(title: Any) -> str:
+    return re.sub(r'\s+', ' ', str(title or '')).strip().casefold()
+
+def _title_set(titles: Iterable[Any]) -> frozenset:
+    return frozenset(normalized for normalized in map(_normalize_title, titles) if normalized)
+
+def title_set_key(titles: Iterable[Any]) -> str:
+    """Order- and case-insensitive hash of a cluster's sampled titles."""
+    digest = hashlib.blake2b(digest_size=16)
+    for title in sorted(_title_set(titles)):
+        digest.update(title.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class SummaryCache:
+    """Thread-safe LRU of cluster summaries keyed on title sets."""
+
+    def __init__(self, max_size: int = SUMMARY_CACHE_SIZE, min_jaccard: float = NEAR_DUPLICATE_JACCARD):
+        self.max_size = max_size
+        self.min_jaccard = min_jaccard
+        self._lock = threading.Lock()
+        # key -> (title set, summary)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # normalized title -> keys of the entries containing it (candidates for near-duplicates)
+        self._by_title: Dict[str, Set[str]] = {}
+        self._hits = 0
+        self._near_hits = 0
+        self._misses = 0
+
+    def get(self, titles: Iterable[Any]) -> Optional[str]:
+        title_set = _title_set(titles)
+        if not title_set:
+            return None
+        key = title_set_key(title_set)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                key = self._nearest(title_set)
+                entry = self._entries.get(key) if key else None
+                if entry is not None:
+                    self._near_hits += 1
+            else:
+                self._hits += 1
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, titles: Iterable[Any], summary: str) -> None:
+        title_set = _title_set(titles)
+        if not title_set:
+            return
+        key = title_set_key(title_set)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                for title in title_set:
+                    self._by_title.setdefault(title, set()).add(key)
+            self._entries[key] = (title_set, summary)
+            while len(self._entries) > self.max_size:
+                self._evict()
+
+    def _nearest(self, title_set: frozenset) -> Optional[str]:
+        """Key of the cached set most similar to title_set, if at least min_jaccard (lock held)."""
+        shared: Dict[str, int] = {}
+        for title in title_set:
+            for key in self._by_title.get(title, ()):
+                shared[key] = shared.get(key, 0) + 1
+        best_key, best = None, self.min_jaccard
+        for key, count in shared.items():
+            similarity = count / (len(title_set) + len(self._entries[key][0]) - count)
+            if similarity >= best:
+                best_key, best = key, similarity
+        return best_key
+
+    def _evict(self) -> None:
+        key, (title_set, _) = self._entries.popitem(last=False)
+        for title in title_set:
+            keys = self._by_title.get(title)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_title[title]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'near_hits': self._near_hits,
+                'misses': self._misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_title.clear()
+
+class SummaryJobs:
+    """Background summary jobs: submit a callable, poll its result by job id."""
+
+    def __init__(self, workers: int = SUMMARY_JOB_WORKERS, kept: int = SUMMARY_JOBS_KEPT):
+        self.kept = kept
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='doctrove-summaries')
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def submit(self, work: Callable[[], Any]) -> str:
+        """Run work() in the background; its return value becomes the job result."""
+        job_id = f"{int(time.time() * 1000):x}-{next(self._ids)}"
+        job = {'status': 'pending', 'result': None, 'error': None, 'done': threading.Event()}
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.kept:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, work)
+        return job_id
+
+    def _run(self, job: Dict[str, Any], work: Callable[[], Any]) -> None:
+        try:
+            job['result'] = work()
+            job['status'] = 'done'
+        except Exception as e:
+            logger.error(f"Summary job failed: {e}")
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['done'].set()
+
+    def get(self, job_id: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Status and result of a job, waiting up to `wait` seconds for it to finish; None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if wait > 0:
+            job['done'].wait(wait)
+        return {'job_id': job_id, 'status': job['status'], 'result': job['result'], 'error': job['error']}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job['status'] for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('pending', 'done', 'failed')}
+
+_summary_cache = SummaryCache()
+_summary_jobs: Optional[SummaryJobs] = None
+_jobs_lock = threading.Lock()
+
+def get_summary_cache() -> SummaryCache:
+    return _summary_cache
+
+def get_summary_jobs() -> SummaryJobs:
+    """Process-wide job runner (its worker threads start on first use)."""
+    global _summary_jobs
+    if _summary_jobs is None:
+        with _jobs_lock:
+            if _summary_jobs is None:
+                _summary_jobs = SummaryJobs()
+    return _summary_jobs
@@ -0,0 +1,100 @@
+"""
+Fast unit tests for the ASGI entry point (no database or server required).
+"""
+
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+
+from psycopg2 import extensions
+
+from asgi import AsyncConnectionPool, DocTroveASGI, PoolTimeout
+from api import CONNECTION_LEASE_ENVIRON_KEY
+
+
+class FakeConnection:
+    closed = 0
+    info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+
+def http_scope(method, path, query_string=b''):
+    return {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+        'headers': [(b'content-type', b'application/json')], 'http_version': '1.1',
+        'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+    }
+
+
+async def call(app, scope, body=b''):
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status'], sent[1]['body']
+
+
+class TestAsyncConnectionPool(unittest.TestCase):
+
+    def test_waiters_queue_and_time_out(self):
+        async def scenario():
+            pool = AsyncConnectionPool(FakeConnection, maxconn=1, timeout=0.05)
+            first = await pool.acquire()
+            with self.assertRaises(PoolTimeout):
+                await pool.acquire()
+
+            waiter = asyncio.ensure_future(pool.acquire())
+            await asyncio.sleep(0.01)
+            self.assertEqual(pool.stats()['waiting'], 1)
+            pool.release(first)
+            self.assertIs(await waiter, first)
+
+            # Closed connections are dropped and replaced on the next acquire
+            first.closed = 1
+            pool.release(first)
+            replacement = await pool.acquire()
+            self.assertIsNot(replacement, first)
+            stats = pool.stats()
+            self.assertEqual((stats['in_use'], stats['idle'], stats['waiting']), (1, 0, 0))
+            self.assertEqual((stats['acquired'], stats['waited'], stats['timeouts'], stats['broken']), (3, 1, 1, 1))
+
+        asyncio.run(scenario())
+
+
+class TestWsgiBridge(unittest.TestCase):
+
+    def test_flask_views_served_with_request_lease(self):
+        seen = {}
+
+        def wsgi_app(environ, start_response):
+            seen['lease'] = environ[CONNECTION_LEASE_ENVIRON_KEY]
+            seen['connection'] = seen['lease'].connection
+            body = environ['wsgi.input'].read(int(environ['CONTENT_LENGTH']))
+            payload = {'query': environ['QUERY_STRING'], 'body': body.decode(), 'type': environ['CONTENT_TYPE']}
+            start_response('201 Created', [('Content-Type', 'application/json')])
+            return [json.dumps(payload).encode()]
+
+        async def scenario():
+            app = DocTroveASGI(wsgi_app)
+            app.pool = AsyncConnectionPool(FakeConnection, maxconn=1, timeout=1)
+            status, body = await call(app, http_scope('POST', '/api/papers/details', b'a=1'), b'{"ids": []}')
+            self.assertEqual(status, 201)
+            self.assertEqual(json.loads(body), {'query': 'a=1', 'body': '{"ids": []}', 'type': 'application/json'})
+            # Database routes get their connection before dispatch; it is returned afterwards
+            self.assertIsInstance(seen['connection'], FakeConnection)
+            self.assertEqual(app.pool.stats()['in_use'], 0)
+
+            await call(app, http_scope('GET', '/api/health'))
+            self.assertIsNone(seen['connection'])
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -254,7 +254,7 @@ class TestQueryBuildingFunctions(unittest.TestCase):
         self.assertIn('SELECT', query)
         self.assertIn('doctrove_paper_id', query)
         self.assertIn('doctrove_title', query)
-        self.assertEqual(params, [])
+        self.assertEqual(params, [100])  # LIMIT is a bound parameter
     
     def test_build_optimized_query_v2_sql_filter(self):
         """Test query building with SQL filter."""
@@ -263,7 +263,9 @@ class TestQueryBuildingFunctions(unittest.TestCase):
         query, params, warnings = build_optimized_query_v2(fields, sql_filter=sql_filter)
         
         self.assertIn('WHERE', query)
-        self.assertIn("doctrove_source='nature'", query)
+        # Filter literals are bound parameters
+        self.assertIn("doctrove_source = %s", query)
+        self.assertEqual(params, ['nature', 100])
     
     def test_build_optimized_query_v2_bbox(self):
         """Test query building with bbox."""
@@ -12,8 +12,14 @@ from unittest.mock import patch, MagicMock
 from business_logic import (
     validate_bbox, validate_sql_filter_v2, validate_limit, validate_offset,
     validate_fields, validate_field, validate_sort_field,
-    calculate_cosine_similarity, get_embedding_for_text, build_optimized_query_v2
+    calculate_cosine_similarity, get_embedding_for_text, build_optimized_query_v2,
+    resolve_embedding_2d_column, clear_projection_state_cache, parse_source_filter,
+    clear_query_template_cache, get_query_template_cache_stats,
+    decode_vector_binary, exact_rerank, build_papers_by_id_query, RERANK_OVERSAMPLE,
+    get_max_extent
 )
+from dataclasses import replace
+from semantic_planner import choose_semantic_plan, PlannerStatistics, PLAN_FILTER_FIRST
 
 class TestValidationFunctionsFast(unittest.TestCase):
     """Fast tests for validation functions."""
@@ -45,6 +51,21 @@ class TestValidationFunctionsFast(unittest.TestCase):
         valid, warnings = validate_sql_filter_v2("UNION SELECT * FROM users")
         self.assertFalse(valid)
         
+        # Functions outside the allow-list, even with the SQL hidden in a string literal
+        for function_call in ["query_to_xml('select usename, passwd from pg_shadow', true, true, '')::text",
+                              "current_setting('data_directory')", "set_config('work_mem', '1GB', false)",
+                              "pg_read_file('/etc/passwd')", "lo_import('/etc/passwd')::text"]:
+            valid, warnings = validate_sql_filter_v2(f"doctrove_title = {function_call}")
+            self.assertFalse(valid, function_call)
+        
+        valid, warnings = validate_sql_filter_v2("lower(doctrove_title) LIKE '%select%'")
+        self.assertTrue(valid)
+        # Syntax the parser does not model gets the same allow-list
+        valid, warnings = validate_sql_filter_v2('"doctrove_title" = current_setting(\'data_directory\')')
+        self.assertFalse(valid)
+        valid, warnings = validate_sql_filter_v2('"doctrove_title" IS NOT NULL AND doctrove_source IN (\'arxiv\')')
+        self.assertTrue(valid)
+        
         # Test invalid column
         valid, warnings = validate_sql_filter_v2("invalid_column = 'value'")
         self.assertFalse(valid)
@@ -120,7 +141,7 @@ class TestQueryBuildingFunctionsFast(unittest.TestCase):
         self.assertIn('SELECT', query)
         self.assertIn('doctrove_paper_id', query)
         self.assertIn('doctrove_title', query)
-        self.assertEqual(params, [])
+        self.assertEqual(params, [100])  # LIMIT is a bound parameter
     
     def test_build_optimized_query_v2_bbox_fast(self):
         """Test query building with bbox."""
@@ -131,9 +152,104 @@ class TestQueryBuildingFunctionsFast(unittest.TestCase):
         self.assertIn('WHERE', query)
         # API generates correct PostgreSQL spatial syntax: <@ box(point(x, y), point(x, y))
         self.assertIn('doctrove_embedding_2d', query)
-        self.assertIn('<@ box(point(', query)
-        # Note: Bbox coordinates are embedded directly in SQL for performance (no parameters)
-        # This is intentional to avoid psycopg2 issues and enable GiST spatial index usage
+        self.assertIn('<@ box(point(%s, %s), point(%s, %s))', query)
+        # Bbox corners are bound so the template (and its prepared plan) is shared across viewports
+        self.assertEqual(params, [0.0, 0.0, 1.0, 1.0, 100])
+    
+    def test_build_optimized_query_v2_template_cache_fast(self):
+        """Test that requests differing only in bbox/limit reuse one compiled template."""
+        clear_query_template_cache()
+        fields = ['doctrove_paper_id', 'doctrove_title']
+        query1, params1, _ = build_optimized_query_v2(fields, bbox=(0.0, 0.0, 1.0, 1.0), limit=50)
+        query2, params2, _ = build_optimized_query_v2(fields, bbox=(5.0, 6.0, -1.0, 2.0), limit=500, offset=10)
+        query3, params3, _ = build_optimized_query_v2(fields, bbox=(2.0, 2.0, 3.0, 3.0), limit=10)
+        
+        self.assertEqual(query1, query3)
+        self.assertEqual(params3, [2.0, 2.0, 3.0, 3.0, 10])
+        self.assertIn('OFFSET %s', query2)
+        self.assertEqual(params2, [-1.0, 2.0, 5.0, 6.0, 500, 10])
+        stats = get_query_template_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+    
+    def test_build_optimized_query_v2_filter_literals_bound_fast(self):
+        """Test sql_filter literals are bound, so filters differing only in values share a template."""
+        fields = ['doctrove_paper_id']
+        query1, params1, _ = build_optimized_query_v2(
+            fields, sql_filter="doctrove_title LIKE '%graph%' AND doctrove_primary_date >= '2020-01-01'")
+        query2, params2, _ = build_optimized_query_v2(
+            fields, sql_filter="doctrove_title LIKE '%tree%' AND doctrove_primary_date >= '2001-01-01'")
+        self.assertEqual(query1, query2)
+        self.assertEqual(params1, ['%graph%', '2020-01-01', 100])
+        self.assertEqual(params2, ['%tree%', '2001-01-01', 100])
+        
+        # Syntax the parser does not model keeps the inline text path, with % escaped
+        query, params, _ = build_optimized_query_v2(fields, sql_filter="doctrove_title LIKE E'%graph%'")
+        self.assertIn("LIKE E'%%graph%%'", query)
+        self.assertEqual(query.count('%s'), len(params))
+    
+    def test_build_optimized_query_v2_filter_joins_fast(self):
+        """Test JOINs come from filter columns, not from words inside string literals."""
+        query, params, _ = build_optimized_query_v2(
+            ['doctrove_paper_id'], sql_filter="enrichment_country.country_uschina = 'China'")
+        self.assertIn('LEFT JOIN enrichment_country ec', query)
+        self.assertIn('ec.country_uschina = %s', query)
+        
+        query, params, _ = build_optimized_query_v2(
+            ['doctrove_paper_id'], sql_filter="doctrove_title = 'country_uschina'")
+        self.assertNotIn('JOIN', query)
+    
+    @patch('business_logic.get_embedding_for_text', return_value=np.array([0.1, 0.2]))
+    def test_build_optimized_query_v2_semantic_plans_fast(self, mock_embedding):
+        """Test the semantic planner's strategy and ANN candidate count shape the query."""
+        fields = ['doctrove_paper_id']
+        sql_filter = "doctrove_source = 'arxiv'"
+        base_plan = choose_semantic_plan(500, 0.1, True, True, PlannerStatistics(tables={}, embedded_rows=1e6))
+        
+        query, params, _ = build_optimized_query_v2(
+            fields, sql_filter=sql_filter, search_text='graphs', limit=100, semantic_plan=base_plan)
+        self.assertIn('WITH semantic_candidates AS', query)
+        self.assertIn(base_plan.candidates, params)
+        
+        filter_first = replace(base_plan, strategy=PLAN_FILTER_FIRST)
+        query, params, warnings = build_optimized_query_v2(
+            fields, sql_filter=sql_filter, search_text='graphs', limit=100, semantic_plan=filter_first)
+        self.assertIn('WITH filtered_candidates AS MATERIALIZED', query)
+        self.assertIn('ORDER BY fc.distance', query)
+        self.assertEqual(params, ['[0.1,0.2]', 'arxiv', '[0.1,0.2]', 500])
+        self.assertTrue(any(w.startswith('SEMANTIC_FILTER_FIRST') for w in warnings))
+    
+    def test_exact_rerank_fast(self):
+        """Test binary vector decoding and the vectorized rerank/threshold/paging."""
+        import struct
+        vectors = [[1.0, 0.0], [0.6, 0.8], [0.0, 1.0], [-1.0, 0.0], [0.0, 0.0]]
+        buffers = [struct.pack('>hh2f', 2, 0, *v) for v in vectors]
+        decoded = decode_vector_binary(buffers)
+        self.assertEqual(decoded.shape, (5, 2))
+        np.testing.assert_allclose(decoded, vectors)
+        
+        ids = ['a', 'b', 'c', 'd', 'e']
+        query = np.array([0.0, 2.0])
+        top_ids, scores, passed = exact_rerank(ids, decoded, query, similarity_threshold=0.0, limit=2)
+        self.assertEqual(top_ids, ['c', 'b'])
+        np.testing.assert_allclose(scores, [1.0, 0.8], rtol=1e-6)
+        self.assertEqual(passed, 4)  # threshold is inclusive (a and d score 0.0); the zero vector e never passes
+        
+        top_ids, _, passed = exact_rerank(ids, decoded, query, similarity_threshold=0.5, limit=2, offset=1)
+        self.assertEqual((top_ids, passed), (['b'], 2))
+        self.assertEqual(exact_rerank([], decode_vector_binary([]), query)[0], [])
+    
+    @patch('business_logic.get_embedding_for_text', return_value=np.array([0.1, 0.2]))
+    def test_build_optimized_query_v2_rerank_fast(self, mock_embedding):
+        """Test rerank mode selects ids and binary vectors, oversampled, with paging left to NumPy."""
+        query, params, _ = build_optimized_query_v2(
+            ['doctrove_paper_id', 'doctrove_title'], search_text='graphs', limit=100, offset=50, rerank=True)
+        self.assertIn('SELECT dp.doctrove_paper_id, vector_send(dp.doctrove_embedding) AS embedding_binary', query)
+        self.assertNotIn('OFFSET', query)
+        self.assertEqual(params[-1], 500 * RERANK_OVERSAMPLE)
+        
+        query, params = build_papers_by_id_query(['doctrove_title'], ['a', 'b'])
+        self.assertIn('ANY(%s::text[]::uuid[])', query)
+        self.assertEqual(params, [['a', 'b'], 2])
     
     def test_build_optimized_query_v2_country_fast(self):
         """Test query building with country fields."""
@@ -142,6 +258,52 @@ class TestQueryBuildingFunctionsFast(unittest.TestCase):
         
         self.assertIn('LEFT JOIN aipickle_metadata', query)
         self.assertIn('am.country2', query)
+    
+    def test_build_optimized_query_v2_shadow_projection_fast(self):
+        """Test query building against the blue/green shadow projection slot."""
+        fields = ['doctrove_paper_id', 'doctrove_embedding_2d']
+        bbox = (0.0, 0.0, 1.0, 1.0)
+        query, params, warnings = build_optimized_query_v2(
+            fields, bbox=bbox, embedding_2d_column='doctrove_embedding_2d_shadow')
+        
+        # Response keeps the public field name while reading the shadow column
+        self.assertIn('dp.doctrove_embedding_2d_shadow AS doctrove_embedding_2d', query)
+        self.assertIn('doctrove_embedding_2d_shadow <@ box(point(', query)
+        self.assertNotIn('mv_papers_sorted_by_year', query)
+        
+        with self.assertRaises(ValueError):
+            build_optimized_query_v2(fields, embedding_2d_column='doctrove_title')
+    
+    def test_resolve_embedding_2d_column_fallback_fast(self):
+        """Test projection resolution falls back to the primary column without a database."""
+        clear_projection_state_cache()
+        self.assertEqual(resolve_embedding_2d_column('active'), 'doctrove_embedding_2d')
+        self.assertEqual(resolve_embedding_2d_column('candidate'), 'doctrove_embedding_2d_shadow')
+    
+    def test_parse_source_filter_fast(self):
+        """Test which max-extent filters can be answered from corpus_stats."""
+        self.assertIsNone(parse_source_filter(None))
+        self.assertEqual(parse_source_filter("doctrove_source = 'arxiv'"), ['arxiv'])
+        self.assertEqual(parse_source_filter("dp.doctrove_source IN ('arxiv', 'randpub')"), ['arxiv', 'randpub'])
+        self.assertIsNone(parse_source_filter("doctrove_source = 'arxiv' AND doctrove_primary_date > '2020-01-01'"))
+    
+    def test_get_max_extent_filter_validation_fast(self):
+        """Test max-extent filters are validated and legacy text stays parenthesised."""
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (0.0, 1.0, 0.0, 1.0)
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value.__enter__.return_value = cursor
+        
+        # Syntax the parser does not model still gets the function allow-list
+        injection = "doctrove_title = E'x' OR query_to_xml('select 1', true, true, '') IS NOT NULL"
+        self.assertIsNone(get_max_extent(lambda: conn, injection))
+        cursor.execute.assert_not_called()
+        
+        legacy = '"doctrove_title" IS NOT NULL OR doctrove_source IN (\'arxiv\')'
+        extent = get_max_extent(lambda: conn, legacy)
+        self.assertEqual(extent['x_max'], 1.0)
+        self.assertIn(f"AND ({legacy})", cursor.execute.call_args[0][0])
 
 class TestIntegrationFast(unittest.TestCase):
     """Fast integration tests."""
@@ -0,0 +1,101 @@
+"""
+Fast unit tests for the catalog cache (no database required).
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import catalog as catalog_module
+from catalog import Catalog
+
+
+def make_connect(source_rows, column_rows):
+    """Return a connect() stub whose cursor answers the two catalog queries."""
+    calls = {'count': 0}
+
+    def connect():
+        calls['count'] += 1
+        cur = MagicMock()
+        cur.fetchall.side_effect = [source_rows, column_rows]
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cur
+        return conn
+
+    return connect, calls
+
+
+SOURCE_ROWS = [('arxiv', 10, 8), ('randpub', 5, 5), ('openalex', 20, 0)]
+COLUMN_ROWS = [
+    ('arxiv_metadata', 'doctrove_paper_id', 'uuid', 'NO'),
+    ('arxiv_metadata', 'arxiv_categories', 'text', 'YES'),
+    ('randpub_metadata', 'doi', 'text', 'YES'),
+    ('enrichment_country', 'country_name', 'text', 'YES'),
+]
+
+
+class TestCatalog(unittest.TestCase):
+
+    def test_lookups_served_from_one_refresh(self):
+        connect, calls = make_connect(SOURCE_ROWS, COLUMN_ROWS)
+        catalog = Catalog(connect, refresh_seconds=3600)
+
+        self.assertEqual(catalog.sources(), ['arxiv', 'randpub'])
+        self.assertEqual(list(catalog.enrichment_fields('arxiv')), ['arxiv_metadata'])
+        self.assertEqual(
+            [c['column_name'] for c in catalog.enrichment_fields('arxiv')['arxiv_metadata']],
+            ['arxiv_categories']
+        )
+        self.assertTrue(catalog.has_column('randpub_metadata', 'doi'))
+        self.assertFalse(catalog.has_column('randpub_metadata', 'missing'))
+
+        stats = catalog.stats()
+        self.assertEqual(stats['total_papers'], 35)
+        self.assertEqual(stats['papers_with_embeddings'], 13)
+        self.assertEqual(stats['source_distribution'][0], {'doctrove_source': 'openalex', 'count': 20})
+
+        self.assertEqual(calls['count'], 1)
+
+    def test_unique_count_memoised_until_invalidated(self):
+        connect, _ = make_connect(SOURCE_ROWS, COLUMN_ROWS)
+        catalog = Catalog(connect, refresh_seconds=3600)
+        compute = MagicMock(return_value={'unique_count': 3})
+
+        catalog.unique_count('randpub_metadata', 'doi', compute)
+        catalog.unique_count('randpub_metadata', 'doi', compute)
+        self.assertEqual(compute.call_count, 1)
+
+        catalog._connect, _ = make_connect(SOURCE_ROWS, COLUMN_ROWS)
+        catalog.invalidate()
+        catalog.unique_count('randpub_metadata', 'doi', compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_concurrent_stale_callers_share_one_refresh(self):
+        connect, calls = make_connect(SOURCE_ROWS, COLUMN_ROWS)
+
+        def slow_connect():
+            time.sleep(0.05)
+            return connect()
+
+        catalog = Catalog(slow_connect, refresh_seconds=3600)
+        threads = [threading.Thread(target=catalog.sources) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls['count'], 1)
+
+        # An explicit refresh (listener, NOTIFY) always recomputes
+        catalog.refresh()
+        self.assertEqual(calls['count'], 2)
+
+    def test_get_catalog_starts_listener_on_first_use(self):
+        catalog = Catalog(MagicMock())
+        with patch.object(catalog_module, '_catalog', catalog), patch.object(Catalog, 'start') as start:
+            self.assertIs(catalog_module.get_catalog(), catalog)
+            start.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
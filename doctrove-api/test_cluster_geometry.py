@@ -0,0 +1,125 @@
+"""
+Fast unit tests for cluster_geometry (no database or LLM required).
+"""
+
+import unittest
+
+import numpy as np
+import shapely
+
+from cluster_geometry import (convex_hull, coordinate_decimals, encode_flat, encode_xy, simplify_cells, simplify_tolerance,
+                              voronoi_cells)
+
+
+def decode_flat(geometry):
+    """Cells of an encode_flat payload as shapely geometries (None for empty cells)."""
+    points = np.array(geometry['coords']).reshape(-1, 2)
+    rings, polygons = geometry['ring_offsets'], geometry['polygon_offsets']
+    cells = []
+    offsets = geometry['cell_offsets']
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        parts = []
+        for p in range(start, end):
+            shell, *holes = [points[rings[r]:rings[r + 1]] for r in range(polygons[p], polygons[p + 1])]
+            parts.append(shapely.Polygon(shell, holes))
+        cells.append(shapely.MultiPolygon(parts) if parts else None)
+    return cells
+
+
+class TestVoronoiCells(unittest.TestCase):
+
+    def test_cells_follow_center_order_and_tile_the_boundary(self):
+        rng = np.random.default_rng(0)
+        centers = rng.uniform(-10, 10, size=(300, 2))
+        boundary = shapely.box(-8, -8, 8, 8)
+
+        cells = voronoi_cells(centers, boundary)
+
+        present = [i for i, cell in enumerate(cells) if cell is not None]
+        for i in present:
+            # The clipped cell of a center inside the boundary contains it; others are nearest to it
+            if boundary.contains(shapely.Point(centers[i])):
+                self.assertTrue(cells[i].buffer(1e-9).contains(shapely.Point(centers[i])))
+            probe = shapely.point_on_surface(cells[i])
+            nearest = np.argmin(np.linalg.norm(centers - shapely.get_coordinates(probe), axis=1))
+            self.assertEqual(nearest, i)
+        self.assertAlmostEqual(sum(cells[i].area for i in present), boundary.area, places=6)
+
+    def test_non_convex_boundary_keeps_multipolygons_and_holes(self):
+        centers = np.array([[-5.0, 0.0], [5.0, 0.0]])
+        # A hole inside the left cell
+        holed = shapely.box(-10, -10, 10, 10).difference(shapely.box(-4, -1, -2, 1))
+        left, right = voronoi_cells(centers, holed)
+        self.assertEqual(len(left.interiors), 1)
+        self.assertAlmostEqual(left.area + right.area, holed.area)
+
+        # Two strips, each split between the centers
+        strips = shapely.union(shapely.box(-10, -10, 10, -6), shapely.box(-10, 6, 10, 10))
+        left, right = voronoi_cells(centers, strips)
+        self.assertEqual((left.geom_type, len(left.geoms)), ('MultiPolygon', 2))
+        self.assertAlmostEqual(left.area + right.area, strips.area)
+
+    def test_convex_hull_matches_shapely(self):
+        rng = np.random.default_rng(1)
+        for coords in (rng.normal(size=(5000, 2)), rng.uniform(-1, 1, size=(5000, 2)), rng.normal(size=(10, 2)),
+                       np.column_stack([np.arange(100.0), np.arange(100.0)])):
+            expected = shapely.convex_hull(shapely.multipoints(coords))
+            self.assertTrue(shapely.equals(convex_hull(coords), expected))
+
+    def test_single_and_duplicate_centers(self):
+        boundary = shapely.box(0, 0, 1, 1)
+        [cell] = voronoi_cells(np.array([[0.5, 0.5]]), boundary)
+        self.assertAlmostEqual(cell.area, 1.0)
+
+        cells = voronoi_cells(np.array([[0.25, 0.5], [0.25, 0.5], [0.75, 0.5]]), boundary)
+        self.assertIsNotNone(cells[0])
+        self.assertIsNone(cells[1])
+        self.assertAlmostEqual(cells[0].area + cells[2].area, 1.0)
+
+
+class TestEncoding(unittest.TestCase):
+
+    def test_flat_round_trip(self):
+        donut = shapely.box(0, 0, 3, 3).difference(shapely.box(1, 1, 2, 2))
+        pair = shapely.MultiPolygon([shapely.box(5, 0, 6, 1), shapely.box(7, 0, 8, 1)])
+        cells = np.array([donut, None, pair, shapely.box(0.123456, 0, 1, 1)], dtype=object)
+
+        geometry = encode_flat(cells, decimals=2)
+
+        self.assertEqual(geometry['cell_offsets'], [0, 1, 1, 3, 4])
+        decoded = decode_flat(geometry)
+        self.assertIsNone(decoded[1])
+        self.assertAlmostEqual(decoded[0].area, 8.0)
+        self.assertAlmostEqual(decoded[2].area, 2.0)
+        self.assertIn(0.12, geometry['coords'])
+
+    def test_flat_polygons_only_and_empty(self):
+        geometry = encode_flat(np.array([None, shapely.box(0, 0, 1, 1)], dtype=object))
+        self.assertEqual(geometry['cell_offsets'], [0, 0, 1])
+        self.assertEqual(geometry['polygon_offsets'], [0, 1])
+        self.assertEqual(encode_flat(np.array([], dtype=object))['cell_offsets'], [0])
+
+    def test_xy_one_closed_ring_per_polygon(self):
+        pair = shapely.MultiPolygon([shapely.box(5, 0, 6, 1), shapely.box(7, 0, 8, 1)])
+        polygons = encode_xy(np.array([shapely.box(0, 0, 1, 1), None, pair], dtype=object))
+        self.assertEqual(len(polygons), 3)
+        for polygon in polygons:
+            self.assertEqual(len(polygon['x']), 5)
+            self.assertEqual((polygon['x'][0], polygon['y'][0]), (polygon['x'][-1], polygon['y'][-1]))
+
+    def test_tolerance_follows_view_size(self):
+        self.assertAlmostEqual(simplify_tolerance((0, 0, 20, 10)), 0.02)
+        self.assertEqual(coordinate_decimals(0.02), 3)
+        self.assertEqual(coordinate_decimals(50.0), 0)
+        self.assertIsNone(coordinate_decimals(0.0))
+
+        # A nearly straight edge is dropped at a wide view and kept when zoomed in
+        wobbly = np.array([shapely.Polygon([(0, 0), (5, 0.001), (10, 0), (10, 10), (0, 10)])], dtype=object)
+        wide = simplify_cells(wobbly, simplify_tolerance((0, 0, 100, 100)))
+        close = simplify_cells(wobbly, simplify_tolerance((0, 0, 0.5, 0.5)))
+        self.assertEqual(len(shapely.get_coordinates(wide[0])), 5)
+        self.assertEqual(len(shapely.get_coordinates(close[0])), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Fast unit tests for cluster_tree (no database or LLM required).
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+import cluster_tree
+
+
+def blobs(centers, per_cluster=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.vstack([rng.normal(center, 0.5, size=(per_cluster, 2)) for center in centers])
+
+
+class TestBuildTree(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.coords = blobs([(-10, -10), (-10, 10), (10, -10), (10, 10)])
+        cls.nodes = cluster_tree.build_tree(cls.coords, branching=4, max_depth=2, min_node_points=20)
+
+    def test_each_level_partitions_points_and_tiles_the_hull(self):
+        nodes, root = self.nodes, self.nodes[0]
+        self.assertEqual([node.node_id for node in nodes], list(range(len(nodes))))
+        for depth in (1, 2):
+            shown = [node for node in nodes if node.depth == depth or (node.is_leaf and 0 < node.depth < depth)]
+            rows = np.concatenate([node.rows for node in shown])
+            self.assertEqual(sorted(rows.tolist()), list(range(len(self.coords))))
+            self.assertAlmostEqual(sum(node.polygon.area for node in shown), root.polygon.area, places=6)
+
+    def test_children_split_their_parent(self):
+        by_id = {node.node_id: node for node in self.nodes}
+        level_one = [node for node in self.nodes if node.depth == 1]
+        # The four blobs are the first split
+        self.assertEqual(sorted(len(node.rows) for node in level_one), [60, 60, 60, 60])
+        for node in self.nodes[1:]:
+            parent = by_id[node.parent_id]
+            self.assertFalse(parent.is_leaf)
+            self.assertTrue(set(node.rows.tolist()) <= set(parent.rows.tolist()))
+            self.assertTrue(set(node.sample.tolist()) <= set(node.rows.tolist()))
+            self.assertTrue(parent.polygon.buffer(1e-9).contains(node.polygon))
+
+    def test_children_without_a_cell_keep_their_points(self):
+        real_cells = cluster_tree.voronoi_cells
+
+        def drop_first_cell(centers, parent):
+            cells = real_cells(centers, parent)
+            return [None] + list(cells[1:])
+
+        with patch.object(cluster_tree, 'voronoi_cells', side_effect=drop_first_cell):
+            nodes = cluster_tree.build_tree(self.coords, branching=4, max_depth=1, min_node_points=20)
+        children = nodes[1:]
+        self.assertEqual(len(children), 3)
+        rows = np.concatenate([node.rows for node in children])
+        self.assertEqual(sorted(rows.tolist()), list(range(len(self.coords))))
+
+    def test_small_nodes_are_leaves(self):
+        nodes = cluster_tree.build_tree(self.coords[:30], branching=4, max_depth=3, min_node_points=50)
+        self.assertEqual(len(nodes), 1)
+        self.assertTrue(nodes[0].is_leaf)
+
+    def test_siblings_are_labelled_together(self):
+        groups = []
+
+        def summarize(titles):
+            groups.append(len(titles))
+            return [f"topic {titles[0][0]}" if titles[0] else "none"] * len(titles)
+
+        cluster_tree.label_tree(self.nodes, lambda samples: [[f"t{row}" for row in rows] for rows in samples],
+                                summarize)
+        self.assertEqual(sorted(groups), [4, 4, 4, 4, 4])
+        self.assertIsNone(self.nodes[0].label)
+        self.assertTrue(all(node.label.startswith('topic t') for node in self.nodes[1:]))
+
+
+class TestTreeQueries(unittest.TestCase):
+
+    def test_depth_for_zoom(self):
+        self.assertEqual(cluster_tree.depth_for_zoom(0, 8, 4), 1)
+        # Zooming in 2^1.5 times shows one level deeper with branching 8
+        self.assertEqual(cluster_tree.depth_for_zoom(1.5, 8, 4), 2)
+        self.assertEqual(cluster_tree.depth_for_zoom(20, 8, 4), 4)
+
+    def test_zoom_for_bbox(self):
+        extent = (-8.0, 8.0, -4.0, 4.0)
+        self.assertEqual(cluster_tree.zoom_for_bbox(None, extent), 0.0)
+        self.assertEqual(cluster_tree.zoom_for_bbox((-20, -20, 20, 20), extent), 0.0)
+        self.assertAlmostEqual(cluster_tree.zoom_for_bbox((0, 0, 4, 2), extent), 2.0)
+
+    def test_nodes_query(self):
+        sql, params = cluster_tree.build_tree_nodes_query(3, 2, (0, 1, 4, 5))
+        self.assertIn("(depth = %s OR (is_leaf AND depth < %s))", sql)
+        self.assertEqual(params, [3, 2, 2, 0, 4, 1, 5])
+        self.assertEqual(cluster_tree.build_tree_build_query()[1], [])
+        self.assertEqual(cluster_tree.build_tree_build_query(7)[1], [7])
+
+
+class TestTreeInterceptor(unittest.TestCase):
+
+    def fetch(self, active_column):
+        from api_interceptors import fetch_cluster_tree_interceptor
+        build = {'build_id': 5, 'embedding_2d_column': 'doctrove_embedding_2d', 'branching': 8, 'max_depth': 4,
+                 'x_min': -1.0, 'x_max': 1.0, 'y_min': -1.0, 'y_max': 1.0}
+        cursor = MagicMock()
+        cursor.fetchone.return_value = build
+        cursor.fetchall.return_value = []
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value.__enter__.return_value = cursor
+        with patch('business_logic.resolve_embedding_2d_column', return_value=active_column):
+            return fetch_cluster_tree_interceptor({'connection_factory': lambda: conn, 'bbox': None})
+
+    def test_serves_build_of_the_active_slot(self):
+        ctx = self.fetch('doctrove_embedding_2d')
+        self.assertNotIn('error', ctx)
+        self.assertEqual(ctx['tree_build']['build_id'], 5)
+
+    def test_build_of_another_slot_requires_a_rebuild(self):
+        ctx = self.fetch('doctrove_embedding_2d_shadow')
+        self.assertIsInstance(ctx['error'], LookupError)
+        self.assertIn('rebuild required', str(ctx['error']))
+        self.assertNotIn('tree_nodes', ctx)
+
+
+if __name__ == '__main__':
+    unittest.main()
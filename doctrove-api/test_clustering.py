@@ -0,0 +1,138 @@
+"""
+Fast unit tests for clustering (no database or LLM required).
+"""
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import shapely
+
+import clustering
+from business_logic import build_cluster_points_query
+from summary_cache import get_summary_cache
+
+
+def blobs(centers, per_cluster=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.vstack([rng.normal(center, 0.1, size=(per_cluster, 2)) for center in centers])
+
+
+class TestClusterPoints(unittest.TestCase):
+
+    def setUp(self):
+        get_summary_cache().clear()
+
+    @patch('clustering.get_azure_llm_summaries', return_value="1. Left\n2. Right")
+    def test_titles_fetched_for_representatives_only(self, _llm):
+        coords = blobs([(-5, 0), (5, 0)])
+        requested = []
+
+        def titles_for(samples):
+            requested.append(samples)
+            return [[f"paper {idx}" for idx in indices] for indices in samples]
+
+        overlay = clustering.cluster_points(coords, 2, (-10, -10, 10, 10), titles_for)
+
+        self.assertEqual(len(requested), 1)
+        [samples] = requested
+        self.assertEqual([len(indices) for indices in samples], [10, 10])
+        # Each cluster's representatives come from one blob
+        for indices in samples:
+            self.assertEqual(len(set(coords[indices, 0] > 0)), 1)
+        self.assertEqual(len(overlay['polygons']), 2)
+        self.assertEqual(sorted(a['text'] for a in overlay['annotations']), ['Left', 'Right'])
+
+    @patch('clustering.get_azure_llm_summaries', side_effect=RuntimeError("LLM down"))
+    def test_compute_clusters_from_posted_papers(self, _llm):
+        coords = blobs([(-5, 0), (5, 0), (0, 5)], per_cluster=20)
+        papers = [{'doctrove_title': f"t{i}", 'doctrove_embedding_2d': [x, y]} for i, (x, y) in enumerate(coords)]
+        papers.append({'doctrove_title': 'no coordinates'})
+
+        overlay = clustering.compute_clusters(papers, 3)
+
+        self.assertEqual(len(overlay['polygons']), 3)
+        self.assertEqual({a['text'] for a in overlay['annotations']}, {'Summary unavailable.'})
+
+    @patch('clustering.summarize_clusters', side_effect=lambda titles, summaries=None: [t[0] for t in titles])
+    def test_labels_sit_in_their_cells(self, _llm):
+        names = ['West', 'East', 'North', 'South', 'Middle']
+        coords = blobs([(-5, 0), (5, 0), (0, 5), (0, -5), (0, 0)])
+
+        def titles_for(samples):
+            return [[names[idx // 50] for idx in indices] for indices in samples]
+
+        flat = clustering.cluster_points(coords, 5, None, titles_for, polygon_encoding='flat')
+        xy = clustering.cluster_points(coords, 5, None, titles_for)
+
+        self.assertNotIn('polygons', flat)
+        self.assertEqual(flat['geometry']['cell_offsets'], [0, 1, 2, 3, 4, 5])
+        self.assertEqual(flat['annotations'], xy['annotations'])
+        rings = flat['geometry']['ring_offsets']
+        points = np.array(flat['geometry']['coords']).reshape(-1, 2)
+        for i, annotation in enumerate(flat['annotations']):
+            # Each label is its own cluster's, at that cluster's center and inside its cell
+            blob = names.index(annotation['text'])
+            blob_center = coords[blob * 50:(blob + 1) * 50].mean(axis=0)
+            self.assertTrue(np.allclose([annotation['x'], annotation['y']], blob_center, atol=0.1))
+            cell = shapely.Polygon(points[rings[i]:rings[i + 1]])
+            self.assertTrue(cell.contains(shapely.Point(annotation['x'], annotation['y'])))
+            self.assertTrue(shapely.Polygon(np.column_stack([xy['polygons'][i]['x'], xy['polygons'][i]['y']]))
+                            .buffer(0.01).contains(cell))
+
+    def test_too_few_points(self):
+        overlay = clustering.cluster_points(np.array([[0.0, 0.0]]), 5, None, lambda samples: [])
+        self.assertEqual(overlay, {'polygons': [], 'annotations': []})
+
+
+class TestSampleClusterRepresentatives(unittest.TestCase):
+
+    def test_samples_within_clusters_reproducibly(self):
+        coords = blobs([(-5, 0), (5, 0), (0, 5)], per_cluster=30)
+        assignments = np.repeat([2, 0, 1], 30)
+        centroids = np.array([(5, 0), (0, 5), (-5, 0)], dtype=float)
+        # Cluster 3 is empty
+        centroids = np.vstack([centroids, [(9, 9)]])
+
+        samples = clustering.sample_cluster_representatives(coords, centroids, assignments, n=10)
+
+        self.assertEqual([len(indices) for indices in samples], [10, 10, 10, 0])
+        for cluster_id, indices in enumerate(samples):
+            self.assertTrue((assignments[indices] == cluster_id).all())
+            self.assertEqual(len(set(indices.tolist())), len(indices))
+        again = clustering.sample_cluster_representatives(coords, centroids, assignments, n=10)
+        self.assertTrue(all((a == b).all() for a, b in zip(samples, again)))
+
+        # Small clusters are used whole
+        [whole] = clustering.sample_cluster_representatives(coords[:3], centroids[2:3], np.zeros(3), n=10)
+        self.assertEqual(sorted(whole.tolist()), [0, 1, 2])
+
+    def test_first_draw_follows_inverse_distance_weights(self):
+        # Normalized distances 0, 0.5/1.01, 1/1.01 -> weights 1 / (d^2 + 0.1)
+        coords = np.array([[0.0, 0.0], [0.5, 0.0], [1.0, 0.0]])
+        normalized = np.array([0.0, 0.5, 1.0]) / 1.01
+        expected = 1 / (normalized ** 2 + 0.1)
+        expected /= expected.sum()
+
+        rng = np.random.default_rng(1)
+        firsts = [clustering.sample_cluster_representatives(coords, np.zeros((1, 2)), np.zeros(3), n=1, rng=rng)[0][0]
+                  for _ in range(4000)]
+        observed = np.bincount(firsts, minlength=3) / len(firsts)
+        np.testing.assert_allclose(observed, expected, atol=0.03)
+
+
+class TestClusterPointsQuery(unittest.TestCase):
+
+    def test_wraps_papers_query(self):
+        sql, params = build_cluster_points_query("SELECT 1 LIMIT %s", [10])
+        self.assertIn("FROM (SELECT 1 LIMIT %s) q", sql)
+        self.assertNotIn("similarity_score", sql)
+        self.assertEqual(params, [10])
+
+        sql, params = build_cluster_points_query("SELECT 1 LIMIT %s", [1500], 0.5, 100)
+        self.assertTrue(sql.endswith("q.similarity_score >= %s ORDER BY q.similarity_score DESC LIMIT %s"))
+        self.assertEqual(params, [1500, 0.5, 100])
+
+
+if __name__ == '__main__':
+    unittest.main()
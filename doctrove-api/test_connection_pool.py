@@ -0,0 +1,96 @@
+"""
+Fast unit tests for the instrumented connection pool (no database required).
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from psycopg2 import extensions
+
+from connection_pool import (
+    ConnectionPool, PoolTimeout, apply_session_settings, settings_committed, settings_rolled_back
+)
+
+
+def make_connection():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_blocking_acquire_and_timeout(self):
+        pool = ConnectionPool(0, 1, connect=make_connection)
+        held = pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(timeout=0.05)
+
+        threading.Timer(0.05, pool.putconn, args=(held,)).start()
+        self.assertIs(pool.getconn(timeout=2), held)
+
+        stats = pool.stats()
+        self.assertEqual((stats['in_use'], stats['size'], stats['waiting']), (1, 1, 0))
+        self.assertEqual((stats['acquired'], stats['waited'], stats['timeouts'], stats['connects']), (2, 1, 1, 1))
+        self.assertGreaterEqual(stats['wait_ms_max'], 40)
+
+    def test_broken_connections_are_replaced(self):
+        pool = ConnectionPool(0, 1, validate_after_idle=3600, connect=make_connection)
+        first = pool.getconn()
+        first.closed = 2  # psycopg2 marks connections it found broken
+        pool.putconn(first)
+        second = pool.getconn()
+        self.assertIsNot(second, first)
+        pool.putconn(second)
+
+        # Idle past the validation window and failing the ping
+        pool.validate_after_idle = 0
+        second.cursor.return_value.__enter__.return_value.execute.side_effect = Exception('server closed')
+        third = pool.getconn()
+        self.assertIsNot(third, second)
+        second.close.assert_called()
+        self.assertEqual(pool.stats()['broken'], 2)
+
+    def test_breakage_triggers_validation_of_idle_connections(self):
+        pool = ConnectionPool(0, 2, validate_after_idle=3600, connect=make_connection)
+        first, second = pool.getconn(), pool.getconn()
+        pool.putconn(second)
+        first.closed = 2
+        pool.putconn(first)
+        # second was returned before first broke: pinged (and kept) on checkout
+        self.assertIs(pool.getconn(), second)
+        second.cursor.return_value.__enter__.return_value.execute.assert_called_once_with("SELECT 1")
+
+    def test_open_transactions_rolled_back_on_return(self):
+        pool = ConnectionPool(0, 1, connect=make_connection)
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+        conn.rollback.assert_called_once()
+
+
+class TestSessionSettings(unittest.TestCase):
+
+    def test_set_skipped_when_in_effect(self):
+        conn = make_connection()
+        execute = conn.cursor.return_value.__enter__.return_value.execute
+
+        self.assertTrue(apply_session_settings(conn, {'ivfflat.probes': 5}))
+        settings_committed(conn)
+        self.assertFalse(apply_session_settings(conn, {'ivfflat.probes': 5}))
+        self.assertEqual(execute.call_count, 1)
+
+        # A rolled-back SET is not in effect
+        self.assertTrue(apply_session_settings(conn, {'ivfflat.probes': 20}))
+        settings_rolled_back(conn)
+        self.assertTrue(apply_session_settings(conn, {'ivfflat.probes': 20}))
+        self.assertEqual(execute.call_args[0][1], ['ivfflat.probes', '20'])
+        # ...but within the same transaction it is
+        self.assertFalse(apply_session_settings(conn, {'ivfflat.probes': 20}))
+
+
+if __name__ == '__main__':
+    unittest.main()
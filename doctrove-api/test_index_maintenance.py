@@ -0,0 +1,79 @@
+"""
+Fast unit tests for the index advisor in index_maintenance (no database required).
+"""
+
+import unittest
+from datetime import datetime
+
+from index_maintenance import (AnnIndex, Evaluation, MAX_HNSW_M, MIN_INDEX_ROWS, advise, in_window,
+                               index_definition, recommended_lists, recommended_setting)
+
+IVFFLAT = AnnIndex('idx_papers_embedding_ivfflat', 'ivfflat', {'lists': 1000}, True, 0)
+HNSW = AnnIndex('idx_papers_embedding_hnsw', 'hnsw', {'m': 16, 'ef_construction': 64}, True, 0)
+
+
+def evaluation(index, results, target_recall=0.95):
+    results = [{'setting': setting, 'recall': recall, 'p50_ms': p95 / 2, 'p95_ms': p95}
+               for setting, recall, p95 in results]
+    return Evaluation(index=index, embedded_rows=1_000_000, rows_since_build=0, sample_size=20, k=10,
+                      setting_name='ivfflat.probes', target_recall=target_recall, results=results,
+                      exact_p50_ms=900.0, recommended_setting=recommended_setting(results, target_recall))
+
+
+class TestIndexAdvisor(unittest.TestCase):
+
+    def test_sizing_and_recommended_setting(self):
+        self.assertEqual(recommended_lists(5_000), 10)
+        self.assertEqual(recommended_lists(500_000), 500)
+        self.assertEqual(recommended_lists(4_000_000), 2000)
+        results = [{'setting': 10, 'recall': 0.97}, {'setting': 1, 'recall': 0.6}, {'setting': 5, 'recall': 0.95}]
+        self.assertEqual(recommended_setting(results, 0.95), 5)
+        self.assertIsNone(recommended_setting(results, 0.99))
+
+    def test_create_and_healthy(self):
+        self.assertEqual(advise(None, MIN_INDEX_ROWS - 1, None, None).action, 'none')
+        create = advise(None, 2_000_000, None, None)
+        self.assertEqual((create.action, create.method, create.params), ('create', 'ivfflat', {'lists': 1414}))
+
+        healthy = evaluation(IVFFLAT, [(5, 0.9, 20.0), (10, 0.96, 40.0)])
+        self.assertEqual(advise(IVFFLAT, 1_000_000, 950_000, healthy).action, 'none')
+
+    def test_ivfflat(self):
+        # Lists sized for a much smaller corpus
+        retune = advise(IVFFLAT, 5_000_000, 4_900_000, None)
+        self.assertEqual((retune.action, retune.params), ('retune', {'lists': 2236}))
+        # Growth past REBUILD_GROWTH since the build
+        self.assertEqual(advise(IVFFLAT, 1_300_000, 1_000_000, None).action, 'reindex')
+        # Target recall unreachable, or only beyond the latency budget
+        unreachable = evaluation(IVFFLAT, [(5, 0.7, 20.0), (1000, 0.9, 900.0)])
+        self.assertEqual(advise(IVFFLAT, 1_000_000, 1_000_000, unreachable).action, 'reindex')
+        slow = evaluation(IVFFLAT, [(5, 0.7, 20.0), (160, 0.96, 800.0)])
+        self.assertEqual(advise(IVFFLAT, 1_000_000, 1_000_000, slow).action, 'reindex')
+
+    def test_hnsw(self):
+        unreachable = evaluation(HNSW, [(40, 0.8, 5.0), (1000, 0.9, 30.0)])
+        retune = advise(HNSW, 1_000_000, 1_000_000, unreachable)
+        self.assertEqual((retune.action, retune.params), ('retune', {'m': 32, 'ef_construction': 128}))
+        # Already at the largest parameters: rebuild as is
+        maxed = AnnIndex(HNSW.name, 'hnsw', {'m': MAX_HNSW_M, 'ef_construction': 512}, True, 0)
+        self.assertEqual(advise(maxed, 1_000_000, 1_000_000, evaluation(maxed, [(1000, 0.9, 30.0)])).action,
+                         'reindex')
+        # HNSW tolerates more growth than IVFFlat
+        self.assertEqual(advise(HNSW, 1_300_000, 1_000_000, None).action, 'none')
+        self.assertEqual(advise(HNSW, 1_500_000, 1_000_000, None).action, 'reindex')
+        invalid = AnnIndex(HNSW.name, 'hnsw', HNSW.params, False, 0)
+        self.assertEqual(advise(invalid, 1_000_000, 1_000_000, None).action, 'reindex')
+
+    def test_window_and_definition(self):
+        self.assertTrue(in_window('01:00-05:00', datetime(2026, 1, 1, 3, 0)))
+        self.assertFalse(in_window('01:00-05:00', datetime(2026, 1, 1, 5, 0)))
+        self.assertTrue(in_window('22:00-02:00', datetime(2026, 1, 1, 23, 30)))
+        self.assertTrue(in_window('22:00-02:00', datetime(2026, 1, 1, 1, 0)))
+        self.assertFalse(in_window('22:00-02:00', datetime(2026, 1, 1, 12, 0)))
+        self.assertEqual(index_definition('idx', 'hnsw', {'m': 16, 'ef_construction': 64}),
+                         "CREATE INDEX CONCURRENTLY idx ON doctrove_papers USING hnsw "
+                         "(doctrove_embedding vector_cosine_ops) WITH (ef_construction = 64, m = 16)")
+
+
+if __name__ == '__main__':
+    unittest.main()
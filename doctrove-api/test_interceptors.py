@@ -94,6 +94,60 @@ class TestAPIInterceptors(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('status', data)
         self.assertEqual(data['status'], 'healthy')
+    
+    def test_paper_details_batch_validation(self):
+        """Batch detail endpoint rejects bad bodies before touching the database."""
+        response = self.client.post('/api/papers/details', json={'ids': []})
+        self.assertEqual(response.status_code, 400)
+        
+        response = self.client.post('/api/papers/details', json={'ids': ['not-a-uuid']})
+        self.assertEqual(response.status_code, 400)
+        
+        from api_interceptors import MAX_PAPER_DETAILS_BATCH
+        too_many = ['123e4567-e89b-12d3-a456-426614174000'] * (MAX_PAPER_DETAILS_BATCH + 1)
+        response = self.client.post('/api/papers/details', json={'ids': too_many})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_paper_detail_queries(self):
+        """GET /api/papers/<id> returns every column; the sidebar endpoints use the narrow projection."""
+        from api_interceptors import (fetch_paper_detail_interceptor, fetch_paper_details_batch_interceptor,
+                                      fetch_paper_sidebar_detail_interceptor, PAPER_DETAIL_SELECT)
+        paper_id = '123e4567-e89b-12d3-a456-426614174000'
+        row = {'doctrove_paper_id': paper_id, 'doctrove_title': 'T', 'doctrove_embedding_2d': '(0.1,0.2)'}
+        cursor = Mock()
+        cursor.fetchone.return_value = row
+        cursor.fetchall.return_value = [row]
+        conn = Mock()
+        conn.__enter__ = Mock(return_value=conn)
+        conn.__exit__ = Mock(return_value=False)
+        conn.cursor.return_value.__enter__ = Mock(return_value=cursor)
+        conn.cursor.return_value.__exit__ = Mock(return_value=False)
+        
+        ctx = fetch_paper_detail_interceptor({'connection_factory': lambda: conn, 'paper_id': paper_id})
+        self.assertNotIn('error', ctx)
+        self.assertEqual(ctx['paper'], row)
+        sql = ' '.join(cursor.execute.call_args[0][0].split())
+        self.assertEqual(sql, 'SELECT dp.* FROM doctrove_papers dp WHERE dp.doctrove_paper_id = %s')
+        
+        ctx = fetch_paper_details_batch_interceptor({'connection_factory': lambda: conn, 'paper_ids': [paper_id]})
+        self.assertEqual(ctx['papers'], [row])
+        self.assertTrue(cursor.execute.call_args[0][0].startswith(PAPER_DETAIL_SELECT))
+        self.assertNotIn('dp.*', PAPER_DETAIL_SELECT)
+        self.assertIn('JOIN arxiv_metadata', PAPER_DETAIL_SELECT)
+        self.assertIn('JOIN openalex_metadata', PAPER_DETAIL_SELECT)
+        
+        # GET /api/papers/<id>/details: the batch query with a single id
+        cursor.execute.reset_mock()
+        ctx = fetch_paper_sidebar_detail_interceptor({'connection_factory': lambda: conn, 'paper_id': paper_id,
+                                                      'paper_ids': [paper_id]})
+        self.assertEqual(ctx['paper'], row)
+        self.assertTrue(cursor.execute.call_args[0][0].startswith(PAPER_DETAIL_SELECT))
+        self.assertEqual(cursor.execute.call_args[0][1], ([paper_id],))
+        
+        cursor.fetchall.return_value = []
+        ctx = fetch_paper_sidebar_detail_interceptor({'connection_factory': lambda: conn, 'paper_id': paper_id,
+                                                      'paper_ids': [paper_id]})
+        self.assertIn('not found', str(ctx['error']))
 
 def test_api_imports():
     """Test that the refactored API imports correctly."""
@@ -0,0 +1,101 @@
+"""
+Fast unit tests for plan_capture (no database required).
+"""
+
+import copy
+import unittest
+
+import plan_capture
+
+ANN_PLAN = {'Plan': {
+    'Node Type': 'Limit', 'Total Cost': 120.5, 'Plan Rows': 100,
+    'Plans': [{'Node Type': 'Index Scan', 'Parent Relationship': 'Outer', 'Relation Name': 'doctrove_papers',
+               'Index Name': 'idx_doctrove_embedding_ivfflat', 'Total Cost': 118.0, 'Plan Rows': 20000,
+               'Order By': "(doctrove_embedding <=> '[0.1,0.2]'::vector)"}],
+}}
+SEMANTIC_QUERY = "SELECT doctrove_paper_id FROM doctrove_papers dp ORDER BY dp.doctrove_embedding <=> %s::vector LIMIT %s"
+
+
+def seq_scan_plan():
+    plan = copy.deepcopy(ANN_PLAN)
+    plan['Plan']['Plans'] = [{'Node Type': 'Sort', 'Parent Relationship': 'Outer', 'Plans': [
+        {'Node Type': 'Seq Scan', 'Parent Relationship': 'Outer', 'Relation Name': 'doctrove_papers'}]}]
+    return plan
+
+
+class TestPlanAnalysis(unittest.TestCase):
+
+    def test_fingerprint_ignores_costs_and_parameters(self):
+        cheaper = copy.deepcopy(ANN_PLAN)
+        cheaper['Plan']['Total Cost'] = 1.0
+        cheaper['Plan']['Plans'][0]['Order By'] = "(doctrove_embedding <=> '[0.9,0.8]'::vector)"
+        self.assertEqual(plan_capture.plan_fingerprint(ANN_PLAN), plan_capture.plan_fingerprint(cheaper))
+        self.assertNotEqual(plan_capture.plan_fingerprint(ANN_PLAN), plan_capture.plan_fingerprint(seq_scan_plan()))
+
+    def test_findings(self):
+        self.assertEqual(plan_capture.plan_findings(ANN_PLAN, SEMANTIC_QUERY, 'direct'), [])
+        self.assertEqual(plan_capture.plan_findings(seq_scan_plan(), SEMANTIC_QUERY, 'ann_first'),
+                         [plan_capture.FINDING_SEQ_SCAN, plan_capture.FINDING_ANN_UNUSED])
+        # Exact filter_first plans skip the ANN index on purpose; non-semantic queries have no ANN check
+        self.assertEqual(plan_capture.plan_findings(seq_scan_plan(), SEMANTIC_QUERY, 'filter_first'),
+                         [plan_capture.FINDING_SEQ_SCAN])
+        self.assertEqual(plan_capture.plan_findings(seq_scan_plan(), "SELECT 1 FROM doctrove_papers"),
+                         [plan_capture.FINDING_SEQ_SCAN])
+
+    def test_regressions(self):
+        def group(template, fingerprint, median_ms, first_seen, last_seen, findings=()):
+            return {'query_kind': 'papers', 'query_hash': template, 'plan_fingerprint': fingerprint, 'samples': 5,
+                    'median_ms': median_ms, 'first_seen': first_seen, 'last_seen': last_seen,
+                    'findings': list(findings)}
+
+        groups = [
+            # a: the plan changed on day 3 and is four times slower
+            group('a', 'fast', 50.0, '2026-10-01', '2026-10-02'),
+            group('a', 'slow', 200.0, '2026-10-03', '2026-10-04'),
+            # b: the plan changed but got faster
+            group('b', 'old', 80.0, '2026-10-01', '2026-10-02'),
+            group('b', 'new', 60.0, '2026-10-03', '2026-10-04'),
+            # c: a single plan with a finding
+            group('c', 'only', 10.0, '2026-10-01', '2026-10-04', [plan_capture.FINDING_SEQ_SCAN]),
+            # d: back on the fast plan after a slow spell
+            group('d', 'fast', 50.0, '2026-10-01', '2026-10-04'),
+            group('d', 'slow', 500.0, '2026-10-02', '2026-10-03'),
+        ]
+        regressions = {r['query_hash']: r for r in plan_capture.find_regressions(groups)}
+
+        self.assertEqual(sorted(regressions), ['a', 'c'])
+        self.assertEqual(regressions['a']['issues'], [plan_capture.FINDING_PLAN_CHANGED])
+        self.assertEqual(regressions['a']['previous_plan']['plan_fingerprint'], 'fast')
+        self.assertEqual(regressions['c']['issues'], [plan_capture.FINDING_SEQ_SCAN])
+
+
+class TestCaptureDecision(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = plan_capture.config()
+        plan_capture._window_start, plan_capture._window_count = 0.0, 0
+
+    def tearDown(self):
+        plan_capture.configure(self.saved['sample_rate'], self.saved['slow_ms'])
+
+    def test_slow_or_sampled_within_the_per_minute_cap(self):
+        plan_capture.configure(sample_rate=0.0, slow_ms=500)
+        self.assertFalse(plan_capture.sample_request())
+        self.assertIsNone(plan_capture.capture_reason(100.0, sampled=False))
+        self.assertEqual(plan_capture.capture_reason(100.0, sampled=True), 'sampled')
+        self.assertEqual(plan_capture.capture_reason(600.0, sampled=False), 'slow')
+
+        plan_capture._window_count = plan_capture.PLAN_MAX_PER_MINUTE
+        self.assertIsNone(plan_capture.capture_reason(600.0, sampled=True))
+
+    def test_configure_validates(self):
+        with self.assertRaises(ValueError):
+            plan_capture.configure(sample_rate=1.5)
+        with self.assertRaises(ValueError):
+            plan_capture.configure(slow_ms=-1)
+        self.assertEqual(plan_capture.configure(sample_rate=1.0)['sample_rate'], 1.0)
+        self.assertTrue(plan_capture.sample_request())
+
+
+if __name__ == '__main__':
+    unittest.main()
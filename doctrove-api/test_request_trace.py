@@ -0,0 +1,80 @@
+"""
+Fast unit tests for request_trace (no database or server required).
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import request_trace
+
+
+class TestRequestTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = request_trace.config()
+        request_trace._buffer.clear()
+
+    def tearDown(self):
+        request_trace.configure(self.saved['categories'], self.saved['sample_rate'])
+        request_trace.TRACE_FILE = self.saved['file']
+        request_trace._buffer.clear()
+
+    def test_disabled_categories_record_nothing(self):
+        request_trace.configure(['sql'], 1.0)
+        request_trace.begin_request('/api/papers')
+        request_trace.trace('timing', 'fetch_papers', query_ms=1.0)
+        self.assertFalse(request_trace.enabled('timing'))
+        self.assertEqual(request_trace.recent(), [])
+
+    def test_events_are_compacted_and_filtered(self):
+        request_trace.configure(['sql', 'timing'], 1.0)
+        request_trace.begin_request('/api/papers')
+        vector = '[' + ','.join(['0.0123456'] * 1536) + ']'
+        request_trace.trace('sql', 'papers_query', query='SELECT 1', params=[vector, 10] + [0] * 100)
+        request_trace.trace('timing', 'fetch_papers', query_ms=1.5)
+
+        [event] = request_trace.recent(category='sql')
+        self.assertEqual((event['endpoint'], event['query']), ('/api/papers', 'SELECT 1'))
+        self.assertTrue(event['params'][0].endswith(f'... <{len(vector)} chars>'))
+        self.assertEqual(len(event['params']), request_trace.MAX_SEQUENCE_LENGTH + 1)
+        # Both events belong to the same request
+        self.assertEqual(len(request_trace.recent(request_id=event['request_id'])), 2)
+        json.dumps(request_trace.recent())
+
+    def test_sampling_is_per_request(self):
+        request_trace.configure(['all'], 0.0)
+        request_trace.begin_request('/api/papers')
+        request_trace.trace('request', 'papers_request', args={})
+        self.assertEqual(request_trace.recent(), [])
+
+        request_trace.configure(sample_rate=1.0)
+        request_trace.begin_request('/api/papers')
+        request_trace.trace('request', 'papers_request', args={})
+        self.assertEqual(len(request_trace.recent()), 1)
+
+    def test_configure_rejects_unknown_values(self):
+        with self.assertRaises(ValueError):
+            request_trace.configure(['nope'])
+        with self.assertRaises(ValueError):
+            request_trace.configure(sample_rate=2.0)
+
+    def test_background_writer_appends_json_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'traces.jsonl')
+            request_trace.TRACE_FILE = path
+            request_trace.configure(['exec'], 1.0)
+            request_trace.begin_request('/api/papers')
+            request_trace.trace('exec', 'bind_params', count=2)
+
+            deadline = time.time() + 5
+            while not (os.path.exists(path) and os.path.getsize(path)) and time.time() < deadline:
+                time.sleep(0.01)
+            with open(path) as f:
+                self.assertEqual(json.loads(f.readline())['event'], 'bind_params')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Fast unit tests for the semantic-search planner (no database required).
+"""
+
+import unittest
+
+from sql_filter_parser import parse_sql_filter
+from semantic_planner import (
+    ColumnStatistics, TableStatistics, PlannerStatistics, column_estimator, bbox_fraction,
+    choose_semantic_plan, grow_semantic_plan, PLAN_DIRECT, PLAN_ANN_FIRST, PLAN_ITERATIVE,
+    PLAN_FILTER_FIRST, MAX_ANN_CANDIDATES, MAX_HNSW_EF_SEARCH
+)
+
+PAPERS = TableStatistics(rows=1_000_000, columns={
+    'doctrove_source': ColumnStatistics(
+        null_frac=0.0, n_distinct=3,
+        most_common_vals=('openalex', 'arxiv', 'randpub'), most_common_freqs=(0.7, 0.29, 0.01)),
+    'doctrove_primary_date': ColumnStatistics(
+        null_frac=0.0, n_distinct=-0.01,
+        histogram_bounds=('2000-01-01', '2010-01-01', '2020-01-01', '2025-01-01', '2025-12-31')),
+})
+COUNTRY = TableStatistics(rows=500_000, columns={
+    'country_uschina': ColumnStatistics(
+        null_frac=0.0, n_distinct=3,
+        most_common_vals=('Other', 'United States', 'China'), most_common_freqs=(0.6, 0.3, 0.1)),
+})
+
+
+def statistics(ann_index='ivfflat', ivfflat_lists=1000, ann_min_setting=None):
+    return PlannerStatistics(
+        tables={'doctrove_papers': PAPERS, 'enrichment_country': COUNTRY},
+        embedded_rows=1_000_000, ann_index=ann_index, ivfflat_lists=ivfflat_lists,
+        extent=(0.0, 0.0, 10.0, 10.0), ann_min_setting=ann_min_setting
+    )
+
+
+def resolve(column):
+    table = column.qualifier or 'doctrove_papers'
+    return table, column.name
+
+
+class TestSemanticPlanner(unittest.TestCase):
+
+    def test_column_statistics(self):
+        source = PAPERS.columns['doctrove_source']
+        self.assertAlmostEqual(source.selectivity('=', 'arxiv', PAPERS.rows), 0.29)
+        self.assertEqual(source.selectivity('=', 'extpub', PAPERS.rows), 0.0)
+
+        dates = PAPERS.columns['doctrove_primary_date']
+        self.assertAlmostEqual(dates.selectivity('>=', '2020-01-01', PAPERS.rows), 0.5)
+        self.assertAlmostEqual(dates.selectivity('<', '1999-01-01', PAPERS.rows), 0.0)
+        self.assertIsNone(dates.selectivity('LIKE', '2020%', PAPERS.rows))
+
+    def test_filter_estimates_use_statistics(self):
+        estimator, misses = column_estimator(statistics(), resolve)
+        parsed = parse_sql_filter(
+            "doctrove_source = 'arxiv' AND doctrove_primary_date >= '2020-01-01' "
+            "AND doctrove_primary_date < '2025-01-01' AND enrichment_country.country_uschina = 'China'")
+        # 0.29 * (0.5 + 0.75 - 1) * (0.1 * 500k/1M coverage)
+        self.assertAlmostEqual(parsed.selectivity(estimator=estimator), 0.29 * 0.25 * 0.05)
+        self.assertEqual(misses, [])
+
+        parse_sql_filter("doctrove_title LIKE 'graph%'").selectivity(estimator=estimator)
+        self.assertEqual([column.name for column in misses], ['doctrove_title'])
+
+    def test_strategy_choice(self):
+        stats = statistics()
+        self.assertEqual(choose_semantic_plan(500, 1.0, True, False, stats).strategy, PLAN_DIRECT)
+        self.assertEqual(choose_semantic_plan(500, 0.8, True, True, stats).strategy, PLAN_DIRECT)
+
+        exact = choose_semantic_plan(500, 0.01, True, True, stats)
+        self.assertEqual(exact.strategy, PLAN_FILTER_FIRST)
+        self.assertIsNone(exact.probes)
+
+        ann = choose_semantic_plan(500, 0.1, True, True, stats)
+        self.assertEqual(ann.strategy, PLAN_ANN_FIRST)
+        self.assertEqual(ann.candidates, 10_000)
+        # 1000 rows per list: 10k candidates need 10 lists, doubled for headroom
+        self.assertEqual(ann.probes, 20)
+        self.assertEqual(choose_semantic_plan(500, 0.1, True, True, stats, probes_override=7).probes, 7)
+
+        # Uncertain estimates never scan exactly on a large corpus
+        self.assertEqual(choose_semantic_plan(500, 0.01, False, True, stats).strategy, PLAN_ITERATIVE)
+
+        hnsw = choose_semantic_plan(500, 0.1, True, True, statistics(ann_index='hnsw', ivfflat_lists=None))
+        self.assertEqual((hnsw.probes, hnsw.ef_search), (None, MAX_HNSW_EF_SEARCH))
+
+    def test_iterative_growth(self):
+        plan = choose_semantic_plan(500, 0.1, False, True, statistics())
+        self.assertEqual(plan.strategy, PLAN_ITERATIVE)
+        rounds = [plan]
+        while True:
+            plan = grow_semantic_plan(plan)
+            if plan is None:
+                break
+            rounds.append(plan)
+        self.assertEqual([p.candidates for p in rounds], [10_000, 40_000, 160_000])
+        self.assertEqual([p.probes for p in rounds], [20, 80, 320])
+        self.assertLessEqual(rounds[-1].candidates, MAX_ANN_CANDIDATES)
+
+        self.assertIsNone(grow_semantic_plan(choose_semantic_plan(500, 0.1, True, True, statistics())))
+
+    def test_measured_recall_floor(self):
+        # index_maintenance measured probes=40 for the target recall: never probe fewer
+        stats = statistics(ann_min_setting=40)
+        self.assertEqual(choose_semantic_plan(500, 1.0, True, False, statistics()).probes, 5)
+        self.assertEqual(choose_semantic_plan(500, 1.0, True, False, stats).probes, 40)
+        iterative = choose_semantic_plan(500, 0.1, False, True, stats)
+        self.assertEqual([iterative.probes, grow_semantic_plan(iterative).probes], [40, 80])
+        self.assertEqual(choose_semantic_plan(500, 0.1, True, True, stats, probes_override=7).probes, 7)
+
+        hnsw = choose_semantic_plan(10, 1.0, True, False,
+                                    statistics(ann_index='hnsw', ivfflat_lists=None, ann_min_setting=200))
+        self.assertEqual(hnsw.ef_search, 200)
+
+    def test_bbox_fraction(self):
+        self.assertAlmostEqual(bbox_fraction((0.0, 0.0, 5.0, 5.0), (0.0, 0.0, 10.0, 10.0)), 0.25)
+        self.assertAlmostEqual(bbox_fraction((-5.0, -5.0, 5.0, 5.0), (0.0, 0.0, 10.0, 10.0)), 0.25)
+        self.assertEqual(bbox_fraction((20.0, 20.0, 30.0, 30.0), (0.0, 0.0, 10.0, 10.0)), 0.0)
+        self.assertIsNone(bbox_fraction((0.0, 0.0, 1.0, 1.0), None))
+
+
+if __name__ == '__main__':
+    unittest.main()
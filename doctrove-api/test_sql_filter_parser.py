@@ -0,0 +1,94 @@
+"""
+Fast unit tests for the sql_filter parser (no database required).
+"""
+
+import unittest
+
+from sql_filter_parser import (
+    parse_sql_filter, SqlFilterError, ColumnRef, DEFAULT_RANGE_INEQ_SEL
+)
+
+UNIVERSE_FILTER = (
+    "(doctrove_source IN ('openalex')) AND (doctrove_primary_date >= '2000-01-01' "
+    "AND doctrove_primary_date <= '2025-12-31') AND enrichment_country.country_uschina = 'China'"
+)
+
+
+class TestSqlFilterParser(unittest.TestCase):
+
+    def test_parameterized_shape_and_columns(self):
+        parsed = parse_sql_filter(UNIVERSE_FILTER)
+
+        self.assertEqual(parsed.params, ('openalex', '2000-01-01', '2025-12-31', 'China'))
+        self.assertNotIn("'", parsed.shape)
+        self.assertEqual(parsed.shape.count('%s'), 4)
+        self.assertEqual(parsed.columns, (
+            ColumnRef('doctrove_source'),
+            ColumnRef('doctrove_primary_date'),
+            ColumnRef('country_uschina', 'enrichment_country'),
+        ))
+
+        # Same shape, different values -> equal (shared query template)
+        other = parse_sql_filter(UNIVERSE_FILTER.replace('China', 'United States'))
+        self.assertEqual(parsed, other)
+        self.assertEqual(hash(parsed), hash(other))
+        self.assertNotEqual(parsed, parse_sql_filter("doctrove_source = 'arxiv'"))
+
+    def test_literals_are_not_columns(self):
+        parsed = parse_sql_filter("doctrove_title ILIKE '%o''brien AND country_uschina%'")
+        self.assertEqual(parsed.columns, (ColumnRef('doctrove_title'),))
+        self.assertEqual(parsed.params, ("%o'brien AND country_uschina%",))
+
+    def test_expression_forms(self):
+        for sql_filter in [
+            "NOT doctrove_source = 'x' OR doctrove_embedding_2d IS NOT NULL",
+            "'cs.AI' = ANY(am.arxiv_categories)",
+            "am.arxiv_categories @> ARRAY['cs.AI', 'cs.LG']",
+            "(doctrove_embedding_2d)[0] BETWEEN -1.5 AND 2",
+            "lower(doctrove_title) NOT LIKE 'a%' AND doctrove_primary_date::text >= '2020'",
+            "doctrove_source NOT IN ('a', 'b')",
+        ]:
+            parsed = parse_sql_filter(sql_filter)
+            # Rendering the shape again with literals inlined must round-trip through the parser
+            self.assertEqual(parse_sql_filter(parsed.shape.replace('%s', "'v'")).shape, parsed.shape)
+
+    def test_forbidden_and_unsupported(self):
+        for sql_filter in [
+            "doctrove_source = 'x'; DROP TABLE doctrove_papers",
+            "doctrove_source = 'x' -- comment",
+            "doctrove_paper_id IN (SELECT doctrove_paper_id FROM arxiv_metadata)",
+            "pg_sleep(10) IS NULL",
+            # Only ALLOWED_FUNCTIONS may be called, qualified or not
+            "doctrove_title = query_to_xml('select usename, passwd from pg_shadow', true, true, '')::text",
+            "doctrove_title = current_setting('data_directory')",
+            "set_config('statement_timeout', '0', false) IS NOT NULL",
+            "doctrove_abstract = pg_read_file('/etc/passwd')",
+            "lo_import('/etc/passwd') > 0",
+            "doctrove_title = pg_catalog.current_setting('data_directory')",
+            "UNION SELECT * FROM users",
+        ]:
+            with self.assertRaises(SqlFilterError) as raised:
+                parse_sql_filter(sql_filter)
+            self.assertTrue(raised.exception.forbidden, sql_filter)
+
+        for sql_filter in ['"doctrove_title" IS NULL', "doctrove_title = = 'x'", "doctrove_title ILIKE E'%x%'"]:
+            with self.assertRaises(SqlFilterError) as raised:
+                parse_sql_filter(sql_filter)
+            self.assertFalse(raised.exception.forbidden, sql_filter)
+
+        # Whole-word keyword matching: column names containing keywords are fine
+        self.assertEqual(parse_sql_filter("updated_at > '2020-01-01'").columns, (ColumnRef('updated_at'),))
+
+    def test_selectivity(self):
+        hints = {'doctrove_source': 0.25}
+        self.assertEqual(parse_sql_filter("doctrove_source IN ('a', 'b', 'c', 'd')").selectivity(hints), 1.0)
+        self.assertAlmostEqual(parse_sql_filter("doctrove_source = 'arxiv'").selectivity(hints), 0.25)
+        self.assertGreater(parse_sql_filter("doctrove_embedding_2d IS NOT NULL").selectivity(), 0.99)
+
+        bounded = parse_sql_filter("doctrove_primary_date >= '2000-01-01' AND doctrove_primary_date <= '2001-01-01'")
+        self.assertAlmostEqual(bounded.selectivity(), DEFAULT_RANGE_INEQ_SEL)
+        self.assertLess(parse_sql_filter(UNIVERSE_FILTER).selectivity(hints), 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Fast unit tests for cluster summary caching and deferred summaries.
+
+LLM calls go to mock_llm_server on a free local port (no network required).
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import clustering
+from mock_llm_server import start_mock_llm_server
+from summary_cache import SummaryCache, SummaryJobs, get_summary_cache, title_set_key
+
+
+def titles(prefix, count=10):
+    return [f"{prefix} paper {i}" for i in range(count)]
+
+
+class TestSummaryCache(unittest.TestCase):
+
+    def test_title_set_key_ignores_order_case_and_spacing(self):
+        self.assertEqual(title_set_key(['Graph  Nets', 'Vision']), title_set_key(['vision', 'graph nets ']))
+        self.assertNotEqual(title_set_key(['Graph nets']), title_set_key(['Graph nets', 'Vision']))
+
+    def test_exact_and_near_duplicate_hits(self):
+        cache = SummaryCache(min_jaccard=0.8)
+        cache.put(titles('graph'), 'Graph methods')
+
+        self.assertEqual(cache.get(list(reversed(titles('graph')))), 'Graph methods')
+        # 9 of 10 titles shared: Jaccard 9/11
+        self.assertEqual(cache.get(titles('graph')[:9] + ['another paper']), 'Graph methods')
+        # 5 of 10 shared: too different
+        self.assertIsNone(cache.get(titles('graph')[:5] + titles('vision', 5)))
+        self.assertEqual(cache.stats(), {'entries': 1, 'hits': 1, 'near_hits': 1, 'misses': 1})
+
+    def test_lru_eviction(self):
+        cache = SummaryCache(max_size=2)
+        for name in ('a', 'b', 'c'):
+            cache.put(titles(name), name)
+        self.assertIsNone(cache.get(titles('a')))
+        self.assertEqual(cache.get(titles('c')), 'c')
+        self.assertEqual(cache._by_title.keys(), {t.casefold() for t in titles('b') + titles('c')})
+
+    def test_jobs(self):
+        jobs = SummaryJobs(workers=1)
+        ok = jobs.submit(lambda: {'annotations': []})
+        failed = jobs.submit(lambda: 1 / 0)
+        self.assertEqual(jobs.get(ok, wait=5)['status'], 'done')
+        self.assertEqual(jobs.get(failed, wait=5)['status'], 'failed')
+        self.assertIsNone(jobs.get('unknown'))
+
+
+class TestDeferredSummaries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import sklearn.cluster  # noqa: F401  (first import is slow; keep it out of the timing)
+        cls.server = start_mock_llm_server(latency=0.5)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        get_summary_cache().clear()
+        self.server.stats = {name: 0 for name in self.server.stats}
+        config = patch.multiple(clustering, OPENAI_API_KEY='mock', OPENAI_BASE_URL=self.server.base_url,
+                                OPENAI_CHAT_MODEL='mock', USE_OPENAI_LLM=True)
+        config.start()
+        self.addCleanup(config.stop)
+
+    def cluster(self, defer):
+        rng = np.random.default_rng(0)
+        coords = np.vstack([rng.normal(center, 0.1, size=(30, 2)) for center in [(-5, 0), (5, 0)]])
+        names = ['Left'] * 30 + ['Right'] * 30
+
+        def titles_for(samples):
+            return [[f"{names[idx]} topic paper {idx}" for idx in indices] for indices in samples]
+
+        return clustering.cluster_points(coords, 2, None, titles_for, defer_summaries=defer)
+
+    def test_geometry_returns_before_labels(self):
+        started = time.time()
+        overlay = self.cluster(defer=True)
+        self.assertLess(time.time() - started, 0.4)
+        self.assertEqual(len(overlay['polygons']), 2)
+        self.assertEqual({a['text'] for a in overlay['annotations']}, {clustering.SUMMARY_PENDING})
+
+        job = clustering.get_summary_jobs().get(overlay['summary_job'], wait=5)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(sorted(a['text'].split()[0] for a in job['result']['annotations']), ['Left', 'Right'])
+        self.assertEqual(self.server.stats['chat_requests'], 1)
+
+        # Same clusters again: labels come from the cache, no job and no LLM call
+        overlay = self.cluster(defer=True)
+        self.assertNotIn('summary_job', overlay)
+        self.assertEqual(overlay['annotations'], job['result']['annotations'])
+        self.assertEqual(self.server.stats['chat_requests'], 1)
+
+    def test_only_uncached_clusters_are_sent(self):
+        first = clustering.summarize_clusters([titles('graph'), titles('vision')])
+        self.assertEqual(first, ['graph paper 0', 'vision paper 0'])
+        second = clustering.summarize_clusters([titles('vision'), titles('robotics')])
+        self.assertEqual(second, ['vision paper 0', 'robotics paper 0'])
+        self.assertEqual(self.server.stats['chat_requests'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
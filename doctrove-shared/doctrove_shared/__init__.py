@@ -0,0 +1,6 @@
+"""
+Code shared by the DocTrove API (doctrove-api) and DocScope.
+
+Installed as a package (`pip install -e ./doctrove-shared`, part of the root
+requirements.txt) so neither app edits sys.path to reach the other's directory.
+"""
@@ -0,0 +1,90 @@
+"""
+Fast unit tests for cluster_engine (no database or LLM required).
+"""
+
+import unittest
+
+import numpy as np
+
+from doctrove_shared.cluster_engine import KMeansEngine, fingerprint_coords
+
+
+def blobs(centers, per_cluster=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.vstack([rng.normal(center, 0.1, size=(per_cluster, 2)) for center in centers])
+
+
+class TestKMeansEngine(unittest.TestCase):
+
+    def test_identical_data_is_served_from_cache(self):
+        engine = KMeansEngine()
+        coords = blobs([(-5, 0), (5, 0), (0, 5)])
+
+        first = engine.fit(coords, 3)
+        second = engine.fit(coords.copy(), 3)
+
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        np.testing.assert_array_equal(first.centers, second.centers)
+        np.testing.assert_array_equal(first.labels, second.labels)
+        # A different k is a different result
+        self.assertFalse(engine.fit(coords, 2).cached)
+        self.assertEqual(engine.stats()['hits'], 1)
+        self.assertEqual(engine.stats()['misses'], 2)
+
+    def test_lineage_warm_starts_from_previous_centroids(self):
+        engine = KMeansEngine()
+        coords = blobs([(-5, 0), (5, 0), (0, 5)])
+        panned = coords + 0.05
+
+        first = engine.fit(coords, 3, lineage='view-1')
+        warm = engine.fit(panned, 3, lineage='view-1')
+        cold = engine.fit(panned + 0.01, 3, lineage='view-2')
+        other_k = engine.fit(panned, 2, lineage='view-1')
+
+        self.assertFalse(first.warm_start)
+        self.assertTrue(warm.warm_start)
+        self.assertFalse(cold.warm_start)
+        self.assertFalse(other_k.warm_start)
+        # Seeded from the previous centroids, cluster ids keep their meaning
+        np.testing.assert_allclose(warm.centers, first.centers + 0.05, atol=0.05)
+
+    def test_minibatch_above_threshold(self):
+        engine = KMeansEngine(minibatch_threshold=100)
+        small = engine.fit(blobs([(-5, 0), (5, 0)], per_cluster=40), 2)
+        large = engine.fit(blobs([(-5, 0), (5, 0)], per_cluster=100), 2)
+
+        self.assertEqual(small.method, 'kmeans')
+        self.assertEqual(large.method, 'minibatch')
+        self.assertEqual(len(large.labels), 200)
+        self.assertEqual(sorted(np.bincount(large.labels).tolist()), [100, 100])
+
+    def test_cold_start_initializations(self):
+        engine = KMeansEngine(minibatch_threshold=100)
+        self.assertEqual(engine._model(50, 3, None, None)[0].n_init, 10)
+        # DocScope keeps its single init
+        self.assertEqual(engine._model(50, 3, None, 1)[0].n_init, 1)
+        self.assertEqual(engine._model(500, 3, None, None)[0].n_init, 3)
+        self.assertEqual(engine._model(500, 3, None, 1)[0].n_init, 1)
+
+        coords = blobs([(-5, 0), (5, 0)])
+        engine.fit(coords, 2)
+        self.assertFalse(engine.fit(coords, 2, n_init=1).cached)
+        self.assertTrue(engine.fit(coords, 2, n_init=1).cached)
+
+    def test_cache_is_bounded(self):
+        engine = KMeansEngine(cache_size=2, lineage_size=1)
+        for seed in range(3):
+            engine.fit(blobs([(-5, 0), (5, 0)], seed=seed), 2, lineage=f"view-{seed}")
+        self.assertEqual(engine.stats()['cached_results'], 2)
+        self.assertEqual(engine.stats()['lineages'], 1)
+
+    def test_fingerprint(self):
+        coords = blobs([(0, 0)], per_cluster=5)
+        self.assertEqual(fingerprint_coords(coords), fingerprint_coords(coords.copy()))
+        self.assertNotEqual(fingerprint_coords(coords), fingerprint_coords(coords[::-1]))
+        self.assertNotEqual(fingerprint_coords(coords), fingerprint_coords(coords.reshape(-1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
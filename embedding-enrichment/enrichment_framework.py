@@ -272,6 +272,9 @@ class BaseEnrichment(ABC):
                     cur.execute(insert_sql, values)
                     inserted_count += 1
                 
+                # Let the API catalog cache pick up new enrichment values (delivered on commit)
+                cur.execute("SELECT pg_notify('doctrove_catalog_changed', %s)",
+                            (f'{self.enrichment_name}_enrichment',))
                 conn.commit()
                 logger.debug(f"Inserted {inserted_count} {self.enrichment_name} enrichment results")
                 return inserted_count
@@ -16,7 +16,7 @@ import random
 from typing import List, Tuple, Optional, Callable, NamedTuple
 from functools import partial
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import umap.umap_ as umap
 from sklearn.preprocessing import StandardScaler
 import argparse
@@ -60,6 +60,15 @@ UMAPModel = NamedTuple('UMAPModel', [
     ('model_path', str)
 ])
 
+# Blue/green projection slots (see reset_umap_environment.py --blue-green)
+DEFAULT_EMBEDDING_2D_COLUMN = 'doctrove_embedding_2d'
+EMBEDDING_2D_COLUMNS = ('doctrove_embedding_2d', 'doctrove_embedding_2d_shadow')
+
+ActiveProjection = NamedTuple('ActiveProjection', [
+    ('column', str),
+    ('model_path', Optional[str])
+])
+
 def create_connection_factory() -> Callable:
     """Create a connection factory function (pure function)."""
     def connection_factory():
@@ -149,6 +158,37 @@ def count_papers_in_queue(connection_factory: Callable) -> int:
             cur.execute("SELECT COUNT(*) FROM papers_needing_2d_embeddings")
             return cur.fetchone()[0]
 
+def resolve_active_projection(connection_factory: Callable) -> ActiveProjection:
+    """
+    Look up the live 2D projection slot and the model that produced it.
+    
+    Falls back to the primary column (and the worker's own model) when the
+    umap_projection_state table has not been created yet.
+    
+    Args:
+        connection_factory: Function to create database connections
+    
+    Returns:
+        ActiveProjection with the column to write and the model path (or None)
+    """
+    try:
+        with connection_factory() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT slot, model_path
+                    FROM umap_projection_state
+                    WHERE is_active
+                    LIMIT 1
+                """)
+                row = cur.fetchone()
+    except psycopg2.Error as e:
+        logger.debug(f"Projection state unavailable, writing {DEFAULT_EMBEDDING_2D_COLUMN}: {e}")
+        return ActiveProjection(column=DEFAULT_EMBEDDING_2D_COLUMN, model_path=None)
+    
+    if not row or row[0] not in EMBEDDING_2D_COLUMNS:
+        return ActiveProjection(column=DEFAULT_EMBEDDING_2D_COLUMN, model_path=None)
+    return ActiveProjection(column=row[0], model_path=row[1])
+
 def load_umap_model(model_path: str = 'umap_model.pkl') -> Optional[UMAPModel]:
     """
     Load existing UMAP model (pure function).
@@ -234,13 +274,38 @@ def transform_embeddings_to_2d(papers: List[PaperEmbedding], umap_model: UMAPMod
     
     return list(map(add_2d_embedding, zip(papers, embeddings_2d)))
 
-def save_2d_embeddings_batch(papers_with_2d: List[PaperEmbedding], connection_factory: Callable) -> ProcessingResult:
+def lock_active_projection(cur) -> str:
+    """
+    Take a share lock on the active umap_projection_state row for the rest of
+    the transaction, so a blue/green activation (which locks the table FOR
+    UPDATE) cannot switch slots until this transaction commits.
+    
+    Returns:
+        The live slot (the primary column when projection state is not set up)
+    """
+    cur.execute("SELECT to_regclass('umap_projection_state') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return DEFAULT_EMBEDDING_2D_COLUMN
+    # A second attempt sees the new active row if an activation committed while we waited
+    for _ in range(2):
+        cur.execute("SELECT slot FROM umap_projection_state WHERE is_active FOR SHARE")
+        row = cur.fetchone()
+        if row:
+            return row[0] if row[0] in EMBEDDING_2D_COLUMNS else DEFAULT_EMBEDDING_2D_COLUMN
+    return DEFAULT_EMBEDDING_2D_COLUMN
+
+def save_2d_embeddings_batch(
+    papers_with_2d: List[PaperEmbedding],
+    connection_factory: Callable,
+    column: str = DEFAULT_EMBEDDING_2D_COLUMN
+) -> ProcessingResult:
     """
     Save 2D embeddings to database (pure function with controlled side effects).
     
     Args:
         papers_with_2d: List of PaperEmbedding objects with 2D embeddings
         connection_factory: Function to create database connections
+        column: Projection slot to write (the active slot)
     
     Returns:
         ProcessingResult object
@@ -248,9 +313,30 @@ def save_2d_embeddings_batch(papers_with_2d: List[PaperEmbedding], connection_fa
     if not papers_with_2d:
         return ProcessingResult(successful_count=0, failed_count=0, total_processed=0, batch_index=0)
     
+    if column not in EMBEDDING_2D_COLUMNS:
+        raise ValueError(f"Invalid 2D embedding column: {column}")
+    
     try:
         with connection_factory() as conn:
             with conn.cursor() as cur:
+                # The batch was transformed with the model of `column`; if a blue/green
+                # switch happened since, don't write the retired slot. The activation's
+                # catch-up projected papers that existed then; re-queue the rest for the new model
+                active_column = lock_active_projection(cur)
+                if active_column != column:
+                    cur.execute(f"""
+                        INSERT INTO papers_needing_2d_embeddings (paper_id)
+                        SELECT doctrove_paper_id FROM doctrove_papers
+                        WHERE doctrove_paper_id = ANY(%s::uuid[]) AND {active_column} IS NULL
+                        ON CONFLICT DO NOTHING
+                    """, ([paper.paper_id for paper in papers_with_2d],))
+                    requeued = cur.rowcount
+                    conn.commit()
+                    logger.warning(f"Projection switched from {column} to {active_column} during this batch; "
+                                   f"not writing {len(papers_with_2d)} papers, re-queued {requeued}")
+                    return ProcessingResult(successful_count=0, failed_count=0,
+                                            total_processed=len(papers_with_2d), batch_index=0)
+                
                 # Prepare data for batch update using functional approach
                 def create_update_data(paper):
                     """Create update data tuple (pure function)."""
@@ -260,12 +346,14 @@ def save_2d_embeddings_batch(papers_with_2d: List[PaperEmbedding], connection_fa
                 
                 update_data = list(map(create_update_data, papers_with_2d))
                 
-                # Update papers with 2D embeddings
-                cur.executemany("""
-                    UPDATE doctrove_papers 
-                    SET doctrove_embedding_2d = %s::point
-                    WHERE doctrove_paper_id = %s
-                """, update_data)
+                # Update papers with 2D embeddings in one statement, so the
+                # corpus_stats trigger aggregates the batch once
+                execute_values(cur, f"""
+                    UPDATE doctrove_papers dp
+                    SET {column} = v.point_str::point
+                    FROM (VALUES %s) AS v(point_str, paper_id)
+                    WHERE dp.doctrove_paper_id = v.paper_id::uuid
+                """, update_data, page_size=len(update_data))
                 
                 # Commit the transaction
                 conn.commit()
@@ -284,10 +372,38 @@ def save_2d_embeddings_batch(papers_with_2d: List[PaperEmbedding], connection_fa
         batch_index=0
     )
 
+def refresh_stale_corpus_extents(connection_factory: Callable) -> int:
+    """
+    Compact corpus_stats deltas, then recompute extents flagged stale by deletes or
+    moved boundary points (both projection slots).
+    
+    Writers keep appending deltas during the rescan, but it scans doctrove_papers
+    per stale source, so only call it while idle.
+    
+    Returns:
+        Number of sources refreshed (0 if nothing was stale or the table is missing)
+    """
+    try:
+        with connection_factory() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regproc('refresh_stale_corpus_extents') IS NOT NULL")
+                if not cur.fetchone()[0]:
+                    return 0
+                cur.execute("SELECT refresh_stale_corpus_extents()")
+                refreshed = cur.fetchone()[0]
+            conn.commit()
+        if refreshed:
+            logger.info(f"Refreshed stale corpus_stats extents for {refreshed} sources")
+        return refreshed
+    except Exception as e:
+        logger.warning(f"Could not refresh corpus_stats extents: {e}")
+        return 0
+
 def process_2d_embeddings_batch_from_queue(
     connection_factory: Callable,
     umap_model: UMAPModel,
-    batch_size: int = 100
+    batch_size: int = 100,
+    column: str = DEFAULT_EMBEDDING_2D_COLUMN
 ) -> ProcessingResult:
     """
     Process a single batch of 2D embeddings from the queue (pure function).
@@ -296,6 +412,7 @@ def process_2d_embeddings_batch_from_queue(
         connection_factory: Function to create database connections
         umap_model: Pre-loaded UMAP model
         batch_size: Number of papers to process
+        column: Projection slot to write (the active slot)
     
     Returns:
         ProcessingResult object
@@ -323,7 +440,7 @@ def process_2d_embeddings_batch_from_queue(
     # Save to database
     logger.info(f"Saving {len(papers_with_2d)} 2D embeddings to database...")
     save_start = time.time()
-    result = save_2d_embeddings_batch(papers_with_2d, connection_factory)
+    result = save_2d_embeddings_batch(papers_with_2d, connection_factory, column)
     save_time = time.time() - save_start
     logger.info(f"Saved embeddings in {save_time:.2f}s")
     
@@ -379,15 +496,28 @@ def process_2d_embeddings_continuous_from_queue(
                 queue_size = count_papers_in_queue(connection_factory)
                 logger.info(f"Queue size: {queue_size} papers")
                 
+                # Follow blue/green switches: write the live slot with the model that built it
+                projection = resolve_active_projection(connection_factory)
+                if projection.model_path and projection.model_path != umap_model.model_path:
+                    logger.info(f"Active projection switched to {projection.column}; loading {projection.model_path}")
+                    switched_model = load_umap_model(projection.model_path)
+                    if switched_model is None:
+                        logger.error(f"Failed to load switched UMAP model from {projection.model_path}")
+                        time.sleep(sleep_seconds)
+                        continue
+                    umap_model = switched_model
+                
                 # Process batch from queue
                 result = process_2d_embeddings_batch_from_queue(
                     connection_factory=connection_factory,
                     umap_model=umap_model,
-                    batch_size=batch_size
+                    batch_size=batch_size,
+                    column=projection.column
                 )
                 
                 if result.total_processed == 0:
                     consecutive_empty_batches += 1
+                    refresh_stale_corpus_extents(connection_factory)
                     if consecutive_empty_batches >= max_empty_batches:
                         logger.info(f"Queue idle - no papers available (empty batch #{consecutive_empty_batches})")
                         consecutive_empty_batches = 0  # Reset counter after logging
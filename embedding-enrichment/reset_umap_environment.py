@@ -12,6 +12,10 @@ Process:
 3. Take a random sample of papers with both embeddings
 4. Compute new UMAP model on the sample
 5. Restart incremental processing
+
+Blue/green mode (--blue-green) avoids the empty-map window: the new model
+projects every paper into the inactive projection slot while the API keeps
+serving the active one, then the slots are switched in one transaction.
 """
 
 import sys
@@ -25,6 +29,7 @@ import argparse
 import random
 from typing import List, Dict, Any, Optional, Tuple
 import psycopg2
+from psycopg2.extras import execute_values
 import numpy as np
 import pickle
 from sklearn.preprocessing import StandardScaler
@@ -50,6 +55,10 @@ UMAP_CONFIG = {
     'random_state': 42
 }
 
+# Blue/green projection slots (see database/migrations/*__umap_blue_green_projection.sql)
+EMBEDDING_2D_COLUMNS = ('doctrove_embedding_2d', 'doctrove_embedding_2d_shadow')
+PROJECTION_BATCH_SIZE = 5000
+
 class UMAPEnvironmentReset:
     """
     Handles the complete UMAP environment reset process.
@@ -493,6 +502,315 @@ class UMAPEnvironmentReset:
             logger.error(f"Error starting incremental processing: {e}")
             return False
     
+    def get_projection_slots(self) -> Tuple[str, str]:
+        """
+        Get the (active, shadow) 2D columns from umap_projection_state.
+        
+        Returns:
+            Tuple of (active_slot, shadow_slot)
+        """
+        with psycopg2.connect(**self.connection_params) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT slot FROM umap_projection_state WHERE is_active LIMIT 1")
+                row = cur.fetchone()
+        
+        active = row[0] if row and row[0] in EMBEDDING_2D_COLUMNS else EMBEDDING_2D_COLUMNS[0]
+        shadow = next(col for col in EMBEDDING_2D_COLUMNS if col != active)
+        return active, shadow
+    
+    def clear_shadow_projection(self, shadow_slot: str) -> bool:
+        """
+        Clear the inactive projection slot before a rebuild. The live slot is untouched.
+        
+        Args:
+            shadow_slot: Inactive 2D column to clear
+            
+        Returns:
+            True if clearing was successful
+        """
+        logger.debug(f"Clearing shadow projection slot {shadow_slot}...")
+        
+        try:
+            with psycopg2.connect(**self.connection_params) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        UPDATE doctrove_papers
+                        SET {shadow_slot} = NULL
+                        WHERE {shadow_slot} IS NOT NULL
+                    """)
+                    logger.debug(f"Cleared {cur.rowcount} stale shadow coordinates")
+                    cur.execute("""
+                        UPDATE umap_projection_state
+                        SET model_version = NULL, model_path = NULL, built_at = NULL
+                        WHERE slot = %s
+                    """, (shadow_slot,))
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error clearing shadow projection: {e}")
+            return False
+    
+    def project_into_slot(self, model: umap.UMAP, scaler: StandardScaler, slot: str,
+                          batch_size: int = PROJECTION_BATCH_SIZE, conn=None) -> int:
+        """
+        Project every paper that has a 1D embedding but no coordinates in `slot`.
+        
+        Runs in batches until nothing is left, so papers ingested while the
+        rebuild is running are picked up by the final pass before the switch.
+        
+        Args:
+            model: Trained UMAP model
+            scaler: Fitted StandardScaler
+            slot: 2D column to write
+            batch_size: Papers per transform/update round-trip
+            conn: Project inside this connection's open transaction (the caller
+                  commits); by default a new connection commits every batch
+            
+        Returns:
+            Number of papers projected
+        """
+        if slot not in EMBEDDING_2D_COLUMNS:
+            raise ValueError(f"Invalid projection slot: {slot}")
+        
+        projected = 0
+        start_time = time.time()
+        own_connection = conn is None
+        if own_connection:
+            conn = psycopg2.connect(**self.connection_params)
+        
+        try:
+            while True:
+                with conn.cursor() as cur:
+                    cur.execute(f"""
+                        SELECT doctrove_paper_id, doctrove_embedding
+                        FROM doctrove_papers
+                        WHERE doctrove_embedding IS NOT NULL
+                        AND {slot} IS NULL
+                        LIMIT %s
+                    """, (batch_size,))
+                    rows = cur.fetchall()
+                
+                if not rows:
+                    break
+                
+                papers = [{'doctrove_paper_id': row[0], 'doctrove_embedding': row[1]} for row in rows]
+                embeddings, paper_ids, _ = self.extract_embeddings_from_papers(papers)
+                if not embeddings:
+                    logger.error("No embeddings could be parsed in projection batch; stopping")
+                    break
+                
+                embeddings_2d = model.transform(scaler.transform(np.array(embeddings)))
+                update_data = [
+                    (paper_id, f"({float(x)},{float(y)})")
+                    for paper_id, (x, y) in zip(paper_ids, embeddings_2d)
+                ]
+                
+                with conn.cursor() as cur:
+                    execute_values(cur, f"""
+                        UPDATE doctrove_papers AS dp
+                        SET {slot} = v.coords::point
+                        FROM (VALUES %s) AS v(paper_id, coords)
+                        WHERE dp.doctrove_paper_id = v.paper_id::uuid
+                    """, update_data, page_size=1000)
+                if own_connection:
+                    conn.commit()
+                
+                projected += len(update_data)
+                rate = projected / max(time.time() - start_time, 1e-6)
+                logger.info(f"Projected {projected} papers into {slot} ({rate:.0f} papers/sec)")
+        finally:
+            if own_connection:
+                conn.close()
+        
+        return projected
+    
+    def activate_projection(self, slot: str, model_version: str, model_path: str,
+                            model: Optional[umap.UMAP] = None, scaler: Optional[StandardScaler] = None) -> bool:
+        """
+        Make `slot` the live projection in a single transaction.
+        
+        The transaction locks umap_projection_state first. Queue workers take a
+        share lock on the active row when they save a batch
+        (queue_2d_worker.save_2d_embeddings_batch), so the lock waits for batches
+        being written into the current slot and holds back new ones until the
+        switch commits; workers that were held back then see the new slot and
+        do not write the retired one. With `model`, the final catch-up projects
+        papers still missing from `slot` (including those batches) inside the
+        same transaction; without it, activation is refused while any are missing.
+        
+        The API picks the switch up on its next projection-state refresh and
+        queue workers reload `model_path` before their next batch. The previous
+        slot keeps its coordinates so the layouts can still be compared (or
+        switched back) until the next rebuild clears it.
+        
+        Args:
+            slot: 2D column to activate
+            model_version: Version label of the model that produced the slot
+            model_path: Path of the pickled (model, scaler) for that version
+            model: Model of that version, for the final catch-up
+            scaler: Scaler of that version
+            
+        Returns:
+            True if the switch committed
+        """
+        try:
+            with psycopg2.connect(**self.connection_params) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT slot FROM umap_projection_state ORDER BY slot FOR UPDATE")
+                
+                if model is not None:
+                    projected = self.project_into_slot(model, scaler, slot, conn=conn)
+                    logger.info(f"Caught up {projected} papers into {slot} under the projection lock")
+                
+                with conn.cursor() as cur:
+                    if model is None:
+                        cur.execute(f"""
+                            SELECT COUNT(*) FROM doctrove_papers
+                            WHERE doctrove_embedding IS NOT NULL AND {slot} IS NULL
+                        """)
+                        unprojected = cur.fetchone()[0]
+                        if unprojected:
+                            raise RuntimeError(f"{unprojected} papers have no coordinates in {slot} "
+                                               f"and no model was given to project them")
+                    
+                    # Two statements keep the single-active unique index satisfied mid-transaction
+                    cur.execute("UPDATE umap_projection_state SET is_active = FALSE WHERE is_active")
+                    cur.execute("""
+                        UPDATE umap_projection_state
+                        SET is_active = TRUE,
+                            model_version = %s,
+                            model_path = %s,
+                            built_at = COALESCE(built_at, NOW()),
+                            activated_at = NOW()
+                        WHERE slot = %s
+                    """, (model_version, model_path, slot))
+                    if cur.rowcount != 1:
+                        raise RuntimeError(f"Projection slot {slot} is not registered")
+            logger.info(f"Activated projection slot {slot} (model {model_version})")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error activating projection slot {slot}: {e}")
+            return False
+    
+    def activate_shadow_projection(self) -> bool:
+        """
+        Switch the API to the already-built shadow layout (`--activate-shadow`).
+        
+        Papers embedded since the shadow build are projected into the shadow
+        slot with its own model first, like the final pass of
+        run_blue_green_rebuild, so none lose their map position. Activation is
+        refused if that model cannot be loaded while unprojected papers remain.
+        
+        Returns:
+            True if the switch committed
+        """
+        _, shadow_slot = self.get_projection_slots()
+        with psycopg2.connect(**self.connection_params) as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT model_version, model_path FROM umap_projection_state
+                    WHERE slot = %s AND built_at IS NOT NULL
+                """, (shadow_slot,))
+                row = cur.fetchone()
+        if not row:
+            logger.error(f"No built layout in {shadow_slot}; run --blue-green first")
+            return False
+        model_version, model_path = row
+        
+        try:
+            with open(model_path, 'rb') as f:
+                model, scaler = pickle.load(f)
+        except Exception as e:
+            # Activation is refused unless every paper already has coordinates in the slot
+            logger.warning(f"Cannot load model {model_version} from {model_path} ({e}); "
+                           f"activating only if no papers need projecting")
+            return self.activate_projection(shadow_slot, model_version, model_path)
+        
+        # Bulk of the catch-up outside the projection lock; the rest runs under it
+        projected = self.project_into_slot(model, scaler, shadow_slot)
+        logger.info(f"Caught up {projected} papers embedded since the {shadow_slot} build")
+        return self.activate_projection(shadow_slot, model_version, model_path, model, scaler)
+    
+    def run_blue_green_rebuild(self, activate: bool = True) -> bool:
+        """
+        Rebuild the UMAP layout without clearing the live 2D coordinates.
+        
+        Trains a new model, projects all papers into the shadow slot under a
+        new model version, and (optionally) switches the API over atomically.
+        
+        Args:
+            activate: Switch to the new slot when projection finishes
+            
+        Returns:
+            True if the rebuild was successful
+        """
+        logger.info("=" * 60)
+        logger.info("STARTING BLUE/GREEN UMAP REBUILD")
+        logger.info("=" * 60)
+        
+        try:
+            active_slot, shadow_slot = self.get_projection_slots()
+            logger.info(f"Serving {active_slot}; building {shadow_slot}")
+            
+            if not self.clear_shadow_projection(shadow_slot):
+                return False
+            
+            papers = self.get_papers_with_embeddings()
+            if not papers:
+                logger.error("No papers found with embeddings")
+                return False
+            
+            if self.use_stratified:
+                sampled_papers = self.sample_papers_stratified(papers)
+            else:
+                sampled_papers = self.sample_papers(papers)
+            
+            embeddings, _, _ = self.extract_embeddings_from_papers(sampled_papers)
+            if not embeddings:
+                logger.error("No embeddings extracted for UMAP training")
+                return False
+            
+            model, scaler = self.train_new_umap_model(embeddings)
+            
+            # Versioned model file: the live model stays on disk until the switch
+            model_version = time.strftime('umap_%Y%m%d_%H%M%S')
+            root, ext = os.path.splitext(os.path.abspath(self.model_path))
+            versioned_model_path = f"{root}_{model_version}{ext or '.pkl'}"
+            with open(versioned_model_path, 'wb') as f:
+                pickle.dump((model, scaler), f)
+            logger.info(f"Saved model {model_version} to {versioned_model_path}")
+            
+            projected = self.project_into_slot(model, scaler, shadow_slot)
+            logger.info(f"Projected {projected} papers into {shadow_slot}")
+            
+            with psycopg2.connect(**self.connection_params) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        UPDATE umap_projection_state
+                        SET model_version = %s, model_path = %s, built_at = NOW()
+                        WHERE slot = %s
+                    """, (model_version, versioned_model_path, shadow_slot))
+            
+            if not activate:
+                logger.info(f"Shadow layout ready; preview with /api/papers?projection=candidate")
+                return True
+            
+            # Catch up papers ingested during the rebuild, then switch; the last
+            # stragglers are projected under the projection lock in the same transaction
+            self.project_into_slot(model, scaler, shadow_slot)
+            if not self.activate_projection(shadow_slot, model_version, versioned_model_path, model, scaler):
+                return False
+            
+            logger.info("=" * 60)
+            logger.info("BLUE/GREEN UMAP REBUILD COMPLETED SUCCESSFULLY")
+            logger.info("=" * 60)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error during blue/green UMAP rebuild: {e}")
+            return False
+    
     def run_complete_reset(self) -> bool:
         """
         Run the complete UMAP environment reset process.
@@ -574,6 +892,12 @@ def main():
                        help='Show what would be done without actually doing it')
     parser.add_argument('--stratified', action='store_true',
                        help='Use stratified sampling to ensure representation across sources')
+    parser.add_argument('--blue-green', action='store_true',
+                       help='Project into the shadow slot while the API keeps serving the live layout, then switch')
+    parser.add_argument('--no-activate', action='store_true',
+                       help='With --blue-green: build the shadow layout but do not switch to it')
+    parser.add_argument('--activate-shadow', action='store_true',
+                       help='Switch the API to an already-built shadow layout and exit')
     
     args = parser.parse_args()
     
@@ -589,9 +913,15 @@ def main():
         logger.debug(f"Would sample from {len(papers)} papers with embeddings")
         return
     
-    # Run the reset
     resetter = UMAPEnvironmentReset(args.sample_size, args.model_path, args.stratified)
-    success = resetter.run_complete_reset()
+    
+    if args.activate_shadow:
+        success = resetter.activate_shadow_projection()
+    elif args.blue_green:
+        success = resetter.run_blue_green_rebuild(activate=not args.no_activate)
+    else:
+        # Run the reset
+        success = resetter.run_complete_reset()
     
     if success:
         print("\n✅ UMAP environment reset completed successfully!")
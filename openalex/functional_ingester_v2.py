@@ -18,8 +18,11 @@ from functools import wraps
 sys.path.append(os.path.dirname(__file__))
 # Add the doctrove-api directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'doctrove-api'))
+# Shared ingestion framework (connection pooling / transaction batching)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'doc-ingestor', 'ROOT_SCRIPTS'))
 
 from transformer import transform_openalex_work, should_process_work
+from shared_ingestion_framework import as_pooled_connection_factory, commit_pending, BatchLostError
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -333,6 +336,7 @@ def process_file_with_interceptors(ctx: Dict[str, Any]) -> int:
     logger.info(f"Processing file with interceptors: {file_path}")
     
     ensure_metadata_table_exists(connection_factory)
+    commit_pending(connection_factory)
     
     inserted_count = 0
     total_processed = 0
@@ -340,11 +344,19 @@ def process_file_with_interceptors(ctx: Dict[str, Any]) -> int:
     for transformed_work, original_work in process_jsonl_file(file_path):
         total_processed += 1
         
-        if insert_single_work(connection_factory, transformed_work, original_work):
-            inserted_count += 1
-            
-            if inserted_count % 100 == 0:
-                logger.info(f"Inserted {inserted_count} works (processed {total_processed})")
+        try:
+            if insert_single_work(connection_factory, transformed_work, original_work):
+                inserted_count += 1
+                
+                if inserted_count % 100 == 0:
+                    logger.info(f"Inserted {inserted_count} works (processed {total_processed})")
+        except BatchLostError as e:
+            # Earlier works of the batch were rolled back with this one
+            inserted_count -= e.lost
+            logger.error(f"{e} at work {transformed_work.get('doctrove_source_id', 'unknown')}")
+    
+    # Works only count as inserted once their batch is committed
+    inserted_count -= commit_pending(connection_factory)
     
     logger.info(f"Successfully inserted {inserted_count} works from {file_path}")
     return inserted_count
@@ -356,16 +368,16 @@ def process_file_functional_v2(file_path: Path, config_provider: Callable = None
     if config_provider is None:
         config_provider = get_config_from_module
     
-    connection_factory = create_connection_factory(config_provider)
-    
-    ctx = {
-        'phase': 'file_processing',
-        'file_path': file_path,
-        'connection_factory': connection_factory,
-        'required_keys': ['file_path', 'connection_factory']
-    }
-    
-    result = process_file_with_interceptors(ctx)
+    # One connection for the whole file, committing in batches instead of per work
+    with as_pooled_connection_factory(create_connection_factory(config_provider)) as connection_factory:
+        ctx = {
+            'phase': 'file_processing',
+            'file_path': file_path,
+            'connection_factory': connection_factory,
+            'required_keys': ['file_path', 'connection_factory']
+        }
+        
+        result = process_file_with_interceptors(ctx)
     return result
 
 # ============================================================================
@@ -5,7 +5,8 @@
 # especially after major data changes like bulk deletions or migrations.
 #
 # Indexes rebuilt:
-#   1. IVFFlat vector index (semantic similarity) - CRITICAL, needs extra memory
+#   1. Vector index (semantic similarity) - CRITICAL; rebuilt and re-evaluated by
+#      doctrove-api/index_maintenance.py (run --reindex --force)
 #   2. GIST 2D spatial index (visualization) - CRITICAL for UI
 #   3. GIN authors array index (author search) - Important for filtering
 #   4. BRIN date index (efficient date range queries)
@@ -80,29 +81,20 @@ echo ""
 echo -e "${BLUE}[INFO]${NC} Starting index rebuild..."
 echo ""
 
+# 1. Vector index (largest, most critical): the same path as scheduled maintenance,
+# so the build is recorded and the planner's probes floor is re-measured
+echo "=== Rebuilding vector index (this takes ~20 minutes)..."
+(cd "$(dirname "$0")/../doctrove-api" && python index_maintenance.py run --reindex --force --maintenance-work-mem 1GB)
+
 # Execute rebuild
 PGPASSWORD=$DOC_TROVE_PASSWORD psql -h $DOC_TROVE_HOST -p $DOC_TROVE_PORT -U $DOC_TROVE_USER -d $DOC_TROVE_DB << 'EOF'
 \timing on
 
--- Set higher memory for vector index rebuild
-SET maintenance_work_mem = '1GB';
-
-SHOW maintenance_work_mem;
-
 -- Clean up any leftover concurrent rebuild indexes first
-DROP INDEX IF EXISTS idx_papers_embedding_ivfflat_optimized_ccnew;
 DROP INDEX IF EXISTS idx_doctrove_embedding_2d_ccnew;
 DROP INDEX IF EXISTS idx_papers_authors_ccnew;
 DROP INDEX IF EXISTS idx_papers_date_brin_ccnew;
 
--- 1. Rebuild IVFFlat vector index (largest, most critical)
--- This is the most important index for semantic similarity search
-\echo '=== Rebuilding IVFFlat vector index (this takes ~20 minutes)...'
-REINDEX INDEX idx_papers_embedding_ivfflat_optimized;
-
--- Reset memory for other indexes
-RESET maintenance_work_mem;
-
 -- 2. Rebuild GIST 2D spatial index (used for visualization bounding box queries)
 \echo '=== Rebuilding GIST 2D spatial index...'
 REINDEX INDEX idx_doctrove_embedding_2d;
@@ -1,19 +1,36 @@
 #!/usr/bin/env python3
 """
 Streaming OpenAlex Ingester
-Processes files in batches to avoid loading entire files into memory.
+Production OpenAlex path: streams a gzipped JSONL file, transforms records in
+batches and bulk-inserts papers plus openalex_metadata on one reused connection.
+
+Each batch commits together with a per-file checkpoint (last committed line),
+so a crashed or interrupted run resumes mid-file without re-inserting rows.
 """
 
+import os
 import sys
 import argparse
 import gzip
 import json
 import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Iterator, Tuple
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator, Tuple, Callable
 import logging
 
+from psycopg2.extras import execute_values
+
+# Production OpenAlex transformer and schema live in openalex/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'openalex'))
+
+from transformer import transform_openalex_work, should_process_work
+from functional_ingester_v2 import (
+    create_connection_factory,
+    get_config_from_module,
+    ensure_metadata_table_exists,
+    extract_metadata,
+)
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,14 +38,33 @@ logger = logging.getLogger(__name__)
 # Configuration
 BATCH_SIZE = 10000  # Process 10K records at a time
 MAX_RECORD_SIZE = 500000  # 500KB max per record
+INSERT_PAGE_SIZE = 1000  # Rows per multi-row INSERT statement
+
+CHECKPOINT_TABLE = 'openalex_ingest_checkpoints'
+
+PAPER_COLUMNS = (
+    'doctrove_source', 'doctrove_source_id', 'doctrove_title', 'doctrove_abstract',
+    'doctrove_authors', 'doctrove_primary_date', 'doctrove_links'
+)
 
-def process_openalex_jsonl_file_streaming(file_path: Path) -> Iterator[Dict[str, Any]]:
+METADATA_COLUMNS = (
+    'openalex_type', 'openalex_cited_by_count', 'openalex_publication_year', 'openalex_doi',
+    'openalex_has_fulltext', 'openalex_is_retracted', 'openalex_language',
+    'openalex_concepts_count', 'openalex_referenced_works_count', 'openalex_authors_count',
+    'openalex_locations_count', 'openalex_updated_date', 'openalex_created_date',
+    'openalex_raw_data'
+)
+
+def process_openalex_jsonl_file_streaming(file_path: Path, start_line: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
     """
     Stream gzipped OpenAlex JSONL file without loading into memory.
-    Yields individual records one at a time.
+    Yields (line_number, record) one at a time. Lines up to and including
+    start_line are skipped without being parsed.
     """
     with gzip.open(file_path, 'rt', encoding='utf-8') as f:
         for line_num, line in enumerate(f, 1):
+            if line_num <= start_line:
+                continue
             try:
                 line = line.strip()
                 if not line:
@@ -40,7 +76,7 @@ def process_openalex_jsonl_file_streaming(file_path: Path) -> Iterator[Dict[str,
                     continue
                 
                 work_data = json.loads(line)
-                yield work_data
+                yield line_num, work_data
                     
             except json.JSONDecodeError:
                 logger.warning(f"Invalid JSON on line {line_num}")
@@ -49,128 +85,238 @@ def process_openalex_jsonl_file_streaming(file_path: Path) -> Iterator[Dict[str,
                 logger.error(f"Error processing line {line_num}: {e}")
                 continue
 
-def transform_openalex_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def build_batch_rows(records: List[Dict[str, Any]]) -> Tuple[List[tuple], Dict[str, Dict[str, Any]], int]:
     """
-    Transform an OpenAlex record to our format.
-    Returns None if record should be skipped.
+    Transform raw OpenAlex records into paper insert rows. Pure function.
+
+    Returns:
+        (paper_rows, originals_by_source_id, skipped). Duplicate source ids
+        within the batch keep their first occurrence.
     """
-    try:
-        # Basic validation
-        if not record.get('id') or not record.get('title'):
-            return None
-        
-        # Extract basic fields
-        transformed = {
-            'doctrove_source': 'openalex',
-            'doctrove_source_id': record.get('id', ''),
-            'doctrove_title': record.get('title', ''),
-            'doctrove_abstract': record.get('abstract_inverted_index', ''),
-            'doctrove_authors': extract_authors(record),
-            'doctrove_primary_date': record.get('publication_year', ''),
-            'raw_record': record  # Keep original for metadata
-        }
-        
-        return transformed
-        
-    except Exception as e:
-        logger.error(f"Error transforming record: {e}")
-        return None
+    paper_rows = []
+    originals = {}
+    skipped = 0
+
+    for record in records:
+        try:
+            if not should_process_work(record):
+                skipped += 1
+                continue
+
+            transformed = transform_openalex_work(record)
+            source_id = transformed['doctrove_source_id']
+            if not transformed['doctrove_title'] or source_id in originals:
+                skipped += 1
+                continue
+
+            originals[source_id] = record
+            paper_rows.append(tuple(transformed[column] for column in PAPER_COLUMNS))
+
+        except Exception as e:
+            logger.error(f"Error transforming record: {e}")
+            skipped += 1
+
+    return paper_rows, originals, skipped
+
+def build_metadata_rows(inserted: List[Tuple[str, Any]], originals: Dict[str, Dict[str, Any]]) -> List[tuple]:
+    """Build openalex_metadata rows for the (source_id, paper_id) pairs that were inserted. Pure function."""
+    rows = []
+    for source_id, paper_id in inserted:
+        metadata = extract_metadata(originals[source_id])
+        rows.append((paper_id,) + tuple(metadata[column] for column in METADATA_COLUMNS))
+    return rows
+
+def insert_batch(conn, paper_rows: List[tuple], originals: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Insert papers and their metadata with multi-row INSERT statements.
+    Does not commit. Returns the number of new papers (duplicates are skipped).
+    """
+    if not paper_rows:
+        return 0
+
+    with conn.cursor() as cur:
+        inserted = execute_values(cur, f"""
+            INSERT INTO doctrove_papers ({', '.join(PAPER_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (doctrove_source, doctrove_source_id) DO NOTHING
+            RETURNING doctrove_source_id, doctrove_paper_id
+        """, paper_rows, page_size=INSERT_PAGE_SIZE, fetch=True)
+
+        metadata_rows = build_metadata_rows(inserted, originals)
+        if metadata_rows:
+            execute_values(cur, f"""
+                INSERT INTO openalex_metadata (doctrove_paper_id, {', '.join(METADATA_COLUMNS)})
+                VALUES %s
+                ON CONFLICT (doctrove_paper_id) DO NOTHING
+            """, metadata_rows, page_size=INSERT_PAGE_SIZE)
+
+    return len(inserted)
+
+def ensure_checkpoint_table_exists(conn) -> None:
+    """Ensure the per-file checkpoint table exists."""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                file_path TEXT PRIMARY KEY,
+                last_line BIGINT NOT NULL DEFAULT 0,
+                papers_inserted BIGINT NOT NULL DEFAULT 0,
+                completed BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+    conn.commit()
+
+def get_checkpoint(conn, file_key: str) -> Tuple[int, bool]:
+    """Return (last_committed_line, completed) for a file, (0, False) if never seen."""
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT last_line, completed FROM {CHECKPOINT_TABLE} WHERE file_path = %s", (file_key,))
+        row = cur.fetchone()
+    return (row[0], row[1]) if row else (0, False)
+
+def save_checkpoint(conn, file_key: str, last_line: int, inserted: int, completed: bool = False) -> None:
+    """Record progress for a file. Does not commit, so it lands in the batch's transaction."""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO {CHECKPOINT_TABLE} (file_path, last_line, papers_inserted, completed, updated_at)
+            VALUES (%s, %s, %s, %s, NOW())
+            ON CONFLICT (file_path) DO UPDATE SET
+                last_line = EXCLUDED.last_line,
+                papers_inserted = {CHECKPOINT_TABLE}.papers_inserted + EXCLUDED.papers_inserted,
+                completed = EXCLUDED.completed,
+                updated_at = NOW()
+        """, (file_key, last_line, inserted, completed))
+
+def process_batch(conn, records: List[Dict[str, Any]], file_key: str, last_line: int) -> Dict[str, int]:
+    """
+    Transform and insert a batch of records, then commit it with its checkpoint.
+
+    If the multi-row insert fails (e.g. one malformed record), the batch is
+    retried one record at a time so only the bad records are lost.
+
+    Args:
+        conn: Open database connection (reused across batches)
+        records: List of raw OpenAlex records
+        file_key: Checkpoint key for the file being processed
+        last_line: Line number of the last record in the batch
+
+    Returns:
+        Batch processing results
+    """
+    paper_rows, originals, skipped = build_batch_rows(records)
+    errors = 0
 
-def extract_authors(record: Dict[str, Any]) -> List[str]:
-    """Extract author names from record."""
-    authors = []
     try:
-        authorships = record.get('authorships', [])
-        for authorship in authorships:
-            author = authorship.get('author', {})
-            if author and author.get('display_name'):
-                authors.append(author['display_name'])
+        inserted = insert_batch(conn, paper_rows, originals)
     except Exception as e:
-        logger.warning(f"Error extracting authors: {e}")
-    
-    return authors
-
-def extract_openalex_metadata(record: Dict[str, Any], paper_id: str) -> Dict[str, str]:
-    """Extract metadata from OpenAlex record."""
-    metadata = {
-        'doctrove_paper_id': paper_id,
-        'openalex_type': record.get('type', ''),
-        'openalex_cited_by_count': str(record.get('cited_by_count', 0)),
-        'openalex_publication_year': str(record.get('publication_year', '')),
-        'openalex_doi': record.get('doi', ''),
-        'openalex_has_fulltext': str(record.get('has_fulltext', False)),
-        'openalex_is_retracted': str(record.get('is_retracted', False)),
-        'openalex_language': record.get('language', ''),
-        'openalex_concepts_count': str(len(record.get('concepts', []))),
-        'openalex_authors_count': str(len(record.get('authorships', []))),
-        'openalex_locations_count': str(len(record.get('locations', []))),
-        'openalex_updated_date': record.get('updated_date', ''),
-        'openalex_created_date': record.get('created_date', ''),
-        'openalex_raw_data': json.dumps(record)  # Store raw data as JSON string
+        conn.rollback()
+        logger.warning(f"Bulk insert failed ({e}); retrying batch row by row")
+        inserted = 0
+        for row in paper_rows:
+            try:
+                inserted += insert_batch(conn, [row], originals)
+                conn.commit()
+            except Exception as row_error:
+                conn.rollback()
+                errors += 1
+                logger.error(f"Error inserting work {row[1]}: {row_error}")
+
+    save_checkpoint(conn, file_key, last_line, inserted)
+    conn.commit()
+
+    return {
+        'total': len(records),
+        'processed': inserted,
+        'duplicates': len(paper_rows) - inserted - errors,
+        'skipped': skipped,
+        'errors': errors
     }
-    
-    return metadata
 
-def process_file_in_batches(file_path: Path, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+def process_file_in_batches(file_path: Path, batch_size: int = BATCH_SIZE,
+                            connection_factory: Optional[Callable] = None,
+                            resume: bool = True) -> Dict[str, Any]:
     """
     Process OpenAlex file in batches to avoid memory issues.
     
     Args:
         file_path: Path to the gzipped file
         batch_size: Number of records to process per batch
+        connection_factory: Database connection factory (defaults to config module settings)
+        resume: Continue from the file's checkpoint instead of line 1
         
     Returns:
         Processing results
     """
+    if connection_factory is None:
+        connection_factory = create_connection_factory(get_config_from_module)
+
     start_time = time.time()
+    file_key = str(Path(file_path).resolve())
     total_records = 0
     total_processed = 0
+    total_duplicates = 0
     total_errors = 0
     batch_count = 0
     
     logger.info(f"Starting batch processing of {file_path}")
     logger.info(f"Batch size: {batch_size:,} records")
     
+    ensure_metadata_table_exists(connection_factory)
+    conn = connection_factory()
+
     try:
-        # Stream records instead of loading into memory
-        record_stream = process_openalex_jsonl_file_streaming(file_path)
+        ensure_checkpoint_table_exists(conn)
+        start_line, completed = get_checkpoint(conn, file_key) if resume else (0, False)
+        if completed:
+            logger.info(f"{file_path} already completed according to checkpoint; skipping")
+            return {
+                'total_records': 0, 'processed_records': 0, 'duplicate_count': 0,
+                'error_count': 0, 'batch_count': 0, 'processing_time': 0.0, 'success': True
+            }
+        if start_line:
+            logger.info(f"Resuming {file_path} after line {start_line:,}")
         
         current_batch = []
+        last_line = start_line
         
-        for record in record_stream:
+        def run_batch():
+            nonlocal batch_count, total_records, total_processed, total_duplicates, total_errors
+            batch_count += 1
+            batch_results = process_batch(conn, current_batch, file_key, last_line)
+            total_records += batch_results['total']
+            total_processed += batch_results['processed']
+            total_duplicates += batch_results['duplicates']
+            total_errors += batch_results['errors']
+
+            rate = total_records / max(time.time() - start_time, 1e-6)
+            logger.info(f"Batch {batch_count} completed: {batch_results['processed']} inserted, "
+                        f"{batch_results['duplicates']} duplicates, {batch_results['errors']} errors "
+                        f"(line {last_line:,}, {rate:,.0f} records/sec)")
+
+        # Stream records instead of loading into memory
+        for line_num, record in process_openalex_jsonl_file_streaming(file_path, start_line):
             current_batch.append(record)
+            last_line = line_num
             
             # Process batch when it reaches the size limit
             if len(current_batch) >= batch_size:
-                batch_count += 1
-                logger.info(f"Processing batch {batch_count} ({len(current_batch)} records)")
-                
-                batch_results = process_batch(current_batch)
-                total_records += batch_results['total']
-                total_processed += batch_results['processed']
-                total_errors += batch_results['errors']
+                run_batch()
                 
                 # Clear batch to free memory
                 current_batch = []
                 
-                # Log progress
-                logger.info(f"Batch {batch_count} completed: {batch_results['processed']} processed, {batch_results['errors']} errors")
-        
         # Process remaining records in final batch
         if current_batch:
-            batch_count += 1
-            logger.info(f"Processing final batch {batch_count} ({len(current_batch)} records)")
+            run_batch()
             
-            batch_results = process_batch(current_batch)
-            total_records += batch_results['total']
-            total_processed += batch_results['processed']
-            total_errors += batch_results['errors']
+        save_checkpoint(conn, file_key, last_line, 0, completed=True)
+        conn.commit()
         
         processing_time = time.time() - start_time
         
         results = {
             'total_records': total_records,
             'processed_records': total_processed,
+            'duplicate_count': total_duplicates,
             'error_count': total_errors,
             'batch_count': batch_count,
             'processing_time': processing_time,
@@ -179,7 +325,8 @@ def process_file_in_batches(file_path: Path, batch_size: int = BATCH_SIZE) -> Di
         
         logger.info(f"Batch processing completed successfully:")
         logger.info(f"  Total records: {total_records:,}")
-        logger.info(f"  Processed: {total_processed:,}")
+        logger.info(f"  Inserted: {total_processed:,}")
+        logger.info(f"  Duplicates: {total_duplicates:,}")
         logger.info(f"  Errors: {total_errors:,}")
         logger.info(f"  Batches: {batch_count}")
         logger.info(f"  Time: {processing_time:.1f}s")
@@ -188,59 +335,22 @@ def process_file_in_batches(file_path: Path, batch_size: int = BATCH_SIZE) -> Di
         
     except Exception as e:
         logger.error(f"Error during batch processing: {e}")
+        conn.rollback()
         return {
             'error': str(e),
             'success': False
         }
-
-def process_batch(records: List[Dict[str, Any]]) -> Dict[str, int]:
-    """
-    Process a batch of records.
-    This is where you'd do the actual database insertion.
-    
-    Args:
-        records: List of records to process
-        
-    Returns:
-        Batch processing results
-    """
-    total = len(records)
-    processed = 0
-    errors = 0
-    
-    for record in records:
-        try:
-            # Transform record
-            transformed = transform_openalex_record(record)
-            if transformed is None:
-                errors += 1
-                continue
-            
-            # Here you would:
-            # 1. Insert into doctrove_papers table
-            # 2. Extract and insert metadata
-            # 3. Handle any database errors
-            
-            # For now, just count as processed
-            processed += 1
-            
-        except Exception as e:
-            logger.error(f"Error processing record: {e}")
-            errors += 1
-            continue
-    
-    return {
-        'total': total,
-        'processed': processed,
-        'errors': errors
-    }
+    finally:
+        conn.close()
 
 def main():
     """Main entry point."""
-    parser = argparse.ArgumentParser(description='Streaming OpenAlex file processor')
+    parser = argparse.ArgumentParser(description='Streaming OpenAlex file ingester')
     parser.add_argument('file_path', help='Path to gzipped OpenAlex file')
     parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, 
                        help=f'Batch size (default: {BATCH_SIZE:,})')
+    parser.add_argument('--restart', action='store_true',
+                       help='Ignore the checkpoint and start from the first line')
     
     args = parser.parse_args()
     
@@ -249,21 +359,22 @@ def main():
         print(f"❌ File not found: {file_path}")
         sys.exit(1)
     
-    print(f"🚀 Starting streaming OpenAlex processing: {file_path}")
+    print(f"🚀 Starting streaming OpenAlex ingestion: {file_path}")
     print(f"📦 Batch size: {args.batch_size:,} records")
     print(f"💾 This will NOT load the entire file into memory")
     print()
     
     try:
-        results = process_file_in_batches(file_path, args.batch_size)
+        results = process_file_in_batches(file_path, args.batch_size, resume=not args.restart)
         
         if results['success']:
             print("✅ Processing completed successfully!")
-            print(f"   Records processed: {results['processed_records']:,}")
+            print(f"   Papers inserted: {results['processed_records']:,}")
             print(f"   Total time: {results['processing_time']:.1f}s")
             print(f"   Batches processed: {results['batch_count']}")
         else:
             print(f"❌ Processing failed: {results.get('error', 'Unknown error')}")
+            print(f"   Re-run the same command to resume from the last committed batch")
             sys.exit(1)
             
     except Exception as e:
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming OpenAlex ingester batch and checkpoint helpers.
+"""
+
+import unittest
+import json
+import tempfile
+import gzip
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import streaming_openalex_ingester as ingester
+
+
+def make_work(work_id: str, title: str = 'A Sufficiently Long Title') -> dict:
+    return {
+        'id': f'https://openalex.org/{work_id}',
+        'display_name': title,
+        'type': 'article',
+        'publication_date': '2024-01-15',
+        'authorships': [{'author': {'display_name': 'Author One'}}],
+        'abstract_inverted_index': {'Hello': [0], 'world': [1]},
+    }
+
+
+class TestStreamingOpenAlexIngester(unittest.TestCase):
+    """Test cases for streaming OpenAlex ingester pure functions."""
+
+    def test_build_batch_rows_skips_invalid_and_duplicates(self):
+        """Invalid works and repeated source ids within a batch are skipped."""
+        records = [make_work('W1'), make_work('W1'), make_work('W2', title='abc'), make_work('W3')]
+        paper_rows, originals, skipped = ingester.build_batch_rows(records)
+
+        self.assertEqual([row[1] for row in paper_rows],
+                         ['https://openalex.org/W1', 'https://openalex.org/W3'])
+        self.assertEqual(skipped, 2)
+        self.assertEqual(len(paper_rows[0]), len(ingester.PAPER_COLUMNS))
+        self.assertEqual(paper_rows[0][3], 'Hello world')
+
+    def test_build_metadata_rows_only_for_inserted(self):
+        """Metadata rows are built only for papers returned by the insert."""
+        _, originals, _ = ingester.build_batch_rows([make_work('W1'), make_work('W2')])
+        rows = ingester.build_metadata_rows([('https://openalex.org/W2', 'uuid-2')], originals)
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], 'uuid-2')
+        self.assertEqual(len(rows[0]), len(ingester.METADATA_COLUMNS) + 1)
+
+    def test_streaming_resumes_after_checkpoint_line(self):
+        """Lines up to the checkpoint are skipped."""
+        with tempfile.NamedTemporaryFile(suffix='.gz', delete=False) as tmp:
+            path = Path(tmp.name)
+        try:
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                for i in range(5):
+                    f.write(json.dumps(make_work(f'W{i}')) + '\n')
+
+            lines = [line for line, _ in ingester.process_openalex_jsonl_file_streaming(path, start_line=3)]
+            self.assertEqual(lines, [4, 5])
+        finally:
+            os.unlink(path)
+
+    def test_process_batch_commits_checkpoint(self):
+        """A batch commits once, after its checkpoint has been written."""
+        conn = MagicMock()
+        with patch.object(ingester, 'insert_batch', return_value=2) as mock_insert, \
+             patch.object(ingester, 'save_checkpoint') as mock_checkpoint:
+            results = ingester.process_batch(conn, [make_work('W1'), make_work('W2')], 'file', 42)
+
+        mock_insert.assert_called_once()
+        mock_checkpoint.assert_called_once_with(conn, 'file', 42, 2)
+        conn.commit.assert_called_once()
+        self.assertEqual(results['processed'], 2)
+        self.assertEqual(results['duplicates'], 0)
+
+    def test_process_batch_falls_back_to_single_rows(self):
+        """A failed bulk insert is retried row by row so one bad record is isolated."""
+        conn = MagicMock()
+        calls = []
+
+        def fake_insert(conn, rows, originals):
+            calls.append(len(rows))
+            if len(rows) > 1 or rows[0][1].endswith('W2'):
+                raise ValueError('bad row')
+            return 1
+
+        with patch.object(ingester, 'insert_batch', side_effect=fake_insert), \
+             patch.object(ingester, 'save_checkpoint'):
+            results = ingester.process_batch(conn, [make_work('W1'), make_work('W2')], 'file', 2)
+
+        self.assertEqual(calls, [2, 1, 1])
+        self.assertEqual(results['processed'], 1)
+        self.assertEqual(results['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Ingestion Connection Benchmark
+Compares per-record connections (plain connection_factory) with the shared
+framework's PooledConnectionFactory when inserting papers through
+insert_paper_with_metadata.
+
+Runs in a throwaway `ingest_benchmark` schema (search_path is pinned on every
+connection), so it never touches the real doctrove_papers table. Point it at
+a local Postgres:
+
+    DB_HOST=localhost DB_PORT=5432 DB_NAME=doctrove DB_USER=doctrove_admin DB_PASSWORD=... \\
+        python tests/performance/benchmark_ingestion_connections.py --papers 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'doc-ingestor', 'ROOT_SCRIPTS'))
+
+from shared_ingestion_framework import (
+    PaperRecord,
+    MetadataRecord,
+    CommitPolicy,
+    PooledConnectionFactory,
+    insert_paper_with_metadata,
+)
+
+BENCHMARK_SCHEMA = 'ingest_benchmark'
+
+
+def connect():
+    """Connect with search_path pinned to the benchmark schema."""
+    return psycopg2.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=os.getenv('DB_PORT', '5432'),
+        database=os.getenv('DB_NAME', 'doctrove'),
+        user=os.getenv('DB_USER', 'doctrove_admin'),
+        password=os.getenv('DB_PASSWORD', ''),
+        options=f'-c search_path={BENCHMARK_SCHEMA}',
+    )
+
+
+def reset_schema():
+    conn = connect()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {BENCHMARK_SCHEMA}")
+        cur.execute("""
+            CREATE TABLE doctrove_papers (
+                doctrove_paper_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                doctrove_source TEXT NOT NULL,
+                doctrove_source_id TEXT NOT NULL,
+                doctrove_title TEXT NOT NULL,
+                doctrove_abstract TEXT,
+                doctrove_authors TEXT[],
+                doctrove_primary_date DATE,
+                doctrove_doi TEXT,
+                doctrove_links TEXT,
+                UNIQUE (doctrove_source, doctrove_source_id)
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE bench_metadata (
+                doctrove_paper_id UUID PRIMARY KEY REFERENCES doctrove_papers(doctrove_paper_id),
+                bench_category TEXT
+            )
+        """)
+    conn.commit()
+    conn.close()
+
+
+def drop_schema():
+    conn = connect()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+def make_records(run: str, count: int):
+    for i in range(count):
+        source_id = f'{run}-{i}'
+        paper = PaperRecord(
+            source='bench',
+            source_id=source_id,
+            title=f'Benchmark paper {i}',
+            abstract='Benchmark abstract ' * 20,
+            authors=('Author One', 'Author Two'),
+            primary_date='2024-01-01',
+        )
+        metadata = MetadataRecord(paper_id=source_id, fields={
+            'doctrove_paper_id': source_id,
+            'bench_category': 'cs.AI',
+        })
+        yield paper, metadata
+
+
+def run_inserts(connection_factory, run: str, count: int, duplicate_every: int) -> float:
+    records = list(make_records(run, count))
+    start = time.perf_counter()
+    for i, (paper, metadata) in enumerate(records):
+        insert_paper_with_metadata(connection_factory, paper, metadata, 'bench')
+        if duplicate_every and i % duplicate_every == 0:
+            # Re-insert to exercise the duplicate path (rolled back per record)
+            insert_paper_with_metadata(connection_factory, paper, metadata, 'bench')
+    if isinstance(connection_factory, PooledConnectionFactory):
+        connection_factory.close()
+    return time.perf_counter() - start
+
+
+def count_rows() -> int:
+    conn = connect()
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM doctrove_papers")
+        count = cur.fetchone()[0]
+    conn.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-record vs pooled ingestion connections')
+    parser.add_argument('--papers', type=int, default=2000, help='Papers per run')
+    parser.add_argument('--batch-rows', type=int, default=1000, help='CommitPolicy.max_rows for the pooled run')
+    parser.add_argument('--duplicate-every', type=int, default=50,
+                        help='Re-insert every Nth paper to include duplicate handling (0 = never)')
+    args = parser.parse_args()
+
+    # insert_paper_with_metadata logs every metadata insert at INFO
+    import logging
+    logging.getLogger('shared_ingestion_framework').setLevel(logging.WARNING)
+
+    reset_schema()
+    try:
+        per_record = run_inserts(connect, 'per-record', args.papers, args.duplicate_every)
+        pooled_factory = PooledConnectionFactory(connect, CommitPolicy(max_rows=args.batch_rows))
+        pooled = run_inserts(pooled_factory, 'pooled', args.papers, args.duplicate_every)
+        total = count_rows()
+    finally:
+        drop_schema()
+
+    print(f"Papers per run:        {args.papers:,}")
+    print(f"Per-record connection: {per_record:.2f}s ({args.papers / per_record:,.0f} papers/sec)")
+    print(f"Pooled + batched:      {pooled:.2f}s ({args.papers / pooled:,.0f} papers/sec)")
+    print(f"Speedup:               {per_record / pooled:.1f}x")
+    print(f"Rows inserted:         {total:,} (expected {2 * args.papers:,})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark Harness
+Runs scripted /api scenarios against a synthetic corpus in a local
+Postgres + pgvector (see synthetic_corpus.py), with mock_llm_server standing
+in for the embedding and chat APIs. Nothing touches the production database
+or a live model API.
+
+Scenarios (all parameters derive from the corpus manifest, so a run is
+reproducible):
+
+    bbox_pan         /api/papers over a viewport panned across the map
+    semantic_search  /api/papers?search_text=<topic phrase>
+    universe_filter  /api/papers with a source + country + date sql_filter and a bbox
+    count            /api/papers?limit=1 with filters, dominated by the count query
+    clustering       /api/clusters/compute over panned viewports
+
+By default the API runs in-process through Flask's test client, configured
+through the environment (DOC_TROVE_*, OPENAI_BASE_URL; .env.local is ignored).
+--api-url benchmarks a running server instead; it must already point at the
+benchmark database.
+
+Each run writes a JSON record (git commit, host, corpus, per-scenario latency
+percentiles) to tests/performance/results/ (git-ignored; baselines are per
+machine, taken from a clean tree). --compare exits with status 1
+when a scenario's p95 regressed by more than --threshold against a baseline.
+
+    DOC_TROVE_HOST=localhost DOC_TROVE_USER=postgres DOC_TROVE_PASSWORD=... \\
+        python tests/performance/offline_benchmark.py --papers 20000 --repeat 20
+    python tests/performance/offline_benchmark.py --compare tests/performance/results/<baseline>.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'doctrove-api'))
+
+from mock_llm_server import start_mock_llm_server
+from synthetic_corpus import DEFAULT_DATABASE, REPO_ROOT, CorpusSpec, connection_params, ensure_corpus
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+RESULT_SCHEMA_VERSION = 1
+
+PAPER_FIELDS = 'doctrove_paper_id,doctrove_title,doctrove_source,doctrove_primary_date,doctrove_embedding_2d'
+VIEW_FRACTION = 0.25       # Viewport width as a fraction of the map
+PAN_STEPS = 12             # Viewports per pan path before it repeats
+SCENARIOS = ['bbox_pan', 'semantic_search', 'universe_filter', 'count', 'clustering']
+
+
+def pan_bboxes(extent: Dict[str, float], steps: int = PAN_STEPS) -> List[str]:
+    """Viewports of VIEW_FRACTION of the map, panned diagonally across it."""
+    width = (extent['x_max'] - extent['x_min']) * VIEW_FRACTION
+    height = (extent['y_max'] - extent['y_min']) * VIEW_FRACTION
+    bboxes = []
+    for step in range(steps):
+        t = step / max(steps - 1, 1)
+        x = extent['x_min'] + t * (extent['x_max'] - extent['x_min'] - width)
+        y = extent['y_min'] + t * (extent['y_max'] - extent['y_min'] - height)
+        bboxes.append(f"{x:.4f},{y:.4f},{x + width:.4f},{y + height:.4f}")
+    return bboxes
+
+
+def scenario_requests(name: str, manifest: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """The (path, params) cycle a scenario repeats."""
+    extent = manifest['extent']
+    bboxes = pan_bboxes(extent)
+    full_bbox = f"{extent['x_min']},{extent['y_min']},{extent['x_max']},{extent['y_max']}"
+    if name == 'bbox_pan':
+        return [('/api/papers', {'bbox': bbox, 'limit': 5000, 'fields': PAPER_FIELDS}) for bbox in bboxes]
+    if name == 'semantic_search':
+        return [('/api/papers', {'search_text': topic['phrase'], 'limit': 500, 'similarity_threshold': 0.3,
+                                 'fields': PAPER_FIELDS})
+                for topic in manifest['topics']]
+    if name == 'universe_filter':
+        filters = ["doctrove_source IN ('arxiv','openalex') AND country_uschina = 'China'",
+                   "doctrove_source = 'arxiv' AND doctrove_primary_date >= '2015-01-01'",
+                   "country_uschina = 'United States' AND doctrove_primary_date >= '2020-01-01'"]
+        return [('/api/papers', {'sql_filter': sql_filter, 'bbox': bbox, 'limit': 5000, 'fields': PAPER_FIELDS})
+                for sql_filter in filters for bbox in (full_bbox, bboxes[len(bboxes) // 2])]
+    if name == 'count':
+        filters = [None, "doctrove_source = 'openalex'", "doctrove_primary_date >= '2010-01-01'"]
+        return [('/api/papers', {key: value for key, value in
+                                 {'sql_filter': sql_filter, 'bbox': bbox, 'limit': 1, 'fields': 'doctrove_paper_id'}
+                                 .items() if value is not None})
+                for sql_filter in filters for bbox in (None, full_bbox)]
+    if name == 'clustering':
+        return [('/api/clusters/compute', {'bbox': bbox, 'limit': 5000, 'num_clusters': 30}) for bbox in bboxes]
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def summarize_timings(timings_ms: List[float]) -> Dict[str, Optional[float]]:
+    if not timings_ms:
+        return {key: None for key in ('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'min_ms', 'max_ms')}
+    values = np.asarray(timings_ms)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2), 'p99_ms': round(float(p99), 2),
+            'mean_ms': round(float(values.mean()), 2), 'min_ms': round(float(values.min()), 2),
+            'max_ms': round(float(values.max()), 2)}
+
+
+def in_process_client(database: str, llm_base_url: str) -> Callable[[str, Dict[str, Any]], Tuple[int, Any]]:
+    """Import doctrove-api configured for the benchmark database and the mock LLM server."""
+    params = connection_params(database)
+    os.environ.update({
+        'DOCTROVE_IGNORE_ENV_LOCAL': 'true',
+        'DOC_TROVE_HOST': str(params['host']), 'DOC_TROVE_PORT': str(params['port']),
+        'DOC_TROVE_USER': str(params['user']), 'DOC_TROVE_PASSWORD': str(params['password']),
+        'DOC_TROVE_DB': database,
+        'OPENAI_BASE_URL': llm_base_url, 'OPENAI_API_KEY': 'mock', 'OPENAI_CHAT_MODEL': 'mock',
+        'USE_OPENAI_EMBEDDINGS': 'true', 'USE_OPENAI_LLM': 'true',
+    })
+    import config
+    if config.DB_NAME != database or config.OPENAI_BASE_URL != llm_base_url:
+        raise SystemExit("doctrove-api config was imported before the benchmark environment was set")
+    from api import app
+
+    client = app.test_client()
+
+    def request(path: str, query: Dict[str, Any]) -> Tuple[int, Any]:
+        response = client.get(path, query_string=query)
+        return response.status_code, response.get_json(silent=True)
+
+    return request
+
+
+def http_client(api_url: str) -> Callable[[str, Dict[str, Any]], Tuple[int, Any]]:
+    import requests
+
+    session = requests.Session()
+
+    def request(path: str, query: Dict[str, Any]) -> Tuple[int, Any]:
+        response = session.get(f"{api_url.rstrip('/')}{path}?{urlencode(query)}", timeout=120)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+    return request
+
+
+def run_scenario(request: Callable, name: str, manifest: Dict[str, Any], repeat: int, warmup: int) -> Dict[str, Any]:
+    cycle = scenario_requests(name, manifest)
+    timings, server_ms, rows, errors = [], [], [], []
+    for i in range(warmup + repeat):
+        path, query = cycle[i % len(cycle)]
+        started = time.perf_counter()
+        status, body = request(path, query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if i < warmup:
+            continue
+        if status != 200:
+            errors.append({'status': status, 'params': query,
+                           'error': (body or {}).get('error') if isinstance(body, dict) else None})
+            continue
+        timings.append(elapsed_ms)
+        if isinstance(body, dict):
+            if body.get('execution_time_ms') is not None:
+                server_ms.append(body['execution_time_ms'])
+            if 'results' in body:
+                rows.append(len(body['results']))
+            elif 'annotations' in body:
+                rows.append(len(body['annotations']))
+    result = {'requests': repeat, 'errors': len(errors), **summarize_timings(timings),
+              'server_p50_ms': round(float(np.median(server_ms)), 2) if server_ms else None,
+              'rows_mean': round(float(np.mean(rows)), 1) if rows else None}
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+def git_info() -> Dict[str, Any]:
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {'commit': git('rev-parse', 'HEAD'), 'branch': git('rev-parse', '--abbrev-ref', 'HEAD'),
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def host_info(database: str) -> Dict[str, Any]:
+    import psycopg2
+
+    info = {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+    conn = psycopg2.connect(**connection_params(database))
+    with conn.cursor() as cur:
+        cur.execute("SHOW server_version")
+        info['postgres'] = cur.fetchone()[0]
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cur.fetchone()
+        info['pgvector'] = row[0] if row else None
+    conn.close()
+    return info
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-scenario p50/p95 changes; 'regressed' when p95 grew by more than threshold (a fraction)."""
+    rows = []
+    for name, now in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before or before.get('p95_ms') is None or now.get('p95_ms') is None:
+            continue
+        change = now['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        rows.append({'scenario': name, 'baseline_p50_ms': before['p50_ms'], 'p50_ms': now['p50_ms'],
+                     'baseline_p95_ms': before['p95_ms'], 'p95_ms': now['p95_ms'],
+                     'p95_change': round(change, 3), 'regressed': change > threshold})
+    return rows
+
+
+def write_result(result: Dict[str, Any], output: Optional[str]) -> str:
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (result['git']['commit'] or 'nogit')[:10]
+        output = os.path.join(RESULTS_DIR, f"offline_{commit}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline API benchmarks against a synthetic corpus')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='Benchmark database (must contain "bench")')
+    parser.add_argument('--papers', type=int, default=CorpusSpec.papers, help='Synthetic corpus size')
+    parser.add_argument('--topics', type=int, default=CorpusSpec.topics, help='Topic clusters in the corpus')
+    parser.add_argument('--seed', type=int, default=CorpusSpec.seed, help='Corpus random seed')
+    parser.add_argument('--ann', choices=['ivfflat', 'hnsw', 'none'], default='ivfflat', help='ANN index')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the corpus even if it matches')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated scenarios to run')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per scenario')
+    parser.add_argument('--embedding-latency', type=float, default=0.0, help='Mock LLM server latency (seconds)')
+    parser.add_argument('--api-url', help='Benchmark a running API instead of the in-process app')
+    parser.add_argument('--output', help='Result file (default: tests/performance/results/offline_<commit>_<time>.json)')
+    parser.add_argument('--compare', help='Baseline result file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p95 growth that counts as a regression')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    spec = CorpusSpec(papers=args.papers, topics=args.topics, seed=args.seed)
+    manifest = ensure_corpus(args.database, spec, args.ann, rebuild=args.rebuild)
+    llm_server = start_mock_llm_server(latency=args.embedding_latency)
+    request = http_client(args.api_url) if args.api_url else in_process_client(args.database, llm_server.base_url)
+
+    started = datetime.now()
+    result = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'started_at': started.isoformat(timespec='seconds'),
+        'git': git_info(),
+        'host': host_info(args.database),
+        'corpus': {key: manifest[key] for key in ('database', 'spec', 'ann_index', 'papers', 'papers_with_2d',
+                                                  'extent', 'migrations')},
+        'settings': {'repeat': args.repeat, 'warmup': args.warmup, 'target': args.api_url or 'in-process',
+                     'embedding_latency_s': args.embedding_latency},
+        'scenarios': {},
+    }
+    try:
+        for name in scenarios:
+            logger.info(f"Running {name} ({args.repeat} requests)")
+            result['scenarios'][name] = run_scenario(request, name, manifest, args.repeat, args.warmup)
+    finally:
+        llm_server.shutdown()
+    result['duration_s'] = round((datetime.now() - started).total_seconds(), 1)
+    path = write_result(result, args.output)
+
+    print(f"\n{'scenario':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rows':>8} {'errors':>7}")
+    for name, stats in result['scenarios'].items():
+        def cell(value):
+            return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+        print(f"{name:<16} {cell(stats['p50_ms'])} {cell(stats['p95_ms'])} {cell(stats['p99_ms'])} "
+              f"{stats['rows_mean'] if stats['rows_mean'] is not None else '-':>8} {stats['errors']:>7}")
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, result, args.threshold)
+        print(f"\nAgainst {args.compare} (commit {(baseline.get('git') or {}).get('commit', '?')[:10]}):")
+        for row in rows:
+            flag = '  REGRESSION' if row['regressed'] else ''
+            print(f"{row['scenario']:<16} p95 {row['baseline_p95_ms']:>9.1f} -> {row['p95_ms']:>9.1f} ms "
+                  f"({row['p95_change']:+.0%}){flag}")
+        if any(row['regressed'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Workload Replay Load Generator
+Turns captured /api/papers traffic into a workload file and replays it
+against a running API at a chosen concurrency and rate, reporting latency
+percentiles per request class so index and planner changes can be checked
+against the real traffic mix.
+
+Inputs understood by `extract` (format is detected per file):
+
+    trace     JSON lines written by request_trace (DOCTROVE_TRACE=request,
+              DOCTROVE_TRACE_FILE=...): the exact query string of each request
+    frontend  /tmp/frontend_api_calls.log written by docscope's data service
+    backend   /tmp/backend_sql_queries.log written by older API versions; the
+              bbox is recovered from the SQL parameters, enrichment is not
+
+Request classes (first match wins):
+
+    semantic    search_text given
+    enrichment  enrichment_source/table/field or symbolization_id given
+    filtered    sql_filter given
+    bbox_only   only a bbox
+    unfiltered  none of the above
+
+Replay modes:
+
+    default       closed loop: --concurrency workers send back to back
+    --rate R      open loop at R requests/s; latency is measured from the
+                  scheduled send time, so queueing behind a slow server counts
+    --speed X     open loop at the captured timing, X times faster
+
+    python tests/performance/replay_workload.py extract /tmp/frontend_api_calls.log traces.jsonl -o workload.jsonl
+    python tests/performance/replay_workload.py replay workload.jsonl --api-url http://localhost:5001 \\
+        --concurrency 8 --rate 20 --duration 60 --slo semantic:p95=2000 --slo bbox_only:p99=500
+"""
+
+import argparse
+import ast
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from offline_benchmark import RESULTS_DIR, git_info, summarize_timings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_CLASSES = ('semantic', 'enrichment', 'filtered', 'bbox_only', 'unfiltered')
+ENRICHMENT_PARAMS = ('enrichment_source', 'enrichment_table', 'enrichment_field', 'symbolization_id')
+# Query parameters carried into the workload; anything else in a log is dropped
+REPLAYED_PARAMS = ('bbox', 'sql_filter', 'search_text', 'similarity_threshold', 'limit', 'fields',
+                   'enrichment_source', 'enrichment_table', 'enrichment_field', 'symbolization_id',
+                   'disable_sort', 'sort_by', 'offset', 'projection', 'rerank')
+LOG_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+BBOX_PATTERN = re.compile(r"box\(point\(%s, %s\), point\(%s, %s\)\)")
+TRUNCATED_PATTERN = re.compile(r"\.\.\. <\d+ (chars|items)>$")
+
+
+def classify(params: Dict[str, Any]) -> str:
+    if params.get('search_text'):
+        return 'semantic'
+    if any(params.get(name) for name in ENRICHMENT_PARAMS):
+        return 'enrichment'
+    if params.get('sql_filter'):
+        return 'filtered'
+    if params.get('bbox'):
+        return 'bbox_only'
+    return 'unfiltered'
+
+
+def _clean(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Replayable query parameters as strings, without empty values."""
+    return {name: str(value) for name, value in params.items()
+            if name in REPLAYED_PARAMS and value not in (None, '', 'None')}
+
+
+def _log_time(line: str, marker: str) -> Optional[float]:
+    try:
+        return datetime.strptime(line.split(marker, 1)[1].strip(' =\n'), LOG_TIMESTAMP_FORMAT).timestamp()
+    except (IndexError, ValueError):
+        return None
+
+
+def _blocks(lines: List[str], marker: str) -> Iterator[Tuple[Optional[float], List[str]]]:
+    """(timestamp, body lines) of each '=== <marker> at <time> ===' block."""
+    ts, body = None, None
+    for line in lines:
+        if marker in line and line.startswith('==='):
+            if body is not None:
+                yield ts, body
+            ts, body = _log_time(line, ' at '), []
+        elif body is not None:
+            body.append(line.rstrip('\n'))
+    if body is not None:
+        yield ts, body
+
+
+def _field(body: List[str], name: str) -> Optional[str]:
+    prefix = f"{name}: "
+    for line in body:
+        if line.startswith(prefix):
+            return line[len(prefix):]
+    return None
+
+
+def parse_trace(lines: List[str]) -> Iterator[Tuple[Optional[float], Dict[str, Any]]]:
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event.get('category') != 'request' or event.get('endpoint') not in (None, '/api/papers'):
+            continue
+        args = event.get('args') or {}
+        if any(isinstance(value, str) and TRUNCATED_PATTERN.search(value) for value in args.values()):
+            # The tracer shortened a long parameter: the request cannot be replayed faithfully
+            continue
+        yield event.get('ts'), args
+
+
+def parse_frontend(lines: List[str]) -> Iterator[Tuple[Optional[float], Dict[str, Any]]]:
+    for ts, body in _blocks(lines, 'FRONTEND API CALL'):
+        url = _field(body, 'URL') or ''
+        raw = _field(body, 'Params')
+        if not url.endswith('/papers') or raw is None:
+            continue
+        try:
+            params = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(params, dict):
+            yield ts, params
+
+
+def parse_backend(lines: List[str]) -> Iterator[Tuple[Optional[float], Dict[str, Any]]]:
+    for ts, body in _blocks(lines, 'BACKEND SQL QUERY'):
+        params = {'search_text': _field(body, 'Search text'),
+                  'similarity_threshold': _field(body, 'Similarity threshold'),
+                  'sql_filter': _field(body, 'SQL filter'),
+                  'limit': _field(body, 'Limit')}
+        if params['similarity_threshold'] in ('0.0', '0'):
+            del params['similarity_threshold']
+        # The generated SQL spans the lines up to 'Parameters:'
+        sql_lines, in_sql = [], False
+        for line in body:
+            if line.startswith('Generated SQL:'):
+                in_sql = True
+            elif line.startswith('Parameters:'):
+                break
+            elif in_sql:
+                sql_lines.append(line)
+        sql, raw = '\n'.join(sql_lines), _field(body, 'Parameters')
+        match = BBOX_PATTERN.search(sql)
+        if match and raw:
+            try:
+                values = ast.literal_eval(raw)
+                first = sql[:match.start()].count('%s')
+                params['bbox'] = ','.join(str(value) for value in values[first:first + 4])
+            except (ValueError, SyntaxError, TypeError):
+                pass
+        yield ts, params
+
+
+PARSERS = {'trace': parse_trace, 'frontend': parse_frontend, 'backend': parse_backend}
+
+
+def detect_format(lines: List[str]) -> Optional[str]:
+    for line in lines[:200]:
+        if line.startswith('{'):
+            return 'trace'
+        if 'FRONTEND API CALL' in line:
+            return 'frontend'
+        if 'BACKEND SQL QUERY' in line:
+            return 'backend'
+    return None
+
+
+def extract_workload(paths: List[str], log_format: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Requests from the given logs, ordered by time, with offsets from the first one."""
+    entries = []
+    for path in paths:
+        with open(path, errors='replace') as f:
+            lines = f.readlines()
+        fmt = log_format or detect_format(lines)
+        if fmt is None:
+            logger.warning(f"Skipping {path}: not a recognized log format")
+            continue
+        count = 0
+        for ts, params in PARSERS[fmt](lines):
+            params = _clean(params)
+            entries.append({'ts': ts, 'class': classify(params), 'params': params, 'source': fmt})
+            count += 1
+        logger.info(f"{path}: {count} requests ({fmt})")
+    timed = [entry['ts'] for entry in entries if entry['ts'] is not None]
+    start = min(timed) if timed else 0.0
+    entries.sort(key=lambda entry: entry['ts'] if entry['ts'] is not None else start)
+    for entry in entries:
+        entry['offset_s'] = round((entry.pop('ts') or start) - start, 3)
+    return entries
+
+
+def load_workload(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def schedule(workload: List[Dict[str, Any]], total: int, rate: Optional[float],
+             speed: Optional[float]) -> List[Tuple[Optional[float], Dict[str, Any]]]:
+    """(send time relative to start or None for closed loop, entry) for total requests, cycling the workload."""
+    plan = []
+    span = (workload[-1]['offset_s'] + 1.0) if workload else 0.0
+    for i in range(total):
+        entry = workload[i % len(workload)]
+        if rate:
+            plan.append((i / rate, entry))
+        elif speed:
+            plan.append(((entry['offset_s'] + (i // len(workload)) * span) / speed, entry))
+        else:
+            plan.append((None, entry))
+    return plan
+
+
+def replay(workload: List[Dict[str, Any]], api_url: str, concurrency: int, total: int,
+           rate: Optional[float] = None, speed: Optional[float] = None, timeout: float = 180.0,
+           classes: Optional[List[str]] = None) -> Dict[str, Any]:
+    import requests
+
+    if classes:
+        workload = [entry for entry in workload if entry['class'] in classes]
+    if not workload:
+        raise ValueError("Workload has no requests to replay")
+    plan = schedule(workload, total, rate, speed)
+    url = f"{api_url.rstrip('/')}/api/papers"
+    sessions = threading.local()
+    lock = threading.Lock()
+    latencies, service, errors, lag = defaultdict(list), defaultdict(list), defaultdict(list), []
+
+    def send(item):
+        due, entry = item
+        if due is not None:
+            delay = started + due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        session = getattr(sessions, 'session', None) or requests.Session()
+        sessions.session = session
+        sent = time.perf_counter()
+        try:
+            response = session.get(url, params=entry['params'], timeout=timeout)
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        done = time.perf_counter()
+        with lock:
+            if status != 200:
+                errors[entry['class']].append(status)
+                return
+            # Open loop: waiting for a free worker counts as latency (no coordinated omission)
+            latencies[entry['class']].append((done - (started + due if due is not None else sent)) * 1000)
+            service[entry['class']].append((done - sent) * 1000)
+            if due is not None:
+                lag.append((sent - started - due) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, plan))
+    elapsed = time.perf_counter() - started
+
+    result = {'requests': total, 'duration_s': round(elapsed, 2), 'throughput_rps': round(total / elapsed, 2),
+              'max_send_lag_ms': round(max(lag), 1) if lag else None, 'classes': {}}
+    for name in REQUEST_CLASSES:
+        count = len(latencies[name]) + len(errors[name])
+        if not count:
+            continue
+        stats = summarize_timings(latencies[name])
+        stats['service_p50_ms'] = summarize_timings(service[name])['p50_ms']
+        errors_seen = sorted({str(status) for status in errors[name]})
+        result['classes'][name] = {'requests': count, 'errors': len(errors[name]), 'error_statuses': errors_seen,
+                                   **stats}
+    result['classes']['all'] = {
+        'requests': total, 'errors': sum(len(values) for values in errors.values()),
+        **summarize_timings([value for values in latencies.values() for value in values])}
+    return result
+
+
+def parse_slo(text: str) -> Tuple[str, str, float]:
+    """'semantic:p95=2000' -> ('semantic', 'p95_ms', 2000.0)"""
+    match = re.fullmatch(r"(\w+):(p50|p95|p99)=([\d.]+)", text.strip())
+    if not match or match.group(1) not in REQUEST_CLASSES + ('all',):
+        raise argparse.ArgumentTypeError(f"Invalid SLO '{text}' (expected <class>:p95=<ms>)")
+    return match.group(1), f"{match.group(2)}_ms", float(match.group(3))
+
+
+def check_slos(result: Dict[str, Any], slos: List[Tuple[str, str, float]]) -> List[Dict[str, Any]]:
+    checks = []
+    for request_class, percentile, limit_ms in slos:
+        observed = result['classes'].get(request_class, {}).get(percentile)
+        checks.append({'class': request_class, 'percentile': percentile, 'limit_ms': limit_ms,
+                       'observed_ms': observed, 'met': observed is not None and observed <= limit_ms})
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract and replay /api/papers workloads')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    extract = commands.add_parser('extract', help='Build a workload file from request logs')
+    extract.add_argument('logs', nargs='+', help='Trace JSON lines, frontend or backend request logs')
+    extract.add_argument('-o', '--output', required=True, help='Workload file to write (JSON lines)')
+    extract.add_argument('--format', choices=sorted(PARSERS), help='Log format (default: detect per file)')
+
+    run = commands.add_parser('replay', help='Replay a workload file against a running API')
+    run.add_argument('workload', help='Workload file from extract')
+    run.add_argument('--api-url', default=os.getenv('DOCTROVE_API_URL', 'http://localhost:5001'))
+    run.add_argument('--concurrency', type=int, default=4, help='Concurrent workers')
+    mode = run.add_mutually_exclusive_group()
+    mode.add_argument('--rate', type=float, help='Open loop: requests per second')
+    mode.add_argument('--speed', type=float, help='Open loop: captured timing sped up this many times')
+    size = run.add_mutually_exclusive_group()
+    size.add_argument('--requests', type=int, help='Requests to send (default: the workload once)')
+    size.add_argument('--duration', type=float, help='With --rate: seconds to run')
+    run.add_argument('--classes', help='Comma-separated request classes to replay (default: all)')
+    run.add_argument('--timeout', type=float, default=180.0, help='Per-request timeout (seconds)')
+    run.add_argument('--slo', type=parse_slo, action='append', default=[],
+                     help='Latency objective, e.g. semantic:p95=2000 (repeatable; exit 1 if missed)')
+    run.add_argument('--output', help='Result file (default: tests/performance/results/replay_<commit>_<time>.json)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'extract':
+        entries = extract_workload(args.logs, args.format)
+        with open(args.output, 'w') as f:
+            f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        mix = defaultdict(int)
+        for entry in entries:
+            mix[entry['class']] += 1
+        print(f"Wrote {len(entries)} requests to {args.output}: "
+              + ', '.join(f"{name} {mix[name]}" for name in REQUEST_CLASSES if mix[name]))
+        return
+
+    workload = load_workload(args.workload)
+    if args.duration and not args.rate:
+        parser.error('--duration needs --rate')
+    total = int(args.duration * args.rate) if args.duration else (args.requests or len(workload))
+    classes = [name.strip() for name in args.classes.split(',')] if args.classes else None
+
+    started = datetime.now()
+    result = replay(workload, args.api_url, args.concurrency, total, args.rate, args.speed, args.timeout, classes)
+    result = {'started_at': started.isoformat(timespec='seconds'), 'git': git_info(),
+              'settings': {'workload': os.path.abspath(args.workload), 'api_url': args.api_url,
+                           'concurrency': args.concurrency, 'rate': args.rate, 'speed': args.speed,
+                           'classes': classes},
+              **result, 'slos': check_slos(result, args.slo)}
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (result['git']['commit'] or 'nogit')[:10]
+        output = os.path.join(RESULTS_DIR, f"replay_{commit}_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(f"\n{result['requests']} requests in {result['duration_s']}s ({result['throughput_rps']} req/s)")
+    print(f"{'class':<12} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in result['classes'].items():
+        cells = ''.join(f" {stats[key]:>9.1f}" if stats[key] is not None else f" {'-':>9}"
+                        for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f"{name:<12} {stats['requests']:>9} {stats['errors']:>7}{cells}")
+    for check in result['slos']:
+        observed = '-' if check['observed_ms'] is None else f"{check['observed_ms']:.1f}"
+        print(f"SLO {check['class']} {check['percentile'][:3]} <= {check['limit_ms']:g} ms: "
+              f"{observed} ms {'met' if check['met'] else 'MISSED'}")
+    print(f"Results written to {output}")
+    if not all(check['met'] for check in result['slos']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Synthetic Corpus Generator
+Builds a throwaway DocTrove database for offline benchmarks: N papers in
+clustered topics, each with a 1536-d unit embedding, a 2D point around its
+topic center, a title and abstract drawn from the topic's phrase, and
+arxiv_metadata / openalex_metadata / enrichment_country rows. The base schema
+mirrors production (columns, GiST / btree / ANN indexes and
+mv_papers_sorted_by_year) and every file in database/migrations is applied on
+top, so doctrove-api runs against it unchanged.
+
+A topic's embedding direction is mock_llm_server's embedding of its phrase
+(see TOPIC_PHRASES), so with the mock server standing in for OpenAI a
+semantic search for a phrase lands on that topic's papers.
+
+The same --papers / --topics / --seed always produce the same rows. The target
+database is dropped and recreated; names without "bench" are refused.
+
+    DOC_TROVE_HOST=localhost DOC_TROVE_USER=postgres DOC_TROVE_PASSWORD=... \\
+        python tests/performance/synthetic_corpus.py --papers 100000 --database doctrove_bench
+"""
+
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'doctrove-api'))
+
+from mock_llm_server import EMBEDDING_DIMENSIONS, mock_embedding
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, 'database', 'migrations')
+
+DEFAULT_DATABASE = 'doctrove_bench'
+CHUNK_SIZE = 2000
+
+TOPIC_PHRASES = [
+    'graph neural networks', 'reinforcement learning', 'quantum error correction', 'protein structure prediction',
+    'large language models', 'computer vision', 'climate modeling', 'dark matter detection',
+    'federated learning', 'causal inference', 'speech recognition', 'robotic manipulation',
+    'cryptographic protocols', 'epidemic forecasting', 'materials discovery', 'gravitational waves',
+    'recommender systems', 'differential privacy', 'neural architecture search', 'topological insulators',
+    'autonomous driving', 'single cell genomics', 'supply chain optimization', 'adversarial robustness',
+    'knowledge graphs', 'medical image segmentation', 'battery chemistry', 'exoplanet atmospheres',
+    'time series forecasting', 'wireless networks', 'nuclear deterrence', 'labor economics',
+    'education policy', 'defense acquisition', 'public health surveillance', 'energy markets',
+    'semiconductor supply', 'cyber operations', 'space policy', 'military readiness',
+]
+
+SOURCE_WEIGHTS = {'arxiv': 0.5, 'openalex': 0.4, 'randpub': 0.1}
+COUNTRIES = [('United States', 'US', 'United States'), ('China', 'CN', 'China'),
+             ('United Kingdom', 'GB', 'Rest of the World'), ('Germany', 'DE', 'Rest of the World'),
+             ('Japan', 'JP', 'Rest of the World'), ('India', 'IN', 'Rest of the World')]
+COUNTRY_WEIGHTS = [0.4, 0.25, 0.1, 0.1, 0.08, 0.07]
+OPENALEX_TYPES = ['article', 'preprint', 'book-chapter', 'review']
+FIRST_YEAR, LAST_YEAR = 1995, 2025
+
+BASE_SCHEMA = """
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE doctrove_papers (
+    doctrove_paper_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    doctrove_source TEXT NOT NULL,
+    doctrove_source_id TEXT NOT NULL,
+    doctrove_title TEXT NOT NULL,
+    doctrove_abstract TEXT,
+    doctrove_authors TEXT[],
+    doctrove_primary_date DATE,
+    publication_year INTEGER,
+    doctrove_doi TEXT,
+    doctrove_links TEXT,
+    doctrove_embedding VECTOR(1536),
+    doctrove_embedding_2d POINT,
+    doctrove_embedding_2d_metadata JSONB,
+    embedding_model_version TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    embedding_2d_updated_at TIMESTAMP,
+    UNIQUE (doctrove_source, doctrove_source_id)
+);
+
+CREATE TABLE arxiv_metadata (
+    doctrove_paper_id UUID PRIMARY KEY REFERENCES doctrove_papers(doctrove_paper_id),
+    arxiv_doi TEXT,
+    arxiv_categories TEXT,
+    arxiv_journal_ref TEXT,
+    arxiv_comments TEXT,
+    arxiv_license TEXT,
+    arxiv_update_date TEXT
+);
+
+CREATE TABLE openalex_metadata (
+    doctrove_paper_id UUID PRIMARY KEY REFERENCES doctrove_papers(doctrove_paper_id),
+    openalex_type VARCHAR(50),
+    openalex_cited_by_count INTEGER,
+    openalex_publication_year INTEGER,
+    openalex_doi VARCHAR(500),
+    openalex_has_fulltext BOOLEAN,
+    openalex_is_retracted BOOLEAN,
+    openalex_language VARCHAR(10),
+    openalex_concepts_count INTEGER,
+    openalex_referenced_works_count INTEGER,
+    openalex_authors_count INTEGER,
+    openalex_locations_count INTEGER,
+    openalex_updated_date DATE,
+    openalex_created_date DATE,
+    openalex_raw_data JSONB
+);
+
+CREATE TABLE enrichment_country (
+    doctrove_paper_id UUID PRIMARY KEY REFERENCES doctrove_papers(doctrove_paper_id),
+    institution_name TEXT,
+    institution_country_code TEXT,
+    country_name TEXT,
+    country_uschina TEXT,
+    enrichment_method TEXT,
+    enrichment_confidence TEXT,
+    enrichment_source TEXT
+);
+"""
+
+# Built after the bulk load; names follow production
+INDEXES = [
+    "CREATE INDEX idx_doctrove_embedding_2d ON doctrove_papers USING gist (doctrove_embedding_2d)",
+    "CREATE INDEX idx_papers_source_embedding_date ON doctrove_papers "
+    "(doctrove_source, doctrove_primary_date DESC, doctrove_paper_id) WHERE doctrove_embedding_2d IS NOT NULL",
+    "CREATE INDEX idx_papers_publication_year ON doctrove_papers (publication_year DESC NULLS LAST, doctrove_paper_id)",
+    "CREATE INDEX idx_enrichment_country_uschina ON enrichment_country (country_uschina)",
+]
+
+ANN_INDEXES = {
+    'ivfflat': "CREATE INDEX idx_papers_embedding_ivfflat ON doctrove_papers "
+               "USING ivfflat (doctrove_embedding vector_cosine_ops) WITH (lists = {lists})",
+    'hnsw': "CREATE INDEX idx_papers_embedding_hnsw ON doctrove_papers "
+            "USING hnsw (doctrove_embedding vector_cosine_ops) WITH (m = 8, ef_construction = 64)",
+}
+
+MATERIALIZED_VIEW = """
+CREATE MATERIALIZED VIEW mv_papers_sorted_by_year AS
+SELECT dp.doctrove_paper_id, dp.doctrove_title, dp.doctrove_abstract, dp.doctrove_source,
+       dp.doctrove_primary_date, dp.publication_year, dp.doctrove_embedding_2d, dp.doctrove_doi,
+       dp.doctrove_authors, dp.doctrove_links, dp.created_at, dp.updated_at
+FROM doctrove_papers dp
+ORDER BY dp.publication_year DESC NULLS LAST, dp.doctrove_paper_id ASC;
+CREATE INDEX idx_mv_papers_sorted_embedding_2d ON mv_papers_sorted_by_year USING gist (doctrove_embedding_2d);
+"""
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    papers: int = 20000
+    topics: int = 40
+    seed: int = 42
+    missing_2d: float = 0.05     # Fraction still waiting for embeddings (NULL 1D and 2D)
+    extent: float = 12.0         # Topic centers fall in [-extent, extent]^2
+
+
+@dataclass(frozen=True)
+class Topic:
+    phrase: str
+    center: np.ndarray
+    spread: float
+    direction: np.ndarray
+
+
+def topic_phrase(index: int) -> str:
+    phrase = TOPIC_PHRASES[index % len(TOPIC_PHRASES)]
+    return phrase if index < len(TOPIC_PHRASES) else f"{phrase} {index // len(TOPIC_PHRASES)}"
+
+
+def make_topics(spec: CorpusSpec) -> List[Topic]:
+    rng = np.random.default_rng(spec.seed)
+    return [Topic(phrase=topic_phrase(i),
+                  center=rng.uniform(-spec.extent, spec.extent, size=2),
+                  spread=float(rng.uniform(0.4, 1.5)),
+                  direction=np.asarray(mock_embedding(topic_phrase(i))))
+            for i in range(spec.topics)]
+
+
+def connection_params(database: str) -> Dict[str, object]:
+    """Connection settings from the DOC_TROVE_* variables doctrove-api reads."""
+    return dict(host=os.getenv('DOC_TROVE_HOST', 'localhost'), port=int(os.getenv('DOC_TROVE_PORT', 5432)),
+                user=os.getenv('DOC_TROVE_USER', 'doctrove_admin'), password=os.getenv('DOC_TROVE_PASSWORD', ''),
+                dbname=database)
+
+
+def recreate_database(database: str) -> None:
+    if 'bench' not in database:
+        raise SystemExit(f"Refusing to drop database {database!r}: benchmark database names must contain 'bench'")
+    conn = psycopg2.connect(**connection_params(os.getenv('DOC_TROVE_MAINTENANCE_DB', 'postgres')))
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+        cur.execute(f'CREATE DATABASE "{database}"')
+    conn.close()
+
+
+def generate_chunks(spec: CorpusSpec, topics: List[Topic]) -> Iterator[Dict[str, io.StringIO]]:
+    """COPY text buffers for each table, CHUNK_SIZE papers at a time."""
+    rng = np.random.default_rng(spec.seed + 1)
+    topic_weights = rng.dirichlet(np.full(len(topics), 2.0))
+    sources = list(SOURCE_WEIGHTS)
+    source_weights = np.array(list(SOURCE_WEIGHTS.values())) / sum(SOURCE_WEIGHTS.values())
+    directions = np.stack([topic.direction for topic in topics])
+    centers = np.stack([topic.center for topic in topics])
+    spreads = np.array([topic.spread for topic in topics])
+    vector_format = ','.join(['%.5f'] * EMBEDDING_DIMENSIONS)
+    day_span = (date(LAST_YEAR, 12, 31) - date(FIRST_YEAR, 1, 1)).days
+
+    for start in range(0, spec.papers, CHUNK_SIZE):
+        count = min(CHUNK_SIZE, spec.papers - start)
+        topic_ids = rng.choice(len(topics), size=count, p=topic_weights)
+        source_ids = rng.choice(len(sources), size=count, p=source_weights)
+        points = centers[topic_ids] + rng.normal(size=(count, 2)) * spreads[topic_ids, np.newaxis]
+        # Cosine similarity to the topic direction is about 0.6
+        noise = rng.normal(size=(count, EMBEDDING_DIMENSIONS)) / math.sqrt(EMBEDDING_DIMENSIONS)
+        vectors = 0.6 * directions[topic_ids] + 0.8 * noise
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Skewed towards recent years, like the real corpus
+        days = (day_span * (1 - rng.power(3.0, size=count) ** 0.5)).astype(int)
+        embedded = rng.random(count) >= spec.missing_2d
+        countries = rng.choice(len(COUNTRIES), size=count, p=COUNTRY_WEIGHTS)
+        uuids = [uuid.UUID(bytes=rng.bytes(16), version=4) for _ in range(count)]
+
+        papers, arxiv, openalex, country = io.StringIO(), io.StringIO(), io.StringIO(), io.StringIO()
+        for i in range(count):
+            n = start + i
+            topic = topics[topic_ids[i]]
+            source = sources[source_ids[i]]
+            published = date(LAST_YEAR, 12, 31) - timedelta(days=int(days[i]))
+            words = topic.phrase.split()
+            title = f"{words[0].capitalize()} {' '.join(words[1:])} study {n}"
+            abstract = (f"We study {topic.phrase} with synthetic benchmark data. Paper {n} reports results on "
+                        f"{words[-1]} methods and compares {len(words)} baselines.")
+            doi = f"10.5555/bench.{n}"
+            if embedded[i]:
+                vector = '[' + vector_format % tuple(vectors[i]) + ']'
+                point = f"({points[i, 0]:.6f},{points[i, 1]:.6f})"
+                metadata = '{"algorithm": "synthetic"}'
+            else:
+                vector = point = metadata = '\\N'
+            papers.write('\t'.join([
+                str(uuids[i]), source, f"{source}-{n}", title, abstract,
+                f'{{"Author {n % 997}","Author {(n * 7) % 991}"}}', published.isoformat(), str(published.year),
+                doi, f"https://example.org/{source}/{n}", vector, point, metadata,
+                'text-embedding-3-small' if embedded[i] else '\\N',
+            ]) + '\n')
+            if source == 'arxiv':
+                arxiv.write(f"{uuids[i]}\t{doi}\tcs.{words[0][:2].upper()}\t\\N\t\\N\t"
+                            f"http://arxiv.org/licenses/nonexclusive-distrib/1.0/\t{published.isoformat()}\n")
+            elif source == 'openalex':
+                openalex.write('\t'.join([
+                    str(uuids[i]), OPENALEX_TYPES[n % len(OPENALEX_TYPES)], str(int(rng.integers(0, 500))),
+                    str(published.year), doi, 'true', 'false', 'en', str(n % 30), str(n % 80), str(1 + n % 9),
+                    str(1 + n % 3), published.isoformat(), published.isoformat(), '\\N',
+                ]) + '\n')
+            if source != 'randpub':
+                name, code, uschina = COUNTRIES[countries[i]]
+                country.write(f"{uuids[i]}\tInstitute {n % 211}\t{code}\t{name}\t{uschina}\tsynthetic\thigh\tbench\n")
+        yield {'papers': papers, 'arxiv': arxiv, 'openalex': openalex, 'country': country}
+
+
+COPY_TARGETS = {
+    'papers': "doctrove_papers (doctrove_paper_id, doctrove_source, doctrove_source_id, doctrove_title, "
+              "doctrove_abstract, doctrove_authors, doctrove_primary_date, publication_year, doctrove_doi, "
+              "doctrove_links, doctrove_embedding, doctrove_embedding_2d, doctrove_embedding_2d_metadata, "
+              "embedding_model_version)",
+    'arxiv': "arxiv_metadata (doctrove_paper_id, arxiv_doi, arxiv_categories, arxiv_journal_ref, arxiv_comments, "
+             "arxiv_license, arxiv_update_date)",
+    'openalex': "openalex_metadata (doctrove_paper_id, openalex_type, openalex_cited_by_count, "
+                "openalex_publication_year, openalex_doi, openalex_has_fulltext, openalex_is_retracted, "
+                "openalex_language, openalex_concepts_count, openalex_referenced_works_count, "
+                "openalex_authors_count, openalex_locations_count, openalex_updated_date, "
+                "openalex_created_date, openalex_raw_data)",
+    'country': "enrichment_country (doctrove_paper_id, institution_name, institution_country_code, country_name, "
+               "country_uschina, enrichment_method, enrichment_confidence, enrichment_source)",
+}
+
+
+def load_corpus(conn, spec: CorpusSpec, topics: List[Topic]) -> None:
+    loaded = 0
+    started = time.time()
+    for buffers in generate_chunks(spec, topics):
+        with conn.cursor() as cur:
+            for name, target in COPY_TARGETS.items():
+                buffers[name].seek(0)
+                cur.copy_expert(f"COPY {target} FROM STDIN", buffers[name])
+        conn.commit()
+        loaded = min(loaded + CHUNK_SIZE, spec.papers)
+        logger.info(f"Loaded {loaded:,}/{spec.papers:,} papers ({time.time() - started:.0f}s)")
+
+
+def apply_migrations(database: str) -> List[str]:
+    """Apply database/migrations/*.sql in name order with psql (some use CREATE INDEX CONCURRENTLY)."""
+    params = connection_params(database)
+    env = dict(os.environ, PGPASSWORD=str(params['password']), PGOPTIONS='-c client_min_messages=warning')
+    applied = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not name.endswith('.sql'):
+            continue
+        subprocess.run(['psql', '-q', '-v', 'ON_ERROR_STOP=1', '-h', str(params['host']), '-p', str(params['port']),
+                        '-U', str(params['user']), '-d', database, '-f', os.path.join(MIGRATIONS_DIR, name)],
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+        applied.append(name)
+    return applied
+
+
+def build_corpus(database: str, spec: CorpusSpec, ann: str = 'ivfflat') -> Dict[str, object]:
+    """Recreate database with the synthetic corpus; returns a manifest describing it."""
+    topics = make_topics(spec)
+    recreate_database(database)
+    conn = psycopg2.connect(**connection_params(database))
+    timings = {}
+
+    started = time.time()
+    with conn.cursor() as cur:
+        cur.execute(BASE_SCHEMA)
+    conn.commit()
+    load_corpus(conn, spec, topics)
+    timings['load_s'] = round(time.time() - started, 1)
+
+    started = time.time()
+    with conn.cursor() as cur:
+        for ddl in INDEXES:
+            cur.execute(ddl)
+        if ann != 'none':
+            # pgvector guidance: rows / 1000 lists up to 1M rows
+            cur.execute(ANN_INDEXES[ann].format(lists=max(10, spec.papers // 1000)))
+        cur.execute(MATERIALIZED_VIEW)
+    conn.commit()
+    timings['index_s'] = round(time.time() - started, 1)
+
+    started = time.time()
+    migrations = apply_migrations(database)
+    timings['migrations_s'] = round(time.time() - started, 1)
+
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("VACUUM ANALYZE")
+        cur.execute("SELECT COUNT(*), COUNT(doctrove_embedding_2d) FROM doctrove_papers")
+        total, embedded = cur.fetchone()
+        cur.execute("SELECT MIN(doctrove_embedding_2d[0]), MAX(doctrove_embedding_2d[0]), "
+                    "MIN(doctrove_embedding_2d[1]), MAX(doctrove_embedding_2d[1]) FROM doctrove_papers")
+        x_min, x_max, y_min, y_max = cur.fetchone()
+    conn.close()
+
+    return {
+        'database': database,
+        'spec': spec.__dict__,
+        'ann_index': ann,
+        'papers': total,
+        'papers_with_2d': embedded,
+        'extent': {'x_min': x_min, 'x_max': x_max, 'y_min': y_min, 'y_max': y_max},
+        'topics': [{'phrase': topic.phrase, 'center': topic.center.round(4).tolist(), 'spread': round(topic.spread, 4)}
+                   for topic in topics],
+        'migrations': migrations,
+        'timings': timings,
+    }
+
+
+def read_manifest(database: str) -> Optional[Dict[str, object]]:
+    """Manifest stored by main() in the benchmark database, or None if it was never built."""
+    try:
+        conn = psycopg2.connect(**connection_params(database))
+    except psycopg2.OperationalError:
+        return None
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('bench_manifest')")
+            if cur.fetchone()[0] is None:
+                return None
+            cur.execute("SELECT manifest FROM bench_manifest")
+            row = cur.fetchone()
+            return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def write_manifest(database: str, manifest: Dict[str, object]) -> None:
+    conn = psycopg2.connect(**connection_params(database))
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE IF NOT EXISTS bench_manifest (manifest JSONB NOT NULL)")
+        cur.execute("DELETE FROM bench_manifest")
+        cur.execute("INSERT INTO bench_manifest VALUES (%s)", (json.dumps(manifest),))
+    conn.commit()
+    conn.close()
+
+
+def ensure_corpus(database: str, spec: CorpusSpec, ann: str = 'ivfflat', rebuild: bool = False) -> Dict[str, object]:
+    """Reuse database if it already holds this spec's corpus, otherwise (re)build it."""
+    manifest = None if rebuild else read_manifest(database)
+    if manifest and manifest.get('spec') == spec.__dict__ and manifest.get('ann_index') == ann:
+        logger.info(f"Reusing synthetic corpus in {database} ({manifest['papers']:,} papers)")
+        return manifest
+    manifest = build_corpus(database, spec, ann)
+    write_manifest(database, manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a synthetic DocTrove corpus for offline benchmarks')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='Database to (re)create; must contain "bench"')
+    parser.add_argument('--papers', type=int, default=CorpusSpec.papers, help='Number of papers')
+    parser.add_argument('--topics', type=int, default=CorpusSpec.topics, help='Number of topic clusters')
+    parser.add_argument('--seed', type=int, default=CorpusSpec.seed, help='Random seed')
+    parser.add_argument('--missing-2d', type=float, default=CorpusSpec.missing_2d,
+                        help='Fraction of papers without embeddings')
+    parser.add_argument('--ann', choices=['ivfflat', 'hnsw', 'none'], default='ivfflat', help='ANN index to build')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    spec = CorpusSpec(papers=args.papers, topics=args.topics, seed=args.seed, missing_2d=args.missing_2d)
+    manifest = build_corpus(args.database, spec, args.ann)
+    write_manifest(args.database, manifest)
+    print(json.dumps({key: manifest[key] for key in ('database', 'papers', 'papers_with_2d', 'timings')}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
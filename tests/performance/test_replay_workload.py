@@ -0,0 +1,112 @@
+"""
+Fast unit tests for replay_workload log parsing and scheduling (no database or server required).
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import replay_workload
+
+BACKEND_LOG = """
+=== BACKEND SQL QUERY at 2026-10-18 22:24:45 ===
+Search text: None
+Similarity threshold: 0.0
+SQL filter: doctrove_source = 'arxiv'
+Limit: 5000
+Generated SQL:
+SELECT dp.doctrove_paper_id FROM doctrove_papers dp
+WHERE (doctrove_source = %s) AND dp.doctrove_embedding_2d <@ box(point(%s, %s), point(%s, %s)) LIMIT %s
+Parameters: ['arxiv', -1.5, -2.0, 3.25, 4.0, 5000]
+Warnings: []
+==================================================
+
+=== BACKEND SQL QUERY at 2026-10-18 22:24:47 ===
+Search text: graph neural networks
+Similarity threshold: 0.5
+SQL filter: None
+Limit: 500
+Generated SQL:
+SELECT dp.doctrove_paper_id FROM doctrove_papers dp ORDER BY dp.doctrove_embedding <=> %s::vector LIMIT %s
+Parameters: ['[0.1,0.2]', 500]
+Warnings: []
+==================================================
+"""
+
+FRONTEND_LOG = """
+=== FRONTEND API CALL at 2026-10-18 22:24:40 ===
+URL: http://localhost:5001/api/papers
+Params: {'fields': 'doctrove_paper_id', 'limit': 500, 'bbox': '0,0,1,1', 'enrichment_source': 'openalex', 'enrichment_table': 'enrichment_country', 'enrichment_field': 'country_uschina'}
+Search text: None
+Similarity threshold: None
+SQL filter: None
+==================================================
+"""
+
+
+class TestExtract(unittest.TestCase):
+
+    def write(self, text):
+        f = tempfile.NamedTemporaryFile('w', suffix='.log', delete=False)
+        f.write(text)
+        f.close()
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_logs_merge_in_time_order(self):
+        trace = '\n'.join(json.dumps(event) for event in [
+            {'ts': 1792364700.0, 'endpoint': '/api/papers', 'category': 'request', 'args': {'bbox': '1,2,3,4'}},
+            {'ts': 1792364701.0, 'endpoint': '/api/papers', 'category': 'timing', 'query_ms': 1.0},
+            {'ts': 1792364702.0, 'endpoint': '/api/papers', 'category': 'request',
+             'args': {'sql_filter': 'x' * 500 + '... <900 chars>'}},
+        ])
+        entries = replay_workload.extract_workload([self.write(BACKEND_LOG), self.write(FRONTEND_LOG),
+                                                    self.write(trace)])
+
+        self.assertEqual([entry['source'] for entry in entries], ['frontend', 'backend', 'backend', 'trace'])
+        self.assertEqual([entry['offset_s'] for entry in entries[:3]], [0.0, 5.0, 7.0])
+        enrichment, filtered, semantic, bbox_only = entries
+        self.assertEqual(enrichment['class'], 'enrichment')
+        self.assertEqual(filtered['class'], 'filtered')
+        # The bbox is recovered from the parameters bound after the filter's literal
+        self.assertEqual(filtered['params']['bbox'], '-1.5,-2.0,3.25,4.0')
+        self.assertEqual(semantic['class'], 'semantic')
+        self.assertEqual(semantic['params'], {'search_text': 'graph neural networks',
+                                              'similarity_threshold': '0.5', 'limit': '500'})
+        self.assertEqual(bbox_only['params'], {'bbox': '1,2,3,4'})
+
+    def test_classify(self):
+        self.assertEqual(replay_workload.classify({'search_text': 'x', 'sql_filter': 'y'}), 'semantic')
+        self.assertEqual(replay_workload.classify({'symbolization_id': '3', 'bbox': '0,0,1,1'}), 'enrichment')
+        self.assertEqual(replay_workload.classify({'limit': '10'}), 'unfiltered')
+
+
+class TestSchedule(unittest.TestCase):
+
+    workload = [{'offset_s': 0.0, 'class': 'bbox_only', 'params': {}},
+                {'offset_s': 2.0, 'class': 'semantic', 'params': {}}]
+
+    def test_modes(self):
+        self.assertEqual([due for due, _ in replay_workload.schedule(self.workload, 3, rate=2.0, speed=None)],
+                         [0.0, 0.5, 1.0])
+        # Captured timing, cycling after the last request plus one second
+        self.assertEqual([due for due, _ in replay_workload.schedule(self.workload, 4, rate=None, speed=2.0)],
+                         [0.0, 1.0, 1.5, 2.5])
+        closed = replay_workload.schedule(self.workload, 3, rate=None, speed=None)
+        self.assertEqual([(due, entry['class']) for due, entry in closed],
+                         [(None, 'bbox_only'), (None, 'semantic'), (None, 'bbox_only')])
+
+    def test_slos(self):
+        slos = [replay_workload.parse_slo('semantic:p95=200'), replay_workload.parse_slo('filtered:p99=50')]
+        result = {'classes': {'semantic': {'p95_ms': 150.0}}}
+        self.assertEqual([check['met'] for check in replay_workload.check_slos(result, slos)], [True, False])
+        with self.assertRaises(Exception):
+            replay_workload.parse_slo('bogus:p95=1')
+
+
+if __name__ == '__main__':
+    unittest.main()